@@ -808,36 +808,23 @@ GEHDF5Wrapper::read_sinogram(Array<3, unsigned char>& output,
   if (stride[0] != 1 || stride[1] != 1 || stride[2] != 1)
     error("Only {1,1,1} stride supported. Aborting");
 
+  if (rdf_ver != 9)
+    error("GEHDF5Wrapper::read_sinogram: only RDF version 9 is supported, but this file is RDF version "
+          + std::to_string(rdf_ver));
+
   // We know the size of the DataSpace
   hsize_t str_dimsf[3]{ m_NX_SUB, m_NY_SUB, m_NZ_SUB };
 
-  // get a temporary buffer here,
-  std::vector<unsigned char> aux_buffer(m_NX_SUB * m_NY_SUB * m_NZ_SUB);
+  // The output has the same memory layout as the data in the file (only the sizes of the dimensions
+  // are listed in the opposite order), so we read directly into the output (avoiding a temporary buffer and a copy).
+  const IndexRange3D range(m_NZ_SUB, m_NY_SUB, m_NX_SUB);
+  if (output.get_index_range() != range || !output.is_contiguous())
+    output = Array<3, unsigned char>(range);
 
   m_dataspace.selectHyperslab(H5S_SELECT_SET, str_dimsf, offset.data());
   H5::DataSpace memspace(3, str_dimsf);
-  m_dataset_sptr->read(static_cast<void*>(aux_buffer.data()), H5::PredType::STD_U8LE, memspace, m_dataspace);
-
-  // the data is not in the correct size if its RDF9, so we will need to transpose the output of the data read.
-  if (rdf_ver == 9)
-    {
-      output.resize(IndexRange3D(m_NZ_SUB, m_NY_SUB, m_NX_SUB));
-      // now transpose the output.
-      // AB: todo
-      // todo 1: test
-      for (unsigned int i = 0; i < m_NZ_SUB; ++i)
-        {
-          unsigned int ioffset = i * m_NX_SUB * m_NY_SUB;
-          for (unsigned int j = 0; j < m_NY_SUB; ++j)
-            {
-              unsigned int joffset = j * m_NX_SUB;
-              for (unsigned int k = 0; k < m_NX_SUB; ++k)
-                {
-                  output[i][j][k] = aux_buffer[ioffset + joffset + k];
-                }
-            }
-        }
-    }
+  m_dataset_sptr->read(static_cast<void*>(output.get_full_data_ptr()), H5::PredType::STD_U8LE, memspace, m_dataspace);
+  output.release_full_data_ptr();
 
   return Succeeded::yes;
 }
@@ -24,11 +24,13 @@
 #include "stir/error.h"
 #include "stir/FilePath.h"
 #include "stir/info.h"
+#include "stir/warning.h"
 #include "stir/error.h"
 
 #include <TROOT.h>
 #include <TSystem.h>
 #include <TChain.h>
+#include <algorithm>
 #include <type_traits>
 
 START_NAMESPACE_STIR
@@ -75,6 +77,8 @@ InputStreamFromROOTFile::set_defaults()
   crystal_repeater_z = -1;
   num_virtual_axial_crystals_per_block = 0;
   num_virtual_transaxial_crystals_per_block = 0;
+  num_entries_per_chunk = 10000;
+  prefetch_in_background = false;
 }
 
 void
@@ -94,6 +98,8 @@ InputStreamFromROOTFile::initialise_keymap()
   this->parser.add_key("low energy window (keV)", &this->low_energy_window);
   this->parser.add_key("upper energy window (keV)", &this->up_energy_window);
   this->parser.add_key("read optional ROOT fields", &this->read_optional_root_fields);
+  this->parser.add_key("number of entries per read chunk", &this->num_entries_per_chunk);
+  this->parser.add_key("prefetch in background", &this->prefetch_in_background);
 
   this->parser.add_key("number of crystals X", &this->crystal_repeater_x);
   this->parser.add_key("number of crystals Y", &this->crystal_repeater_y);
@@ -103,6 +109,11 @@ InputStreamFromROOTFile::initialise_keymap()
 bool
 InputStreamFromROOTFile::post_processing()
 {
+  if (this->num_entries_per_chunk < 1)
+    {
+      warning("InputStreamFromROOTFile: number of entries per read chunk has to be at least 1");
+      return true;
+    }
   return false;
 }
 
@@ -124,42 +135,48 @@ InputStreamFromROOTFile::set_up(const std::string& header_path)
       error("InputStreamFromROOTFile: File '%s' is not a ROOT file! (first 4 bytes should say 'root')", filename.c_str());
     }
 
+  if (this->prefetch_in_background)
+    {
+      // ROOT objects will be used from different threads (although never at the same time)
+      ROOT::EnableThreadSafety();
+    }
+
   stream_ptr = new TChain(this->chain_name.c_str());
   stream_ptr->Add(fullfilename.c_str());
   // Turn off all branches
   stream_ptr->SetBranchStatus("*", 0);
 
-  // Branches are turned back on by SetBranchAddress()
-  stream_ptr->SetBranchAddress("time1", &time1, &br_time1);
-  stream_ptr->SetBranchAddress("time2", &time2, &br_time2);
-  stream_ptr->SetBranchAddress("eventID1", &eventID1, &br_eventID1);
-  stream_ptr->SetBranchAddress("eventID2", &eventID2, &br_eventID2);
-  stream_ptr->SetBranchAddress("energy1", &energy1, &br_energy1);
-  stream_ptr->SetBranchAddress("energy2", &energy2, &br_energy2);
-  stream_ptr->SetBranchAddress("comptonPhantom1", &comptonphantom1, &br_comptonPhantom1);
-  stream_ptr->SetBranchAddress("comptonPhantom2", &comptonphantom2, &br_comptonPhantom2);
+  // Branches are turned back on by set_branch_address()
+  set_branch_address("time1", &time1, &br_time1);
+  set_branch_address("time2", &time2, &br_time2);
+  set_branch_address("eventID1", &eventID1, &br_eventID1);
+  set_branch_address("eventID2", &eventID2, &br_eventID2);
+  set_branch_address("energy1", &energy1, &br_energy1);
+  set_branch_address("energy2", &energy2, &br_energy2);
+  set_branch_address("comptonPhantom1", &comptonphantom1, &br_comptonPhantom1);
+  set_branch_address("comptonPhantom2", &comptonphantom2, &br_comptonPhantom2);
 
   if (read_optional_root_fields)
     {
-      stream_ptr->SetBranchAddress("axialPos", &axialPos, &br_axialPos);
-      stream_ptr->SetBranchAddress("globalPosX1", &globalPosX1, &br_globalPosX1);
-      stream_ptr->SetBranchAddress("globalPosX2", &globalPosX2, &br_globalPosX2);
-      stream_ptr->SetBranchAddress("globalPosY1", &globalPosY1, &br_globalPosY1);
-      stream_ptr->SetBranchAddress("globalPosY2", &globalPosY2, &br_globalPosY2);
-      stream_ptr->SetBranchAddress("globalPosZ1", &globalPosZ1, &br_globalPosZ1);
-      stream_ptr->SetBranchAddress("globalPosZ2", &globalPosZ2, &br_globalPosZ2);
-      stream_ptr->SetBranchAddress("rotationAngle", &rotation_angle, &br_rotation_angle);
-      stream_ptr->SetBranchAddress("runID", &runID, &br_runID);
-      stream_ptr->SetBranchAddress("sinogramS", &sinogramS, &br_sinogramS);
-      stream_ptr->SetBranchAddress("sinogramTheta", &sinogramTheta, &br_sinogramTheta);
-      stream_ptr->SetBranchAddress("sourceID1", &sourceID1, &br_sourceID1);
-      stream_ptr->SetBranchAddress("sourceID2", &sourceID2, &br_sourceID2);
-      stream_ptr->SetBranchAddress("sourcePosX1", &sourcePosX1, &br_sourcePosX1);
-      stream_ptr->SetBranchAddress("sourcePosX2", &sourcePosX2, &br_sourcePosX2);
-      stream_ptr->SetBranchAddress("sourcePosY1", &sourcePosY1, &br_sourcePosY1);
-      stream_ptr->SetBranchAddress("sourcePosY2", &sourcePosY2, &br_sourcePosY2);
-      stream_ptr->SetBranchAddress("sourcePosZ1", &sourcePosZ1, &br_sourcePosZ1);
-      stream_ptr->SetBranchAddress("sourcePosZ2", &sourcePosZ2, &br_sourcePosZ2);
+      set_branch_address("axialPos", &axialPos, &br_axialPos);
+      set_branch_address("globalPosX1", &globalPosX1, &br_globalPosX1);
+      set_branch_address("globalPosX2", &globalPosX2, &br_globalPosX2);
+      set_branch_address("globalPosY1", &globalPosY1, &br_globalPosY1);
+      set_branch_address("globalPosY2", &globalPosY2, &br_globalPosY2);
+      set_branch_address("globalPosZ1", &globalPosZ1, &br_globalPosZ1);
+      set_branch_address("globalPosZ2", &globalPosZ2, &br_globalPosZ2);
+      set_branch_address("rotationAngle", &rotation_angle, &br_rotation_angle);
+      set_branch_address("runID", &runID, &br_runID);
+      set_branch_address("sinogramS", &sinogramS, &br_sinogramS);
+      set_branch_address("sinogramTheta", &sinogramTheta, &br_sinogramTheta);
+      set_branch_address("sourceID1", &sourceID1, &br_sourceID1);
+      set_branch_address("sourceID2", &sourceID2, &br_sourceID2);
+      set_branch_address("sourcePosX1", &sourcePosX1, &br_sourcePosX1);
+      set_branch_address("sourcePosX2", &sourcePosX2, &br_sourcePosX2);
+      set_branch_address("sourcePosY1", &sourcePosY1, &br_sourcePosY1);
+      set_branch_address("sourcePosY2", &sourcePosY2, &br_sourcePosY2);
+      set_branch_address("sourcePosZ1", &sourcePosZ1, &br_sourcePosZ1);
+      set_branch_address("sourcePosZ2", &sourcePosZ2, &br_sourcePosZ2);
     }
 
   {
@@ -196,6 +213,122 @@ InputStreamFromROOTFile::set_up(const std::string& header_path)
   return Succeeded::yes;
 }
 
+Succeeded
+InputStreamFromROOTFile::get_next_record(CListRecordROOT& record)
+{
+  BufferedEvent event;
+  bool eof = false;
+
+#ifdef STIR_OPENMP
+#  pragma omp critical(LISTMODEIO)
+#endif
+  {
+    if (buffer_index == buffer.size())
+      fill_buffer();
+    if (buffer_index == buffer.size())
+      eof = true;
+    else
+      {
+        event = buffer[buffer_index++];
+        current_position = event.next_position;
+      }
+  }
+
+  if (eof)
+    return Succeeded::no;
+
+  return record.init_from_data(event.ring1,
+                               event.ring2,
+                               event.crystal1,
+                               event.crystal2,
+                               event.time1,
+                               event.delta_timing_bin,
+                               event.eventID1,
+                               event.eventID2);
+}
+
+void
+InputStreamFromROOTFile::read_chunk(std::vector<BufferedEvent>& events, unsigned long int& position)
+{
+  events.clear();
+  const unsigned long int end_position
+      = std::min(nentries, position + static_cast<unsigned long int>(std::max(this->num_entries_per_chunk, 1)));
+  events.reserve(end_position - position);
+  while (position < end_position)
+    {
+      const Long64_t brentry = stream_ptr->LoadTree(static_cast<Long64_t>(position));
+      position++;
+
+      if (!this->check_brentry_randoms_scatter_energy_conditions(brentry))
+        continue;
+
+      // Get time information
+      GetEntryCheck(br_time1->GetEntry(brentry));
+      GetEntryCheck(br_time2->GetEntry(brentry));
+
+      BufferedEvent event;
+      this->get_rings_and_crystals_for_entry(event.ring1, event.ring2, event.crystal1, event.crystal2, brentry);
+      event.time1 = time1;
+      event.delta_timing_bin = (time2 - time1) * least_significant_clock_bit;
+      event.eventID1 = eventID1;
+      event.eventID2 = eventID2;
+      event.next_position = position;
+      events.push_back(event);
+    }
+}
+
+void
+InputStreamFromROOTFile::fill_buffer()
+{
+  buffer.clear();
+  buffer_index = 0;
+  // loop as all events in a chunk might have been rejected
+  while (buffer.empty())
+    {
+      if (prefetch_future.valid())
+        {
+          // get() rethrows any exception thrown in the background thread
+          prefetch_future.get();
+          std::swap(buffer, prefetch_buffer);
+        }
+      else if (read_position < nentries)
+        read_chunk(buffer, read_position);
+      else
+        return;
+
+      if (this->prefetch_in_background && read_position < nentries)
+        prefetch_future
+            = std::async(std::launch::async, [this]() { this->read_chunk(this->prefetch_buffer, this->read_position); });
+    }
+}
+
+void
+InputStreamFromROOTFile::discard_buffered_events()
+{
+  if (prefetch_future.valid())
+    {
+      try
+        {
+          prefetch_future.get();
+        }
+      catch (...)
+        {
+          // ignore errors for events that will not be used
+        }
+    }
+  buffer.clear();
+  prefetch_buffer.clear();
+  buffer_index = 0;
+  read_position = current_position;
+}
+
+void
+InputStreamFromROOTFile::set_branch_address(const char* name, void* address, TBranch** branch_ptr_ptr)
+{
+  stream_ptr->SetBranchStatus(name, 1);
+  stream_ptr->SetBranchAddress(name, address, branch_ptr_ptr);
+}
+
 bool
 InputStreamFromROOTFile::check_brentry_randoms_scatter_energy_conditions(Long64_t brentry)
 {
@@ -55,87 +55,51 @@ InputStreamFromROOTFileForCylindricalPET(std::string _filename,
 }
 #endif
 
-Succeeded
-InputStreamFromROOTFileForCylindricalPET::get_next_record(CListRecordROOT& record)
+void
+InputStreamFromROOTFileForCylindricalPET::get_rings_and_crystals_for_entry(
+    int& ring1, int& ring2, int& crystal1, int& crystal2, long long int brentry)
 {
-  int ring1, ring2, crystal1, crystal2;
-  double delta_timing_bin;
-  bool eof = false;
-
-#ifdef STIR_OPENMP
-#  pragma omp critical(LISTMODEIO)
-#endif
-  {
-    while (true)
-      {
-        if (current_position == nentries)
-          {
-            eof = true;
-            break;
-          }
-
-        Long64_t brentry = stream_ptr->LoadTree(static_cast<Long64_t>(current_position));
-        current_position++;
-
-        if (!this->check_brentry_randoms_scatter_energy_conditions(brentry))
-          continue;
-
-        // Get time information
-        GetEntryCheck(br_time1->GetEntry(brentry));
-        GetEntryCheck(br_time2->GetEntry(brentry));
+  // Get positional ID information
+  GetEntryCheck(br_crystalID1->GetEntry(brentry));
+  GetEntryCheck(br_crystalID2->GetEntry(brentry));
 
-        // Get positional ID information
-        GetEntryCheck(br_crystalID1->GetEntry(brentry));
-        GetEntryCheck(br_crystalID2->GetEntry(brentry));
+  GetEntryCheck(br_submoduleID1->GetEntry(brentry));
+  GetEntryCheck(br_submoduleID2->GetEntry(brentry));
 
-        GetEntryCheck(br_submoduleID1->GetEntry(brentry));
-        GetEntryCheck(br_submoduleID2->GetEntry(brentry));
+  GetEntryCheck(br_moduleID1->GetEntry(brentry));
+  GetEntryCheck(br_moduleID2->GetEntry(brentry));
 
-        GetEntryCheck(br_moduleID1->GetEntry(brentry));
-        GetEntryCheck(br_moduleID2->GetEntry(brentry));
+  GetEntryCheck(br_rsectorID1->GetEntry(brentry));
+  GetEntryCheck(br_rsectorID2->GetEntry(brentry));
 
-        GetEntryCheck(br_rsectorID1->GetEntry(brentry));
-        GetEntryCheck(br_rsectorID2->GetEntry(brentry));
+  ring1 = static_cast<int>(crystalID1 / crystal_repeater_y)
+          + static_cast<int>(submoduleID1 / submodule_repeater_y) * get_num_axial_crystals_per_block_v()
+          + static_cast<int>(moduleID1 / module_repeater_y) * submodule_repeater_z * get_num_axial_crystals_per_block_v();
 
-        break;
-      }
+  ring2 = static_cast<int>(crystalID2 / crystal_repeater_y)
+          + static_cast<int>(submoduleID2 / submodule_repeater_y) * get_num_axial_crystals_per_block_v()
+          + static_cast<int>(moduleID2 / module_repeater_y) * submodule_repeater_z * get_num_axial_crystals_per_block_v();
 
-    ring1 = static_cast<int>(crystalID1 / crystal_repeater_y)
-            + static_cast<int>(submoduleID1 / submodule_repeater_y) * get_num_axial_crystals_per_block_v()
-            + static_cast<int>(moduleID1 / module_repeater_y) * submodule_repeater_z * get_num_axial_crystals_per_block_v();
+  crystal1 = rsectorID1 * module_repeater_y * submodule_repeater_y * get_num_transaxial_crystals_per_block_v()
+             + (moduleID1 % module_repeater_y) * submodule_repeater_y * get_num_transaxial_crystals_per_block_v()
+             + (submoduleID1 % submodule_repeater_y) * get_num_transaxial_crystals_per_block_v()
+             + (crystalID1 % crystal_repeater_y);
 
-    ring2 = static_cast<int>(crystalID2 / crystal_repeater_y)
-            + static_cast<int>(submoduleID2 / submodule_repeater_y) * get_num_axial_crystals_per_block_v()
-            + static_cast<int>(moduleID2 / module_repeater_y) * submodule_repeater_z * get_num_axial_crystals_per_block_v();
+  crystal2 = rsectorID2 * module_repeater_y * submodule_repeater_y * get_num_transaxial_crystals_per_block_v()
+             + (moduleID2 % module_repeater_y) * submodule_repeater_y * get_num_transaxial_crystals_per_block_v()
+             + (submoduleID2 % submodule_repeater_y) * get_num_transaxial_crystals_per_block_v()
+             + (crystalID2 % crystal_repeater_y);
 
-    crystal1 = rsectorID1 * module_repeater_y * submodule_repeater_y * get_num_transaxial_crystals_per_block_v()
-               + (moduleID1 % module_repeater_y) * submodule_repeater_y * get_num_transaxial_crystals_per_block_v()
-               + (submoduleID1 % submodule_repeater_y) * get_num_transaxial_crystals_per_block_v()
-               + (crystalID1 % crystal_repeater_y);
-
-    crystal2 = rsectorID2 * module_repeater_y * submodule_repeater_y * get_num_transaxial_crystals_per_block_v()
-               + (moduleID2 % module_repeater_y) * submodule_repeater_y * get_num_transaxial_crystals_per_block_v()
-               + (submoduleID2 % submodule_repeater_y) * get_num_transaxial_crystals_per_block_v()
-               + (crystalID2 % crystal_repeater_y);
-
-    // GATE counts crystal ID =0 the most negative. Therefore
-    // ID = 0 should be negative, in Rsector 0 and the mid crystal ID be 0 .
+  // GATE counts crystal ID =0 the most negative. Therefore
+  // ID = 0 should be negative, in Rsector 0 and the mid crystal ID be 0 .
 #ifdef STIR_ROOT_ROTATION_AS_V4
-    crystal1 -= half_block;
-    crystal2 -= half_block;
+  crystal1 -= half_block;
+  crystal2 -= half_block;
 
-    // Add offset
-    crystal1 += offset_dets;
-    crystal2 += offset_dets;
+  // Add offset
+  crystal1 += offset_dets;
+  crystal2 += offset_dets;
 #endif
-
-    delta_timing_bin = (time2 - time1) * least_significant_clock_bit;
-  }
-
-  if (eof)
-    return Succeeded::no;
-
-  return record.init_from_data(ring1, ring2, crystal1, crystal2, time1, delta_timing_bin, eventID1, eventID2);
 }
 
 std::string
@@ -203,14 +167,14 @@ InputStreamFromROOTFileForCylindricalPET::set_up(const std::string& header_path)
       return Succeeded::no;
     }
 
-  stream_ptr->SetBranchAddress("crystalID1", &crystalID1, &br_crystalID1);
-  stream_ptr->SetBranchAddress("crystalID2", &crystalID2, &br_crystalID2);
-  stream_ptr->SetBranchAddress("submoduleID1", &submoduleID1, &br_submoduleID1);
-  stream_ptr->SetBranchAddress("submoduleID2", &submoduleID2, &br_submoduleID2);
-  stream_ptr->SetBranchAddress("moduleID1", &moduleID1, &br_moduleID1);
-  stream_ptr->SetBranchAddress("moduleID2", &moduleID2, &br_moduleID2);
-  stream_ptr->SetBranchAddress("rsectorID1", &rsectorID1, &br_rsectorID1);
-  stream_ptr->SetBranchAddress("rsectorID2", &rsectorID2, &br_rsectorID2);
+  set_branch_address("crystalID1", &crystalID1, &br_crystalID1);
+  set_branch_address("crystalID2", &crystalID2, &br_crystalID2);
+  set_branch_address("submoduleID1", &submoduleID1, &br_submoduleID1);
+  set_branch_address("submoduleID2", &submoduleID2, &br_submoduleID2);
+  set_branch_address("moduleID1", &moduleID1, &br_moduleID1);
+  set_branch_address("moduleID2", &moduleID2, &br_moduleID2);
+  set_branch_address("rsectorID1", &rsectorID1, &br_rsectorID1);
+  set_branch_address("rsectorID2", &rsectorID2, &br_rsectorID2);
 
   nentries = static_cast<unsigned long int>(stream_ptr->GetEntries());
   if (nentries == 0)
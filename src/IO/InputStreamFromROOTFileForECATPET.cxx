@@ -53,70 +53,37 @@ InputStreamFromROOTFileForECATPET(std::string _filename,
 }
 #endif
 
-Succeeded
-InputStreamFromROOTFileForECATPET::get_next_record(CListRecordROOT& record)
+void
+InputStreamFromROOTFileForECATPET::get_rings_and_crystals_for_entry(
+    int& ring1, int& ring2, int& crystal1, int& crystal2, long long int brentry)
 {
+  // Get positional ID information
+  GetEntryCheck(br_crystalID1->GetEntry(brentry));
+  GetEntryCheck(br_crystalID2->GetEntry(brentry));
 
-  int ring1, ring2, crystal1, crystal2;
-  double delta_timing_bin;
-  bool return_no = false;
-
-#ifdef STIR_OPENMP
-#  pragma omp critical(LISTMODEIO)
-#endif
-  {
-    while (true)
-      {
-        if (current_position == nentries)
-          return_no = true;
-
-        Long64_t brentry = stream_ptr->LoadTree(static_cast<Long64_t>(current_position));
-        current_position++;
-
-        if (!this->check_brentry_randoms_scatter_energy_conditions(brentry))
-          continue;
-
-        GetEntryCheck(br_time1->GetEntry(brentry));
-        GetEntryCheck(br_time2->GetEntry(brentry));
+  GetEntryCheck(br_blockID1->GetEntry(brentry));
+  GetEntryCheck(br_blockID2->GetEntry(brentry));
 
-        // Get positional ID information
-        GetEntryCheck(br_crystalID1->GetEntry(brentry));
-        GetEntryCheck(br_crystalID2->GetEntry(brentry));
+  ring1 = static_cast<Int_t>(crystalID1 / crystal_repeater_y)
+          + static_cast<Int_t>(blockID1 / block_repeater_y) * crystal_repeater_z;
 
-        GetEntryCheck(br_blockID1->GetEntry(brentry));
-        GetEntryCheck(br_blockID2->GetEntry(brentry));
+  ring2 = static_cast<Int_t>(crystalID2 / crystal_repeater_y)
+          + static_cast<Int_t>(blockID2 / block_repeater_y) * crystal_repeater_z;
 
-        break;
-      }
+  crystal1 = (blockID1 % block_repeater_y) * get_num_transaxial_crystals_per_block_v() + (crystalID1 % crystal_repeater_y);
 
-    ring1 = static_cast<Int_t>(crystalID1 / crystal_repeater_y)
-            + static_cast<Int_t>(blockID1 / block_repeater_y) * crystal_repeater_z;
+  crystal2 = (blockID2 % block_repeater_y) * get_num_transaxial_crystals_per_block_v() + (crystalID2 % crystal_repeater_y);
 
-    ring2 = static_cast<Int_t>(crystalID2 / crystal_repeater_y)
-            + static_cast<Int_t>(blockID2 / block_repeater_y) * crystal_repeater_z;
-
-    crystal1 = (blockID1 % block_repeater_y) * get_num_transaxial_crystals_per_block_v() + (crystalID1 % crystal_repeater_y);
-
-    crystal2 = (blockID2 % block_repeater_y) * get_num_transaxial_crystals_per_block_v() + (crystalID2 % crystal_repeater_y);
-
-    // GATE counts crystal ID =0 the most negative. Therefore
-    // ID = 0 should be negative, in Rsector 0 and the mid crystal ID be 0 .
+  // GATE counts crystal ID =0 the most negative. Therefore
+  // ID = 0 should be negative, in Rsector 0 and the mid crystal ID be 0 .
 #ifdef STIR_ROOT_ROTATION_AS_V4
-    crystal1 -= half_block;
-    crystal2 -= half_block;
+  crystal1 -= half_block;
+  crystal2 -= half_block;
 
-    // Add offset
-    crystal1 += offset_dets;
-    crystal2 += offset_dets;
+  // Add offset
+  crystal1 += offset_dets;
+  crystal2 += offset_dets;
 #endif
-
-    delta_timing_bin = (time2 - time1) * least_significant_clock_bit;
-  }
-
-  if (return_no)
-    return Succeeded::no;
-
-  return record.init_from_data(ring1, ring2, crystal1, crystal2, time1, delta_timing_bin, eventID1, eventID2);
 }
 
 std::string
@@ -171,10 +138,10 @@ InputStreamFromROOTFileForECATPET::set_up(const std::string& header_path)
       return Succeeded::no;
     }
 
-  stream_ptr->SetBranchAddress("crystalID1", &crystalID1);
-  stream_ptr->SetBranchAddress("crystalID2", &crystalID2);
-  stream_ptr->SetBranchAddress("blockID1", &blockID1);
-  stream_ptr->SetBranchAddress("blockID2", &blockID2);
+  set_branch_address("crystalID1", &crystalID1, &br_crystalID1);
+  set_branch_address("crystalID2", &crystalID2, &br_crystalID2);
+  set_branch_address("blockID1", &blockID1, &br_blockID1);
+  set_branch_address("blockID2", &blockID2, &br_blockID2);
 
   nentries = static_cast<unsigned long int>(stream_ptr->GetEntries());
   if (nentries == 0)
@@ -98,10 +98,16 @@
 #include <fstream>
 #include <iostream>
 #include <numeric>
+#include <sstream>
 #include <string>
+#include <vector>
 // for asctime()
 #include <ctime>
 
+#ifdef STIR_OPENMP
+#  include <omp.h>
+#endif
+
 #include <algorithm>
 using std::min;
 using std::max;
@@ -114,6 +120,10 @@ START_NAMESPACE_STIR
 
 // should be private member, TODO
 static ofstream full_log;
+// log for the processing of one set of related viewgrams.
+// This is thread-local such that views can be processed in parallel.
+// It is appended to full_log at the end of do_process_viewgrams().
+static thread_local std::ostringstream view_log;
 
 // terribly ugly. can be replaced using LORCoordinates stuff (TODO)
 static void
@@ -603,64 +613,87 @@ FBP3DRPReconstruction::do_3D_Reconstruction(VoxelsOnCartesianGrid<float>& image)
   forward_projector_sptr->set_input(estimated_image());
   back_projector_sptr->start_accumulating_in_new_target();
 
+  // find the basic view/segment numbers to process for every segment
+  std::vector<int> segment_nums;
+  std::vector<std::vector<ViewSegmentNumbers>> vs_nums_per_segment;
   for (int seg_num = -max_segment_num_to_process; seg_num <= max_segment_num_to_process; seg_num++)
     {
-
-      // a bool value that will be used to determine if we are starting processing for this segment
-      bool first_view_in_segment = true;
-
-      const int orig_min_axial_pos_num = proj_data_ptr->get_min_axial_pos_num(seg_num);
-      const int orig_max_axial_pos_num = proj_data_ptr->get_max_axial_pos_num(seg_num);
-
+      std::vector<ViewSegmentNumbers> vs_nums;
       for (int view_num = proj_data_ptr->get_min_view_num(); view_num <= proj_data_ptr->get_max_view_num(); ++view_num)
         {
           const ViewSegmentNumbers vs_num(view_num, seg_num);
-          if (!symmetries_sptr->is_basic(vs_num))
-            continue;
+          if (symmetries_sptr->is_basic(vs_num))
+            vs_nums.push_back(vs_num);
+        }
+      // some segment_nums might not have any views because of the symmetries
+      if (vs_nums.empty())
+        continue;
+      segment_nums.push_back(seg_num);
+      vs_nums_per_segment.push_back(vs_nums);
+    }
 
-          const int new_min_axial_pos_num = proj_data_info_with_missing_data_sptr->get_min_axial_pos_num(seg_num);
-          const int new_max_axial_pos_num = proj_data_info_with_missing_data_sptr->get_max_axial_pos_num(seg_num);
+  do_set_up_colsher_filters(segment_nums);
+
+  // Processing in parallel is disabled when displaying after every view.
+  // Views are assigned to threads in a fixed order (schedule(static,1)), such that the sum
+  // of the thread-local images in the back projector is independent of the timing of the threads.
+#if defined(STIR_OPENMP) && !defined(NRFFT)
+  const bool process_in_parallel = display_level <= 2;
+#endif
+  for (std::size_t i = 0; i < segment_nums.size(); ++i)
+    {
+      const int seg_num = segment_nums[i];
+      const std::vector<ViewSegmentNumbers>& vs_nums = vs_nums_per_segment[i];
 
-          if (first_view_in_segment)
-            {
-              full_log << "\n--------------------------------\n";
-              full_log << "PROCESSING SEGMENT  No " << seg_num << endl;
+      const int orig_min_axial_pos_num = proj_data_ptr->get_min_axial_pos_num(seg_num);
+      const int orig_max_axial_pos_num = proj_data_ptr->get_max_axial_pos_num(seg_num);
+      const int new_min_axial_pos_num = proj_data_info_with_missing_data_sptr->get_min_axial_pos_num(seg_num);
+      const int new_max_axial_pos_num = proj_data_info_with_missing_data_sptr->get_max_axial_pos_num(seg_num);
 
-              full_log << "Average delta= " << input_proj_data_info_cyl().get_average_ring_difference(seg_num) << " with span= "
-                       << input_proj_data_info_cyl().get_max_ring_difference(seg_num)
-                              - input_proj_data_info_cyl().get_min_ring_difference(seg_num) + 1
-                       << " and extended axial position numbers: min= " << new_min_axial_pos_num
-                       << " and max= " << new_max_axial_pos_num << endl;
+      full_log << "\n--------------------------------\n";
+      full_log << "PROCESSING SEGMENT  No " << seg_num << endl;
 
-              first_view_in_segment = false;
-            }
+      full_log << "Average delta= " << input_proj_data_info_cyl().get_average_ring_difference(seg_num) << " with span= "
+               << input_proj_data_info_cyl().get_max_ring_difference(seg_num)
+                      - input_proj_data_info_cyl().get_min_ring_difference(seg_num) + 1
+               << " and extended axial position numbers: min= " << new_min_axial_pos_num << " and max= " << new_max_axial_pos_num
+               << endl;
 
-          full_log << "\n*************************************************************";
-          full_log << "\n        Processing view " << vs_num.view_num() << " of segment " << vs_num.segment_num() << endl;
+#if defined(STIR_OPENMP) && !defined(NRFFT)
+#  pragma omp parallel for schedule(static, 1) if (process_in_parallel)
+#endif
+      // note: older versions of openmp need an int as loop
+      for (int j = 0; j < static_cast<int>(vs_nums.size()); ++j)
+        {
+          const ViewSegmentNumbers vs_num = vs_nums[j];
+          view_log << "\n*************************************************************";
+          view_log << "\n        Processing view " << vs_num.view_num() << " of segment " << vs_num.segment_num() << endl;
 
-          full_log << "\n  - Getting related viewgrams" << endl;
+          view_log << "\n  - Getting related viewgrams" << endl;
 
+#ifdef STIR_OPENMP
+          RelatedViewgrams<float> viewgrams;
+#  pragma omp critical(FBP3DRP_get_viewgrams)
+          viewgrams = proj_data_ptr->get_related_viewgrams(vs_num, symmetries_sptr);
+#else
           RelatedViewgrams<float> viewgrams = proj_data_ptr->get_related_viewgrams(vs_num, symmetries_sptr);
+#endif
 
           do_process_viewgrams(
               viewgrams, new_min_axial_pos_num, new_max_axial_pos_num, orig_min_axial_pos_num, orig_max_axial_pos_num);
         }
-      // do some logging etc, but only when this segment had any processing
-      // (some segment_nums might not because of the symmetries)
-      if (!first_view_in_segment)
+      full_log << "\n*************************************************************";
+      full_log << "\nEnd of segment " << seg_num << endl;
+#ifndef PARALLEL
+      if (save_intermediate_files && !_disable_output)
         {
-          full_log << "\n*************************************************************";
-          full_log << "\nEnd of this segment. Current image values:\n"
+          char* file = new char[output_filename_prefix.size() + 20];
+          sprintf(file, "%s_afterseg%d", output_filename_prefix.c_str(), seg_num);
+          back_projector_sptr->get_output(image);
+          full_log << "Current image values:\n"
                    << "Min= " << image.find_min() << " Max = " << image.find_max() << " Sum = " << image.sum() << endl;
-#ifndef PARALLEL
-          if (save_intermediate_files && !_disable_output)
-            {
-              char* file = new char[output_filename_prefix.size() + 20];
-              sprintf(file, "%s_afterseg%d", output_filename_prefix.c_str(), seg_num);
-              back_projector_sptr->get_output(image);
-              do_save_img(file, image);
-              delete[] file;
-            }
+          do_save_img(file, image);
+          delete[] file;
         }
 #endif
     }
@@ -757,7 +790,7 @@ FBP3DRPReconstruction::do_forward_project_view(RelatedViewgrams<float>& viewgram
   // do not forward project if we don't need to...
   if (new_min_axial_pos_num <= orig_min_axial_pos_num - 1)
     {
-      full_log << "  - Forward projection of missing data first from ring No " << new_min_axial_pos_num << " to "
+      view_log << "  - Forward projection of missing data first from ring No " << new_min_axial_pos_num << " to "
                << orig_min_axial_pos_num - 1 << endl;
 
       forward_projector_sptr->forward_project(viewgrams, new_min_axial_pos_num, orig_min_axial_pos_num - 1);
@@ -765,7 +798,7 @@ FBP3DRPReconstruction::do_forward_project_view(RelatedViewgrams<float>& viewgram
 
   if (orig_max_axial_pos_num + 1 <= new_max_axial_pos_num)
     {
-      full_log << "  - Forward projection from ring No " << orig_max_axial_pos_num + 1 << " to " << new_max_axial_pos_num << endl;
+      view_log << "  - Forward projection from ring No " << orig_max_axial_pos_num + 1 << " to " << new_max_axial_pos_num << endl;
 
       forward_projector_sptr->forward_project(viewgrams, orig_max_axial_pos_num + 1, new_max_axial_pos_num);
     }
@@ -791,23 +824,79 @@ FBP3DRPReconstruction::do_forward_project_view(RelatedViewgrams<float>& viewgram
     }
 }
 
+void
+FBP3DRPReconstruction::do_set_up_colsher_filters(const std::vector<int>& segment_nums)
+{
+#ifndef NRFFT
+  colsher_filters = VectorWithOffset<shared_ptr<ColsherFilter>>(proj_data_info_with_missing_data_sptr->get_min_segment_num(),
+                                                                proj_data_info_with_missing_data_sptr->get_max_segment_num());
+  // width is determined by the arc-corrected number of tangential positions
+  const int nprojs = proj_data_info_with_missing_data_sptr->get_num_tangential_poss();
+  const int width = (int)pow(2., ((int)ceil(log((PadS + 1.) * nprojs) / log(2.))));
+  const float theta_max = atan(proj_data_info_with_missing_data_sptr->get_tantheta(Bin(max_segment_num_to_process, 0, 0, 0)));
+
+  // the filters are independent, so we can construct them in parallel
+  std::vector<std::string> filter_logs(segment_nums.size());
+  bool all_succeeded = true;
+#  ifdef STIR_OPENMP
+#    pragma omp parallel for schedule(dynamic)
+#  endif
+  for (int i = 0; i < static_cast<int>(segment_nums.size()); ++i)
+    {
+      const int seg_num = segment_nums[i];
+      // viewgrams will be grown to include the original and the missing data
+      const int nrings = max(proj_data_info_with_missing_data_sptr->get_max_axial_pos_num(seg_num),
+                             proj_data_ptr->get_max_axial_pos_num(seg_num))
+                         - min(proj_data_info_with_missing_data_sptr->get_min_axial_pos_num(seg_num),
+                               proj_data_ptr->get_min_axial_pos_num(seg_num))
+                         + 1;
+      const int height = (int)pow(2., ((int)ceil(log((PadZ + 1.) * nrings) / log(2.))));
+
+      const Bin bin(seg_num, 0, 0, 0);
+      const float theta = static_cast<float>(atan(proj_data_info_with_missing_data_sptr->get_tantheta(bin)));
+      const float sampling_in_s = proj_data_info_with_missing_data_sptr->get_sampling_in_s(bin);
+      const float sampling_in_t = proj_data_info_with_missing_data_sptr->get_sampling_in_t(bin);
+
+      std::ostringstream filter_log;
+      filter_log << "  - Constructing Colsher filter for segment " << seg_num << '\n'
+                 << "Colsher filter theta_max = " << theta_max << " theta = " << theta << " d_a = " << sampling_in_s
+                 << " d_b = " << sampling_in_t << endl;
+      filter_logs[i] = filter_log.str();
+
+      shared_ptr<ColsherFilter> filter_sptr(new ColsherFilter(colsher_filter));
+      if (filter_sptr->set_up(height, width, theta, sampling_in_s, sampling_in_t) != Succeeded::yes)
+        {
+#  ifdef STIR_OPENMP
+#    pragma omp critical(FBP3DRP_colsher_set_up_failed)
+#  endif
+          all_succeeded = false;
+        }
+      colsher_filters[seg_num] = filter_sptr;
+    }
+  for (const std::string& filter_log : filter_logs)
+    full_log << filter_log;
+  if (!all_succeeded)
+    error("Exiting");
+#endif
+}
+
 void
 FBP3DRPReconstruction::do_colsher_filter_view(RelatedViewgrams<float>& viewgrams)
 {
 
   assert(!is_null_ptr(dynamic_pointer_cast<const ProjDataInfoCylindricalArcCorr>(viewgrams.get_proj_data_info_sptr())));
 
+  const int seg_num = viewgrams.get_basic_segment_num();
+
+#ifdef NRFFT
   // TODO make into object member instead of static
   static int prev_seg_num = viewgrams.get_proj_data_info_sptr()->get_min_segment_num() - 1;
-#ifdef NRFFT
   static ColsherFilter colsher_filter(0, 0, 0, 0, 0, 0, 0, 0, 0, 0);
-#endif
-  const int seg_num = viewgrams.get_basic_segment_num();
 
   if (prev_seg_num != seg_num)
     {
       prev_seg_num = seg_num;
-      full_log << "  - Constructing Colsher filter for this segment\n";
+      view_log << "  - Constructing Colsher filter for this segment\n";
       const int nrings = viewgrams.get_num_axial_poss();
       const int nprojs = viewgrams.get_num_tangential_poss();
 
@@ -820,10 +909,9 @@ FBP3DRPReconstruction::do_colsher_filter_view(RelatedViewgrams<float>& viewgrams
 
       const float sampling_in_s = viewgrams.get_proj_data_info_sptr()->get_sampling_in_s(Bin(seg_num, 0, 0, 0));
       const float sampling_in_t = viewgrams.get_proj_data_info_sptr()->get_sampling_in_t(Bin(seg_num, 0, 0, 0));
-      full_log << "Colsher filter theta_max = " << theta_max << " theta = " << theta << " d_a = " << sampling_in_s
+      view_log << "Colsher filter theta_max = " << theta_max << " theta = " << theta << " d_a = " << sampling_in_s
                << " d_b = " << sampling_in_t << endl;
 
-#ifdef NRFFT
       colsher_filter = ColsherFilter(height,
                                      width,
                                      _PI / 2 - theta,
@@ -834,13 +922,15 @@ FBP3DRPReconstruction::do_colsher_filter_view(RelatedViewgrams<float>& viewgrams
                                      fc_colsher_axial,
                                      alpha_colsher_planar,
                                      fc_colsher_planar);
+    }
 #else
-        if (colsher_filter.set_up(height, width, theta, sampling_in_s, sampling_in_t) != Succeeded::yes)
-          error("Exiting");
+  if (seg_num < colsher_filters.get_min_index() || seg_num > colsher_filters.get_max_index()
+      || is_null_ptr(colsher_filters[seg_num]))
+    error("FBP3DRP: Colsher filter for segment %d has not been set-up", seg_num);
+  const ColsherFilter& colsher_filter = *colsher_filters[seg_num];
 #endif
-    }
 
-  full_log << "  - Apply Colsher filter to complete oblique sinograms" << endl;
+  view_log << "  - Apply Colsher filter to complete oblique sinograms" << endl;
 #ifdef NRFFT
 
   assert(viewgrams.get_num_viewgrams() % 2 == 0);
@@ -852,12 +942,12 @@ FBP3DRPReconstruction::do_colsher_filter_view(RelatedViewgrams<float>& viewgrams
 
 #else
 
-    //  do not use std::for_each. at present on gcc it copies the filter for every viewgram
-    //  std::for_each(viewgrams.begin(), viewgrams.end(),
-    //		colsher_filter);
-    RelatedViewgrams<float>::iterator viewgram_iter = viewgrams.begin();
-    for (; viewgram_iter != viewgrams.end(); ++viewgram_iter)
-      colsher_filter(*viewgram_iter);
+  //  do not use std::for_each. at present on gcc it copies the filter for every viewgram
+  //  std::for_each(viewgrams.begin(), viewgrams.end(),
+  //		colsher_filter);
+  RelatedViewgrams<float>::iterator viewgram_iter = viewgrams.begin();
+  for (; viewgram_iter != viewgrams.end(); ++viewgram_iter)
+    colsher_filter(*viewgram_iter);
 
 #endif
   /* If the segment is really an amalgam of different ring differences,
@@ -871,7 +961,7 @@ FBP3DRPReconstruction::do_colsher_filter_view(RelatedViewgrams<float>& viewgrams
   {
     const int num_ring_differences = input_proj_data_info_cyl().get_max_ring_difference(seg_num)
                                      - input_proj_data_info_cyl().get_min_ring_difference(seg_num) + 1;
-    full_log << "  - Multiplying filtered projections by " << num_ring_differences << endl;
+    view_log << "  - Multiplying filtered projections by " << num_ring_differences << endl;
     if (num_ring_differences != 1)
       {
         viewgrams *= static_cast<float>(num_ring_differences);
@@ -888,7 +978,7 @@ FBP3DRPReconstruction::do_3D_backprojection_view(const RelatedViewgrams<float>&
                                                  int new_min_axial_pos_num,
                                                  int new_max_axial_pos_num)
 {
-  full_log << "  - Backproject the filtered Colsher complete sinograms" << endl;
+  view_log << "  - Backproject the filtered Colsher complete sinograms" << endl;
 
   back_projector_sptr->back_project(viewgrams, new_min_axial_pos_num, new_max_axial_pos_num);
 }
@@ -918,11 +1008,14 @@ FBP3DRPReconstruction::do_log_file(const VoxelsOnCartesianGrid<float>& image)
   logfile << "\n\n TIMING RESULTS :\n"
           << "Total CPU time : " << get_CPU_timer_value() << '\n'
           << "forward projection CPU time : " << forward_projector_sptr->get_CPU_timer_value() << '\n'
-          << "back projection CPU time : " << back_projector_sptr->get_CPU_timer_value() << '\n'
+          << "back projection CPU time : " << back_projector_sptr->get_CPU_timer_value() << '\n';
 #  ifndef NRFFT
-          << "Colsher filter set-up CPU time : " << colsher_filter.get_CPU_timer_value() << '\n'
+  double colsher_filter_CPU_time = 0.;
+  for (int seg_num = colsher_filters.get_min_index(); seg_num <= colsher_filters.get_max_index(); ++seg_num)
+    if (!is_null_ptr(colsher_filters[seg_num]))
+      colsher_filter_CPU_time += colsher_filters[seg_num]->get_CPU_timer_value();
+  logfile << "Colsher filter set-up CPU time : " << colsher_filter_CPU_time << '\n';
 #  endif
-      ;
 #endif
 }
 
@@ -959,6 +1052,12 @@ FBP3DRPReconstruction::do_process_viewgrams(RelatedViewgrams<float>& viewgrams,
     }
 
   do_3D_backprojection_view(viewgrams, new_min_axial_pos_num, new_max_axial_pos_num);
+
+#ifdef STIR_OPENMP
+#  pragma omp critical(FBP3DRP_full_log)
+#endif
+  full_log << view_log.str();
+  view_log.str("");
 }
 
 END_NAMESPACE_STIR
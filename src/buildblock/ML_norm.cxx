@@ -585,16 +585,18 @@ GeoData3D::get_max_rb(const int ra) const
   return (*this)[ra][(*this)[ra].get_min_index()].get_max_index();
 }
 
+// next 2 functions use the index ranges as set in the constructor (and operator>>),
+// which is faster than finding them from the array
 int
 GeoData3D::get_min_b(const int a) const
 {
-  return (*this)[get_min_index()][a][(*this)[get_min_index()][a].get_min_index()].get_min_index();
+  return a;
 }
 
 int
 GeoData3D::get_max_b(const int a) const
 {
-  return (*this)[get_min_index()][a][(*this)[get_min_index()][a].get_min_index()].get_max_index();
+  return a + num_detectors_per_ring - 1;
 }
 
 float
@@ -847,22 +849,24 @@ FanProjData::get_min_rb(const int ra) const
   // return (*this)[ra][(*this)[ra].get_min_index()].get_min_index();
 }
 
+// next 3 functions use the index ranges as set in the constructor (and operator>>),
+// which is faster than finding them from the array
 int
 FanProjData::get_max_rb(const int ra) const
 {
-  return (*this)[ra][(*this)[ra].get_min_index()].get_max_index();
+  return min(ra + max_ring_diff, num_rings - 1);
 }
 
 int
 FanProjData::get_min_b(const int a) const
 {
-  return (*this)[get_min_index()][a][(*this)[get_min_index()][a].get_min_index()].get_min_index();
+  return a + num_detectors_per_ring / 2 - half_fan_size;
 }
 
 int
 FanProjData::get_max_b(const int a) const
 {
-  return (*this)[get_min_index()][a][(*this)[get_min_index()][a].get_min_index()].get_max_index();
+  return a + num_detectors_per_ring / 2 + half_fan_size;
 }
 
 float
@@ -1048,9 +1052,48 @@ set_det_pair_data(ProjData& proj_data, const DetPairData& det_pair_data, const i
     }
 }
 
+//! Helper class to convert detector pairs with gaps (as in proj_data) to detector pairs without gaps (as in fan_data)
+class FanDataGapRemover
+{
+public:
+  explicit FanDataGapRemover(const Scanner& scanner)
+      : num_transaxial_crystals_per_block(scanner.get_num_transaxial_crystals_per_block()),
+        num_axial_crystals_per_block(scanner.get_num_axial_crystals_per_block()),
+        num_virtual_transaxial_crystals_per_block(scanner.get_num_virtual_transaxial_crystals_per_block()),
+        num_virtual_axial_crystals_per_block(scanner.get_num_virtual_axial_crystals_per_block())
+  {}
+
+  //! Converts the detector pair to fan_data indices, returns \c false if one of the detectors is in a gap
+  bool remove_gaps(int& new_ra, int& new_a, int& new_rb, int& new_b, const int ra, const int a, const int rb, const int b) const
+  {
+    if (a % num_transaxial_crystals_per_block >= num_transaxial_crystals_per_block - num_virtual_transaxial_crystals_per_block)
+      return false;
+    if (ra % num_axial_crystals_per_block >= num_axial_crystals_per_block - num_virtual_axial_crystals_per_block)
+      return false;
+    if (b % num_transaxial_crystals_per_block >= num_transaxial_crystals_per_block - num_virtual_transaxial_crystals_per_block)
+      return false;
+    if (rb % num_axial_crystals_per_block >= num_axial_crystals_per_block - num_virtual_axial_crystals_per_block)
+      return false;
+    new_a = a - (a / num_transaxial_crystals_per_block) * num_virtual_transaxial_crystals_per_block;
+    new_ra = ra - (ra / num_axial_crystals_per_block) * num_virtual_axial_crystals_per_block;
+    new_b = b - (b / num_transaxial_crystals_per_block) * num_virtual_transaxial_crystals_per_block;
+    new_rb = rb - (rb / num_axial_crystals_per_block) * num_virtual_axial_crystals_per_block;
+    return true;
+  }
+
+private:
+  const int num_transaxial_crystals_per_block;
+  const int num_axial_crystals_per_block;
+  const int num_virtual_transaxial_crystals_per_block;
+  const int num_virtual_axial_crystals_per_block;
+};
+
 /// **** This function make fan_data from projecion file while removing the intermodule gaps **** ////
 /// *** fan_data doesn't have gaps, proj_data has gaps *** ///
-template <class TProjDataInfo>
+/* \c get_segment(segment_num) has to return the SegmentBySinogram with the data (or something that
+   can be converted to it).
+*/
+template <class TProjDataInfo, class GetSegment>
 static void
 make_fan_data_remove_gaps_help(FanProjData& fan_data,
                                int num_rings,
@@ -1058,9 +1101,9 @@ make_fan_data_remove_gaps_help(FanProjData& fan_data,
                                int max_delta,
                                int fan_size,
                                const TProjDataInfo& proj_data_info,
-                               const ProjData& proj_data)
+                               GetSegment get_segment)
 {
-  if (proj_data.get_proj_data_info_sptr()->is_tof_data())
+  if (proj_data_info.is_tof_data())
     error("make_fan_data: Incompatible with TOF data. Abort.");
 
   const int half_fan_size = fan_size / 2;
@@ -1074,11 +1117,6 @@ make_fan_data_remove_gaps_help(FanProjData& fan_data,
   const int num_transaxial_crystals_per_block = proj_data_info.get_scanner_sptr()->get_num_transaxial_crystals_per_block();
   const int num_axial_crystals_per_block = proj_data_info.get_scanner_sptr()->get_num_axial_crystals_per_block();
 
-  const int num_physical_transaxial_crystals_per_block
-      = num_transaxial_crystals_per_block - num_virtual_transaxial_crystals_per_block;
-
-  const int num_physical_axial_crystals_per_block = num_axial_crystals_per_block - num_virtual_axial_crystals_per_block;
-
   const int num_transaxial_blocks_in_fansize = fan_size / (num_transaxial_crystals_per_block);
   const int new_fan_size = fan_size - num_transaxial_blocks_in_fansize * num_virtual_transaxial_crystals_per_block;
   const int new_half_fan_size = new_fan_size / 2;
@@ -1089,47 +1127,33 @@ make_fan_data_remove_gaps_help(FanProjData& fan_data,
   const int num_physical_rings = num_rings - (num_axial_blocks - 1) * num_virtual_axial_crystals_per_block;
   fan_data = FanProjData(num_physical_rings, num_physical_detectors_per_ring, new_max_delta, 2 * new_half_fan_size + 1);
 
-  shared_ptr<SegmentBySinogram<float>> segment_ptr;
-  Bin bin;
+  const FanDataGapRemover gap_remover(*proj_data_info.get_scanner_sptr());
 
-  for (bin.segment_num() = proj_data.get_min_segment_num(); bin.segment_num() <= proj_data.get_max_segment_num();
-       ++bin.segment_num())
+  for (int segment_num = proj_data_info.get_min_segment_num(); segment_num <= proj_data_info.get_max_segment_num(); ++segment_num)
     {
-      segment_ptr.reset(new SegmentBySinogram<float>(proj_data.get_segment_by_sinogram(bin.segment_num())));
+      const SegmentBySinogram<float> segment(get_segment(segment_num));
 
-      for (bin.axial_pos_num() = proj_data.get_min_axial_pos_num(bin.segment_num());
-           bin.axial_pos_num() <= proj_data.get_max_axial_pos_num(bin.segment_num());
-           ++bin.axial_pos_num())
-        for (bin.view_num() = 0; bin.view_num() < num_detectors_per_ring / 2; bin.view_num()++)
-          for (bin.tangential_pos_num() = -half_fan_size; bin.tangential_pos_num() <= half_fan_size; ++bin.tangential_pos_num())
+      // every bin in a segment corresponds to different fan_data elements, so we can parallelise over axial positions
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
+      for (int axial_pos_num = proj_data_info.get_min_axial_pos_num(segment_num);
+           axial_pos_num <= proj_data_info.get_max_axial_pos_num(segment_num);
+           ++axial_pos_num)
+        for (int view_num = 0; view_num < num_detectors_per_ring / 2; view_num++)
+          for (int tangential_pos_num = -half_fan_size; tangential_pos_num <= half_fan_size; ++tangential_pos_num)
             {
+              const Bin bin(segment_num, view_num, axial_pos_num, tangential_pos_num);
               int ra = 0, a = 0;
               int rb = 0, b = 0;
-
               proj_data_info.get_det_pair_for_bin(a, ra, b, rb, bin);
-              int a_in_block = a % num_transaxial_crystals_per_block;
-
-              if (a_in_block >= num_physical_transaxial_crystals_per_block)
-                continue;
-              int new_a = a - (a / num_transaxial_crystals_per_block) * num_virtual_transaxial_crystals_per_block;
-
-              int ra_in_block = ra % num_axial_crystals_per_block;
-              if (ra_in_block >= num_physical_axial_crystals_per_block)
-                continue;
-              int new_ra = ra - (ra / num_axial_crystals_per_block) * num_virtual_axial_crystals_per_block;
-
-              int b_in_block = b % num_transaxial_crystals_per_block;
-              if (b_in_block >= num_physical_transaxial_crystals_per_block)
-                continue;
-              int new_b = b - (b / num_transaxial_crystals_per_block) * num_virtual_transaxial_crystals_per_block;
 
-              int rb_in_block = rb % num_axial_crystals_per_block;
-              if (rb_in_block >= num_physical_axial_crystals_per_block)
+              int new_ra, new_a, new_rb, new_b;
+              if (!gap_remover.remove_gaps(new_ra, new_a, new_rb, new_b, ra, a, rb, b))
                 continue;
-              int new_rb = rb - (rb / num_axial_crystals_per_block) * num_virtual_axial_crystals_per_block;
 
               fan_data(new_ra, new_a, new_rb, new_b) = fan_data(new_rb, new_b, new_ra, new_a)
-                  = (*segment_ptr)[bin.axial_pos_num()][bin.view_num()][bin.tangential_pos_num()];
+                  = segment[axial_pos_num][view_num][tangential_pos_num];
             }
     }
 }
@@ -1148,22 +1172,90 @@ make_fan_data_remove_gaps(FanProjData& fan_data, const ProjData& proj_data)
   const ProjDataInfo& proj_data_info = *proj_data.get_proj_data_info_sptr();
   get_fan_info(num_rings, num_detectors_per_ring, max_delta, fan_size, proj_data_info);
 
+  auto get_segment = [&proj_data](const int segment_num) { return proj_data.get_segment_by_sinogram(segment_num); };
+
   if (proj_data.get_proj_data_info_sptr()->get_scanner_ptr()->get_scanner_geometry() == "Cylindrical")
     {
       auto proj_data_info_ptr = dynamic_cast<const ProjDataInfoCylindricalNoArcCorr* const>(&proj_data_info);
 
       make_fan_data_remove_gaps_help(
-          fan_data, num_rings, num_detectors_per_ring, max_delta, fan_size, *proj_data_info_ptr, proj_data);
+          fan_data, num_rings, num_detectors_per_ring, max_delta, fan_size, *proj_data_info_ptr, get_segment);
+    }
+  else
+    {
+      auto proj_data_info_ptr = dynamic_cast<const ProjDataInfoBlocksOnCylindricalNoArcCorr* const>(&proj_data_info);
+
+      make_fan_data_remove_gaps_help(
+          fan_data, num_rings, num_detectors_per_ring, max_delta, fan_size, *proj_data_info_ptr, get_segment);
+    }
+}
+
+void
+make_fan_data_remove_gaps(FanProjData& fan_data, const ProjDataInfo& proj_data_info, const float value)
+{
+  int num_rings;
+  int num_detectors_per_ring;
+  int fan_size;
+  int max_delta;
+
+  if (proj_data_info.is_tof_data())
+    error("make_fan_data: Incompatible with TOF data. Abort.");
+
+  get_fan_info(num_rings, num_detectors_per_ring, max_delta, fan_size, proj_data_info);
+
+  auto get_segment = [&proj_data_info, value](const int segment_num) {
+    SegmentBySinogram<float> segment = proj_data_info.get_empty_segment_by_sinogram(segment_num);
+    segment.fill(value);
+    return segment;
+  };
+
+  if (proj_data_info.get_scanner_ptr()->get_scanner_geometry() == "Cylindrical")
+    {
+      auto proj_data_info_ptr = dynamic_cast<const ProjDataInfoCylindricalNoArcCorr* const>(&proj_data_info);
+
+      make_fan_data_remove_gaps_help(
+          fan_data, num_rings, num_detectors_per_ring, max_delta, fan_size, *proj_data_info_ptr, get_segment);
     }
   else
     {
       auto proj_data_info_ptr = dynamic_cast<const ProjDataInfoBlocksOnCylindricalNoArcCorr* const>(&proj_data_info);
 
       make_fan_data_remove_gaps_help(
-          fan_data, num_rings, num_detectors_per_ring, max_delta, fan_size, *proj_data_info_ptr, proj_data);
+          fan_data, num_rings, num_detectors_per_ring, max_delta, fan_size, *proj_data_info_ptr, get_segment);
     }
 }
 
+/// **** This function sets a viewgram from fan_data while adding the intermodule gaps **** ////
+/// *** fan_data doesn't have gaps, viewgram has gaps *** ///
+/* Elements of the viewgram outside of the fan are not modified.
+ */
+template <class TProjDataInfo>
+static void
+set_fan_data_add_gaps_help(Viewgram<float>& viewgram,
+                           const int half_fan_size,
+                           const TProjDataInfo& proj_data_info,
+                           const FanDataGapRemover& gap_remover,
+                           const FanProjData& fan_data,
+                           const float gap_value)
+{
+  Bin bin;
+  bin.segment_num() = viewgram.get_segment_num();
+  bin.view_num() = viewgram.get_view_num();
+  for (bin.axial_pos_num() = viewgram.get_min_axial_pos_num(); bin.axial_pos_num() <= viewgram.get_max_axial_pos_num();
+       ++bin.axial_pos_num())
+    for (bin.tangential_pos_num() = -half_fan_size; bin.tangential_pos_num() <= half_fan_size; ++bin.tangential_pos_num())
+      {
+        int ra = 0, a = 0;
+        int rb = 0, b = 0;
+        proj_data_info.get_det_pair_for_bin(a, ra, b, rb, bin);
+
+        int new_ra, new_a, new_rb, new_b;
+        viewgram[bin.axial_pos_num()][bin.tangential_pos_num()]
+            = gap_remover.remove_gaps(new_ra, new_a, new_rb, new_b, ra, a, rb, b) ? fan_data(new_ra, new_a, new_rb, new_b)
+                                                                                  : gap_value;
+      }
+}
+
 /// **** This function make proj_data from fan_data while adding the intermodule gaps **** ////
 /// *** fan_data doesn't have gaps, proj_data has gaps *** ///
 template <class TProjDataInfo>
@@ -1178,68 +1270,22 @@ set_fan_data_add_gaps_help(ProjData& proj_data,
                            const float gap_value = 0.F)
 {
   const int half_fan_size = fan_size / 2;
-
-  const int num_virtual_axial_crystals_per_block = proj_data_info.get_scanner_sptr()->get_num_virtual_axial_crystals_per_block();
-  const int num_virtual_transaxial_crystals_per_block
-      = proj_data_info.get_scanner_sptr()->get_num_virtual_transaxial_crystals_per_block();
-  const int num_transaxial_crystals_per_block = proj_data_info.get_scanner_sptr()->get_num_transaxial_crystals_per_block();
-  const int num_axial_crystals_per_block = proj_data_info.get_scanner_sptr()->get_num_axial_crystals_per_block();
-
-  const int num_physical_transaxial_crystals_per_block
-      = num_transaxial_crystals_per_block - num_virtual_transaxial_crystals_per_block;
-
-  const int num_physical_axial_crystals_per_block = num_axial_crystals_per_block - num_virtual_axial_crystals_per_block;
+  const FanDataGapRemover gap_remover(*proj_data_info.get_scanner_sptr());
 
 #ifdef STIR_OPENMP
 #  pragma omp parallel for schedule(dynamic)
 #endif
   for (int segment = proj_data.get_min_segment_num(); segment <= proj_data.get_max_segment_num(); ++segment)
     {
-      Bin bin;
-      shared_ptr<SegmentBySinogram<float>> segment_ptr;
-      bin.segment_num() = segment;
-
-      segment_ptr.reset(new SegmentBySinogram<float>(proj_data.get_empty_segment_by_sinogram(bin.segment_num())));
-
-      for (bin.axial_pos_num() = proj_data.get_min_axial_pos_num(bin.segment_num());
-           bin.axial_pos_num() <= proj_data.get_max_axial_pos_num(bin.segment_num());
-           ++bin.axial_pos_num())
-        for (bin.view_num() = 0; bin.view_num() < num_detectors_per_ring / 2; bin.view_num()++)
-          for (bin.tangential_pos_num() = -half_fan_size; bin.tangential_pos_num() <= half_fan_size; ++bin.tangential_pos_num())
-            {
-              int ra = 0, a = 0;
-              int rb = 0, b = 0;
-
-              proj_data_info.get_det_pair_for_bin(a, ra, b, rb, bin);
+      SegmentBySinogram<float> segment_data = proj_data.get_empty_segment_by_sinogram(segment);
 
-              (*segment_ptr)[bin.axial_pos_num()][bin.view_num()][bin.tangential_pos_num()] = gap_value;
-
-              proj_data_info.get_det_pair_for_bin(a, ra, b, rb, bin);
-              int a_in_block = a % num_transaxial_crystals_per_block;
-
-              if (a_in_block >= num_physical_transaxial_crystals_per_block)
-                continue;
-              int new_a = a - (a / num_transaxial_crystals_per_block) * num_virtual_transaxial_crystals_per_block;
-
-              int ra_in_block = ra % num_axial_crystals_per_block;
-              if (ra_in_block >= num_physical_axial_crystals_per_block)
-                continue;
-              int new_ra = ra - (ra / num_axial_crystals_per_block) * num_virtual_axial_crystals_per_block;
-
-              int b_in_block = b % num_transaxial_crystals_per_block;
-              if (b_in_block >= num_physical_transaxial_crystals_per_block)
-                continue;
-              int new_b = b - (b / num_transaxial_crystals_per_block) * num_virtual_transaxial_crystals_per_block;
-
-              int rb_in_block = rb % num_axial_crystals_per_block;
-              if (rb_in_block >= num_physical_axial_crystals_per_block)
-                continue;
-              int new_rb = rb - (rb / num_axial_crystals_per_block) * num_virtual_axial_crystals_per_block;
-
-              (*segment_ptr)[bin.axial_pos_num()][bin.view_num()][bin.tangential_pos_num()]
-                  = fan_data(new_ra, new_a, new_rb, new_b);
-            }
-      proj_data.set_segment(*segment_ptr);
+      for (int view_num = 0; view_num < num_detectors_per_ring / 2; view_num++)
+        {
+          Viewgram<float> viewgram = segment_data.get_viewgram(view_num);
+          set_fan_data_add_gaps_help(viewgram, half_fan_size, proj_data_info, gap_remover, fan_data, gap_value);
+          segment_data.set_viewgram(viewgram);
+        }
+      proj_data.set_segment(segment_data);
     }
 }
 
@@ -1270,6 +1316,31 @@ set_fan_data_add_gaps(ProjData& proj_data, const FanProjData& fan_data, const fl
     }
 }
 
+void
+set_fan_data_add_gaps(Viewgram<float>& viewgram, const FanProjData& fan_data, const float gap_value)
+{
+  int num_rings;
+  int num_detectors_per_ring;
+  int fan_size;
+  int max_delta;
+  const ProjDataInfo& proj_data_info = *viewgram.get_proj_data_info_sptr();
+  get_fan_info(num_rings, num_detectors_per_ring, max_delta, fan_size, proj_data_info);
+  const FanDataGapRemover gap_remover(*proj_data_info.get_scanner_sptr());
+
+  if (proj_data_info.get_scanner_ptr()->get_scanner_geometry() == "Cylindrical")
+    {
+      auto proj_data_info_ptr = dynamic_cast<const ProjDataInfoCylindricalNoArcCorr* const>(&proj_data_info);
+
+      set_fan_data_add_gaps_help(viewgram, fan_size / 2, *proj_data_info_ptr, gap_remover, fan_data, gap_value);
+    }
+  else
+    {
+      auto proj_data_info_ptr = dynamic_cast<const ProjDataInfoBlocksOnCylindricalNoArcCorr* const>(&proj_data_info);
+
+      set_fan_data_add_gaps_help(viewgram, fan_size / 2, *proj_data_info_ptr, gap_remover, fan_data, gap_value);
+    }
+}
+
 void
 apply_block_norm(FanProjData& fan_data, const BlockData3D& block_data, const bool apply)
 {
@@ -1282,6 +1353,10 @@ apply_block_norm(FanProjData& fan_data, const BlockData3D& block_data, const boo
   const int num_tangential_crystals_per_block = num_tangential_detectors / num_tangential_blocks;
   assert(num_tangential_blocks * num_tangential_crystals_per_block == num_tangential_detectors);
 
+  // Note: for rb>=ra, all fan_data(ra,...) are stored in fan_data[ra], so we can parallelise over ra
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
   for (int ra = fan_data.get_min_ra(); ra <= fan_data.get_max_ra(); ++ra)
     for (int a = fan_data.get_min_a(); a <= fan_data.get_max_a(); ++a)
       // loop rb from ra to avoid double counting
@@ -1394,6 +1469,9 @@ apply_geo_norm(FanProjData& fan_data, const GeoData3D& geo_data, const bool appl
               }
           }
 
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
   for (int ra = fan_data.get_min_ra(); ra <= fan_data.get_max_ra(); ++ra)
     for (int a = fan_data.get_min_a(); a <= fan_data.get_max_a(); ++a)
       //    for (int rb = fan_data.get_min_ra(); rb <= fan_data.get_max_ra(); ++rb)
@@ -1414,6 +1492,9 @@ void
 apply_efficiencies(FanProjData& fan_data, const DetectorEfficiencies& efficiencies, const bool apply)
 {
   const int num_detectors_per_ring = fan_data.get_num_detectors_per_ring();
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
   for (int ra = fan_data.get_min_ra(); ra <= fan_data.get_max_ra(); ++ra)
     for (int a = fan_data.get_min_a(); a <= fan_data.get_max_a(); ++a)
       // loop rb from ra to avoid double counting
@@ -1432,6 +1513,9 @@ apply_efficiencies(FanProjData& fan_data, const DetectorEfficiencies& efficienci
 void
 make_fan_sum_data(Array<2, float>& data_fan_sums, const FanProjData& fan_data)
 {
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
   for (int ra = fan_data.get_min_ra(); ra <= fan_data.get_max_ra(); ++ra)
     for (int a = fan_data.get_min_a(); a <= fan_data.get_max_a(); ++a)
       data_fan_sums[ra][a] = fan_data.sum(ra, a);
@@ -1520,6 +1604,9 @@ make_fan_sum_data(Array<2, float>& data_fan_sums,
   assert(data_fan_sums.get_min_index() == 0);
   const int num_detectors_per_ring = data_fan_sums[0].get_length();
 
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
   for (int ra = data_fan_sums.get_min_index(); ra <= data_fan_sums.get_max_index(); ++ra)
     for (int a = data_fan_sums[ra].get_min_index(); a <= data_fan_sums[ra].get_max_index(); ++a)
       {
@@ -1547,6 +1634,9 @@ make_geo_data(GeoData3D& geo_data, const FanProjData& fan_data)
   FanProjData work = fan_data;
   work.fill(0);
 
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
   for (int ra = fan_data.get_min_ra(); ra <= fan_data.get_max_ra(); ++ra)
     for (int a = fan_data.get_min_a(); a <= fan_data.get_max_a(); ++a)
       // 1// for (int rb = fan_data.get_min_ra(); rb <= fan_data.get_max_ra(); ++rb)
@@ -1568,6 +1658,10 @@ make_geo_data(GeoData3D& geo_data, const FanProjData& fan_data)
 
   geo_data.fill(0);
 
+  // every (ra,a) writes only in geo_data[ra][a]
+#ifdef STIR_OPENMP
+#  pragma omp parallel for collapse(2) schedule(dynamic)
+#endif
   for (int ra = 0; ra < num_axial_crystals_per_block; ++ra)
     //  for (int a = 0; a <= num_transaxial_detectors/2; ++a)
     for (int a = 0; a < num_transaxial_crystals_per_block / 2; ++a)
@@ -1612,18 +1706,23 @@ make_block_data(BlockData3D& block_data, const FanProjData& fan_data)
   assert(num_transaxial_blocks * num_transaxial_crystals_per_block == num_transaxial_detectors);
 
   block_data.fill(0);
-  for (int ra = fan_data.get_min_ra(); ra <= fan_data.get_max_ra(); ++ra)
-    for (int a = fan_data.get_min_a(); a <= fan_data.get_max_a(); ++a)
-      // loop rb from ra to avoid double counting
-      for (int rb = max(ra, fan_data.get_min_rb(ra)); rb <= fan_data.get_max_rb(ra); ++rb)
-        for (int b = fan_data.get_min_b(a); b <= fan_data.get_max_b(a); ++b)
-          {
-            block_data(ra / num_axial_crystals_per_block,
-                       a / num_transaxial_crystals_per_block,
-                       rb / num_axial_crystals_per_block,
-                       b / num_transaxial_crystals_per_block)
-                += fan_data(ra, a, rb, b);
-          }
+  // parallelise over axial blocks, as all rings in a block contribute to the same block_data elements
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
+  for (int axial_block_num = 0; axial_block_num < num_axial_blocks; ++axial_block_num)
+    for (int ra = axial_block_num * num_axial_crystals_per_block; ra < (axial_block_num + 1) * num_axial_crystals_per_block; ++ra)
+      for (int a = fan_data.get_min_a(); a <= fan_data.get_max_a(); ++a)
+        // loop rb from ra to avoid double counting
+        for (int rb = max(ra, fan_data.get_min_rb(ra)); rb <= fan_data.get_max_rb(ra); ++rb)
+          for (int b = fan_data.get_min_b(a); b <= fan_data.get_max_b(a); ++b)
+            {
+              block_data(axial_block_num,
+                         a / num_transaxial_crystals_per_block,
+                         rb / num_axial_crystals_per_block,
+                         b / num_transaxial_crystals_per_block)
+                  += fan_data(ra, a, rb, b);
+            }
 }
 
 void
@@ -1641,6 +1740,9 @@ iterate_efficiencies(DetectorEfficiencies& efficiencies, const Array<2, float>&
           efficiencies[ra][a] = 0;
         else
           {
+            // Note: efficiencies are updated in place (Gauss-Seidel), so this loop cannot be parallelised over ra,a.
+            // The sum below is not parallelised either, as that gives too small chunks of work and
+            // results that depend on the number of threads.
             float denominator = 0;
             for (int rb = model.get_min_rb(ra); rb <= model.get_max_rb(ra); ++rb)
               for (int b = model.get_min_b(a); b <= model.get_max_b(a); ++b)
@@ -1708,6 +1810,9 @@ iterate_geo_norm(GeoData3D& norm_geo_data, const GeoData3D& measured_geo_data, c
 
   const float threshold = measured_geo_data.find_max() / 10000.F;
 
+#ifdef STIR_OPENMP
+#  pragma omp parallel for collapse(2) schedule(dynamic)
+#endif
   for (int ra = 0; ra < num_axial_crystals_per_block; ++ra)
     for (int a = 0; a < num_transaxial_crystals_per_block / 2; ++a)
       // loop rb from ra to avoid double counting
@@ -1729,6 +1834,9 @@ iterate_block_norm(BlockData3D& norm_block_data, const BlockData3D& measured_blo
   make_block_data(norm_block_data, model);
   // norm_block_data = measured_block_data / norm_block_data;
   const float threshold = measured_block_data.find_max() / 10000.F;
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
   for (int ra = norm_block_data.get_min_ra(); ra <= norm_block_data.get_max_ra(); ++ra)
     for (int a = norm_block_data.get_min_a(); a <= norm_block_data.get_max_a(); ++a)
       // loop rb from ra to avoid double counting
@@ -1746,6 +1854,9 @@ double
 KL(const FanProjData& d1, const FanProjData& d2, const double threshold)
 {
   double sum = 0;
+#ifdef STIR_OPENMP
+#  pragma omp parallel for reduction(+ : sum) schedule(dynamic)
+#endif
   for (int ra = d1.get_min_ra(); ra <= d1.get_max_ra(); ++ra)
     {
       double asum = 0;
@@ -26,13 +26,193 @@
 */
 #include "stir/MedianArrayFilter3D.h"
 #include "stir/Coordinate3D.h"
+#include "stir/error.h"
 
 #include <algorithm>
+#include <cstdint>
+#include <utility>
+#include <vector>
 
 using std::nth_element;
 
 START_NAMESPACE_STIR
 
+//! number of bits that are set
+static inline int
+count_bits(std::uint64_t word)
+{
+#if defined(__GNUC__)
+  return __builtin_popcountll(word);
+#else
+  int count = 0;
+  for (; word != 0; word &= word - 1)
+    ++count;
+  return count;
+#endif
+}
+
+//! index of the lowest bit that is set (\a word cannot be 0)
+static inline int
+lowest_bit(const std::uint64_t word)
+{
+  assert(word != 0);
+#if defined(__GNUC__)
+  return __builtin_ctzll(word);
+#else
+  int bit = 0;
+  while (((word >> bit) & 1) == 0)
+    ++bit;
+  return bit;
+#endif
+}
+
+/*!
+  \brief A set of integers in the range <tt>[0,size)</tt> allowing fast insertion, removal and finding the n-th smallest element
+
+  This is a histogram with counts 0 or 1, stored as bits. Counts are also kept for groups of
+  64 words, and groups of 64 of those. Insertion and removal are therefore O(1), while
+  finding the n-th element needs at most <tt>size/2^18 + 3*64</tt> steps.
+*/
+class RankSet
+{
+public:
+  explicit RankSet(const std::size_t size)
+      : words((size + 63) / 64, 0),
+        word_group_counts((words.size() + 63) / 64, 0),
+        large_group_counts((word_group_counts.size() + 63) / 64, 0)
+  {}
+
+  void insert(const std::size_t rank)
+  {
+    assert((words[rank / 64] & (std::uint64_t(1) << (rank % 64))) == 0);
+    words[rank / 64] |= std::uint64_t(1) << (rank % 64);
+    ++word_group_counts[rank / (64 * 64)];
+    ++large_group_counts[rank / (64 * 64 * 64)];
+  }
+
+  void erase(const std::size_t rank)
+  {
+    assert((words[rank / 64] & (std::uint64_t(1) << (rank % 64))) != 0);
+    words[rank / 64] &= ~(std::uint64_t(1) << (rank % 64));
+    --word_group_counts[rank / (64 * 64)];
+    --large_group_counts[rank / (64 * 64 * 64)];
+  }
+
+  //! find the n-th smallest element (starting from 0)
+  std::size_t find_nth(int n) const
+  {
+    std::size_t large_group = 0;
+    while (n >= large_group_counts[large_group])
+      n -= large_group_counts[large_group++];
+    std::size_t word_group = large_group * 64;
+    while (n >= word_group_counts[word_group])
+      n -= word_group_counts[word_group++];
+    std::size_t word_num = word_group * 64;
+    while (n >= count_bits(words[word_num]))
+      n -= count_bits(words[word_num++]);
+    std::uint64_t word = words[word_num];
+    for (; n > 0; --n)
+      word &= word - 1; // remove lowest bit
+    return word_num * 64 + lowest_bit(word);
+  }
+
+private:
+  std::vector<std::uint64_t> words;
+  std::vector<int> word_group_counts;
+  std::vector<int> large_group_counts;
+};
+
+//! median filter for arrays with a regular range, using a histogram that is updated while moving along x
+/*! All voxel values are first sorted, such that the mask can be represented by the
+    ranks of its voxels (in a RankSet). When moving from one voxel to the next, only the voxels in
+    the leaving and entering (y,z)-planes of the mask are removed/inserted.
+*/
+template <typename elemT>
+static void
+sliding_window_median_3d(Array<3, elemT>& out_array,
+                         const Array<3, elemT>& in_array,
+                         const int mask_radius_z,
+                         const int mask_radius_y,
+                         const int mask_radius_x)
+{
+  BasicCoordinate<3, int> min_indices, max_indices;
+  if (!in_array.get_regular_range(min_indices, max_indices))
+    error("MedianArrayFilter3D: can only use sliding window for arrays with a regular range");
+  const int min_z = min_indices[1];
+  const int max_z = max_indices[1];
+  const int min_y = min_indices[2];
+  const int max_y = max_indices[2];
+  const int min_x = min_indices[3];
+  const int max_x = max_indices[3];
+  if (min_y > max_y || min_x > max_x)
+    return;
+  const std::size_t num_y = max_y - min_y + 1;
+  const std::size_t num_x = max_x - min_x + 1;
+  const std::size_t num_voxels = (max_z - min_z + 1) * num_y * num_x;
+  auto linear_index
+      = [&](const int z, const int y, const int x) { return ((z - min_z) * num_y + (y - min_y)) * num_x + (x - min_x); };
+
+  // sort all values to find their rank
+  std::vector<std::pair<elemT, std::size_t>> sorted_values;
+  sorted_values.reserve(num_voxels);
+  {
+    std::size_t index = 0;
+    for (auto iter = in_array.begin_all_const(); iter != in_array.end_all_const(); ++iter)
+      sorted_values.emplace_back(*iter, index++);
+  }
+  std::sort(sorted_values.begin(), sorted_values.end());
+  std::vector<std::size_t> ranks(num_voxels);
+  for (std::size_t rank = 0; rank < num_voxels; ++rank)
+    ranks[sorted_values[rank].second] = rank;
+
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
+  for (int z = min_z; z <= max_z; ++z)
+    {
+      RankSet window(num_voxels);
+      const int first_z = std::max(z - mask_radius_z, min_z);
+      const int last_z = std::min(z + mask_radius_z, max_z);
+      for (int y = min_y; y <= max_y; ++y)
+        {
+          const int first_y = std::max(y - mask_radius_y, min_y);
+          const int last_y = std::min(y + mask_radius_y, max_y);
+          const int num_voxels_in_plane = (last_z - first_z + 1) * (last_y - first_y + 1);
+          // insert or remove all voxels in the mask with the given x
+          auto insert_plane = [&](const int x) {
+            for (int mask_z = first_z; mask_z <= last_z; ++mask_z)
+              for (int mask_y = first_y; mask_y <= last_y; ++mask_y)
+                window.insert(ranks[linear_index(mask_z, mask_y, x)]);
+          };
+          auto erase_plane = [&](const int x) {
+            for (int mask_z = first_z; mask_z <= last_z; ++mask_z)
+              for (int mask_y = first_y; mask_y <= last_y; ++mask_y)
+                window.erase(ranks[linear_index(mask_z, mask_y, x)]);
+          };
+
+          for (int x = min_x; x <= std::min(min_x + mask_radius_x - 1, max_x); ++x)
+            insert_plane(x);
+          for (int x = min_x; x <= max_x; ++x)
+            {
+              if (x - mask_radius_x - 1 >= min_x)
+                erase_plane(x - mask_radius_x - 1);
+              if (x + mask_radius_x <= max_x)
+                insert_plane(x + mask_radius_x);
+              const int num_neighbours
+                  = (std::min(x + mask_radius_x, max_x) - std::max(x - mask_radius_x, min_x) + 1) * num_voxels_in_plane;
+              const elemT median = sorted_values[window.find_nth(num_neighbours / 2)].first;
+              if (num_neighbours % 2 == 1)
+                out_array[z][y][x] = median;
+              else
+                out_array[z][y][x] = (sorted_values[window.find_nth(num_neighbours / 2 - 1)].first + median) / 2;
+            }
+          // empty the window for the next y
+          for (int x = std::max(max_x - mask_radius_x, min_x); x <= max_x; ++x)
+            erase_plane(x);
+        }
+    }
+}
+
 template <typename elemT>
 MedianArrayFilter3D<elemT>::MedianArrayFilter3D(const Coordinate3D<int>& mask_radius)
 {
@@ -92,21 +272,34 @@ MedianArrayFilter3D<elemT>::do_it(Array<3, elemT>& out_array, const Array<3, ele
 {
   assert(out_array.get_index_range() == in_array.get_index_range());
 
-  Array<1, elemT> neighbours(0, (2 * mask_radius_x + 1) * (2 * mask_radius_y + 1) * (2 * mask_radius_z + 1) - 1);
+  // use the (much faster) sliding window implementation when possible
+  if (in_array.get_length() > 0 && in_array.is_regular() && out_array.get_index_range() == in_array.get_index_range()
+      && mask_radius_x >= 0 && mask_radius_y >= 0 && mask_radius_z >= 0)
+    {
+      sliding_window_median_3d(out_array, in_array, mask_radius_z, mask_radius_y, mask_radius_x);
+      return;
+    }
 
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
   for (int z = out_array.get_min_index(); z <= out_array.get_max_index(); ++z)
-    for (int y = out_array[z].get_min_index(); y <= out_array[z].get_max_index(); ++y)
-      for (int x = out_array[z][y].get_min_index(); x <= out_array[z][y].get_max_index(); ++x)
-        {
-          const int num_neighbours = extract_neighbours(neighbours, in_array, Coordinate3D<int>(z, y, x));
-          if (num_neighbours == 0)
-            continue;
-          nth_element(neighbours.begin(), neighbours.begin() + num_neighbours / 2, neighbours.end());
-          if (num_neighbours % 2 == 1)
-            out_array[z][y][x] = neighbours[num_neighbours / 2];
-          else
-            out_array[z][y][x] = (neighbours[num_neighbours / 2] + neighbours[num_neighbours / 2 - 1]) / 2;
-        }
+    {
+      Array<1, elemT> neighbours(0, (2 * mask_radius_x + 1) * (2 * mask_radius_y + 1) * (2 * mask_radius_z + 1) - 1);
+      for (int y = out_array[z].get_min_index(); y <= out_array[z].get_max_index(); ++y)
+        for (int x = out_array[z][y].get_min_index(); x <= out_array[z][y].get_max_index(); ++x)
+          {
+            const int num_neighbours = extract_neighbours(neighbours, in_array, Coordinate3D<int>(z, y, x));
+            if (num_neighbours == 0)
+              continue;
+            const auto median_iter = neighbours.begin() + num_neighbours / 2;
+            nth_element(neighbours.begin(), median_iter, neighbours.begin() + num_neighbours);
+            if (num_neighbours % 2 == 1)
+              out_array[z][y][x] = *median_iter;
+            else
+              out_array[z][y][x] = (*median_iter + *std::max_element(neighbours.begin(), median_iter)) / 2;
+          }
+    }
 }
 
 template <typename elemT>
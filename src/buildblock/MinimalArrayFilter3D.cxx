@@ -19,6 +19,7 @@
 */
 #include "stir/MinimalArrayFilter3D.h"
 #include "stir/Coordinate3D.h"
+#include "stir/detail/sliding_window_extremum.h"
 #include <algorithm>
 #include <numeric>
 
@@ -76,17 +77,32 @@ MinimalArrayFilter3D<elemT>::do_it(Array<3, elemT>& out_array, const Array<3, el
 {
   assert(out_array.get_index_range() == in_array.get_index_range());
 
-  Array<1, elemT> neighbours(0, (2 * mask_radius_x + 1) * (2 * mask_radius_y + 1) * (2 * mask_radius_z + 1) - 1);
+  // use the (much faster) separable implementation when possible
+  if (in_array.get_length() > 0 && in_array.is_regular() && out_array.get_index_range() == in_array.get_index_range()
+      && mask_radius_x >= 0 && mask_radius_y >= 0 && mask_radius_z >= 0)
+    {
+      detail::sliding_window_extremum_3d(out_array,
+                                         in_array,
+                                         Coordinate3D<int>(mask_radius_z, mask_radius_y, mask_radius_x),
+                                         [](const elemT a, const elemT b) { return std::min(a, b); });
+      return;
+    }
 
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
   for (int z = out_array.get_min_index(); z <= out_array.get_max_index(); ++z)
-    for (int y = out_array[z].get_min_index(); y <= out_array[z].get_max_index(); ++y)
-      for (int x = out_array[z][y].get_min_index(); x <= out_array[z][y].get_max_index(); ++x)
-        {
-          const int num_neighbours = extract_neighbours(neighbours, in_array, Coordinate3D<int>(z, y, x));
-          if (num_neighbours == 0)
-            continue;
-          out_array[z][y][x] = *std::min_element(neighbours.begin(), neighbours.begin() + num_neighbours);
-        }
+    {
+      Array<1, elemT> neighbours(0, (2 * mask_radius_x + 1) * (2 * mask_radius_y + 1) * (2 * mask_radius_z + 1) - 1);
+      for (int y = out_array[z].get_min_index(); y <= out_array[z].get_max_index(); ++y)
+        for (int x = out_array[z][y].get_min_index(); x <= out_array[z][y].get_max_index(); ++x)
+          {
+            const int num_neighbours = extract_neighbours(neighbours, in_array, Coordinate3D<int>(z, y, x));
+            if (num_neighbours == 0)
+              continue;
+            out_array[z][y][x] = *std::min_element(neighbours.begin(), neighbours.begin() + num_neighbours);
+          }
+    }
 }
 
 template <typename elemT>
@@ -71,16 +71,15 @@ ProjDataGEHDF5::initialise_viewgram_buffer()
   if (!this->tof_data.empty())
     error("there is already data loaded. Aborting");
 
-  tof_data.reserve(get_num_views());
-  Array<3, unsigned char> buffer;
+  // read directly into the final arrays to avoid copies
+  tof_data.resize(get_num_views());
 
   for (int view_num = get_min_view_num(); view_num <= get_max_view_num(); view_num++)
     {
       // view numbering for initialise_proj_data starts from 1
       m_input_hdf5_sptr->initialise_proj_data(view_num - get_min_view_num() + 1);
 
-      m_input_hdf5_sptr->read_sinogram(buffer);
-      this->tof_data.push_back(buffer);
+      m_input_hdf5_sptr->read_sinogram(this->tof_data[view_num - get_min_view_num()]);
     }
 }
 
@@ -142,17 +141,22 @@ ProjDataGEHDF5::get_viewgram(const int view_num,
     error("ProjDataGEHDF5: internal error on views");
   if (get_max_tangential_pos_num() + get_min_tangential_pos_num() != 0)
     error("ProjDataGEHDF5: internal error on tangential positions");
+  // loop over axial positions last, as they are contiguous in tof_data
+  const Array<3, unsigned char>& tof_data_for_view = tof_data[get_max_view_num() - view_num];
+  const int start_axial_pos = seg_ax_offset[find_segment_index_in_sequence(segment_num)];
   for (int tang_pos = ret_viewgram.get_min_tangential_pos_num(), i_tang = 0;
        tang_pos <= ret_viewgram.get_max_tangential_pos_num();
        ++tang_pos, ++i_tang)
-    for (int i_axial = get_min_axial_pos_num(segment_num), axial_pos = seg_ax_offset[find_segment_index_in_sequence(segment_num)];
-         i_axial <= get_max_axial_pos_num(segment_num);
-         i_axial++, axial_pos++)
-      for (int tof_poss = 0; tof_poss <= num_tof_poss - 1; tof_poss++)
-        {
-          ret_viewgram[i_axial][-tang_pos]
-              += static_cast<float>(tof_data[get_max_view_num() - view_num][i_tang][tof_poss][axial_pos]);
-        }
+    for (int tof_poss = 0; tof_poss <= num_tof_poss - 1; tof_poss++)
+      {
+        const Array<1, unsigned char>& tof_data_row = tof_data_for_view[i_tang][tof_poss];
+        for (int i_axial = get_min_axial_pos_num(segment_num), axial_pos = start_axial_pos;
+             i_axial <= get_max_axial_pos_num(segment_num);
+             i_axial++, axial_pos++)
+          {
+            ret_viewgram[i_axial][-tang_pos] += static_cast<float>(tof_data_row[axial_pos]);
+          }
+      }
 
 #if 0
     ofstream write_tof_data;
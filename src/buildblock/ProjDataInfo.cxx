@@ -41,6 +41,7 @@
 #include "stir/IndexRange2D.h"
 #include "stir/IndexRange3D.h"
 #include "stir/Bin.h"
+#include "stir/LORCoordinates.h"
 #include "stir/TOF_conversions.h"
 // include for ask and ask_num
 #include "stir/utilities.h"
@@ -113,6 +114,69 @@ ProjDataInfo::get_sampling_in_s(const Bin& bin) const
          / 2;
 }
 
+/*! Helper function for get_s_for_bins() etc */
+template <typename FunctionT>
+static void
+get_values_for_bins(std::vector<float>& values, const std::vector<Bin>& bins, FunctionT func)
+{
+  values.resize(bins.size());
+  const long long num_bins = static_cast<long long>(bins.size());
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(static)
+#endif
+  for (long long i = 0; i < num_bins; ++i)
+    values[i] = func(bins[i]);
+}
+
+void
+ProjDataInfo::get_s_for_bins(std::vector<float>& s, const std::vector<Bin>& bins) const
+{
+  get_values_for_bins(s, bins, [this](const Bin& bin) { return this->get_s(bin); });
+}
+
+void
+ProjDataInfo::get_phi_for_bins(std::vector<float>& phi, const std::vector<Bin>& bins) const
+{
+  get_values_for_bins(phi, bins, [this](const Bin& bin) { return this->get_phi(bin); });
+}
+
+void
+ProjDataInfo::get_m_for_bins(std::vector<float>& m, const std::vector<Bin>& bins) const
+{
+  get_values_for_bins(m, bins, [this](const Bin& bin) { return this->get_m(bin); });
+}
+
+void
+ProjDataInfo::get_t_for_bins(std::vector<float>& t, const std::vector<Bin>& bins) const
+{
+  get_values_for_bins(t, bins, [this](const Bin& bin) { return this->get_t(bin); });
+}
+
+void
+ProjDataInfo::get_LOR_end_points_for_bins(std::vector<LORAs2Points<float>>& lors, const std::vector<Bin>& bins) const
+{
+  lors.resize(bins.size());
+  const long long num_bins = static_cast<long long>(bins.size());
+  bool all_found = true;
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(static)
+#endif
+  for (long long i = 0; i < num_bins; ++i)
+    {
+      LORInAxialAndNoArcCorrSinogramCoordinates<float> lor;
+      this->get_LOR(lor, bins[i]);
+      if (lor.get_intersections_with_cylinder(lors[i], lor.radius()) == Succeeded::no)
+        {
+#ifdef STIR_OPENMP
+#  pragma omp atomic write
+#endif
+          all_found = false;
+        }
+    }
+  if (!all_found)
+    error("ProjDataInfo::get_LOR_end_points_for_bins: could not find the end-points of some LORs");
+}
+
 void
 ProjDataInfo::set_num_views(const int num_views)
 {
@@ -287,6 +287,35 @@ ProjDataInfoCylindrical::initialise_ring_diff_arrays() const
         }
     }
 
+  // initialise ring_pair_to_segment_axial_pos_num
+  if (sampling_corresponds_to_physical_rings)
+    {
+      // Note: we cannot use get_segment_axial_pos_num_for_ring_pair() here, as it calls this function.
+      const int num_rings = get_scanner_ptr()->get_num_rings();
+      const int min_ring_difference = get_min_ring_difference(get_min_segment_num());
+      const int max_ring_difference = get_max_ring_difference(get_max_segment_num());
+      ring_pair_to_segment_axial_pos_num.resize(static_cast<std::size_t>(num_rings) * num_rings);
+      for (int ring1 = 0; ring1 < num_rings; ++ring1)
+        for (int ring2 = 0; ring2 < num_rings; ++ring2)
+          {
+            SegmentAxialPosNum& entry = ring_pair_to_segment_axial_pos_num[ring1 * num_rings + ring2];
+            const int ring_diff = ring2 - ring1;
+            // see get_segment_num_for_ring_difference()
+            if (ring_diff > max_ring_difference || ring_diff < min_ring_difference)
+              entry.segment_num = get_max_segment_num() + 1;
+            else
+              entry.segment_num = ring_diff_to_segment_num[ring_diff];
+            if (entry.segment_num > get_max_segment_num())
+              {
+                entry.axial_pos_num = 0;
+                continue;
+              }
+            // see documentation above for formulas
+            entry.axial_pos_num
+                = (ring1 + ring2 - ax_pos_num_offset[entry.segment_num]) * get_num_axial_poss_per_ring_inc(entry.segment_num) / 2;
+          }
+    }
+
   // now also initialise the segment_axial_pos_to_ring_pair table
   if (sampling_corresponds_to_physical_rings)
     {
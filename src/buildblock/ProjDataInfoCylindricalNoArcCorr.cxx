@@ -30,9 +30,11 @@
 #include "stir/CartesianCoordinate3D.h"
 #include "stir/LORCoordinates.h"
 #include "stir/round.h"
+#include "stir/detail/det_pos_pairs_for_bins.h"
 #include <algorithm>
 #include "stir/error.h"
 #include <sstream>
+#include <limits>
 
 #include <boost/static_assert.hpp>
 
@@ -223,6 +225,8 @@ ProjDataInfoCylindricalNoArcCorr::initialise_det1det2_to_uncompressed_view_tangp
   BOOST_STATIC_ASSERT(-2 >> 1 == -1);
 
   const int num_detectors = get_scanner_ptr()->get_num_detectors_per_ring();
+  if (num_detectors > 2 * std::numeric_limits<std::int16_t>::max())
+    error("Number of detectors per ring %d is too large for the look-up table", num_detectors);
 
   if (num_detectors % 2 != 0)
     {
@@ -375,6 +379,22 @@ ProjDataInfoCylindricalNoArcCorr::get_all_det_pos_pairs_for_bin(vector<Detection
   assert(current_dp_num == get_num_det_pos_pairs_for_bin(bin, ignore_non_spatial_dimensions));
 }
 
+void
+ProjDataInfoCylindricalNoArcCorr::get_det_pos_pairs_for_bins(std::vector<DetectionPositionPair<>>& det_pos_pairs,
+                                                             const std::vector<Bin>& bins) const
+{
+  this->initialise_uncompressed_view_tangpos_to_det1det2_if_not_done_yet();
+  detail::get_det_pos_pairs_for_bins(*this, det_pos_pairs, bins);
+}
+
+void
+ProjDataInfoCylindricalNoArcCorr::get_bins_for_det_pos_pairs(std::vector<Bin>& bins,
+                                                             const std::vector<DetectionPositionPair<>>& det_pos_pairs) const
+{
+  this->initialise_det1det2_to_uncompressed_view_tangpos_if_not_done_yet();
+  detail::get_bins_for_det_pos_pairs(*this, bins, det_pos_pairs);
+}
+
 Succeeded
 ProjDataInfoCylindricalNoArcCorr::find_scanner_coordinates_given_cartesian_coordinates(
     int& det1, int& det2, int& ring1, int& ring2, const CartesianCoordinate3D<float>& c1, const CartesianCoordinate3D<float>& c2)
@@ -30,10 +30,12 @@
 #include "stir/DetectionPosition.h"
 #include "stir/is_null_ptr.h"
 #include "stir/error.h"
+#include "stir/detail/det_pos_pairs_for_bins.h"
 #include <iostream>
 #include <fstream>
 
 #include <sstream>
+#include <limits>
 
 #include <boost/static_assert.hpp>
 
@@ -194,6 +196,8 @@ ProjDataInfoGenericNoArcCorr::initialise_det1det2_to_uncompressed_view_tangpos()
   BOOST_STATIC_ASSERT(-2 >> 1 == -1);
 
   const int num_detectors = get_scanner_ptr()->get_num_detectors_per_ring();
+  if (num_detectors > 2 * std::numeric_limits<std::int16_t>::max())
+    error("Number of detectors per ring %d is too large for the look-up table", num_detectors);
 
   if (num_detectors % 2 != 0)
     {
@@ -322,6 +326,22 @@ ProjDataInfoGenericNoArcCorr::get_all_det_pos_pairs_for_bin(std::vector<Detectio
   assert(current_dp_num == get_num_det_pos_pairs_for_bin(bin));
 }
 
+void
+ProjDataInfoGenericNoArcCorr::get_det_pos_pairs_for_bins(std::vector<DetectionPositionPair<>>& det_pos_pairs,
+                                                         const std::vector<Bin>& bins) const
+{
+  this->initialise_uncompressed_view_tangpos_to_det1det2_if_not_done_yet();
+  detail::get_det_pos_pairs_for_bins(*this, det_pos_pairs, bins);
+}
+
+void
+ProjDataInfoGenericNoArcCorr::get_bins_for_det_pos_pairs(std::vector<Bin>& bins,
+                                                         const std::vector<DetectionPositionPair<>>& det_pos_pairs) const
+{
+  this->initialise_det1det2_to_uncompressed_view_tangpos_if_not_done_yet();
+  detail::get_bins_for_det_pos_pairs(*this, bins, det_pos_pairs);
+}
+
 void
 ProjDataInfoGenericNoArcCorr::find_cartesian_coordinates_of_detection(CartesianCoordinate3D<float>& coord_1,
                                                                       CartesianCoordinate3D<float>& coord_2,
@@ -25,6 +25,8 @@
 #include "stir/ProjDataInfoCylindricalNoArcCorr.h"
 #include "stir/ProjDataInfoGenericNoArcCorr.h"
 #include "stir/IndexRange.h"
+#include "stir/IndexRange3D.h"
+#include "stir/Scanner.h"
 #include "stir/BasicCoordinate.h"
 #include "stir/Sinogram.h"
 #include "stir/SegmentBySinogram.h"
@@ -33,9 +35,10 @@
 #include "stir/numerics/BSplinesRegularGrid.h"
 #include "stir/interpolate_projdata.h"
 #include "stir/extend_projdata.h"
-#include "stir/numerics/sampling_functions.h"
 #include "stir/error.h"
 #include <typeinfo>
+#include <algorithm>
+#include <cmath>
 
 START_NAMESPACE_STIR
 
@@ -163,8 +166,7 @@ interpolate_projdata(ProjData& proj_data_out,
 {
   BasicCoordinate<3, BSpline::BSplineType> these_types_3;
   these_types_3[1] = these_types_3[2] = these_types_3[3] = these_types;
-  interpolate_projdata(proj_data_out, proj_data_in, these_types_3, remove_interleaving);
-  return Succeeded::yes;
+  return interpolate_projdata(proj_data_out, proj_data_in, these_types_3, remove_interleaving);
 }
 
 Succeeded
@@ -173,8 +175,64 @@ interpolate_projdata(ProjData& proj_data_out,
                      const BasicCoordinate<3, BSpline::BSplineType>& these_types,
                      const bool remove_interleaving)
 {
-  const ProjDataInfo& proj_data_in_info = *proj_data_in.get_proj_data_info_sptr();
-  const ProjDataInfo& proj_data_out_info = *proj_data_out.get_proj_data_info_sptr();
+  const ProjDataInterpolator interpolator(
+      proj_data_out.get_proj_data_info_sptr(), proj_data_in.get_proj_data_info_sptr(), these_types, remove_interleaving);
+  return interpolator.interpolate(proj_data_out, proj_data_in);
+}
+
+//! This function interpolates BlocksOnCylindrical proj data taking bucket intersections and gaps into account.
+/*! The above proj data interpolation function works well for cylindrical scanners where there are no large discontinuities.
+For BlocksOnCylindrical scanners, the sudden change of angle from one bucket to the next and the gaps between blocks and buckets
+lead to interpolation artifacts if not taken into account. Therefore, this function does the interpolation in physical space
+rather than directly on the proj data bin values. For each bin in proj_data_out (the full size proj data), we find the four
+closest LORs in the downsampled proj_data_in. These are then weighted using bilinear interpolation based on the crystal positions
+of the two endpoints of the LOR.
+*/
+Succeeded
+interpolate_blocks_on_cylindrical_projdata(ProjData& proj_data_out, const ProjData& proj_data_in, bool remove_interleaving)
+{
+  if (proj_data_in.get_proj_data_info_sptr()->get_scanner_sptr()->get_scanner_geometry() == "Cylindrical")
+    error("interpolate_blocks_on_cylindrical_projdata needs a scanner with BlocksOnCylindrical or Generic geometry");
+  // spline types are ignored for BlocksOnCylindrical scanners
+  return interpolate_projdata(proj_data_out, proj_data_in, BSpline::linear, remove_interleaving);
+}
+
+/************************ ProjDataInterpolator ************************/
+
+ProjDataInterpolator::ProjDataInterpolator()
+    : _already_set_up(false),
+      _remove_interleaving(false),
+      _use_blocks_on_cylindrical(false)
+{}
+
+ProjDataInterpolator::ProjDataInterpolator(const shared_ptr<const ProjDataInfo>& proj_data_info_out_sptr,
+                                           const shared_ptr<const ProjDataInfo>& proj_data_info_in_sptr,
+                                           const BasicCoordinate<3, BSpline::BSplineType>& spline_types,
+                                           const bool remove_interleaving)
+    : ProjDataInterpolator()
+{
+  set_up(proj_data_info_out_sptr, proj_data_info_in_sptr, spline_types, remove_interleaving);
+}
+
+bool
+ProjDataInterpolator::is_set_up_for(const ProjDataInfo& proj_data_info_out,
+                                    const ProjDataInfo& proj_data_info_in,
+                                    const BasicCoordinate<3, BSpline::BSplineType>& spline_types,
+                                    const bool remove_interleaving) const
+{
+  return _already_set_up && _remove_interleaving == remove_interleaving && _spline_types == spline_types
+         && *_proj_data_info_out_sptr == proj_data_info_out && *_proj_data_info_in_sptr == proj_data_info_in;
+}
+
+void
+ProjDataInterpolator::set_up(const shared_ptr<const ProjDataInfo>& proj_data_info_out_sptr,
+                             const shared_ptr<const ProjDataInfo>& proj_data_info_in_sptr,
+                             const BasicCoordinate<3, BSpline::BSplineType>& spline_types,
+                             const bool remove_interleaving)
+{
+  _already_set_up = false;
+  const ProjDataInfo& proj_data_in_info = *proj_data_info_in_sptr;
+  const ProjDataInfo& proj_data_out_info = *proj_data_info_out_sptr;
 
   if (typeid(proj_data_in_info) != typeid(proj_data_out_info))
     {
@@ -192,332 +250,352 @@ interpolate_projdata(ProjData& proj_data_out,
       error("interpolate_projdata needs both projection to be of a scanner with the same ring radius");
     }
 
+  // take copies, such that the caller cannot modify them afterwards
+  _proj_data_info_out_sptr = proj_data_out_info.create_shared_clone();
+  _proj_data_info_in_sptr = proj_data_in_info.create_shared_clone();
+  _non_interleaved_proj_data_info_in_sptr
+      = remove_interleaving ? make_non_interleaved_proj_data_info(proj_data_in_info) : _proj_data_info_in_sptr;
+  _spline_types = spline_types;
+  _remove_interleaving = remove_interleaving;
+
   // handle BlocksOnCylindrical interpolation manually
-  if (proj_data_in_info.get_scanner_sptr()->get_scanner_geometry() != "Cylindrical")
-    return interpolate_blocks_on_cylindrical_projdata(proj_data_out, proj_data_in, remove_interleaving);
+  _use_blocks_on_cylindrical = proj_data_in_info.get_scanner_sptr()->get_scanner_geometry() != "Cylindrical";
+  if (_use_blocks_on_cylindrical)
+    set_up_blocks_on_cylindrical();
+  else
+    set_up_cylindrical();
+  _already_set_up = true;
+}
 
-  // initialise interpolator
-  BSpline::BSplinesRegularGrid<3, float, float> proj_data_interpolator(these_types);
-  for (int k = proj_data_out_info.get_min_tof_pos_num(); k <= proj_data_out_info.get_max_tof_pos_num(); ++k)
+// find the B-spline weights for sampling a 1D array with coefficients at positions index_out * step + offset,
+// using the same computation as BSplinesRegularGrid (including its mirror boundary conditions)
+static void
+set_BSplines_weights_1D(std::vector<int>& indices,
+                        std::vector<BSpline::pos_type>& weights,
+                        int& num_terms,
+                        const int min_out_index,
+                        const int max_out_index,
+                        const double offset,
+                        const double step,
+                        const int min_in_index,
+                        const int max_in_index,
+                        const BSpline::BSplineType spline_type)
+{
+  const BSpline::PieceWiseFunction<BSpline::pos_type>& bspline = BSpline::bspline_function(spline_type);
+  num_terms = bspline.kernel_total_length();
+  indices.resize(static_cast<std::size_t>(max_out_index - min_out_index + 1) * num_terms);
+  weights.resize(indices.size());
+  std::size_t i = 0;
+  for (int index_out = min_out_index; index_out <= max_out_index; ++index_out)
     {
-      SegmentBySinogram<float> segment
-          = remove_interleaving ? make_non_interleaved_segment(*(make_non_interleaved_proj_data_info(proj_data_in_info)),
-                                                               proj_data_in.get_segment_by_sinogram(0, k))
-                                : proj_data_in.get_segment_by_sinogram(0, k);
-
-      // for Cylindrical, spacing is regular in all directions, which makes mapping trivial
-      std::function<BasicCoordinate<3, double>(const BasicCoordinate<3, int>&)> index_converter;
-      // especially in view direction, extending by 5 leads to much smaller artifacts
-      proj_data_interpolator.set_coef(extend_segment(segment, 5, 5, 5));
-
-      BasicCoordinate<3, double> offset, step;
-      // out_index * step + offset = in_index
-      const float in_sampling_m = proj_data_in_info.get_sampling_in_m(Bin(0, 0, 0, 0));
-      const float out_sampling_m = proj_data_out_info.get_sampling_in_m(Bin(0, 0, 0, 0));
-      // offset in 'in' index units
-      offset[1] = (proj_data_out_info.get_m(Bin(0, 0, 0, 0)) - proj_data_in_info.get_m(Bin(0, 0, 0, 0))) / in_sampling_m;
-      step[1] = out_sampling_m / in_sampling_m;
-
-      const float in_sampling_phi = (proj_data_in_info.get_phi(Bin(0, 1, 0, 0)) - proj_data_in_info.get_phi(Bin(0, 0, 0, 0)))
-                                    / (remove_interleaving ? 2 : 1);
-      const float out_sampling_phi = proj_data_out_info.get_phi(Bin(0, 1, 0, 0)) - proj_data_out_info.get_phi(Bin(0, 0, 0, 0));
-      offset[2] = (proj_data_out_info.get_phi(Bin(0, 0, 0, 0)) - proj_data_in_info.get_phi(Bin(0, 0, 0, 0))) / in_sampling_phi;
-      step[2] = out_sampling_phi / in_sampling_phi;
-
-      const float in_sampling_s = proj_data_in_info.get_sampling_in_s(Bin(0, 0, 0, 0));
-      const float out_sampling_s = proj_data_out_info.get_sampling_in_s(Bin(0, 0, 0, 0));
-      offset[3] = (proj_data_out_info.get_s(Bin(0, 0, 0, 0)) - proj_data_in_info.get_s(Bin(0, 0, 0, 0))) / in_sampling_s;
-      step[3] = out_sampling_s / in_sampling_s;
-
-      // define a function to translate indices in the output proj data to indices in input proj data
-      index_converter
-          = [&proj_data_out_info, offset, step](const BasicCoordinate<3, int>& index_out) -> BasicCoordinate<3, double> {
-        // translate to indices in input proj data
-        BasicCoordinate<3, double> index_in;
-        for (auto dim = 1; dim <= 3; dim++)
-          index_in[dim] = index_out[dim] * step[dim] + offset[dim];
-
-        return index_in;
-      };
+      const BSpline::pos_type relative_position = index_out * step + offset;
+      const int kmin = static_cast<int>(std::ceil(relative_position - bspline.kernel_length_right()));
+      const int kmax = kmin + num_terms - 1;
+      BSpline::pos_type current_pos = relative_position - kmin;
+      int p = bspline.find_piece(current_pos);
+      for (int k = kmin; k <= kmax; ++k, --current_pos, --p, ++i)
+        {
+          if (k < min_in_index)
+            indices[i] = 2 * min_in_index - k;
+          else if (k > max_in_index)
+            indices[i] = 2 * max_in_index - k;
+          else
+            indices[i] = k;
+          weights[i] = bspline.function_piece(current_pos, p);
+        }
+    }
+}
 
-      SegmentBySinogram<float> sino_3D_out = proj_data_out.get_empty_segment_by_sinogram(0, false, k);
-      sample_function_using_index_converter(sino_3D_out, proj_data_interpolator, index_converter);
+void
+ProjDataInterpolator::set_up_cylindrical()
+{
+  const ProjDataInfo& proj_data_in_info = *_proj_data_info_in_sptr;
+  const ProjDataInfo& proj_data_out_info = *_proj_data_info_out_sptr;
+  const ProjDataInfo& coef_proj_data_info = *_non_interleaved_proj_data_info_in_sptr;
+
+  // for Cylindrical, spacing is regular in all directions, which makes mapping trivial
+  BasicCoordinate<3, double> offset, step;
+  // out_index * step + offset = in_index
+  const float in_sampling_m = proj_data_in_info.get_sampling_in_m(Bin(0, 0, 0, 0));
+  const float out_sampling_m = proj_data_out_info.get_sampling_in_m(Bin(0, 0, 0, 0));
+  // offset in 'in' index units
+  offset[1] = (proj_data_out_info.get_m(Bin(0, 0, 0, 0)) - proj_data_in_info.get_m(Bin(0, 0, 0, 0))) / in_sampling_m;
+  step[1] = out_sampling_m / in_sampling_m;
+
+  const float in_sampling_phi = (proj_data_in_info.get_phi(Bin(0, 1, 0, 0)) - proj_data_in_info.get_phi(Bin(0, 0, 0, 0)))
+                                / (_remove_interleaving ? 2 : 1);
+  const float out_sampling_phi = proj_data_out_info.get_phi(Bin(0, 1, 0, 0)) - proj_data_out_info.get_phi(Bin(0, 0, 0, 0));
+  offset[2] = (proj_data_out_info.get_phi(Bin(0, 0, 0, 0)) - proj_data_in_info.get_phi(Bin(0, 0, 0, 0))) / in_sampling_phi;
+  step[2] = out_sampling_phi / in_sampling_phi;
+
+  const float in_sampling_s = proj_data_in_info.get_sampling_in_s(Bin(0, 0, 0, 0));
+  const float out_sampling_s = proj_data_out_info.get_sampling_in_s(Bin(0, 0, 0, 0));
+  offset[3] = (proj_data_out_info.get_s(Bin(0, 0, 0, 0)) - proj_data_in_info.get_s(Bin(0, 0, 0, 0))) / in_sampling_s;
+  step[3] = out_sampling_s / in_sampling_s;
+
+  // index ranges of the B-spline coefficients, see interpolate()
+  // especially in view direction, extending by 5 leads to much smaller artifacts
+  const int extension = 5;
+  BasicCoordinate<3, int> min_in, max_in, min_out, max_out;
+  min_in[1] = coef_proj_data_info.get_min_axial_pos_num(0) - extension;
+  max_in[1] = coef_proj_data_info.get_max_axial_pos_num(0) + extension;
+  min_in[2] = coef_proj_data_info.get_min_view_num() - extension;
+  max_in[2] = coef_proj_data_info.get_max_view_num() + extension;
+  min_in[3] = coef_proj_data_info.get_min_tangential_pos_num() - extension;
+  max_in[3] = coef_proj_data_info.get_max_tangential_pos_num() + extension;
+  min_out[1] = proj_data_out_info.get_min_axial_pos_num(0);
+  max_out[1] = proj_data_out_info.get_max_axial_pos_num(0);
+  min_out[2] = proj_data_out_info.get_min_view_num();
+  max_out[2] = proj_data_out_info.get_max_view_num();
+  min_out[3] = proj_data_out_info.get_min_tangential_pos_num();
+  max_out[3] = proj_data_out_info.get_max_tangential_pos_num();
+
+  for (int d = 0; d < 3; ++d)
+    {
+      Weights1D& w = _weights_1D[d];
+      w.min_out_index = min_out[d + 1];
+      w.max_out_index = max_out[d + 1];
+      set_BSplines_weights_1D(w.indices,
+                              w.weights,
+                              w.num_terms,
+                              min_out[d + 1],
+                              max_out[d + 1],
+                              offset[d + 1],
+                              step[d + 1],
+                              min_in[d + 1],
+                              max_in[d + 1],
+                              _spline_types[d + 1]);
+    }
+}
 
-      if (proj_data_out.set_segment(sino_3D_out) == Succeeded::no)
-        return Succeeded::no;
+void
+ProjDataInterpolator::set_up_blocks_on_cylindrical()
+{
+  const ProjDataInfo& proj_data_in_info = *_proj_data_info_in_sptr;
+  const ProjDataInfo& proj_data_out_info = *_proj_data_info_out_sptr;
+  const auto proj_data_in_info_ptr = dynamic_cast<const ProjDataInfoGenericNoArcCorr*>(&proj_data_in_info);
+  const auto proj_data_out_info_ptr = dynamic_cast<const ProjDataInfoGenericNoArcCorr*>(&proj_data_out_info);
+  if (!proj_data_in_info_ptr || !proj_data_out_info_ptr)
+    error("interpolate_projdata for BlocksOnCylindrical scanners needs non-arccorrected projection data");
+
+  const auto m_offset = proj_data_in_info.get_m(Bin(0, 0, 0, 0));
+  const auto m_sampling = proj_data_in_info.get_sampling_in_m(Bin(0, 0, 0, 0));
+
+  // confirm that proj_data_in has equidistant sampling in m
+  for (auto axial_pos = proj_data_in_info.get_min_axial_pos_num(0); axial_pos <= proj_data_in_info.get_max_axial_pos_num(0);
+       axial_pos++)
+    {
+      if (abs(m_sampling - proj_data_in_info.get_sampling_in_m(Bin(0, 0, axial_pos, 0))) > 1E-4)
+        error("input projdata to interpolate_projdata are not equidistantly sampled in m.");
     }
-  return Succeeded::yes;
+
+  // axial weights: linear interpolation in m
+  _axial_weights.clear();
+  for (int axial_pos = proj_data_out_info.get_min_axial_pos_num(0); axial_pos <= proj_data_out_info.get_max_axial_pos_num(0);
+       ++axial_pos)
+    {
+      const auto out_m = proj_data_out_info.get_m(Bin(0, 0, axial_pos, 0));
+      const double axial_idx = (out_m - m_offset) / m_sampling;
+      int axial_floor = std::floor(axial_idx);
+      int axial_ceil = std::ceil(axial_idx);
+      if (axial_floor == axial_ceil)
+        {
+          if (axial_floor == 0)
+            axial_ceil++;
+          else
+            axial_floor--;
+        }
+      _axial_weights.emplace_back(std::max(axial_floor, proj_data_in_info.get_min_axial_pos_num(0)), axial_ceil - axial_idx);
+      _axial_weights.emplace_back(std::min(axial_ceil, proj_data_in_info.get_max_axial_pos_num(0)), axial_idx - axial_floor);
+    }
+
+  // transaxial weights: bilinear interpolation in the positions of the 2 crystals of the LOR
+  const Scanner& scanner_out = *proj_data_out_info.get_scanner_sptr();
+  const Scanner& scanner_in = *proj_data_in_info.get_scanner_sptr();
+  const int dets_per_module_out = scanner_out.get_num_transaxial_crystals_per_bucket();
+  const int dets_per_module_in = scanner_in.get_num_transaxial_crystals_per_bucket();
+
+  // translate the crystal position on a module from the full size scanner to the downsampled scanner
+  // and find the neighbouring crystals and their weights
+  auto find_crystals_in = [&](const int det_num_out, std::vector<std::pair<int, double>>& crystals_in) {
+    const int module = det_num_out / dets_per_module_out;
+    const int crystal_out_module_idx = det_num_out % dets_per_module_out;
+    const double crystal_out_module_pos
+        = std::floor(static_cast<double>(crystal_out_module_idx) / scanner_out.get_num_transaxial_crystals_per_block())
+              * scanner_out.get_transaxial_block_spacing()
+          + static_cast<double>(crystal_out_module_idx % scanner_out.get_num_transaxial_crystals_per_block())
+                * scanner_out.get_transaxial_crystal_spacing();
+    const double crystal_num_in
+        = module * dets_per_module_in + crystal_out_module_pos / scanner_in.get_transaxial_crystal_spacing();
+    const auto crystal_num_in_floor = std::max(static_cast<int>(std::floor(crystal_num_in)), module * dets_per_module_in);
+    const auto crystal_num_in_ceil = std::min(static_cast<int>(std::ceil(crystal_num_in)), (module + 1) * dets_per_module_in - 1);
+    crystals_in.clear();
+    if (crystal_num_in_floor == crystal_num_in_ceil)
+      crystals_in.emplace_back(crystal_num_in_floor, 1.);
+    else
+      {
+        crystals_in.emplace_back(crystal_num_in_floor, crystal_num_in_ceil - crystal_num_in);
+        crystals_in.emplace_back(crystal_num_in_ceil, crystal_num_in - crystal_num_in_floor);
+      }
+  };
+
+  _transaxial_weights.clear();
+  _transaxial_offsets.assign(1, 0);
+  std::vector<std::pair<int, double>> crystals1_in, crystals2_in;
+  for (int view_num = proj_data_out_info.get_min_view_num(); view_num <= proj_data_out_info.get_max_view_num(); ++view_num)
+    for (int tang_pos_num = proj_data_out_info.get_min_tangential_pos_num();
+         tang_pos_num <= proj_data_out_info.get_max_tangential_pos_num();
+         ++tang_pos_num)
+      {
+        // find the two crystals for this bin
+        int det1_num_out, det2_num_out;
+        proj_data_out_info_ptr->get_det_num_pair_for_view_tangential_pos_num(det1_num_out, det2_num_out, view_num, tang_pos_num);
+        find_crystals_in(det1_num_out, crystals1_in);
+        find_crystals_in(det2_num_out, crystals2_in);
+        for (const auto& crystal1 : crystals1_in)
+          for (const auto& crystal2 : crystals2_in)
+            {
+              WeightedIndex2D weighted_index;
+              proj_data_in_info_ptr->get_view_tangential_pos_num_for_det_num_pair(
+                  weighted_index.index1, weighted_index.index2, crystal1.first, crystal2.first);
+              // TODO: why can we get positions out that are not even in the proj data?!
+              weighted_index.index2 = std::min(std::max(proj_data_in_info.get_min_tangential_pos_num(), weighted_index.index2),
+                                               proj_data_in_info.get_max_tangential_pos_num());
+              weighted_index.weight = crystal1.second * crystal2.second;
+              _transaxial_weights.push_back(weighted_index);
+            }
+        _transaxial_offsets.push_back(_transaxial_weights.size());
+      }
 }
 
-//! This function interpolates BlocksOnCylindrical proj data taking bucket intersections and gaps into account.
-/*! The above proj data interpolation function works well for cylindrical scanners where there are no large discontinuities.
-For BlocksOnCylindrical scanners, the sudden change of angle from one bucket to the next and the gaps between blocks and buckets
-lead to interpolation artifacts if not taken into account. Therefore, this function does the interpolation in physical space
-rather than directly on the proj data bin values. For each bin in proj_data_out (the full size proj data), we find the four
-closest LORs in the downsampled proj_data_in. These are then weighted using bilinear interpolation based on the crystal positions
-of the two endpoints of the LOR.
-*/
 Succeeded
-interpolate_blocks_on_cylindrical_projdata(ProjData& proj_data_out, const ProjData& proj_data_in, bool remove_interleaving)
+ProjDataInterpolator::interpolate(ProjData& proj_data_out, const ProjData& proj_data_in) const
 {
-  const ProjDataInfo& proj_data_in_info = *proj_data_in.get_proj_data_info_sptr();
-  const ProjDataInfo& proj_data_out_info = *proj_data_out.get_proj_data_info_sptr();
-
-  auto m_offset = proj_data_in_info.get_m(Bin(0, 0, 0, 0));
-  auto m_sampling = proj_data_in_info.get_sampling_in_m(Bin(0, 0, 0, 0));
+  if (!_already_set_up)
+    error("ProjDataInterpolator::interpolate called without calling set_up first");
+  if (*proj_data_out.get_proj_data_info_sptr() != *_proj_data_info_out_sptr
+      || *proj_data_in.get_proj_data_info_sptr() != *_proj_data_info_in_sptr)
+    error("ProjDataInterpolator::interpolate called with projection data that are different from those used for set_up");
 
-  for (int k = proj_data_out_info.get_min_tof_pos_num(); k <= proj_data_out_info.get_max_tof_pos_num(); ++k)
+  for (int k = _proj_data_info_out_sptr->get_min_tof_pos_num(); k <= _proj_data_info_out_sptr->get_max_tof_pos_num(); ++k)
     {
-      SegmentBySinogram<float> segment
-          = remove_interleaving ? make_non_interleaved_segment(*(make_non_interleaved_proj_data_info(proj_data_in_info)),
-                                                               proj_data_in.get_segment_by_sinogram(0, k))
-                                : proj_data_in.get_segment_by_sinogram(0, k);
+      const SegmentBySinogram<float> segment = _remove_interleaving
+                                                   ? make_non_interleaved_segment(*_non_interleaved_proj_data_info_in_sptr,
+                                                                                  proj_data_in.get_segment_by_sinogram(0, k))
+                                                   : proj_data_in.get_segment_by_sinogram(0, k);
       SegmentBySinogram<float> sino_3D_out = proj_data_out.get_empty_segment_by_sinogram(0, false, k);
 
-      BasicCoordinate<3, int> min_out, max_out;
-      IndexRange<3> out_range = sino_3D_out.get_index_range();
-      if (!out_range.get_regular_range(min_out, max_out))
-        warning("Output must be regular range!");
-
-      // confirm that proj_data_in has equidistant sampling in m
-      for (auto axial_pos = proj_data_in_info.get_min_axial_pos_num(0); axial_pos <= proj_data_in_info.get_max_axial_pos_num(0);
-           axial_pos++)
+      if (_use_blocks_on_cylindrical)
         {
-          if (abs(m_sampling - proj_data_in_info.get_sampling_in_m(Bin(0, 0, axial_pos, 0))) > 1E-4)
-            error("input projdata to interpolate_projdata are not equidistantly sampled in m.");
+          const int min_view_num = sino_3D_out.get_min_view_num();
+          const int min_tang_pos_num = sino_3D_out.get_min_tangential_pos_num();
+          const int num_tang_poss = sino_3D_out.get_num_tangential_poss();
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
+          for (int axial_pos_num = sino_3D_out.get_min_axial_pos_num(); axial_pos_num <= sino_3D_out.get_max_axial_pos_num();
+               ++axial_pos_num)
+            {
+              const std::size_t axial_idx = 2 * static_cast<std::size_t>(axial_pos_num - sino_3D_out.get_min_axial_pos_num());
+              const auto& axial_floor = _axial_weights[axial_idx];
+              const auto& axial_ceil = _axial_weights[axial_idx + 1];
+              for (int view_num = sino_3D_out.get_min_view_num(); view_num <= sino_3D_out.get_max_view_num(); ++view_num)
+                for (int tang_pos_num = min_tang_pos_num; tang_pos_num <= sino_3D_out.get_max_tangential_pos_num();
+                     ++tang_pos_num)
+                  {
+                    const std::size_t transaxial_idx
+                        = static_cast<std::size_t>(view_num - min_view_num) * num_tang_poss + (tang_pos_num - min_tang_pos_num);
+                    float value = 0.F;
+                    for (const auto& axial : { axial_floor, axial_ceil })
+                      for (std::size_t i = _transaxial_offsets[transaxial_idx]; i < _transaxial_offsets[transaxial_idx + 1]; ++i)
+                        {
+                          const WeightedIndex2D& w = _transaxial_weights[i];
+                          value += segment[axial.first][w.index1][w.index2] * axial.second * w.weight;
+                        }
+                    sino_3D_out[axial_pos_num][view_num][tang_pos_num] = value;
+                  }
+            }
         }
-
-      BasicCoordinate<3, int> index_out;
-      for (index_out[1] = min_out[1]; index_out[1] <= max_out[1]; ++index_out[1])
+      else
         {
-          for (index_out[2] = min_out[2]; index_out[2] <= max_out[2]; ++index_out[2])
+          BSpline::BSplinesRegularGrid<3, float, float> proj_data_interpolator(_spline_types);
+          // especially in view direction, extending by 5 leads to much smaller artifacts
+          proj_data_interpolator.set_coef(extend_segment(segment, 5, 5, 5));
+          const Array<3, float> coeffs = proj_data_interpolator.get_coefficients();
+
+          // B-spline sampling is separable, so we do it one dimension at a time,
+          // starting with the last (tangential) dimension as in BSplinesRegularGrid
+          const Weights1D& weights_axial = _weights_1D[0];
+          const Weights1D& weights_view = _weights_1D[1];
+          const Weights1D& weights_tang = _weights_1D[2];
+          const int min_axial = coeffs.get_min_index();
+          const int max_axial = coeffs.get_max_index();
+          const int min_view = coeffs[min_axial].get_min_index();
+          const int max_view = coeffs[min_axial].get_max_index();
+
+          Array<3, float> tang_sampled(
+              IndexRange3D(min_axial, max_axial, min_view, max_view, weights_tang.min_out_index, weights_tang.max_out_index));
+          Array<3, float> view_tang_sampled(IndexRange3D(min_axial,
+                                                         max_axial,
+                                                         weights_view.min_out_index,
+                                                         weights_view.max_out_index,
+                                                         weights_tang.min_out_index,
+                                                         weights_tang.max_out_index));
+#ifdef STIR_OPENMP
+#  pragma omp parallel for
+#endif
+          for (int axial = min_axial; axial <= max_axial; ++axial)
             {
-              for (index_out[3] = min_out[3]; index_out[3] <= max_out[3]; ++index_out[3])
+              for (int view = min_view; view <= max_view; ++view)
                 {
-                  // translate index on output to coordinate
-                  auto bin
-                = Bin(0 /* segment */, index_out[2] /* view */, 
-                index_out[1] /* axial pos */, index_out[3] /* tangential pos
-                */);
-                  auto out_m = proj_data_out_info.get_m(bin);
-                  double axial_idx = (out_m - m_offset) / m_sampling;
-                  int axial_floor = std::floor(axial_idx);
-                  int axial_ceil = std::ceil(axial_idx);
-                  if (axial_floor == axial_ceil)
+                  const Array<1, float>& coeffs_row = coeffs[axial][view];
+                  Array<1, float>& out_row = tang_sampled[axial][view];
+                  std::size_t i = 0;
+                  for (int tang = weights_tang.min_out_index; tang <= weights_tang.max_out_index; ++tang)
                     {
-                      if (axial_floor == 0)
-                        axial_ceil++;
-                      else
-                        axial_floor--;
-                    }
-
-                  // find the two crystals for this bin and on which buckets (modules) they are
-                  int det1_num_out, det2_num_out;
-                  const auto proj_data_out_info_ptr = dynamic_cast<const ProjDataInfoGenericNoArcCorr*>(&proj_data_out_info);
-                  proj_data_out_info_ptr->get_det_num_pair_for_view_tangential_pos_num(det1_num_out,
-                                                                                       det2_num_out,
-                                                                                       index_out[2], /*view*/
-                                                                                       index_out[3] /* tangential pos */);
-                  const int dets_per_module_out = proj_data_out_info.get_scanner_sptr()->get_num_transaxial_crystals_per_bucket();
-                  const int det1_module = det1_num_out / dets_per_module_out;
-                  const int det2_module = det2_num_out / dets_per_module_out;
-
-                  // translate the crystal position on each module from the full size scanner to the downsampled scanner
-                  const auto proj_data_in_info_ptr = dynamic_cast<const ProjDataInfoGenericNoArcCorr*>(&proj_data_in_info);
-                  const int dets_per_module_in
-                      = proj_data_in_info_ptr->get_scanner_sptr()->get_num_transaxial_crystals_per_bucket();
-                  const int crystal1_out_module_idx = det1_num_out % dets_per_module_out;
-                  const double crystal1_out_module_pos
-                      = std::floor(static_cast<double>(crystal1_out_module_idx)
-                                   / proj_data_out_info_ptr->get_scanner_sptr()->get_num_transaxial_crystals_per_block())
-                            * proj_data_out_info_ptr->get_scanner_sptr()->get_transaxial_block_spacing()
-                        + static_cast<double>(
-                              crystal1_out_module_idx
-                              % proj_data_out_info_ptr->get_scanner_sptr()->get_num_transaxial_crystals_per_block())
-                              * proj_data_out_info_ptr->get_scanner_sptr()->get_transaxial_crystal_spacing();
-                  const double crystal1_num_in
-                      = det1_module * dets_per_module_in
-                        + crystal1_out_module_pos / proj_data_in_info.get_scanner_sptr()->get_transaxial_crystal_spacing();
-                  const int crystal2_out_module_idx = det2_num_out % dets_per_module_out;
-                  const double crystal2_out_module_pos
-                      = std::floor(static_cast<double>(crystal2_out_module_idx)
-                                   / proj_data_out_info_ptr->get_scanner_sptr()->get_num_transaxial_crystals_per_block())
-                            * proj_data_out_info_ptr->get_scanner_sptr()->get_transaxial_block_spacing()
-                        + static_cast<double>(
-                              crystal2_out_module_idx
-                              % proj_data_out_info_ptr->get_scanner_sptr()->get_num_transaxial_crystals_per_block())
-                              * proj_data_out_info_ptr->get_scanner_sptr()->get_transaxial_crystal_spacing();
-                  const double crystal2_num_in
-                      = det2_module * dets_per_module_in
-                        + crystal2_out_module_pos / proj_data_in_info.get_scanner_sptr()->get_transaxial_crystal_spacing();
-                  const auto crystal1_num_in_floor
-                      = std::max(static_cast<int>(std::floor(crystal1_num_in)), det1_module * dets_per_module_in);
-                  const auto crystal1_num_in_ceil
-                      = std::min(static_cast<int>(std::ceil(crystal1_num_in)), (det1_module + 1) * dets_per_module_in - 1);
-                  const auto crystal2_num_in_floor
-                      = std::max(static_cast<int>(std::floor(crystal2_num_in)), det2_module * dets_per_module_in);
-                  const auto crystal2_num_in_ceil
-                      = std::min(static_cast<int>(std::ceil(crystal2_num_in)), (det2_module + 1) * dets_per_module_in - 1);
-
-                  // translate to indices in input proj data
-                  BasicCoordinate<3, int> index_in;
-
-                  // in this case we can skip parts of the interpolation
-                  if (crystal1_num_in_floor == crystal1_num_in_ceil)
-                    {
-                      if (crystal2_num_in_floor == crystal2_num_in_ceil)
-                        {
-                          int one_view, one_tang;
-                          proj_data_in_info_ptr->get_view_tangential_pos_num_for_det_num_pair(
-                              one_view, one_tang, crystal1_num_in_floor, crystal2_num_in_floor);
-                          one_tang = std::min(std::max(proj_data_in_info_ptr->get_min_tangential_pos_num(), one_tang),
-                                              proj_data_in_info_ptr->get_max_tangential_pos_num());
-
-                          index_in[1] = std::max(axial_floor, proj_data_in_info_ptr->get_min_axial_pos_num(0));
-                          index_in[2] = one_view;
-                          index_in[3] = one_tang;
-                          sino_3D_out[index_out] += segment[index_in] * (axial_ceil - axial_idx);
-
-                          index_in[1] = std::min(axial_ceil, proj_data_in_info_ptr->get_max_axial_pos_num(0));
-                          sino_3D_out[index_out] += segment[index_in] * (axial_idx - axial_floor);
-                        }
-                      else
-                        {
-                          int ff_view, fc_view;
-                          int ff_tang, fc_tang;
-                          proj_data_in_info_ptr->get_view_tangential_pos_num_for_det_num_pair(
-                              ff_view, ff_tang, crystal1_num_in_floor, crystal2_num_in_floor);
-                          proj_data_in_info_ptr->get_view_tangential_pos_num_for_det_num_pair(
-                              fc_view, fc_tang, crystal1_num_in_floor, crystal2_num_in_ceil);
-
-                          ff_tang = std::min(std::max(proj_data_in_info_ptr->get_min_tangential_pos_num(), ff_tang),
-                                             proj_data_in_info_ptr->get_max_tangential_pos_num());
-                          fc_tang = std::min(std::max(proj_data_in_info_ptr->get_min_tangential_pos_num(), fc_tang),
-                                             proj_data_in_info_ptr->get_max_tangential_pos_num());
-
-                          index_in[1] = std::max(axial_floor, proj_data_in_info_ptr->get_min_axial_pos_num(0));
-                          index_in[2] = ff_view;
-                          index_in[3] = ff_tang;
-                          sino_3D_out[index_out]
-                              += segment[index_in] * (axial_ceil - axial_idx) * (crystal2_num_in_ceil - crystal2_num_in);
-                          index_in[2] = fc_view;
-                          index_in[3] = fc_tang;
-                          sino_3D_out[index_out]
-                              += segment[index_in] * (axial_ceil - axial_idx) * (crystal2_num_in - crystal2_num_in_floor);
-                          index_in[1] = std::min(axial_ceil, proj_data_in_info_ptr->get_max_axial_pos_num(0));
-                          sino_3D_out[index_out]
-                              += segment[index_in] * (axial_idx - axial_floor) * (crystal2_num_in - crystal2_num_in_floor);
-                          index_in[2] = ff_view;
-                          index_in[3] = ff_tang;
-                          sino_3D_out[index_out]
-                              += segment[index_in] * (axial_idx - axial_floor) * (crystal2_num_in_ceil - crystal2_num_in);
-                        }
+                      float value = 0.F;
+                      for (int term = 0; term < weights_tang.num_terms; ++term, ++i)
+                        value += static_cast<float>(coeffs_row[weights_tang.indices[i]] * weights_tang.weights[i]);
+                      out_row[tang] = value;
                     }
-                  else if (crystal2_num_in_floor == crystal2_num_in_ceil)
+                }
+              std::size_t i = 0;
+              for (int view = weights_view.min_out_index; view <= weights_view.max_out_index; ++view)
+                {
+                  Array<1, float>& out_row = view_tang_sampled[axial][view];
+                  for (int term = 0; term < weights_view.num_terms; ++term, ++i)
                     {
-                      int ff_view, cf_view;
-                      int ff_tang, cf_tang;
-                      proj_data_in_info_ptr->get_view_tangential_pos_num_for_det_num_pair(
-                          ff_view, ff_tang, crystal1_num_in_floor, crystal2_num_in_floor);
-                      proj_data_in_info_ptr->get_view_tangential_pos_num_for_det_num_pair(
-                          cf_view, cf_tang, crystal1_num_in_ceil, crystal2_num_in_floor);
-
-                      ff_tang = std::min(std::max(proj_data_in_info_ptr->get_min_tangential_pos_num(), ff_tang),
-                                         proj_data_in_info_ptr->get_max_tangential_pos_num());
-                      cf_tang = std::min(std::max(proj_data_in_info_ptr->get_min_tangential_pos_num(), cf_tang),
-                                         proj_data_in_info_ptr->get_max_tangential_pos_num());
-
-                      index_in[1] = std::max(axial_floor, proj_data_in_info_ptr->get_min_axial_pos_num(0));
-                      index_in[2] = ff_view;
-                      index_in[3] = ff_tang;
-                      sino_3D_out[index_out]
-                          += segment[index_in] * (axial_ceil - axial_idx) * (crystal1_num_in_ceil - crystal1_num_in);
-                      index_in[2] = cf_view;
-                      index_in[3] = cf_tang;
-                      sino_3D_out[index_out]
-                          += segment[index_in] * (axial_ceil - axial_idx) * (crystal1_num_in - crystal1_num_in_floor);
-                      index_in[1] = std::min(axial_ceil, proj_data_in_info_ptr->get_max_axial_pos_num(0));
-                      sino_3D_out[index_out]
-                          += segment[index_in] * (axial_idx - axial_floor) * (crystal1_num_in - crystal1_num_in_floor);
-                      index_in[2] = ff_view;
-                      index_in[3] = ff_tang;
-                      sino_3D_out[index_out]
-                          += segment[index_in] * (axial_idx - axial_floor) * (crystal1_num_in_ceil - crystal1_num_in);
+                      const Array<1, float>& in_row = tang_sampled[axial][weights_view.indices[i]];
+                      const BSpline::pos_type weight = weights_view.weights[i];
+                      for (int tang = weights_tang.min_out_index; tang <= weights_tang.max_out_index; ++tang)
+                        out_row[tang] += static_cast<float>(in_row[tang] * weight);
                     }
-                  else // in this case we need to do a trilinear interpolation
+                }
+            }
+#ifdef STIR_OPENMP
+#  pragma omp parallel for
+#endif
+          for (int axial = weights_axial.min_out_index; axial <= weights_axial.max_out_index; ++axial)
+            {
+              std::size_t i = static_cast<std::size_t>(axial - weights_axial.min_out_index) * weights_axial.num_terms;
+              for (int term = 0; term < weights_axial.num_terms; ++term, ++i)
+                {
+                  const BSpline::pos_type weight = weights_axial.weights[i];
+                  const Array<2, float>& in_sinogram = view_tang_sampled[weights_axial.indices[i]];
+                  for (int view = weights_view.min_out_index; view <= weights_view.max_out_index; ++view)
                     {
-                      int ff_view, fc_view, cf_view, cc_view;
-                      int ff_tang, fc_tang, cf_tang, cc_tang;
-                      proj_data_in_info_ptr->get_view_tangential_pos_num_for_det_num_pair(
-                          ff_view, ff_tang, crystal1_num_in_floor, crystal2_num_in_floor);
-                      proj_data_in_info_ptr->get_view_tangential_pos_num_for_det_num_pair(
-                          fc_view, fc_tang, crystal1_num_in_floor, crystal2_num_in_ceil);
-                      proj_data_in_info_ptr->get_view_tangential_pos_num_for_det_num_pair(
-                          cf_view, cf_tang, crystal1_num_in_ceil, crystal2_num_in_floor);
-                      proj_data_in_info_ptr->get_view_tangential_pos_num_for_det_num_pair(
-                          cc_view, cc_tang, crystal1_num_in_ceil, crystal2_num_in_ceil);
-
-                      // TODO: why can we get positions out that are not even in the proj data?!
-                      ff_tang = std::min(std::max(proj_data_in_info_ptr->get_min_tangential_pos_num(), ff_tang),
-                                         proj_data_in_info_ptr->get_max_tangential_pos_num());
-                      fc_tang = std::min(std::max(proj_data_in_info_ptr->get_min_tangential_pos_num(), fc_tang),
-                                         proj_data_in_info_ptr->get_max_tangential_pos_num());
-                      cf_tang = std::min(std::max(proj_data_in_info_ptr->get_min_tangential_pos_num(), cf_tang),
-                                         proj_data_in_info_ptr->get_max_tangential_pos_num());
-                      cc_tang = std::min(std::max(proj_data_in_info_ptr->get_min_tangential_pos_num(), cc_tang),
-                                         proj_data_in_info_ptr->get_max_tangential_pos_num());
-
-                      index_in[1] = std::max(axial_floor, proj_data_in_info_ptr->get_min_axial_pos_num(0));
-                      index_in[2] = ff_view;
-                      index_in[3] = ff_tang;
-                      sino_3D_out[index_out] += segment[index_in] * (axial_ceil - axial_idx)
-                                                * (crystal1_num_in_ceil - crystal1_num_in)
-                                                * (crystal2_num_in_ceil - crystal2_num_in);
-                      index_in[2] = fc_view;
-                      index_in[3] = fc_tang;
-                      sino_3D_out[index_out] += segment[index_in] * (axial_ceil - axial_idx)
-                                                * (crystal1_num_in_ceil - crystal1_num_in)
-                                                * (crystal2_num_in - crystal2_num_in_floor);
-                      index_in[2] = cc_view;
-                      index_in[3] = cc_tang;
-                      sino_3D_out[index_out] += segment[index_in] * (axial_ceil - axial_idx)
-                                                * (crystal1_num_in - crystal1_num_in_floor)
-                                                * (crystal2_num_in - crystal2_num_in_floor);
-                      index_in[2] = cf_view;
-                      index_in[3] = cf_tang;
-                      sino_3D_out[index_out] += segment[index_in] * (axial_ceil - axial_idx)
-                                                * (crystal1_num_in - crystal1_num_in_floor)
-                                                * (crystal2_num_in_ceil - crystal2_num_in);
-
-                      index_in[1] = std::min(axial_ceil, proj_data_in_info_ptr->get_max_axial_pos_num(0));
-                      index_in[2] = ff_view;
-                      index_in[3] = ff_tang;
-                      sino_3D_out[index_out] += segment[index_in] * (axial_idx - axial_floor)
-                                                * (crystal1_num_in_ceil - crystal1_num_in)
-                                                * (crystal2_num_in_ceil - crystal2_num_in);
-                      index_in[2] = fc_view;
-                      index_in[3] = fc_tang;
-                      sino_3D_out[index_out] += segment[index_in] * (axial_idx - axial_floor)
-                                                * (crystal1_num_in_ceil - crystal1_num_in)
-                                                * (crystal2_num_in - crystal2_num_in_floor);
-                      index_in[2] = cc_view;
-                      index_in[3] = cc_tang;
-                      sino_3D_out[index_out] += segment[index_in] * (axial_idx - axial_floor)
-                                                * (crystal1_num_in - crystal1_num_in_floor)
-                                                * (crystal2_num_in - crystal2_num_in_floor);
-                      index_in[2] = cf_view;
-                      index_in[3] = cf_tang;
-                      sino_3D_out[index_out] += segment[index_in] * (axial_idx - axial_floor)
-                                                * (crystal1_num_in - crystal1_num_in_floor)
-                                                * (crystal2_num_in_ceil - crystal2_num_in);
+                      const Array<1, float>& in_row = in_sinogram[view];
+                      Array<1, float>& out_row = sino_3D_out[axial][view];
+                      for (int tang = weights_tang.min_out_index; tang <= weights_tang.max_out_index; ++tang)
+                        out_row[tang] += static_cast<float>(in_row[tang] * weight);
                     }
                 }
             }
         }
+
       if (proj_data_out.set_segment(sino_3D_out) == Succeeded::no)
         return Succeeded::no;
     }
-
   return Succeeded::yes;
 }
 
@@ -25,6 +25,7 @@
 #include "stir/Bin.h"
 #include "stir/Succeeded.h"
 #include <limits>
+#include <vector>
 #include "stir/warning.h"
 #include "stir/error.h"
 
@@ -50,12 +51,6 @@ inverse_SSRB(ProjData& proj_data_4D, const ProjData& proj_data_3D)
       return Succeeded::no;
     }
 
-  // keep sinograms out of the loop to avoid reallocations
-  // initialise to something because there's no default constructor
-  Sinogram<float> sino_4D = proj_data_4D.get_empty_sinogram(proj_data_4D.get_min_axial_pos_num(0), 0);
-  Sinogram<float> sino_3D_1 = proj_data_3D.get_empty_sinogram(proj_data_3D.get_min_axial_pos_num(0), 0);
-  Sinogram<float> sino_3D_2 = proj_data_3D.get_empty_sinogram(proj_data_3D.get_min_axial_pos_num(0), 0);
-
   // prefill a vector with the axial positions of the direct sinograms
   VectorWithOffset<float> in_m(proj_data_3D.get_min_axial_pos_num(0), proj_data_3D.get_max_axial_pos_num(0));
   for (int in_ax_pos_num = proj_data_3D.get_min_axial_pos_num(0); in_ax_pos_num <= proj_data_3D.get_max_axial_pos_num(0);
@@ -64,6 +59,18 @@ inverse_SSRB(ProjData& proj_data_4D, const ProjData& proj_data_3D)
       in_m.at(in_ax_pos_num) = proj_data_3D_info_sptr->get_m(Bin(0, 0, in_ax_pos_num, 0));
     }
 
+  // For every output sinogram, find which direct sinograms are closest, and their weights.
+  // This only depends on the geometry, so we do it first, such that the loop over the data can be parallelised.
+  struct InterpolationTerms
+  {
+    int out_segment_num;
+    int out_ax_pos_num;
+    // 2nd axial position is only used when interpolating
+    int in_ax_pos_num_1, in_ax_pos_num_2;
+    float weight_1, weight_2;
+    bool interpolate;
+  };
+  std::vector<InterpolationTerms> all_terms;
   for (int out_segment_num = proj_data_4D.get_min_segment_num(); out_segment_num <= proj_data_4D.get_max_segment_num();
        ++out_segment_num)
     {
@@ -71,65 +78,99 @@ inverse_SSRB(ProjData& proj_data_4D, const ProjData& proj_data_3D)
            out_ax_pos_num <= proj_data_4D.get_max_axial_pos_num(out_segment_num);
            ++out_ax_pos_num)
         {
-          for (int k = proj_data_4D.get_proj_data_info_sptr()->get_min_tof_pos_num();
-               k <= proj_data_4D.get_proj_data_info_sptr()->get_max_tof_pos_num();
-               ++k)
-            {
-              sino_4D = proj_data_4D.get_empty_sinogram(out_ax_pos_num, out_segment_num, false, k);
-              const float out_m = proj_data_4D_info_sptr->get_m(Bin(out_segment_num, 0, out_ax_pos_num, 0));
+          const float out_m = proj_data_4D_info_sptr->get_m(Bin(out_segment_num, 0, out_ax_pos_num, 0));
 
-              // Go through all direct sinograms to check which pair are closest.
-              bool sinogram_set = false;
-              for (int in_ax_pos_num = proj_data_3D.get_min_axial_pos_num(0);
-                   in_ax_pos_num <= proj_data_3D.get_max_axial_pos_num(0);
-                   ++in_ax_pos_num)
-                {
-                  // for the first slice there is no previous
-                  const auto distance_to_previous = in_ax_pos_num == proj_data_3D.get_min_axial_pos_num(0)
-                                                        ? std::numeric_limits<float>::max()
-                                                        : std::abs(out_m - in_m.at(in_ax_pos_num - 1));
-                  const auto distance_to_current = std::abs(out_m - in_m.at(in_ax_pos_num));
-                  // for the last slice there is no next
-                  const auto distance_to_next = in_ax_pos_num == proj_data_3D.get_max_axial_pos_num(0)
+          // Go through all direct sinograms to check which pair are closest.
+          bool sinogram_found = false;
+          for (int in_ax_pos_num = proj_data_3D.get_min_axial_pos_num(0); in_ax_pos_num <= proj_data_3D.get_max_axial_pos_num(0);
+               ++in_ax_pos_num)
+            {
+              // for the first slice there is no previous
+              const auto distance_to_previous = in_ax_pos_num == proj_data_3D.get_min_axial_pos_num(0)
                                                     ? std::numeric_limits<float>::max()
-                                                    : std::abs(out_m - in_m.at(in_ax_pos_num + 1));
-                  if (distance_to_current <= distance_to_previous && distance_to_current <= distance_to_next)
+                                                    : std::abs(out_m - in_m.at(in_ax_pos_num - 1));
+              const auto distance_to_current = std::abs(out_m - in_m.at(in_ax_pos_num));
+              // for the last slice there is no next
+              const auto distance_to_next = in_ax_pos_num == proj_data_3D.get_max_axial_pos_num(0)
+                                                ? std::numeric_limits<float>::max()
+                                                : std::abs(out_m - in_m.at(in_ax_pos_num + 1));
+              if (distance_to_current <= distance_to_previous && distance_to_current <= distance_to_next)
+                {
+                  InterpolationTerms terms;
+                  terms.out_segment_num = out_segment_num;
+                  terms.out_ax_pos_num = out_ax_pos_num;
+                  terms.in_ax_pos_num_1 = terms.in_ax_pos_num_2 = in_ax_pos_num;
+                  terms.weight_1 = 1.F;
+                  terms.weight_2 = 0.F;
+                  terms.interpolate = distance_to_current > 1E-4;
+                  if (terms.interpolate)
                     {
-                      if (distance_to_current <= 1E-4)
-                        {
-                          sino_3D_1 = proj_data_3D.get_sinogram(in_ax_pos_num, 0, false, k);
-                          sino_4D += sino_3D_1;
-                        }
-                      else if (distance_to_previous < distance_to_next)
+                      if (distance_to_previous < distance_to_next)
                         { // interpolate between the previous axial slice and this one
                           const auto distance_sum = distance_to_previous + distance_to_current;
-                          sino_3D_1 = proj_data_3D.get_sinogram(in_ax_pos_num - 1, 0, false, k);
-                          sino_3D_2 = proj_data_3D.get_sinogram(in_ax_pos_num, 0, false, k);
-                          sino_3D_1.sapyb(distance_to_current / distance_sum, sino_3D_2, distance_to_previous / distance_sum);
-                          sino_4D += sino_3D_1;
+                          terms.in_ax_pos_num_1 = in_ax_pos_num - 1;
+                          terms.weight_1 = distance_to_current / distance_sum;
+                          terms.weight_2 = distance_to_previous / distance_sum;
                         }
                       else
                         { // interpolate between the next axial slice and this one
                           const auto distance_sum = distance_to_next + distance_to_current;
-                          sino_3D_1 = proj_data_3D.get_sinogram(in_ax_pos_num + 1, 0, false, k);
-                          sino_3D_2 = proj_data_3D.get_sinogram(in_ax_pos_num, 0, false, k);
-                          sino_3D_1.sapyb(distance_to_current / distance_sum, sino_3D_2, distance_to_next / distance_sum);
-                          sino_4D += sino_3D_1;
+                          terms.in_ax_pos_num_1 = in_ax_pos_num + 1;
+                          terms.weight_1 = distance_to_current / distance_sum;
+                          terms.weight_2 = distance_to_next / distance_sum;
                         }
-
-                      if (proj_data_4D.set_sinogram(sino_4D) == Succeeded::no)
-                        return Succeeded::no;
-                      sinogram_set = true;
-                      break;
                     }
-                }
-              if (!sinogram_set)
-                { // it is logically not possible to get here
-                  error("no matching sinogram found for segment %d and axial pos %d", out_segment_num, out_ax_pos_num);
+                  all_terms.push_back(terms);
+                  sinogram_found = true;
+                  break;
                 }
             }
+          if (!sinogram_found)
+            { // it is logically not possible to get here
+              error("no matching sinogram found for segment %d and axial pos %d", out_segment_num, out_ax_pos_num);
+            }
+        }
+    }
+
+  bool all_set = true;
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
+  for (int i = 0; i < static_cast<int>(all_terms.size()); ++i)
+    {
+      const InterpolationTerms& terms = all_terms[i];
+      for (int k = proj_data_4D.get_proj_data_info_sptr()->get_min_tof_pos_num();
+           k <= proj_data_4D.get_proj_data_info_sptr()->get_max_tof_pos_num();
+           ++k)
+        {
+          Sinogram<float> sino_4D = proj_data_4D.get_empty_sinogram(terms.out_ax_pos_num, terms.out_segment_num, false, k);
+          Sinogram<float> sino_3D_1 = sino_4D;
+          Sinogram<float> sino_3D_2 = sino_4D;
+#ifdef STIR_OPENMP
+          // reading/writing to streams is not safe in multi-threaded code
+          // so protect with a critical section
+#  pragma omp critical(INVERSE_SSRB_IO)
+#endif
+          {
+            sino_3D_1 = proj_data_3D.get_sinogram(terms.in_ax_pos_num_1, 0, false, k);
+            if (terms.interpolate)
+              sino_3D_2 = proj_data_3D.get_sinogram(terms.in_ax_pos_num_2, 0, false, k);
+          }
+          if (terms.interpolate)
+            sino_3D_1.sapyb(terms.weight_1, sino_3D_2, terms.weight_2);
+          sino_4D += sino_3D_1;
+
+#ifdef STIR_OPENMP
+#  pragma omp critical(INVERSE_SSRB_IO)
+#endif
+          {
+            if (proj_data_4D.set_sinogram(sino_4D) == Succeeded::no)
+              all_set = false;
+          }
         }
     }
+  if (!all_set)
+    return Succeeded::no;
   return Succeeded::yes;
 }
 END_NAMESPACE_STIR
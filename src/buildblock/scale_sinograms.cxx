@@ -23,6 +23,8 @@
 #include "stir/Sinogram.h"
 #include "stir/Succeeded.h"
 #include "stir/warning.h"
+#include <vector>
+#include <utility>
 
 START_NAMESPACE_STIR
 
@@ -31,22 +33,42 @@ scale_sinograms(ProjData& scaled_scatter_proj_data, const ProjData& scatter_proj
 {
   const ProjDataInfo& proj_data_info = dynamic_cast<const ProjDataInfo&>(*scaled_scatter_proj_data.get_proj_data_info_sptr());
 
-  Bin bin;
-
-  for (bin.segment_num() = proj_data_info.get_min_segment_num(); bin.segment_num() <= proj_data_info.get_max_segment_num();
-       ++bin.segment_num())
-    for (bin.axial_pos_num() = proj_data_info.get_min_axial_pos_num(bin.segment_num());
-         bin.axial_pos_num() <= proj_data_info.get_max_axial_pos_num(bin.segment_num());
-         ++bin.axial_pos_num())
+  // list of all sinograms, such that we can parallelise over them
+  std::vector<std::pair<int, int>> all_segment_axial_pos_nums;
+  for (int segment_num = proj_data_info.get_min_segment_num(); segment_num <= proj_data_info.get_max_segment_num(); ++segment_num)
+    for (int axial_pos_num = proj_data_info.get_min_axial_pos_num(segment_num);
+         axial_pos_num <= proj_data_info.get_max_axial_pos_num(segment_num);
+         ++axial_pos_num)
+      all_segment_axial_pos_nums.emplace_back(segment_num, axial_pos_num);
+
+  bool all_set = true;
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
+  for (int i = 0; i < static_cast<int>(all_segment_axial_pos_nums.size()); ++i)
+    {
+      const int segment_num = all_segment_axial_pos_nums[i].first;
+      const int axial_pos_num = all_segment_axial_pos_nums[i].second;
+      Sinogram<float> scaled_sinogram = scaled_scatter_proj_data.get_empty_sinogram(axial_pos_num, segment_num);
+#ifdef STIR_OPENMP
+      // reading/writing to streams is not safe in multi-threaded code
+      // so protect with a critical section
+#  pragma omp critical(SCALE_SINOGRAMS_IO)
+#endif
       {
-        Sinogram<float> scatter_sinogram = scatter_proj_data.get_sinogram(bin.axial_pos_num(), bin.segment_num(), 0);
-        Sinogram<float> scaled_sinogram = scatter_sinogram;
-        scaled_sinogram *= scale_factors[bin.segment_num()][bin.axial_pos_num()];
+        scaled_sinogram = scatter_proj_data.get_sinogram(axial_pos_num, segment_num, 0);
+      }
+      scaled_sinogram *= scale_factors[segment_num][axial_pos_num];
 
+#ifdef STIR_OPENMP
+#  pragma omp critical(SCALE_SINOGRAMS_IO)
+#endif
+      {
         if (scaled_scatter_proj_data.set_sinogram(scaled_sinogram) == Succeeded::no)
-          return Succeeded::no;
+          all_set = false;
       }
-  return Succeeded::yes;
+    }
+  return all_set ? Succeeded::yes : Succeeded::no;
 }
 
 Array<2, float>
@@ -57,62 +79,76 @@ get_scale_factors_per_sinogram(const ProjData& numerator_proj_data,
 
   const ProjDataInfo& proj_data_info = dynamic_cast<const ProjDataInfo&>(*weights_proj_data.get_proj_data_info_sptr());
 
-  Bin bin;
-
   // scale factor to use when the denominator is zero
   const float default_scale = 1.F;
 
   IndexRange2D sinogram_range(proj_data_info.get_min_segment_num(), proj_data_info.get_max_segment_num(), 0, 0);
+  // list of all sinograms, such that we can parallelise over them
+  std::vector<std::pair<int, int>> all_segment_axial_pos_nums;
   for (int segment_num = proj_data_info.get_min_segment_num(); segment_num <= proj_data_info.get_max_segment_num(); ++segment_num)
     {
       sinogram_range[segment_num].resize(proj_data_info.get_min_axial_pos_num(segment_num),
                                          proj_data_info.get_max_axial_pos_num(segment_num));
+      for (int axial_pos_num = proj_data_info.get_min_axial_pos_num(segment_num);
+           axial_pos_num <= proj_data_info.get_max_axial_pos_num(segment_num);
+           ++axial_pos_num)
+        all_segment_axial_pos_nums.emplace_back(segment_num, axial_pos_num);
     }
-  Array<2, float> total_in_denominator(sinogram_range), total_in_numerator(sinogram_range);
   Array<2, float> scale_factors(sinogram_range);
-  for (bin.segment_num() = proj_data_info.get_min_segment_num(); bin.segment_num() <= proj_data_info.get_max_segment_num();
-       ++bin.segment_num())
-    for (bin.axial_pos_num() = proj_data_info.get_min_axial_pos_num(bin.segment_num());
-         bin.axial_pos_num() <= proj_data_info.get_max_axial_pos_num(bin.segment_num());
-         ++bin.axial_pos_num())
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
+  for (int i = 0; i < static_cast<int>(all_segment_axial_pos_nums.size()); ++i)
+    {
+      const int segment_num = all_segment_axial_pos_nums[i].first;
+      const int axial_pos_num = all_segment_axial_pos_nums[i].second;
+      Sinogram<float> weights = weights_proj_data.get_empty_sinogram(axial_pos_num, segment_num);
+      Sinogram<float> denominator_sinogram = weights;
+      Sinogram<float> numerator_sinogram = weights;
+#ifdef STIR_OPENMP
+      // reading from streams is not safe in multi-threaded code
+      // so protect with a critical section
+#  pragma omp critical(GET_SCALE_FACTORS_PER_SINOGRAM_IO)
+#endif
       {
-        const Sinogram<float> weights = weights_proj_data.get_sinogram(bin.axial_pos_num(), bin.segment_num());
-        const Sinogram<float> denominator_sinogram = denominator_proj_data.get_sinogram(bin.axial_pos_num(), bin.segment_num());
-        const Array<2, float> weighted_denominator_sinogram = denominator_sinogram * weights;
-        const Array<2, float> weighted_numerator_sinogram
-            = numerator_proj_data.get_sinogram(bin.axial_pos_num(), bin.segment_num()) * weights;
-        total_in_denominator[bin.segment_num()][bin.axial_pos_num()] = weighted_denominator_sinogram.sum();
-        total_in_numerator[bin.segment_num()][bin.axial_pos_num()] = weighted_numerator_sinogram.sum();
-
-        if (denominator_sinogram.sum() == 0.f)
-          {
-            scale_factors[bin.segment_num()][bin.axial_pos_num()] = default_scale;
-          }
-        else
-          {
-            if (total_in_denominator[bin.segment_num()][bin.axial_pos_num()]
-                <= denominator_sinogram.sum() / (proj_data_info.get_num_views() * proj_data_info.get_num_tangential_poss())
-                       * .001f)
-              {
-                warning("Problem at segment %d, axial pos %d in finding sinogram scaling factor.\n"
-                        "Weighted data in denominator %g is very small compared to total in sinogram %g.\n"
-                        "Adjust weights?.\n"
-                        "I will use scale factor %g",
-                        bin.segment_num(),
-                        bin.axial_pos_num(),
-                        total_in_denominator[bin.segment_num()][bin.axial_pos_num()],
-                        denominator_sinogram.sum(),
-                        default_scale);
-                scale_factors[bin.segment_num()][bin.axial_pos_num()] = default_scale;
-              }
-            else
-              {
-                scale_factors[bin.segment_num()][bin.axial_pos_num()]
-                    = total_in_numerator[bin.segment_num()][bin.axial_pos_num()]
-                      / total_in_denominator[bin.segment_num()][bin.axial_pos_num()];
-              }
-          }
+        weights = weights_proj_data.get_sinogram(axial_pos_num, segment_num);
+        denominator_sinogram = denominator_proj_data.get_sinogram(axial_pos_num, segment_num);
+        numerator_sinogram = numerator_proj_data.get_sinogram(axial_pos_num, segment_num);
       }
+      const Array<2, float> weighted_denominator_sinogram = denominator_sinogram * weights;
+      const Array<2, float> weighted_numerator_sinogram = numerator_sinogram * weights;
+      const float total_in_denominator = weighted_denominator_sinogram.sum();
+      const float total_in_numerator = weighted_numerator_sinogram.sum();
+
+      if (denominator_sinogram.sum() == 0.f)
+        {
+          scale_factors[segment_num][axial_pos_num] = default_scale;
+        }
+      else
+        {
+          if (total_in_denominator
+              <= denominator_sinogram.sum() / (proj_data_info.get_num_views() * proj_data_info.get_num_tangential_poss()) * .001f)
+            {
+#ifdef STIR_OPENMP
+#  pragma omp critical(GET_SCALE_FACTORS_PER_SINOGRAM_WARNING)
+#endif
+              warning("Problem at segment %d, axial pos %d in finding sinogram scaling factor.\n"
+                      "Weighted data in denominator %g is very small compared to total in sinogram %g.\n"
+                      "Adjust weights?.\n"
+                      "I will use scale factor %g",
+                      segment_num,
+                      axial_pos_num,
+                      total_in_denominator,
+                      denominator_sinogram.sum(),
+                      default_scale);
+              scale_factors[segment_num][axial_pos_num] = default_scale;
+            }
+          else
+            {
+              scale_factors[segment_num][axial_pos_num] = total_in_numerator / total_in_denominator;
+            }
+        }
+    }
 
   return scale_factors;
 }
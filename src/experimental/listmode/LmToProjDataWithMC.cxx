@@ -125,6 +125,12 @@ LmToProjDataWithMC::process_new_time_event(const CListTime& time_event)
       = compose(this->_transformation_to_reference_position, this->ro3d_ptr->get_motion_in_scanner_coords_rel_time(current_time));
 }
 
+bool
+LmToProjDataWithMC::can_bin_events_in_parallel() const
+{
+  return false;
+}
+
 void
 LmToProjDataWithMC::get_bin_from_event(Bin& bin, const CListEvent& event) const
 {
@@ -27,6 +27,9 @@
 #include "stir/listmode/CListRecordROOT.h"
 #include "stir/RegisteredObject.h"
 #include "stir/error.h"
+#include <cstdint>
+#include <future>
+#include <vector>
 
 // forward declaration of ROOT's TChain
 class TChain;
@@ -59,8 +62,18 @@ START_NAMESPACE_STIR
         exclude random events := ${EXCLUDE_RANDOM}
         low energy window (keV) := 0
         upper energy window (keV):= 10000
+        number of entries per read chunk := 10000
+        prefetch in background := 0
        \endverbatim
 
+       Entries are read from the ROOT file in chunks (with their size set by the
+       <tt>number of entries per read chunk</tt> keyword). All entries in a chunk are
+       read and converted in one go, and get_next_record() then returns the
+       events from that buffer. This avoids having to lock the ROOT file for every event
+       when using multiple threads. ROOT's TTreeCache takes care of reading the baskets of all
+       used branches at once. Optionally, the next chunk is read in a background thread while the
+       current one is being used (<tt>prefetch in background</tt> keyword).
+
         \warning The initial validation of the ROOT input was done with version 5.34.
 */
 
@@ -86,7 +99,9 @@ public:
   //!  \details Returns the next record in the ROOT file.
   //!  The code is adapted from Sadek A. Nehmeh and CR Schmidtlein,
   //! downloaded from <a href="http://www.opengatecollaboration.org/STIR">here</a>
-  virtual Succeeded get_next_record(CListRecordROOT& record) = 0;
+  //!
+  //! This function can be called from multiple threads.
+  virtual Succeeded get_next_record(CListRecordROOT& record);
   //! Go to the first event.
   inline Succeeded reset();
   //! Must be called before calling for the first event.
@@ -161,6 +176,10 @@ public:
   inline void set_upper_energy_window(float);
   //! Set the read_optional_root_fields flag
   inline void set_optional_ROOT_fields(bool);
+  //! Set the number of entries that are read from the file in one go
+  inline void set_num_entries_per_chunk(int);
+  //! Set if the next chunk should be read in a background thread
+  inline void set_prefetch_in_background(bool);
 
   void set_crystal_repeater_x(int);
   void set_crystal_repeater_y(int);
@@ -277,6 +296,20 @@ protected:
   // data, a finite least significant bit.
   double least_significant_clock_bit;
 
+  //! Number of entries that are read from the file in one go. Default is 10000
+  int num_entries_per_chunk;
+  //! Read the next chunk in a background thread. Default is false
+  bool prefetch_in_background;
+
+  //! Reads the detector IDs for \a brentry and computes the ring and crystal numbers
+  /*! \a brentry is the entry number in the current tree, as returned by TChain::LoadTree(). */
+  virtual void get_rings_and_crystals_for_entry(int& ring1, int& ring2, int& crystal1, int& crystal2, long long int brentry) = 0;
+
+  //! Waits for the background thread (if any) and discards all buffered events
+  /*! Next events will be read from \c current_position. Derived classes need to call this in their destructor,
+      as the background thread calls get_rings_and_crystals_for_entry(). */
+  void discard_buffered_events();
+
   //! OpenGATE output ROOT energy information is given in MeV, these methods convert to keV
   float get_energy1_in_keV() const
   {
@@ -287,6 +320,11 @@ protected:
     return energy2 * 1e3;
   };
 
+  //! Enables the branch \a name, and sets its address and \a branch_ptr_ptr
+  /*! All branches are disabled in set_up(). Recent ROOT versions do not enable a branch in TChain::SetBranchAddress(),
+      so we have to do this explicitly. */
+  void set_branch_address(const char* name, void* address, TBranch** branch_ptr_ptr);
+
   //! Checks brentry satisfies the randoms, scatter and energy conditions.
   bool check_brentry_randoms_scatter_energy_conditions(long long int brentry);
 
@@ -297,6 +335,33 @@ protected:
       return;
     error(ret == 0 ? "Entry is null." : "ROOT I/O error.");
   };
+
+private:
+  //! Information for one event, as passed to CListRecordROOT::init_from_data()
+  struct BufferedEvent
+  {
+    int ring1, ring2, crystal1, crystal2;
+    double time1, delta_timing_bin;
+    std::int32_t eventID1, eventID2;
+    //! Position in the file after this event
+    unsigned long int next_position;
+  };
+
+  //! Reads the (accepted) events of the next chunk, starting from \a position, which is updated
+  void read_chunk(std::vector<BufferedEvent>& events, unsigned long int& position);
+  //! Gets the next chunk (from the background thread, if any) and starts reading the one after if requested
+  void fill_buffer();
+
+  //! Events in the current chunk
+  std::vector<BufferedEvent> buffer;
+  //! Index of the next event to return in \c buffer
+  std::size_t buffer_index;
+  //! Position in the file of the next chunk
+  unsigned long int read_position;
+  //! Events read by the background thread
+  std::vector<BufferedEvent> prefetch_buffer;
+  //! Used to wait for the background thread (and get any exceptions it throws)
+  std::future<void> prefetch_future;
 };
 
 END_NAMESPACE_STIR
@@ -31,6 +31,7 @@ Succeeded
 InputStreamFromROOTFile::reset()
 {
   current_position = starting_stream_position;
+  discard_buffered_events();
   return Succeeded::yes;
 }
 
@@ -50,6 +51,7 @@ InputStreamFromROOTFile::set_get_position(const InputStreamFromROOTFile::SavedPo
     current_position = nentries; // go to eof
   else
     current_position = saved_get_positions[pos];
+  discard_buffered_events();
 
   return Succeeded::yes;
 }
@@ -152,6 +154,18 @@ InputStreamFromROOTFile::set_optional_ROOT_fields(bool val)
   read_optional_root_fields = val;
 }
 
+void
+InputStreamFromROOTFile::set_num_entries_per_chunk(int val)
+{
+  num_entries_per_chunk = val;
+}
+
+void
+InputStreamFromROOTFile::set_prefetch_in_background(bool val)
+{
+  prefetch_in_background = val;
+}
+
 int
 InputStreamFromROOTFile::get_num_axial_crystals_per_block_v() const
 {
@@ -96,9 +96,10 @@ public:
 #endif
 
   ~InputStreamFromROOTFileForCylindricalPET() override
-  {}
+  {
+    this->discard_buffered_events();
+  }
 
-  Succeeded get_next_record(CListRecordROOT& record) override;
   //! Must be called before calling for the first event.
   Succeeded set_up(const std::string& header_path) override;
 
@@ -131,6 +132,8 @@ protected:
   void initialise_keymap() override;
   bool post_processing() override;
 
+  void get_rings_and_crystals_for_entry(int& ring1, int& ring2, int& crystal1, int& crystal2, long long int brentry) override;
+
   //! \name TBranches for Cylindrical PET
   //@{
   TBranch* br_crystalID1 = nullptr;
@@ -88,9 +88,9 @@ public:
 #endif
 
   ~InputStreamFromROOTFileForECATPET() override
-  {}
-
-  Succeeded get_next_record(CListRecordROOT& record) override;
+  {
+    this->discard_buffered_events();
+  }
 
   //! gives method information
   virtual std::string method_info() const;
@@ -118,6 +118,8 @@ protected:
   void initialise_keymap() override;
   bool post_processing() override;
 
+  void get_rings_and_crystals_for_entry(int& ring1, int& ring2, int& crystal1, int& crystal2, long long int brentry) override;
+
   //! \name TBranches for ECAT PET
   //@{
   TBranch* br_crystalID1 = nullptr;
@@ -33,6 +33,7 @@
 #include "boost/shared_array.hpp"
 #include <string>
 #include <iostream>
+#include <future>
 #include <vector>
 
 START_NAMESPACE_STIR
@@ -55,6 +56,9 @@ namespace RDF_HDF5
     (on the stack) before reading. This is efficient in many cases, but impractical
     in others.
 
+    Data are read from the file in blocks of 10 MB. If the HDF5 library is thread-safe,
+    the next block is read in a background thread while the current one is being used.
+
     \par Requirements
     \c RecordT needs to have the following member functions
     \code
@@ -138,12 +142,25 @@ private:
   void read_data(char* output, const std::streampos offset, const hsize_t size) const;
   // members for buffering
 
-  boost::shared_array<char> buffer;
+  mutable boost::shared_array<char> buffer;
   std::size_t max_buffer_size;
   //! currently filled size
   mutable std::size_t buffer_size;
   mutable std::streampos start_of_buffer_offset;
   void fill_buffer(const std::streampos offset) const;
+
+  //! \name members for reading the next block in the background
+  //@{
+  mutable boost::shared_array<char> next_buffer;
+  mutable std::size_t next_buffer_size;
+  mutable std::streampos start_of_next_buffer_offset;
+  //! start reading the block after the current buffer (if any)
+  void start_reading_next_buffer() const;
+  //! wait until the background read has finished
+  void wait_for_next_buffer() const;
+  // note: this has to be declared last, such that it is destroyed first (which waits for the background thread)
+  mutable std::future<void> next_buffer_future;
+  //@}
 };
 
 } // namespace RDF_HDF5
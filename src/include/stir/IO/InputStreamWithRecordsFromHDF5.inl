@@ -66,6 +66,9 @@ InputStreamWithRecordsFromHDF5<RecordT>::InputStreamWithRecordsFromHDF5(const st
 
   this->max_buffer_size = 10000000;
   this->buffer.reset(new char[this->max_buffer_size]);
+#ifdef H5_HAVE_THREADSAFE
+  this->next_buffer.reset(new char[this->max_buffer_size]);
+#endif
 
   set_up();
 }
@@ -74,6 +77,8 @@ template <class RecordT>
 Succeeded
 InputStreamWithRecordsFromHDF5<RecordT>::set_up()
 {
+  // make sure we are not reading from the old file anymore
+  wait_for_next_buffer();
   input_sptr.reset(new GEHDF5Wrapper(m_filename));
   data_sptr.reset(new char[this->max_size_of_record]);
   starting_stream_position = 0;
@@ -83,16 +88,67 @@ InputStreamWithRecordsFromHDF5<RecordT>::set_up()
   m_list_size = input_sptr->get_dataset_size() - this->size_of_record_signature;
 
   this->buffer_size = 0;
+  this->next_buffer_size = 0;
   return Succeeded::yes;
 }
 
+template <class RecordT>
+void
+InputStreamWithRecordsFromHDF5<RecordT>::wait_for_next_buffer() const
+{
+  if (this->next_buffer_future.valid())
+    {
+      // get() rethrows any exception thrown in the background thread
+      try
+        {
+          this->next_buffer_future.get();
+        }
+      catch (...)
+        {
+          this->next_buffer_size = 0;
+          throw;
+        }
+    }
+}
+
+template <class RecordT>
+void
+InputStreamWithRecordsFromHDF5<RecordT>::start_reading_next_buffer() const
+{
+#ifdef H5_HAVE_THREADSAFE
+  const std::streampos offset = this->start_of_buffer_offset + static_cast<std::streampos>(this->buffer_size);
+  if (this->buffer_size == 0 || offset >= static_cast<std::streampos>(m_list_size))
+    return;
+  this->next_buffer_size = static_cast<std::size_t>(std::min(static_cast<uint64_t>(this->max_buffer_size), m_list_size - offset));
+  this->start_of_next_buffer_offset = offset;
+  // note: while the background thread is running, only it will access input_sptr
+  this->next_buffer_future = std::async(std::launch::async, [this, offset]() {
+    input_sptr->read_list_data(this->next_buffer.get(), offset, hsize_t(this->next_buffer_size));
+  });
+#endif
+}
+
 template <class RecordT>
 void
 InputStreamWithRecordsFromHDF5<RecordT>::fill_buffer(const std::streampos offset) const
 {
-  this->buffer_size = static_cast<std::size_t>(std::min(static_cast<uint64_t>(this->max_buffer_size), m_list_size - offset));
-  input_sptr->read_list_data(buffer.get(), offset, hsize_t(this->buffer_size));
-  this->start_of_buffer_offset = offset;
+  wait_for_next_buffer();
+  if (this->next_buffer_size > 0 && offset >= this->start_of_next_buffer_offset
+      && offset < this->start_of_next_buffer_offset + static_cast<std::streampos>(this->next_buffer_size))
+    {
+      // the data has been read in the background already
+      std::swap(this->buffer, this->next_buffer);
+      this->buffer_size = this->next_buffer_size;
+      this->start_of_buffer_offset = this->start_of_next_buffer_offset;
+    }
+  else
+    {
+      this->buffer_size = static_cast<std::size_t>(std::min(static_cast<uint64_t>(this->max_buffer_size), m_list_size - offset));
+      input_sptr->read_list_data(buffer.get(), offset, hsize_t(this->buffer_size));
+      this->start_of_buffer_offset = offset;
+    }
+  this->next_buffer_size = 0;
+  start_reading_next_buffer();
 }
 
 template <class RecordT>
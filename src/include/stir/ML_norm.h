@@ -50,6 +50,7 @@
 #include "stir/ProjDataInfoBlocksOnCylindricalNoArcCorr.h"
 #include "stir/IndexRange2D.h"
 #include "stir/Sinogram.h"
+#include "stir/Viewgram.h"
 #include "stir/warning.h"
 #include <iostream>
 
@@ -207,8 +208,15 @@ typedef FanProjData BlockData3D;
 
 void make_fan_data_remove_gaps(FanProjData& fan_data, const ProjData& proj_data);
 
+//! As make_fan_data_remove_gaps(FanProjData&, const ProjData&), but for projection data where every bin is equal to \a value
+void make_fan_data_remove_gaps(FanProjData& fan_data, const ProjDataInfo& proj_data_info, const float value);
+
 void set_fan_data_add_gaps(ProjData& proj_data, const FanProjData& fan_data, const float gap_value = 0.F);
 
+//! As set_fan_data_add_gaps(ProjData&, const FanProjData&, const float), but for a single viewgram
+/*! Bins outside the fan are not modified. */
+void set_fan_data_add_gaps(Viewgram<float>& viewgram, const FanProjData& fan_data, const float gap_value = 0.F);
+
 void apply_block_norm(FanProjData& fan_data, const BlockData3D& block_data, const bool apply = true);
 
 void apply_geo_norm(FanProjData& fan_data, const GeoData3D& geo_data, const bool apply = true);
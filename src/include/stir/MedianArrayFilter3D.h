@@ -37,8 +37,14 @@ class Coordinate3D;
   of the sorted array. For 2n elements, we use (sorted[n-1]+sorted[n])/2
   (starting indices from 0).
 
-  For 3D images, the current filter works by extracting all neigbours (given by
+  For arrays with a regular index range, the filter first sorts all voxel values. It then
+  keeps a histogram of the ranks of the voxels in the mask, and updates it when moving
+  the mask along the x direction (i.e. only the voxels that leave or enter the mask are
+  removed or inserted). The cost per voxel is therefore proportional to the area of the
+  mask in the (y,z)-plane, instead of its volume.
+  Otherwise, it works by extracting all neigbours (given by
   the mask) to a 1D array, and getting the median of that array.
+  Different planes are processed in parallel when using OpenMP.
 
   This implementation of the median filter handles edges by taking a median of
   all available pixels. For instance, when a 3x3 mask is used, and the
@@ -35,7 +35,10 @@ class Coordinate3D;
   The minimum value for a 1D array of 2n+1 elements is defined as the minimum element
   of the sorted array.
 
-  For 3D images, the current filter works by extracting all neigbours (given by
+  For arrays with a regular index range, the filter is applied separably (i.e. along x,
+  y and z in turn), using the van Herk/Gil-Werman algorithm for every 1D line, such
+  that the cost does not depend on the mask size (see detail::sliding_window_extremum_1d()).
+  Otherwise, it works by extracting all neigbours (given by
   the mask) to a 1D array, and getting the minimal of that array.
 
   This implementation of the minimal filter handles edges by taking the minimum of
@@ -36,6 +36,7 @@
 #include "stir/unique_ptr.h"
 #include <string>
 #include <memory>
+#include <vector>
 
 START_NAMESPACE_STIR
 
@@ -56,6 +57,8 @@ template <typename T>
 class LOR;
 template <typename T>
 class LORInAxialAndNoArcCorrSinogramCoordinates;
+template <typename T>
+class LORAs2Points;
 class PMessage;
 
 /*!
@@ -332,6 +335,23 @@ public:
   virtual void get_LOR(LORInAxialAndNoArcCorrSinogramCoordinates<float>&, const Bin&) const = 0;
   //@}
 
+  //! \name Functions that return geometrical info for many bins at once
+  /*! These are equivalent to calling the corresponding function for a single Bin for every element
+      of \a bins, but are faster when called from Python (where the bins are specified via NumPy arrays)
+      and are parallelised with OpenMP (if enabled). The output vectors are resized to the size of \a bins.
+  */
+  //@{
+  void get_s_for_bins(std::vector<float>& s, const std::vector<Bin>& bins) const;
+  void get_phi_for_bins(std::vector<float>& phi, const std::vector<Bin>& bins) const;
+  void get_m_for_bins(std::vector<float>& m, const std::vector<Bin>& bins) const;
+  void get_t_for_bins(std::vector<float>& t, const std::vector<Bin>& bins) const;
+  //! Get the end-points of the LORs corresponding to the bins
+  /*! The end-points are the intersections of the LOR (as returned by get_LOR()) with the cylinder
+      with the radius of the LOR, i.e. they use the same coordinate system as get_m().
+  */
+  void get_LOR_end_points_for_bins(std::vector<LORAs2Points<float>>& lors, const std::vector<Bin>& bins) const;
+  //@}
+
   //! \name Functions that return info on the sampling in the different coordinates
   //@{
   //! Get sampling distance in the \c t coordinate
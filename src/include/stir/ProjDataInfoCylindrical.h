@@ -203,8 +203,10 @@ public:
 
   //! Find to which segment and axial position a ring pair contributes
   /*!
-    \a ring1, \a ring2 have to between 0 and scanner.get_num_rings()-1.
+    \a ring1, \a ring2 have to between 0 and scanner.get_num_rings()-1 (otherwise Succeeded::no is returned).
     \return Succeeded::yes when a corresponding segment was found.
+
+    This uses a look-up table for all ring pairs, computed on first use (in a thread-safe manner).
     \warning axial_pos_num returned might be outside the actual range in the proj_data_info.
 
     For CTI data with span, this essentially implements a 'michelogram'.
@@ -307,6 +309,17 @@ private:
   //! This member stores a table converting segment/axial_pos to ring1+ring2
   mutable VectorWithOffset<VectorWithOffset<int>> segment_axial_pos_to_ring1_plus_ring2;
 
+  struct SegmentAxialPosNum
+  {
+    int segment_num;
+    int axial_pos_num;
+  };
+  //! This member stores a table converting a ring pair to segment/axial_pos, used in get_segment_axial_pos_num_for_ring_pair()
+  /*! Stored as a 1D array with index <code>ring1*num_rings + ring2</code>. Ring pairs that do not belong to
+      any segment have a \c segment_num larger than get_max_segment_num().
+  */
+  mutable std::vector<SegmentAxialPosNum> ring_pair_to_segment_axial_pos_num;
+
   //! This function sets all of the above
   void initialise_ring_diff_arrays() const;
 
@@ -240,17 +240,30 @@ ProjDataInfoCylindrical::get_segment_axial_pos_num_for_ring_pair(int& segment_nu
                                                                  const int ring1,
                                                                  const int ring2) const
 {
-  assert(0 <= ring1);
-  assert(ring1 < get_scanner_ptr()->get_num_rings());
-  assert(0 <= ring2);
-  assert(ring2 < get_scanner_ptr()->get_num_rings());
-
-  // KT 01/08/2002 swapped rings
-  if (get_segment_num_for_ring_difference(segment_num, ring2 - ring1) == Succeeded::no)
+  const int num_rings = get_scanner_ptr()->get_num_rings();
+  if (ring1 < 0 || ring1 >= num_rings || ring2 < 0 || ring2 >= num_rings)
     return Succeeded::no;
 
-  // see initialise_ring_diff_arrays() for some info
-  ax_pos_num = (ring1 + ring2 - ax_pos_num_offset[segment_num]) * get_num_axial_poss_per_ring_inc(segment_num) / 2;
+  this->initialise_ring_diff_arrays_if_not_done_yet();
+
+  if (!sampling_corresponds_to_physical_rings)
+    {
+      // no look-up table available
+      // KT 01/08/2002 swapped rings
+      if (get_segment_num_for_ring_difference(segment_num, ring2 - ring1) == Succeeded::no)
+        return Succeeded::no;
+
+      // see initialise_ring_diff_arrays() for some info
+      ax_pos_num = (ring1 + ring2 - ax_pos_num_offset[segment_num]) * get_num_axial_poss_per_ring_inc(segment_num) / 2;
+      return Succeeded::yes;
+    }
+
+  // use look-up table, see initialise_ring_diff_arrays() for some info
+  const SegmentAxialPosNum& entry = ring_pair_to_segment_axial_pos_num[ring1 * num_rings + ring2];
+  if (entry.segment_num > get_max_segment_num())
+    return Succeeded::no;
+  segment_num = entry.segment_num;
+  ax_pos_num = entry.axial_pos_num;
   return Succeeded::yes;
 }
 
@@ -27,6 +27,7 @@
 #include "stir/DetectionPositionPair.h"
 #include "stir/VectorWithOffset.h"
 #include "stir/CartesianCoordinate3D.h"
+#include <cstdint>
 
 START_NAMESPACE_STIR
 
@@ -182,6 +183,22 @@ public:
   */
   void get_all_det_pos_pairs_for_bin(std::vector<DetectionPositionPair<>>&, const Bin&) const;
 
+  //! This routine gets the detector pairs corresponding to many bins
+  /*!
+    Equivalent to calling get_det_pos_pair_for_bin() for every element of \a bins (and therefore has
+    the same restrictions), but parallelised with OpenMP (if enabled). \a det_pos_pairs is resized to
+    the size of \a bins.
+  */
+  void get_det_pos_pairs_for_bins(std::vector<DetectionPositionPair<>>& det_pos_pairs, const std::vector<Bin>& bins) const;
+
+  //! This routine gets the bins corresponding to many detector pairs
+  /*!
+    Equivalent to calling get_bin_for_det_pos_pair() for every element of \a det_pos_pairs, but
+    parallelised with OpenMP (if enabled). \a bins is resized to the size of \a det_pos_pairs.
+    The bin value is set to 1 if a corresponding bin was found, and to -1 otherwise.
+  */
+  void get_bins_for_det_pos_pairs(std::vector<Bin>& bins, const std::vector<DetectionPositionPair<>>& det_pos_pairs) const;
+
 private:
   // old function, now private. Use get_bin_for_det_pos_pair instead.
   //! This gets Bin coordinates for a particular detector pair
@@ -240,10 +257,11 @@ private:
 
   // used in get_view_tangential_pos_num_for_det_num_pair()
   // we prestore a lookup-table in terms for unmashed view/tangpos
+  // (using 16-bit integers to reduce the size of the table, as it is accessed for every list mode event)
   struct ViewTangPosSwap
   {
-    int view_num;
-    int tang_pos_num;
+    std::int16_t view_num;
+    std::int16_t tang_pos_num;
     bool swap_detectors;
   };
   mutable VectorWithOffset<VectorWithOffset<ViewTangPosSwap>> det1det2_to_uncompressed_view_tangpos;
@@ -28,8 +28,10 @@
 #include "stir/recon_buildblock/BackProjectorByBin.h"
 #include "stir/analytic/FBP3DRP/ColsherFilter.h"
 #include "stir/ArcCorrection.h"
+#include "stir/VectorWithOffset.h"
 #include "stir/shared_ptr.h"
 #include "stir/RegisteredParsingObject.h"
+#include <vector>
 
 START_NAMESPACE_STIR
 
@@ -86,6 +88,15 @@ class Succeeded;
           the zooming.
           - So, no zooming is needed on the final image.
 
+  \par Parallel processing
+  When STIR is compiled with OpenMP, the related viewgrams are processed in parallel
+  (arc-correction, forward projection of the missing data, Colsher filtering and
+  backprojection). Every thread backprojects into its own image (see BackProjectorByBin),
+  and views are distributed over the threads in a fixed order, such that the final
+  image does not depend on the timing of the threads (for a given number of threads).
+  The Colsher filters for all segments are constructed before the views are processed.
+  Views are processed serially when intermediate images are displayed after each view
+  (<tt>display level</tt> larger than 2).
 
 */
 class FBP3DRPReconstruction
@@ -157,6 +168,8 @@ protected:
   void do_colsher_filter_view(RelatedViewgrams<float>& viewgrams);
   //!  3D backprojection implentation for 8 viewgrams.
   void do_3D_backprojection_view(RelatedViewgrams<float> const& viewgrams, int rmin, int rmax);
+  //!  Constructs the Colsher filters for all segments with basic views (in parallel if OpenMP is enabled)
+  void do_set_up_colsher_filters(const std::vector<int>& segment_nums);
   //!  Saving CPU timing and values of reconstruction parameters into a log file.
   void do_log_file(const VoxelsOnCartesianGrid<float>& image);
 
@@ -236,7 +249,10 @@ private:
   shared_ptr<ForwardProjectorByBin> forward_projector_sptr;
   shared_ptr<BackProjectorByBin> back_projector_sptr;
 #ifndef NRFFT
+  //! Prototype of the Colsher filter, copied and set-up for every segment
   ColsherFilter colsher_filter;
+  //! Colsher filters for every segment (indexed by segment number)
+  VectorWithOffset<shared_ptr<ColsherFilter>> colsher_filters;
 #endif
   float alpha_fit;
   float beta_fit;
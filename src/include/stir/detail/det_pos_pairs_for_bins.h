@@ -0,0 +1,93 @@
+/*!
+  \file
+  \ingroup buildblock_detail
+  \brief Implementations of get_det_pos_pairs_for_bins() and get_bins_for_det_pos_pairs() shared by
+  stir::ProjDataInfoCylindricalNoArcCorr and stir::ProjDataInfoGenericNoArcCorr
+
+  \author Kris Thielemans
+
+*/
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+
+#ifndef __stir_detail_det_pos_pairs_for_bins_H__
+#define __stir_detail_det_pos_pairs_for_bins_H__
+
+#include "stir/Bin.h"
+#include "stir/DetectionPositionPair.h"
+#include "stir/Succeeded.h"
+#include <vector>
+
+namespace stir
+{
+namespace detail
+{
+
+/*! \ingroup buildblock_detail
+  \brief Calls <tt>proj_data_info.get_det_pos_pair_for_bin()</tt> for every element of \a bins (in parallel if OpenMP is enabled)
+
+  This checks the ring pairs for all segments first, such that error() is called (if necessary) before
+  going into the parallel loop. The caller has to make sure that any look-up tables used by
+  \c get_det_pos_pair_for_bin() are initialised.
+*/
+template <typename ProjDataInfoT>
+inline void
+get_det_pos_pairs_for_bins(const ProjDataInfoT& proj_data_info,
+                           std::vector<DetectionPositionPair<>>& det_pos_pairs,
+                           const std::vector<Bin>& bins)
+{
+  {
+    int ring_num1, ring_num2;
+    for (int segment_num = proj_data_info.get_min_segment_num(); segment_num <= proj_data_info.get_max_segment_num();
+         ++segment_num)
+      proj_data_info.get_ring_pair_for_segment_axial_pos_num(
+          ring_num1, ring_num2, segment_num, proj_data_info.get_min_axial_pos_num(segment_num));
+  }
+
+  det_pos_pairs.resize(bins.size());
+  const long long num_bins = static_cast<long long>(bins.size());
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(static)
+#endif
+  for (long long i = 0; i < num_bins; ++i)
+    proj_data_info.get_det_pos_pair_for_bin(det_pos_pairs[i], bins[i]);
+}
+
+/*! \ingroup buildblock_detail
+  \brief Calls <tt>proj_data_info.get_bin_for_det_pos_pair()</tt> for every element of \a det_pos_pairs (in parallel if OpenMP is
+  enabled)
+
+  The bin value is set to 1 if a corresponding bin was found, and to -1 otherwise. The caller has to make
+  sure that any look-up tables used by \c get_bin_for_det_pos_pair() are initialised.
+*/
+template <typename ProjDataInfoT>
+inline void
+get_bins_for_det_pos_pairs(const ProjDataInfoT& proj_data_info,
+                           std::vector<Bin>& bins,
+                           const std::vector<DetectionPositionPair<>>& det_pos_pairs)
+{
+  bins.resize(det_pos_pairs.size());
+  const long long num_bins = static_cast<long long>(det_pos_pairs.size());
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(static)
+#endif
+  for (long long i = 0; i < num_bins; ++i)
+    {
+      Bin& bin = bins[i];
+      if (proj_data_info.get_bin_for_det_pos_pair(bin, det_pos_pairs[i]) == Succeeded::yes)
+        bin.set_bin_value(1.F);
+      else
+        bin.set_bin_value(-1.F);
+    }
+}
+
+} // namespace detail
+} // namespace stir
+
+#endif
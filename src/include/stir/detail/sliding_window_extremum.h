@@ -0,0 +1,163 @@
+/*!
+  \file
+  \ingroup buildblock_detail
+  \brief Functions to compute the minimum or maximum over a sliding window, used by
+  stir::MinimalArrayFilter3D and stir::MaximalArrayFilter3D
+
+  \author Kris Thielemans
+
+*/
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+
+#ifndef __stir_detail_sliding_window_extremum_H__
+#define __stir_detail_sliding_window_extremum_H__
+
+#include "stir/Array.h"
+#include "stir/BasicCoordinate.h"
+#include "stir/error.h"
+#include <algorithm>
+#include <vector>
+
+namespace stir
+{
+namespace detail
+{
+
+/*! \ingroup buildblock_detail
+  \brief Computes \c out[i] = op(in[i-radius],...,in[i+radius]) for a 1D sequence of length \c n
+
+  Elements outside the range <tt>[0,n)</tt> are ignored (i.e. the window is truncated at the edges).
+  \c op has to be an associative and idempotent binary operation, such as a min or max.
+
+  This uses the van Herk/Gil-Werman algorithm: the sequence is divided in blocks of
+  size <tt>2*radius+1</tt>, and cumulative results are computed forwards and backwards
+  within each block. Every window then spans at most 2 blocks, such that the cost is
+  independent of the \c radius (3 evaluations of \c op per element).
+
+  \c forward and \c backward are work vectors, passed to avoid reallocations.
+*/
+template <typename elemT, typename BinaryOperation>
+inline void
+sliding_window_extremum_1d(elemT* out,
+                           const elemT* in,
+                           const int n,
+                           const int radius,
+                           BinaryOperation op,
+                           std::vector<elemT>& forward,
+                           std::vector<elemT>& backward)
+{
+  if (n <= 0)
+    return;
+  if (radius <= 0)
+    {
+      std::copy(in, in + n, out);
+      return;
+    }
+  const int block_size = 2 * radius + 1;
+  forward.resize(n);
+  backward.resize(n);
+  for (int i = 0; i < n; ++i)
+    forward[i] = (i % block_size == 0) ? in[i] : op(forward[i - 1], in[i]);
+  for (int i = n - 1; i >= 0; --i)
+    backward[i] = (i == n - 1 || (i + 1) % block_size == 0) ? in[i] : op(backward[i + 1], in[i]);
+  for (int i = 0; i < n; ++i)
+    {
+      const int low = std::max(i - radius, 0);
+      const int high = std::min(i + radius, n - 1);
+      if (low / block_size == high / block_size)
+        {
+          // window is inside a single block, so it starts at the beginning of the block,
+          // or it ends at the end of the sequence (which is also the end of the block)
+          out[i] = (low % block_size == 0) ? forward[high] : backward[low];
+        }
+      else
+        out[i] = op(backward[low], forward[high]);
+    }
+}
+
+/*! \ingroup buildblock_detail
+  \brief Applies sliding_window_extremum_1d() along every dimension of a 3D array
+
+  The window is a box with half-sizes given by \c mask_radius (in the usual z,y,x order).
+  As the operation is separable, this gives the same result as taking \c op over all
+  elements in the box (truncated at the edges of the array).
+
+  \warning \a out_array and \a in_array need to have the same regular index range.
+*/
+template <typename elemT, typename BinaryOperation>
+inline void
+sliding_window_extremum_3d(Array<3, elemT>& out_array,
+                           const Array<3, elemT>& in_array,
+                           const BasicCoordinate<3, int>& mask_radius,
+                           BinaryOperation op)
+{
+  BasicCoordinate<3, int> min_indices, max_indices;
+  if (!in_array.get_regular_range(min_indices, max_indices))
+    error("sliding_window_extremum_3d: can only handle arrays with a regular range");
+  assert(out_array.get_index_range() == in_array.get_index_range());
+  const int min_z = min_indices[1];
+  const int max_z = max_indices[1];
+  const int min_y = min_indices[2];
+  const int max_y = max_indices[2];
+  const int min_x = min_indices[3];
+  const int max_x = max_indices[3];
+  const int num_y = max_y - min_y + 1;
+  const int num_x = max_x - min_x + 1;
+
+  // along x (from in_array to out_array), then along y
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
+  for (int z = min_z; z <= max_z; ++z)
+    {
+      std::vector<elemT> line_in(std::max(num_x, num_y)), line_out(line_in.size()), forward, backward;
+      for (int y = min_y; y <= max_y; ++y)
+        {
+          std::copy(in_array[z][y].begin(), in_array[z][y].end(), line_in.begin());
+          sliding_window_extremum_1d(line_out.data(), line_in.data(), num_x, mask_radius[3], op, forward, backward);
+          std::copy(line_out.begin(), line_out.begin() + num_x, out_array[z][y].begin());
+        }
+      if (mask_radius[2] <= 0)
+        continue;
+      for (int x = min_x; x <= max_x; ++x)
+        {
+          for (int y = min_y; y <= max_y; ++y)
+            line_in[y - min_y] = out_array[z][y][x];
+          sliding_window_extremum_1d(line_out.data(), line_in.data(), num_y, mask_radius[2], op, forward, backward);
+          for (int y = min_y; y <= max_y; ++y)
+            out_array[z][y][x] = line_out[y - min_y];
+        }
+    }
+
+  // along z
+  if (mask_radius[1] <= 0)
+    return;
+  const int num_z = max_z - min_z + 1;
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
+  for (int y = min_y; y <= max_y; ++y)
+    {
+      std::vector<elemT> line_in(num_z), line_out(num_z), forward, backward;
+      for (int x = min_x; x <= max_x; ++x)
+        {
+          for (int z = min_z; z <= max_z; ++z)
+            line_in[z - min_z] = out_array[z][y][x];
+          sliding_window_extremum_1d(line_out.data(), line_in.data(), num_z, mask_radius[1], op, forward, backward);
+          for (int z = min_z; z <= max_z; ++z)
+            out_array[z][y][x] = line_out[z - min_z];
+        }
+    }
+}
+
+} // namespace detail
+} // namespace stir
+
+#endif
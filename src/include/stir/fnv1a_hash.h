@@ -0,0 +1,57 @@
+//
+//
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+/*!
+  \file
+  \ingroup buildblock
+  \brief Definition of stir::fnv1a_hash
+*/
+
+#ifndef __stir_fnv1a_hash_H__
+#define __stir_fnv1a_hash_H__
+
+#include "stir/common.h"
+#include <cstddef>
+#include <cstdint>
+#include <string>
+
+START_NAMESPACE_STIR
+
+//! 64-bit FNV-1a hash of a block of memory
+/*! \ingroup buildblock
+  This hash is the same on all systems (unlike \c std::hash), so it can be used to check
+  if files written to disk are still compatible with the current settings.
+  It is not suitable for cryptographic purposes.
+
+  Data can be hashed in several chunks by passing the result for the previous chunks as \a hash.
+*/
+inline std::uint64_t
+fnv1a_hash(const char* data, const std::size_t size, std::uint64_t hash = 14695981039346656037ULL)
+{
+  for (std::size_t i = 0; i < size; ++i)
+    {
+      hash ^= static_cast<unsigned char>(data[i]);
+      hash *= 1099511628211ULL;
+    }
+  return hash;
+}
+
+//! 64-bit FNV-1a hash of a string
+/*! \ingroup buildblock
+ */
+inline std::uint64_t
+fnv1a_hash(const std::string& str)
+{
+  return fnv1a_hash(str.data(), str.size());
+}
+
+END_NAMESPACE_STIR
+
+#endif
@@ -17,13 +17,19 @@
 
 */
 
+#ifndef __stir_interpolate_projdata_H__
+#define __stir_interpolate_projdata_H__
+
 #include "stir/numerics/BSplines.h"
+#include "stir/BasicCoordinate.h"
+#include "stir/shared_ptr.h"
+#include <vector>
 
 START_NAMESPACE_STIR
 
 class ProjData;
-template <int num_dimensions, class T>
-class BasicCoordinate;
+class ProjDataInfo;
+class Succeeded;
 template <class elemT>
 class Sinogram;
 template <class elemT>
@@ -63,4 +69,96 @@ Succeeded
 interpolate_blocks_on_cylindrical_projdata(ProjData& proj_data_out, const ProjData& proj_data_in, bool remove_interleaving);
 //@}
 
+//! Class for interpolating direct sinograms to a different geometry, using precomputed weights
+/*!
+  \ingroup projdata
+  This class implements interpolate_projdata(), but splits it in 2 stages:
+  set_up() computes the interpolation weights, which only depend on the geometry of the
+  input and output projection data (and the spline types), and interpolate() applies them
+  to the data. This is useful when data with the same geometry have to be interpolated many
+  times, e.g. in the iterations of ScatterEstimation.
+
+  For cylindrical scanners, the B-spline weights are computed for every dimension separately,
+  and interpolate() applies them dimension by dimension, which is much faster than evaluating
+  the B-splines for every output bin. Results are identical to evaluating the B-splines directly (up to rounding errors).
+  For BlocksOnCylindrical scanners, the weights of the neighbouring input bins are stored for every
+  output view and tangential position (and for every axial position), avoiding repeated geometric computations.
+
+  When STIR is compiled with OpenMP, interpolate() is multi-threaded.
+
+  \todo This currently only works for direct sinograms (i.e. segment 0).
+*/
+class ProjDataInterpolator
+{
+public:
+  //! Default constructor. You need to call set_up() before using interpolate().
+  ProjDataInterpolator();
+
+  //! Constructor that calls set_up()
+  ProjDataInterpolator(const shared_ptr<const ProjDataInfo>& proj_data_info_out_sptr,
+                       const shared_ptr<const ProjDataInfo>& proj_data_info_in_sptr,
+                       const BasicCoordinate<3, BSpline::BSplineType>& spline_types,
+                       const bool remove_interleaving);
+
+  //! Compute the interpolation weights
+  /*! Arguments are as for interpolate_projdata(). Calls error() if the projection data are not compatible. */
+  void set_up(const shared_ptr<const ProjDataInfo>& proj_data_info_out_sptr,
+              const shared_ptr<const ProjDataInfo>& proj_data_info_in_sptr,
+              const BasicCoordinate<3, BSpline::BSplineType>& spline_types,
+              const bool remove_interleaving);
+
+  //! Check if set_up() was called with the same arguments (up to equality of the ProjDataInfo objects)
+  bool is_set_up_for(const ProjDataInfo& proj_data_info_out,
+                     const ProjDataInfo& proj_data_info_in,
+                     const BasicCoordinate<3, BSpline::BSplineType>& spline_types,
+                     const bool remove_interleaving) const;
+
+  //! Interpolate segment 0 of \a proj_data_in and store it in \a proj_data_out
+  /*! The projection data need to have the same ProjDataInfo as used in set_up(). */
+  Succeeded interpolate(ProjData& proj_data_out, const ProjData& proj_data_in) const;
+
+private:
+  //! Weights for sampling a 1D array with B-splines, \c num_terms for every output index
+  struct Weights1D
+  {
+    int min_out_index;
+    int max_out_index;
+    int num_terms;
+    std::vector<int> indices;
+    std::vector<BSpline::pos_type> weights;
+  };
+  //! An input bin and its weight for a BlocksOnCylindrical output bin
+  struct WeightedIndex2D
+  {
+    int index1;
+    int index2;
+    double weight;
+  };
+
+  bool _already_set_up;
+  shared_ptr<const ProjDataInfo> _proj_data_info_out_sptr;
+  shared_ptr<const ProjDataInfo> _proj_data_info_in_sptr;
+  //! used when removing interleaving, otherwise equal to \c _proj_data_info_in_sptr
+  shared_ptr<const ProjDataInfo> _non_interleaved_proj_data_info_in_sptr;
+  BasicCoordinate<3, BSpline::BSplineType> _spline_types;
+  bool _remove_interleaving;
+  bool _use_blocks_on_cylindrical;
+
+  // weights for cylindrical scanners (axial, view, tangential)
+  Weights1D _weights_1D[3];
+
+  // weights for BlocksOnCylindrical scanners
+  //! input axial positions and weights for every output axial position (2 per position)
+  std::vector<std::pair<int, double>> _axial_weights;
+  //! input view and tangential positions and weights for all output view and tangential positions
+  std::vector<WeightedIndex2D> _transaxial_weights;
+  //! offsets in \c _transaxial_weights for every output view and tangential position (and one at the end)
+  std::vector<std::size_t> _transaxial_offsets;
+
+  void set_up_cylindrical();
+  void set_up_blocks_on_cylindrical();
+};
+
 END_NAMESPACE_STIR
+
+#endif
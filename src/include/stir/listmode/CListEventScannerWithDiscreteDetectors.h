@@ -36,7 +36,19 @@ template <class ProjDataInfoT>
 class CListEventScannerWithDiscreteDetectors : public CListEvent
 {
 public:
-  explicit CListEventScannerWithDiscreteDetectors(const shared_ptr<const ProjDataInfo>& proj_data_info);
+  //! Constructor
+  /*! The uncompressed ProjDataInfo (i.e. without any mashing or axial compression) is expensive to
+    construct and its lookup tables are filled on first use. If many events are created for the
+    same list mode data, it is therefore best to construct it once (using create_uncompressed_proj_data_info())
+    and pass it as \a uncompressed_proj_data_info_sptr. If it is a null pointer, it will be
+    created by the constructor.
+  */
+  explicit CListEventScannerWithDiscreteDetectors(const shared_ptr<const ProjDataInfo>& proj_data_info,
+                                                  const shared_ptr<const ProjDataInfoT>& uncompressed_proj_data_info_sptr
+                                                  = shared_ptr<const ProjDataInfoT>());
+
+  //! Constructs the uncompressed ProjDataInfo for the scanner used by \a proj_data_info
+  static shared_ptr<const ProjDataInfoT> create_uncompressed_proj_data_info(const ProjDataInfo& proj_data_info);
 
   const Scanner* get_scanner_ptr() const { return this->uncompressed_proj_data_info_sptr->get_scanner_ptr(); }
 
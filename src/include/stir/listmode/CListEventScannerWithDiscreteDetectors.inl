@@ -29,12 +29,27 @@ START_NAMESPACE_STIR
 
 template <class ProjDataInfoT>
 CListEventScannerWithDiscreteDetectors<ProjDataInfoT>::CListEventScannerWithDiscreteDetectors(
-    const shared_ptr<const ProjDataInfo>& proj_data_info_sptr)
+    const shared_ptr<const ProjDataInfo>& proj_data_info_sptr,
+    const shared_ptr<const ProjDataInfoT>& uncompressed_proj_data_info_sptr)
 {
   if (!proj_data_info_sptr)
     error("CListEventScannerWithDiscreteDetectors constructor called with zero pointer");
 
-  auto scanner_sptr = proj_data_info_sptr->get_scanner_sptr();
+  if (uncompressed_proj_data_info_sptr)
+    {
+      if (*uncompressed_proj_data_info_sptr->get_scanner_ptr() != *proj_data_info_sptr->get_scanner_ptr())
+        error("CListEventScannerWithDiscreteDetectors constructor called with uncompressed ProjDataInfo for a different scanner");
+      this->uncompressed_proj_data_info_sptr = uncompressed_proj_data_info_sptr;
+    }
+  else
+    this->uncompressed_proj_data_info_sptr = create_uncompressed_proj_data_info(*proj_data_info_sptr);
+}
+
+template <class ProjDataInfoT>
+shared_ptr<const ProjDataInfoT>
+CListEventScannerWithDiscreteDetectors<ProjDataInfoT>::create_uncompressed_proj_data_info(const ProjDataInfo& proj_data_info)
+{
+  auto scanner_sptr = proj_data_info.get_scanner_sptr();
   // get bare pointer of uncompressed ProjDataInfo
   auto pdi_ptr = ProjDataInfo::construct_proj_data_info(scanner_sptr,
                                                         1,
@@ -49,10 +64,11 @@ CListEventScannerWithDiscreteDetectors<ProjDataInfoT>::CListEventScannerWithDisc
   if (!pdi_ptr_cast)
     {
       delete pdi_ptr;
-      error("CListEventScannerWithDiscreteDetectors constructor called with scanner that gives wrong type of ProjDataInfo");
+      error("CListEventScannerWithDiscreteDetectors::create_uncompressed_proj_data_info called with scanner that gives wrong "
+            "type of ProjDataInfo");
     }
   // set shared_ptr from bare pointer (will take ownership)
-  this->uncompressed_proj_data_info_sptr.reset(pdi_ptr_cast);
+  return shared_ptr<const ProjDataInfoT>(pdi_ptr_cast);
 }
 
 template <class ProjDataInfoT>
@@ -65,6 +65,8 @@ private:
   typedef CListRecordECAT8_32bit CListRecordT;
   std::string listmode_filename;
   shared_ptr<InputStreamWithRecords<CListRecordT, bool>> current_lm_data_ptr;
+  //! uncompressed ProjDataInfo, shared by all records created by get_empty_record_sptr()
+  shared_ptr<const ProjDataInfoCylindricalNoArcCorr> uncompressed_proj_data_info_sptr;
 
   InterfileListmodeHeaderSiemens interfile_parser;
 
@@ -66,6 +66,8 @@ private:
   typedef CListRecordGEHDF5 CListRecordT;
   std::string listmode_filename;
   shared_ptr<InputStreamWithRecordsFromHDF5<CListRecordT>> current_lm_data_ptr;
+  //! uncompressed ProjDataInfo, shared by all records created by get_empty_record_sptr()
+  shared_ptr<const ProjDataInfoCylindricalNoArcCorr> uncompressed_proj_data_info_sptr;
   unsigned long first_time_stamp;
   unsigned long lm_duration_in_millisecs;
 
@@ -126,7 +126,7 @@ public:
 
   bool has_delayeds() const override { return true; }
 
-  inline unsigned long int get_total_number_of_events() const override;
+  unsigned long int get_total_number_of_events() const override;
 
 private:
   //! Check if the hroot contains a full scanner description
@@ -140,6 +140,9 @@ private:
   //! Pointer to the listmode data
   shared_ptr<InputStreamFromROOTFile> root_file_sptr;
 
+  //! uncompressed ProjDataInfo, shared by all records created by get_empty_record_sptr()
+  shared_ptr<const ProjDataInfoCylindricalNoArcCorr> uncompressed_proj_data_info_sptr;
+
   //! \name Variables that can be set in the hroot file to define a scanner's geometry etc.
   //! They are compared to the Scanner  (if set)  and the InputStreamFromROOTFile
   //! geometry, as given by the repeaters. Can be used to check for inconsistencies.
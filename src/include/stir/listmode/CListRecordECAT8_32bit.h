@@ -77,7 +77,10 @@ public:
   DataType get_data() const { return this->data; }
 
 public:
-  CListEventECAT8_32bit(const shared_ptr<const ProjDataInfo>& proj_data_info_sptr);
+  //! Constructor, see CListEventScannerWithDiscreteDetectors::CListEventScannerWithDiscreteDetectors
+  CListEventECAT8_32bit(const shared_ptr<const ProjDataInfo>& proj_data_info_sptr,
+                        const shared_ptr<const ProjDataInfoCylindricalNoArcCorr>& uncompressed_proj_data_info_sptr
+                        = shared_ptr<const ProjDataInfoCylindricalNoArcCorr>());
 
   //! This routine returns the corresponding detector pair
   void get_detection_position(DetectionPositionPair<>&) const override;
@@ -214,8 +217,10 @@ class CListRecordECAT8_32bit : public CListRecord // currently no gating yet
   }
 
 public:
-  CListRecordECAT8_32bit(const shared_ptr<const ProjDataInfo>& proj_data_info_sptr)
-      : event_data(proj_data_info_sptr)
+  CListRecordECAT8_32bit(const shared_ptr<const ProjDataInfo>& proj_data_info_sptr,
+                         const shared_ptr<const ProjDataInfoCylindricalNoArcCorr>& uncompressed_proj_data_info_sptr
+                         = shared_ptr<const ProjDataInfoCylindricalNoArcCorr>())
+      : event_data(proj_data_info_sptr, uncompressed_proj_data_info_sptr)
   {}
 
   virtual Succeeded init_from_data_ptr(const char* const data_ptr,
@@ -204,9 +204,15 @@ public:
     the latter for adjusting the time of each event, as GE listmode files do not start with time-stamp 0.
 
     get_time_in_millisecs() should therefore be zero at the first time stamp.
+
+    See CListEventScannerWithDiscreteDetectors::CListEventScannerWithDiscreteDetectors for
+    \a uncompressed_proj_data_info_sptr.
   */
-  CListRecordGEHDF5(const shared_ptr<const ProjDataInfo>& proj_data_info_sptr, const unsigned long first_time_stamp)
-      : CListEventCylindricalScannerWithDiscreteDetectors(proj_data_info_sptr),
+  CListRecordGEHDF5(const shared_ptr<const ProjDataInfo>& proj_data_info_sptr,
+                    const unsigned long first_time_stamp,
+                    const shared_ptr<const ProjDataInfoCylindricalNoArcCorr>& uncompressed_proj_data_info_sptr
+                    = shared_ptr<const ProjDataInfoCylindricalNoArcCorr>())
+      : CListEventCylindricalScannerWithDiscreteDetectors(proj_data_info_sptr, uncompressed_proj_data_info_sptr),
         first_time_stamp(first_time_stamp)
   {}
 
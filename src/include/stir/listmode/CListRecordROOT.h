@@ -34,7 +34,10 @@ START_NAMESPACE_STIR
 class CListEventROOT : public CListEventCylindricalScannerWithDiscreteDetectors
 {
 public:
-  CListEventROOT(const shared_ptr<const ProjDataInfo>& proj_data_info);
+  //! Constructor, see CListEventScannerWithDiscreteDetectors::CListEventScannerWithDiscreteDetectors
+  CListEventROOT(const shared_ptr<const ProjDataInfo>& proj_data_info,
+                 const shared_ptr<const ProjDataInfoCylindricalNoArcCorr>& uncompressed_proj_data_info_sptr
+                 = shared_ptr<const ProjDataInfoCylindricalNoArcCorr>());
 
   //! This routine returns the corresponding detector pair
   void get_detection_position(DetectionPositionPair<>&) const override;
@@ -116,8 +119,10 @@ public:
            && raw[1] == dynamic_cast<CListRecordROOT const&>(e2).raw[1];
   }
 
-  CListRecordROOT(const shared_ptr<const ProjDataInfo>& proj_data_info_sptr)
-      : event_data(proj_data_info_sptr)
+  CListRecordROOT(const shared_ptr<const ProjDataInfo>& proj_data_info_sptr,
+                  const shared_ptr<const ProjDataInfoCylindricalNoArcCorr>& uncompressed_proj_data_info_sptr
+                  = shared_ptr<const ProjDataInfoCylindricalNoArcCorr>())
+      : event_data(proj_data_info_sptr, uncompressed_proj_data_info_sptr)
   {}
 
   virtual Succeeded init_from_data(const int& ring1,
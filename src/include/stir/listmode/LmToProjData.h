@@ -107,6 +107,12 @@ class ListTime;
     num_segments_in_memory := -1
     ; same for TOF bins
     num_TOF_bins_in_memory := 1
+    ; number of events that are read before finding their bins with
+    ; multiple threads (if STIR is compiled with OpenMP). The number of threads
+    ; is set as elsewhere in STIR (see set_num_threads()). Events are still
+    ; stored in the order in which they occur, so the output does not depend
+    ; on the number of threads. Set to 0 or 1 to disable multi-threading.
+    num_events_per_block := 10000
   End :=
   \endverbatim
 
@@ -204,6 +210,10 @@ public:
   bool get_store_delayeds() const;
   void set_num_segments_in_memory(int);
   int get_num_segments_in_memory() const;
+  //! Set the number of events for which bins are found in parallel
+  /*! A value of 0 or 1 disables multi-threading. */
+  void set_num_events_per_block(int);
+  int get_num_events_per_block() const;
   void set_num_events_to_store(long int);
   long int get_num_events_to_store() const;
   void set_time_frame_definitions(const TimeFrameDefinitions&);
@@ -228,6 +238,13 @@ public:
 #endif
 
 protected:
+  //! returns if get_bin_from_event() can be called in parallel for events in a block
+  /*! Default implementation returns \c true. Derived classes for which get_bin_from_event()
+      is not thread-safe, depends on the order of the events or on information from
+      process_new_time_event(), should return \c false.
+  */
+  virtual bool can_bin_events_in_parallel() const;
+
   //! will be called when a new time frame starts
   /*! The frame numbers start from 1. */
   virtual void start_new_time_frame(const unsigned int new_frame_num);
@@ -276,6 +293,8 @@ protected:
 
   int num_segments_in_memory;
   int num_timing_poss_in_memory;
+  //! number of events in a block for which bins are found in parallel
+  int num_events_per_block;
   long int num_events_to_store;
   int max_segment_num_to_process;
 
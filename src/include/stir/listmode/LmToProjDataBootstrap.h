@@ -84,6 +84,9 @@ protected:
 
   void get_bin_from_event(Bin& bin, const ListEvent&) const override;
 
+  //! returns \c false, as get_bin_from_event() relies on the order of the events
+  bool can_bin_events_in_parallel() const override;
+
   // \name parsing variables
   //@{
   //! used to seed the pseudo-random number generator
@@ -88,6 +88,9 @@ protected:
 
   void get_bin_from_event(Bin& bin, const ListEvent&) const override;
 
+  //! returns \c false, as uses a (non-thread-safe) random number generator in get_bin_from_event()
+  bool can_bin_events_in_parallel() const override;
+
   // \name parsing variables
   //@{
   //! used to seed the pseudo-random number generator
@@ -54,7 +54,7 @@ class BSplinesRegularGrid
 {
 
 public:
-  // only there for tests
+  // used in tests and by ProjDataInterpolator
   Array<num_dimensions, out_elemT> get_coefficients() const { return this->_coeffs; }
 
   //! constructor given an array of samples and the spline type
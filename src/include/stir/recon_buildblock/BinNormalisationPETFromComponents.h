@@ -23,7 +23,9 @@
 #include "stir/recon_buildblock/BinNormalisation.h"
 #include "stir/ML_norm.h"
 #include "stir/ProjData.h"
+#include "stir/Array.h"
 #include "stir/shared_ptr.h"
+#include <vector>
 
 START_NAMESPACE_STIR
 
@@ -67,7 +69,11 @@ START_NAMESPACE_STIR
   \todo This class should probably be derived from BinNormalisationWithCalibration.
   \todo The class currently does not handle "compressed" projection data (i.e. span etc).
 
-  \todo Currently, set_up() creates a ProjDataInMemory object with the PET detection efficiencies.
+  set_up() computes the PET detection efficiencies for all bins and stores them per viewgram, such that
+  apply(), undo() and get_bin_efficiency() do not need to recombine the components, or copy any data.
+  These functions can therefore be called from multiple threads without locking.
+
+  \todo Currently, set_up() stores the PET detection efficiencies for all bins.
   This uses a lot of memory unfortunately.
 
 */
@@ -157,10 +163,15 @@ protected:
 
 private:
   static const char* const registered_name;
-  shared_ptr<ProjDataInMemory> invnorm_proj_data_sptr;
+  //! detection efficiencies for all viewgrams (i.e. the inverse of the normalisation factors)
+  /*! Use get_invnorm_viewgram() to access an element. */
+  std::vector<Array<2, float>> invnorm_viewgrams;
   bool _already_allocated;
   bool _is_trivial;
+  //! compute the detection efficiencies and store them in \c invnorm_viewgrams
   void create_proj_data();
+  //! find the detection efficiencies for a viewgram
+  const Array<2, float>& get_invnorm_viewgram(const int segment_num, const int view_num, const int timing_pos_num) const;
 };
 
 END_NAMESPACE_STIR
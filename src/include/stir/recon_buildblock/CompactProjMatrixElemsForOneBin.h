@@ -0,0 +1,110 @@
+//
+//
+/*!
+  \file
+  \ingroup projection
+
+  \brief Declaration of class stir::CompactProjMatrixElemsForOneBin
+*/
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+
+#ifndef __stir_recon_buildblock_CompactProjMatrixElemsForOneBin_H__
+#define __stir_recon_buildblock_CompactProjMatrixElemsForOneBin_H__
+
+#include "stir/common.h"
+#include <vector>
+#include <string>
+#include <cstdint>
+
+START_NAMESPACE_STIR
+
+class ProjMatrixElemsForOneBin;
+
+/*!
+  \ingroup projection
+  \brief A compact (lossy) way to store the elements of a ProjMatrixElemsForOneBin
+
+  This is used by ProjMatrixByBin to fit more elements in its cache.
+
+  Voxel coordinates are run-length encoded: consecutive elements whose voxels are neighbours
+  (i.e. every coordinate changes by at most 1, as is the case for voxels along a ray) are stored as a
+  single run. A run consists of the coordinates of its first voxel and a 1-byte code for every step
+  to the next voxel. A run of voxels along one axis is therefore stored with 1 byte per element. Values are stored
+  with 16 bits, either as half-precision floats or as fixed-point numbers (relative to the maximum absolute
+  value of the elements). This means that the values are only approximately preserved. The maximum
+  error can be found via get_max_relative_error().
+
+  The order of the elements is preserved.
+*/
+class CompactProjMatrixElemsForOneBin
+{
+public:
+  //! The type used to store the values
+  enum ValueType
+  {
+    //! IEEE 754 half-precision floating point (relative error of about 5E-4 for every element)
+    float16,
+    //! 16-bit fixed point (absolute error of about 1.5E-5 times the maximum value)
+    fixed_point16
+  };
+
+  //! Convert a string to a ValueType ("float16" or "fixed16"). Calls error() if not recognised.
+  static ValueType value_type_from_string(const std::string&);
+  //! Convert a ValueType to a string
+  static std::string value_type_to_string(const ValueType);
+
+  //! Default constructor, creating an empty object
+  CompactProjMatrixElemsForOneBin();
+  //! Constructor calling set()
+  CompactProjMatrixElemsForOneBin(const ProjMatrixElemsForOneBin& elems, const ValueType value_type);
+
+  //! Store the elements of \a elems (the bin is not stored)
+  void set(const ProjMatrixElemsForOneBin& elems, const ValueType value_type);
+
+  //! Overwrite the elements of \a elems with the (decoded) stored ones
+  /*! The bin of \a elems is not modified. */
+  void get(ProjMatrixElemsForOneBin& elems) const;
+
+  //! number of (non-zero) elements
+  std::size_t size() const { return num_elements; }
+  //! number of runs used to store the voxel coordinates
+  std::size_t get_num_runs() const { return runs.size(); }
+  //! memory used for storing the elements (in bytes, excluding the object itself)
+  std::size_t get_size_in_bytes() const;
+
+  //! Find the maximum error when storing these elements, relative to the maximum absolute value
+  /*! This decodes the values and compares them with those in \a elems, which should be the
+      same as used in set().
+   */
+  float get_max_relative_error(const ProjMatrixElemsForOneBin& elems) const;
+
+private:
+  //! A run of neighbouring voxels, starting at (c1,c2,c3)
+  struct Run
+  {
+    std::int16_t c1, c2, c3;
+    std::uint16_t length;
+  };
+
+  std::vector<Run> runs;
+  //! step codes (one less than the length for every run), encoding the difference in coordinates with the previous voxel
+  std::vector<std::uint8_t> steps;
+  std::vector<std::uint16_t> values;
+  std::size_t num_elements;
+  ValueType value_type;
+  //! scale factor used for fixed-point storage
+  float scale;
+
+  float decode_value(const std::uint16_t v) const;
+};
+
+END_NAMESPACE_STIR
+
+#endif
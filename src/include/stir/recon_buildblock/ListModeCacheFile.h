@@ -0,0 +1,149 @@
+//
+//
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+/*!
+  \file
+  \ingroup listmode
+  \brief Declaration of class stir::ListModeCacheFile
+
+*/
+
+#ifndef __stir_recon_buildblock_ListModeCacheFile_H__
+#define __stir_recon_buildblock_ListModeCacheFile_H__
+
+#include "stir/Bin.h"
+#include "stir/Succeeded.h"
+#include <boost/interprocess/file_mapping.hpp>
+#include <boost/interprocess/mapped_region.hpp>
+#include <cstdint>
+#include <string>
+#include <vector>
+
+START_NAMESPACE_STIR
+
+class ProjDataInfo;
+class DataSymmetriesForBins;
+
+/*!
+  \ingroup listmode
+  \brief A file with cached list mode events, which is read via memory-mapping
+
+  The file stores the bins of prompt events (and optionally their additive terms) in a compact
+  format that can be used without any conversion when reading:
+  - a header with a magic string, format version, a hash of the ProjDataInfo, the number of events
+    and subsets, and how the bin indices are packed;
+  - offsets of the events in every subset (the events are sorted on subset);
+  - the bin indices (segment, view, axial and tangential position and TOF bin) of every event,
+    packed into a 64-bit integer using only as many bits as necessary for the ProjDataInfo;
+  - the additive terms as \c float (if present).
+
+  The file is memory-mapped when opened, so only the pages that are accessed are read from disk,
+  and no memory is allocated for the events. The events for a subset are contiguous in the file.
+  Subsets are assigned in the same way as in LM_distributable_computation(), i.e. based on the
+  view number of the basic bin.
+
+  The file is written in native byte order (which is checked via the header).
+  All events have bin value 1.
+*/
+class ListModeCacheFile
+{
+public:
+  //! Version of the file format. Will be increased when the format changes.
+  static constexpr std::uint32_t format_version = 1;
+
+  //! A contiguous range of events in a ListModeCacheFile
+  /*! This can be used instead of a <tt>std::vector<BinAndCorr></tt> for LM_distributable_computation(). */
+  class Records
+  {
+  public:
+    inline Records(const ListModeCacheFile& file, const std::size_t start, const std::size_t num_records);
+
+    //! number of events
+    inline std::size_t size() const;
+    inline bool empty() const;
+    //! get an event (0 <= \a i < size())
+    inline BinAndCorr operator[](const std::size_t i) const;
+
+  private:
+    const ListModeCacheFile* file_ptr;
+    std::size_t start;
+    std::size_t num_records;
+  };
+
+  //! Write events to a file
+  /*!
+    \param filename name of the file (will be overwritten if it exists)
+    \param records events to write (bin values are ignored)
+    \param proj_data_info used to find how to pack the bin indices
+    \param has_additive_terms if \c true, the \c my_corr members of \a records are written as well
+    \param symmetries symmetries used to find the basic bin (and therefore the subset) of every event
+    \param num_subsets number of subsets
+  */
+  static Succeeded write(const std::string& filename,
+                         const std::vector<BinAndCorr>& records,
+                         const ProjDataInfo& proj_data_info,
+                         const bool has_additive_terms,
+                         const DataSymmetriesForBins& symmetries,
+                         const int num_subsets);
+
+  //! Memory-map an existing file
+  /*! Calls error() if the file is not a valid cache file, or if it was written for a different \a proj_data_info. */
+  ListModeCacheFile(const std::string& filename, const ProjDataInfo& proj_data_info);
+
+  //! Compute a hash of a ProjDataInfo, as stored in the file header
+  static std::uint64_t compute_hash(const ProjDataInfo& proj_data_info);
+
+  inline std::size_t get_num_records() const;
+  inline int get_num_subsets() const;
+  //! Returns \c true if the file contains additive terms (if not, they are returned as 0)
+  inline bool has_additive_terms() const;
+
+  //! All events in the file
+  inline Records get_all_records() const;
+  //! Events in a subset (with 0 <= \a subset_num < get_num_subsets())
+  inline Records get_records_in_subset(const int subset_num) const;
+
+  //! Ask the operating system to start reading the file in the background
+  /*! This can be used to overlap reading of the file with other computations. */
+  void prefetch() const;
+
+  //! Packing of one of the bin indices in 64 bits
+  struct IndexPacking
+  {
+    std::int32_t min_index;
+    std::uint32_t num_bits;
+  };
+
+private:
+  //! Number of packed indices (segment, view, axial position, tangential position and TOF bin)
+  static const int num_indices = 5;
+
+  boost::interprocess::file_mapping file;
+  // mutable as mapped_region::advise() is not const
+  mutable boost::interprocess::mapped_region region;
+
+  std::size_t num_records;
+  int num_subsets;
+  bool has_add;
+  IndexPacking packing[num_indices];
+  const std::uint64_t* subset_offsets;
+  const std::uint64_t* packed_bins;
+  const float* additive_terms;
+
+  inline BinAndCorr get_record(const std::size_t i) const;
+  //! find how to pack the bin indices for this \a proj_data_info
+  static void find_packing(IndexPacking packing[num_indices], const ProjDataInfo& proj_data_info);
+};
+
+END_NAMESPACE_STIR
+
+#include "stir/recon_buildblock/ListModeCacheFile.inl"
+
+#endif
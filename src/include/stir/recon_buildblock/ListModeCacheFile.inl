@@ -0,0 +1,94 @@
+//
+//
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+/*!
+  \file
+  \ingroup listmode
+  \brief Inline implementations for class stir::ListModeCacheFile
+
+*/
+#include "stir/error.h"
+
+START_NAMESPACE_STIR
+
+ListModeCacheFile::Records::Records(const ListModeCacheFile& file, const std::size_t start, const std::size_t num_records)
+    : file_ptr(&file),
+      start(start),
+      num_records(num_records)
+{}
+
+std::size_t
+ListModeCacheFile::Records::size() const
+{
+  return num_records;
+}
+
+bool
+ListModeCacheFile::Records::empty() const
+{
+  return num_records == 0;
+}
+
+BinAndCorr
+ListModeCacheFile::Records::operator[](const std::size_t i) const
+{
+  return file_ptr->get_record(start + i);
+}
+
+std::size_t
+ListModeCacheFile::get_num_records() const
+{
+  return num_records;
+}
+
+int
+ListModeCacheFile::get_num_subsets() const
+{
+  return num_subsets;
+}
+
+bool
+ListModeCacheFile::has_additive_terms() const
+{
+  return has_add;
+}
+
+ListModeCacheFile::Records
+ListModeCacheFile::get_all_records() const
+{
+  return Records(*this, 0, num_records);
+}
+
+ListModeCacheFile::Records
+ListModeCacheFile::get_records_in_subset(const int subset_num) const
+{
+  if (subset_num < 0 || subset_num >= num_subsets)
+    error("ListModeCacheFile: subset_num " + std::to_string(subset_num) + " out of range");
+  return Records(*this, subset_offsets[subset_num], subset_offsets[subset_num + 1] - subset_offsets[subset_num]);
+}
+
+BinAndCorr
+ListModeCacheFile::get_record(const std::size_t i) const
+{
+  std::uint64_t packed_bin = packed_bins[i];
+  int indices[num_indices];
+  for (int d = 0; d < num_indices; ++d)
+    {
+      const std::uint32_t num_bits = packing[d].num_bits;
+      indices[d] = packing[d].min_index + static_cast<int>(packed_bin & ((std::uint64_t(1) << num_bits) - 1));
+      packed_bin >>= num_bits;
+    }
+  BinAndCorr record;
+  record.my_bin = Bin(indices[0], indices[1], indices[2], indices[3], indices[4], 1.F);
+  record.my_corr = has_add ? additive_terms[i] : 0.F;
+  return record;
+}
+
+END_NAMESPACE_STIR
@@ -0,0 +1,145 @@
+//
+//
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+/*!
+  \file
+  \ingroup priors
+  \brief Declaration of class stir::NeighbourhoodStencil
+
+*/
+
+#ifndef __stir_recon_buildblock_NeighbourhoodStencil_H__
+#define __stir_recon_buildblock_NeighbourhoodStencil_H__
+
+#include "stir/Array.h"
+#include <vector>
+
+START_NAMESPACE_STIR
+
+/*!
+  \ingroup priors
+  \brief A class to compute sums over a neighbourhood of every voxel, as used by many priors
+
+  Priors such as QuadraticPrior, LogcoshPrior and RelativeDifferencePrior compute for every voxel \f$j\f$
+  \f[
+    s_j = \sum_{k \in N_j} w_{jk} \kappa_j \kappa_k f(x_j, x_k, y_j, y_k)
+  \f]
+  where \f$w\f$ are the weights (as an Array<3,float> with indices relative to the voxel, i.e. the
+  central weight is at [0][0][0]), \f$\kappa\f$ is an optional image with spatially varying
+  penalisation factors, \f$x\f$ is the image and \f$y\f$ is a second image (e.g. the input of the
+  Hessian-vector product). The sum is only over neighbours with non-zero weight that are inside the image.
+
+  The term \f$f\f$ is a function object that is called as
+  \code
+    term(x_j, x_k, y_j, y_k, is_centre)
+  \endcode
+  where \c is_centre is \c true if \f$k=j\f$. Its return type is used for the computation of the sums.
+  It should preferably be written without branches (i.e. using the ternary operator) such that the
+  compiler can vectorise the computation.
+
+  The image is divided into tiles (a few rows of a plane), which are processed in parallel when
+  OpenMP is enabled. For voxels where all neighbours are inside the image, the innermost loop runs over a
+  row of voxels for a fixed neighbour. Voxels near the edges of the image (or all voxels if the image is
+  not regular) use a slower path that checks for every neighbour if it is inside the image.
+
+  Results are independent of the number of threads.
+*/
+class NeighbourhoodStencil
+{
+public:
+  //! Construct from the weights (zero weights are ignored)
+  inline explicit NeighbourhoodStencil(const Array<3, float>& weights);
+
+  //! Compute the sums for all voxels, and pass them per row to \a row_sink
+  /*!
+    For every row (i.e. fixed z and y), \a row_sink is called as <tt>row_sink(z, y, row_sums)</tt>,
+    where <tt>row_sums[x - min_x]</tt> contains the sum for voxel (z,y,x) (with \c min_x the minimum index of the row).
+    Different rows can be handled by different threads, so \a row_sink can only modify data for its own row.
+
+    \a input and \a kappa_ptr (if not null) have to have the same index range as \a image.
+  */
+  template <typename elemT, typename TermT, typename RowSinkT>
+  inline void apply(const Array<3, elemT>& image,
+                    const Array<3, elemT>& input,
+                    const Array<3, elemT>* kappa_ptr,
+                    const TermT& term,
+                    RowSinkT&& row_sink) const;
+
+  //! Sets <tt>output = scale * s</tt>
+  template <typename elemT, typename TermT>
+  inline void compute_sums(Array<3, elemT>& output,
+                           const Array<3, elemT>& image,
+                           const Array<3, elemT>& input,
+                           const Array<3, elemT>* kappa_ptr,
+                           const TermT& term,
+                           const double scale) const;
+
+  //! Sets <tt>output += scale * s</tt>
+  template <typename elemT, typename TermT>
+  inline void accumulate_sums(Array<3, elemT>& output,
+                              const Array<3, elemT>& image,
+                              const Array<3, elemT>& input,
+                              const Array<3, elemT>* kappa_ptr,
+                              const TermT& term,
+                              const double scale) const;
+
+  //! Returns the sum of \f$s_j\f$ over all voxels (in double precision)
+  template <typename elemT, typename TermT>
+  inline double sum_over_image(const Array<3, elemT>& image,
+                               const Array<3, elemT>& input,
+                               const Array<3, elemT>* kappa_ptr,
+                               const TermT& term) const;
+
+  //! Number of rows in a plane that are processed as a single tile
+  static const int num_rows_per_tile = 8;
+
+private:
+  //! offset of a neighbour with non-zero weight
+  struct Neighbour
+  {
+    int dz, dy, dx;
+    float weight;
+    bool is_centre;
+  };
+  //! tile of rows of a plane
+  struct Tile
+  {
+    int z, min_y, max_y;
+  };
+
+  std::vector<Neighbour> neighbours;
+  int min_dz, max_dz, min_dy, max_dy, min_dx, max_dx;
+
+  template <typename elemT>
+  static inline std::vector<Tile> get_tiles(const Array<3, elemT>& image);
+
+  template <bool do_kappa, typename elemT, typename TermT>
+  inline auto sum_for_one_voxel(const int z,
+                                const int y,
+                                const int x,
+                                const Array<3, elemT>& image,
+                                const Array<3, elemT>& input,
+                                const Array<3, elemT>* kappa_ptr,
+                                const TermT& term) const;
+
+  template <bool do_kappa, typename elemT, typename TermT, typename RowSinkT>
+  inline void apply_to_tiles(const std::vector<Tile>& tiles,
+                             const Array<3, elemT>& image,
+                             const Array<3, elemT>& input,
+                             const Array<3, elemT>* kappa_ptr,
+                             const TermT& term,
+                             RowSinkT&& row_sink) const;
+};
+
+END_NAMESPACE_STIR
+
+#include "stir/recon_buildblock/NeighbourhoodStencil.inl"
+
+#endif
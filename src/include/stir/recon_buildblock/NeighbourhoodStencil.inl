@@ -0,0 +1,269 @@
+//
+//
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+/*!
+  \file
+  \ingroup priors
+  \brief Inline implementations for class stir::NeighbourhoodStencil
+
+*/
+#include <algorithm>
+#include <numeric>
+
+START_NAMESPACE_STIR
+
+NeighbourhoodStencil::NeighbourhoodStencil(const Array<3, float>& weights)
+    : min_dz(0),
+      max_dz(0),
+      min_dy(0),
+      max_dy(0),
+      min_dx(0),
+      max_dx(0)
+{
+  for (int dz = weights.get_min_index(); dz <= weights.get_max_index(); ++dz)
+    for (int dy = weights[dz].get_min_index(); dy <= weights[dz].get_max_index(); ++dy)
+      for (int dx = weights[dz][dy].get_min_index(); dx <= weights[dz][dy].get_max_index(); ++dx)
+        {
+          if (weights[dz][dy][dx] == 0.F)
+            continue;
+          Neighbour neighbour;
+          neighbour.dz = dz;
+          neighbour.dy = dy;
+          neighbour.dx = dx;
+          neighbour.weight = weights[dz][dy][dx];
+          neighbour.is_centre = dz == 0 && dy == 0 && dx == 0;
+          this->neighbours.push_back(neighbour);
+          min_dz = std::min(min_dz, dz);
+          max_dz = std::max(max_dz, dz);
+          min_dy = std::min(min_dy, dy);
+          max_dy = std::max(max_dy, dy);
+          min_dx = std::min(min_dx, dx);
+          max_dx = std::max(max_dx, dx);
+        }
+}
+
+template <typename elemT>
+std::vector<NeighbourhoodStencil::Tile>
+NeighbourhoodStencil::get_tiles(const Array<3, elemT>& image)
+{
+  std::vector<Tile> tiles;
+  for (int z = image.get_min_index(); z <= image.get_max_index(); ++z)
+    for (int y = image[z].get_min_index(); y <= image[z].get_max_index(); y += num_rows_per_tile)
+      {
+        Tile tile;
+        tile.z = z;
+        tile.min_y = y;
+        tile.max_y = std::min(y + num_rows_per_tile - 1, image[z].get_max_index());
+        tiles.push_back(tile);
+      }
+  return tiles;
+}
+
+template <bool do_kappa, typename elemT, typename TermT>
+auto
+NeighbourhoodStencil::sum_for_one_voxel(const int z,
+                                        const int y,
+                                        const int x,
+                                        const Array<3, elemT>& image,
+                                        const Array<3, elemT>& input,
+                                        const Array<3, elemT>* kappa_ptr,
+                                        const TermT& term) const
+{
+  typedef decltype(term(elemT(), elemT(), elemT(), elemT(), false)) value_type;
+  value_type sum = 0;
+  for (const auto& neighbour : this->neighbours)
+    {
+      const int zk = z + neighbour.dz;
+      if (zk < image.get_min_index() || zk > image.get_max_index())
+        continue;
+      const int yk = y + neighbour.dy;
+      if (yk < image[zk].get_min_index() || yk > image[zk].get_max_index())
+        continue;
+      const int xk = x + neighbour.dx;
+      if (xk < image[zk][yk].get_min_index() || xk > image[zk][yk].get_max_index())
+        continue;
+      value_type current
+          = neighbour.weight * term(image[z][y][x], image[zk][yk][xk], input[z][y][x], input[zk][yk][xk], neighbour.is_centre);
+      if (do_kappa)
+        current *= (*kappa_ptr)[z][y][x] * (*kappa_ptr)[zk][yk][xk];
+      sum += current;
+    }
+  return sum;
+}
+
+template <bool do_kappa, typename elemT, typename TermT, typename RowSinkT>
+void
+NeighbourhoodStencil::apply_to_tiles(const std::vector<Tile>& tiles,
+                                     const Array<3, elemT>& image,
+                                     const Array<3, elemT>& input,
+                                     const Array<3, elemT>* kappa_ptr,
+                                     const TermT& term,
+                                     RowSinkT&& row_sink) const
+{
+  typedef decltype(term(elemT(), elemT(), elemT(), elemT(), false)) value_type;
+  // we can only use the fast path for interior voxels if all rows have the same range
+  const bool is_regular = image.is_regular();
+  const int min_z = image.get_min_index();
+  const int max_z = image.get_max_index();
+  const int num_tiles = static_cast<int>(tiles.size());
+
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
+  for (int tile_num = 0; tile_num < num_tiles; ++tile_num)
+    {
+      const Tile& tile = tiles[tile_num];
+      const int z = tile.z;
+      const bool z_is_interior = is_regular && z + min_dz >= min_z && z + max_dz <= max_z;
+      const int min_y = image[z].get_min_index();
+      const int max_y = image[z].get_max_index();
+      std::vector<value_type> row_sums;
+      for (int y = tile.min_y; y <= tile.max_y; y++)
+        {
+          const int min_x = image[z][y].get_min_index();
+          const int max_x = image[z][y].get_max_index();
+          row_sums.assign(max_x - min_x + 1, value_type(0));
+
+          // find range of x where all neighbours are inside the image
+          int interior_min_x = std::max(min_x, min_x - min_dx);
+          int interior_max_x = std::min(max_x, max_x - max_dx);
+          if (!z_is_interior || y + min_dy < min_y || y + max_dy > max_y || interior_min_x > interior_max_x)
+            {
+              // no interior voxels
+              interior_min_x = max_x + 1;
+              interior_max_x = max_x;
+            }
+
+          // boundary voxels
+          for (int x = min_x; x < interior_min_x; ++x)
+            row_sums[x - min_x] = sum_for_one_voxel<do_kappa>(z, y, x, image, input, kappa_ptr, term);
+          for (int x = interior_max_x + 1; x <= max_x; ++x)
+            row_sums[x - min_x] = sum_for_one_voxel<do_kappa>(z, y, x, image, input, kappa_ptr, term);
+
+          // interior voxels
+          const int num_interior = interior_max_x - interior_min_x + 1;
+          if (num_interior > 0)
+            {
+              value_type* const sums = &row_sums[interior_min_x - min_x];
+              const elemT* const image_j = &image[z][y][interior_min_x];
+              const elemT* const input_j = &input[z][y][interior_min_x];
+              const elemT* const kappa_j = do_kappa ? &(*kappa_ptr)[z][y][interior_min_x] : nullptr;
+              for (const auto& neighbour : this->neighbours)
+                {
+                  const int zk = z + neighbour.dz;
+                  const int yk = y + neighbour.dy;
+                  const int xk = interior_min_x + neighbour.dx;
+                  const elemT* const image_k = &image[zk][yk][xk];
+                  const elemT* const input_k = &input[zk][yk][xk];
+                  const value_type weight = neighbour.weight;
+                  const bool is_centre = neighbour.is_centre;
+                  if (do_kappa)
+                    {
+                      const elemT* const kappa_k = &(*kappa_ptr)[zk][yk][xk];
+#ifdef STIR_OPENMP
+#  pragma omp simd
+#endif
+                      for (int i = 0; i < num_interior; ++i)
+                        sums[i]
+                            += weight * term(image_j[i], image_k[i], input_j[i], input_k[i], is_centre) * kappa_j[i] * kappa_k[i];
+                    }
+                  else
+                    {
+#ifdef STIR_OPENMP
+#  pragma omp simd
+#endif
+                      for (int i = 0; i < num_interior; ++i)
+                        sums[i] += weight * term(image_j[i], image_k[i], input_j[i], input_k[i], is_centre);
+                    }
+                }
+            }
+          row_sink(z, y, row_sums);
+        }
+    }
+}
+
+template <typename elemT, typename TermT, typename RowSinkT>
+void
+NeighbourhoodStencil::apply(const Array<3, elemT>& image,
+                            const Array<3, elemT>& input,
+                            const Array<3, elemT>* kappa_ptr,
+                            const TermT& term,
+                            RowSinkT&& row_sink) const
+{
+  const std::vector<Tile> tiles = get_tiles(image);
+  if (kappa_ptr)
+    apply_to_tiles<true>(tiles, image, input, kappa_ptr, term, row_sink);
+  else
+    apply_to_tiles<false>(tiles, image, input, kappa_ptr, term, row_sink);
+}
+
+template <typename elemT, typename TermT>
+void
+NeighbourhoodStencil::compute_sums(Array<3, elemT>& output,
+                                   const Array<3, elemT>& image,
+                                   const Array<3, elemT>& input,
+                                   const Array<3, elemT>* kappa_ptr,
+                                   const TermT& term,
+                                   const double scale) const
+{
+  this->apply(image, input, kappa_ptr, term, [&output, scale](const int z, const int y, const auto& row_sums) {
+    auto& output_row = output[z][y];
+    const int min_x = output_row.get_min_index();
+    for (int x = min_x; x <= output_row.get_max_index(); ++x)
+      output_row[x] = static_cast<elemT>(row_sums[x - min_x] * scale);
+  });
+}
+
+template <typename elemT, typename TermT>
+void
+NeighbourhoodStencil::accumulate_sums(Array<3, elemT>& output,
+                                      const Array<3, elemT>& image,
+                                      const Array<3, elemT>& input,
+                                      const Array<3, elemT>* kappa_ptr,
+                                      const TermT& term,
+                                      const double scale) const
+{
+  this->apply(image, input, kappa_ptr, term, [&output, scale](const int z, const int y, const auto& row_sums) {
+    auto& output_row = output[z][y];
+    const int min_x = output_row.get_min_index();
+    for (int x = min_x; x <= output_row.get_max_index(); ++x)
+      output_row[x] += static_cast<elemT>(row_sums[x - min_x] * scale);
+  });
+}
+
+template <typename elemT, typename TermT>
+double
+NeighbourhoodStencil::sum_over_image(const Array<3, elemT>& image,
+                                     const Array<3, elemT>& input,
+                                     const Array<3, elemT>* kappa_ptr,
+                                     const TermT& term) const
+{
+  // store sums per row first, such that the result does not depend on the number of threads
+  const int min_z = image.get_min_index();
+  std::vector<int> first_row_num_in_plane(image.size());
+  int num_rows = 0;
+  for (int z = min_z; z <= image.get_max_index(); ++z)
+    {
+      first_row_num_in_plane[z - min_z] = num_rows;
+      num_rows += static_cast<int>(image[z].size());
+    }
+  std::vector<double> row_totals(num_rows, 0.);
+  this->apply(image,
+              input,
+              kappa_ptr,
+              term,
+              [&row_totals, &first_row_num_in_plane, &image, min_z](const int z, const int y, const auto& row_sums) {
+                row_totals[first_row_num_in_plane[z - min_z] + y - image[z].get_min_index()]
+                    = std::accumulate(row_sums.begin(), row_sums.end(), 0.);
+              });
+  return std::accumulate(row_totals.begin(), row_totals.end(), 0.);
+}
+
+END_NAMESPACE_STIR
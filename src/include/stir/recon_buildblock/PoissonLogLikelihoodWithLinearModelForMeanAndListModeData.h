@@ -29,6 +29,7 @@
 #include "stir/listmode/ListModeData.h"
 #include "stir/ParseAndCreateFrom.h"
 #include "stir/TimeFrameDefinitions.h"
+#include <iosfwd>
 
 START_NAMESPACE_STIR
 
@@ -59,6 +60,28 @@ START_NAMESPACE_STIR
   the add_subset_sensitivity() function will have to be implemented by
   a derived class, specific for the measurement.
 
+  \par Sensitivity cache
+
+  Computing the sensitivity often takes as long as the reconstruction itself,
+  while it is the same for every acquisition on the same scanner with the same normalisation.
+  When a <tt>sensitivity cache directory</tt> is set (and no (subset) sensitivity filenames
+  are specified), set_up() computes a hash of everything that influences the sensitivity:
+  the projection data info, the normalisation parameters and the contents of the files
+  they refer to, the image geometry, the number of subsets and the parameters of the
+  projector (see write_sensitivity_cache_description()).
+  The (subset) sensitivities are then read from Interfile images in that directory with
+  a name containing the hash, or computed and written there if they do not exist yet.
+  Changing any of the inputs therefore results in a different file name.
+  Whether the cache was used is reported via info().
+
+  \warning Only files whose names appear in the normalisation parameters (and the data files of
+  Interfile headers) are checked for changes. A normalisation that was constructed in memory is
+  identified by its parameters only.
+
+  \code
+  ; directory to read/write sensitivity images (empty means: do not use the cache)
+  sensitivity cache directory :=
+  \endcode
 */
 template <typename TargetT>
 class PoissonLogLikelihoodWithLinearModelForMeanAndListModeData : public PoissonLogLikelihoodWithLinearModelForMean<TargetT>
@@ -71,6 +94,10 @@ public:
 
   // virtual TargetT * construct_target_ptr();
 
+  //! set-up, reading the sensitivities from the sensitivity cache if possible
+  /*! \see get_sensitivity_cache_directory() */
+  Succeeded set_up(shared_ptr<TargetT> const& target_sptr) override;
+
   Succeeded set_up_before_sensitivity(shared_ptr<const TargetT> const& target_sptr) override;
 
   //! time frame definitions
@@ -149,6 +176,19 @@ public:
   virtual unsigned long int get_cache_max_size() const;
 
   //@}
+
+  /*! \name sensitivity cache
+    \see the class documentation
+  */
+  //@{
+  //! Set the directory for the sensitivity cache (an empty string disables the cache)
+  /*! The directory has to exist. */
+  void set_sensitivity_cache_directory(const std::string& directory);
+  std::string get_sensitivity_cache_directory() const;
+  //! Get the filename (pattern) used for the sensitivity cache
+  /*! This is empty if the cache was not used. Only available after set_up(). */
+  std::string get_sensitivity_cache_filename() const;
+  //@}
 protected:
   std::string frame_defs_filename;
 
@@ -188,6 +228,12 @@ protected:
 
   ParseAndCreateFrom<TargetT, ListModeData> target_parameter_parser;
 
+  //! Write all settings that influence the sensitivity to a stream
+  /*! This is used to compute the hash for the sensitivity cache. Derived classes
+      have to add the parameters of their projectors etc.
+  */
+  virtual void write_sensitivity_cache_description(std::ostream& s, const TargetT& target);
+
   //! This is the number of records to be cached. If this parameter is more than zero, then the
   //! flag cache_lm_file will be set to true. The listmode file up to this size will be loaded in
   //! the RAM, alongside with any additive sinograms.
@@ -213,6 +259,10 @@ private:
   //! maximum segment_number (from listmode data) to process
   /*! \see set_max_segment_num_to_process */
   int max_segment_num_to_process;
+  //! directory for the sensitivity cache (empty if not used)
+  std::string sensitivity_cache_directory;
+  //! filename (pattern) for the sensitivity cache used by the last call to set_up()
+  std::string sensitivity_cache_filename;
 };
 
 END_NAMESPACE_STIR
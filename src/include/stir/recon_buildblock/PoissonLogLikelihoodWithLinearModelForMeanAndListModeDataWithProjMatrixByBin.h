@@ -32,6 +32,7 @@
 #include "stir/ExamInfo.h"
 #include "stir/deprecated.h"
 #include "stir/recon_buildblock/distributable.h"
+#include "stir/recon_buildblock/ListModeCacheFile.h"
 #include "stir/error.h"
 START_NAMESPACE_STIR
 
@@ -51,6 +52,17 @@ START_NAMESPACE_STIR
   Currently, the subset scheme is the same for the projection data and listmode data, i.e.
   based on views. This is suboptimal for listmode data.
 
+  The list mode data is processed in "batches" of at most \c cache_size events. By default, a batch
+  is read (or loaded from the cache file) and only then processed by the (multi-threaded) projections.
+  When pipelined reading is enabled (see set_pipelined_listmode_reading()), a separate thread reads the
+  next batch while the current one is being processed, such that I/O and computation overlap. This
+  uses memory for 2 batches. Results are identical to the non-pipelined mode.
+
+  When \c cache_size is set, the batches are stored in cache files during set_up() (see ListModeCacheFile).
+  These are memory-mapped, and the events for every subset are stored contiguously, such that
+  the computation for a subset only needs to go through its own events. Pipelined reading then
+  asks the operating system to prefetch the next file.
+
   \todo implement a subset scheme based on events
 */
 
@@ -108,6 +120,11 @@ public:
 
   void set_skip_balanced_subsets(const bool arg);
 
+  //! Set if the next batch of list mode data is read while the current one is processed
+  void set_pipelined_listmode_reading(const bool arg);
+  //! Get if the next batch of list mode data is read while the current one is processed
+  bool get_pipelined_listmode_reading() const;
+
 #if STIR_VERSION < 060000
   STIR_DEPRECATED
   void set_max_ring_difference(const int arg);
@@ -118,6 +135,9 @@ protected:
 
   void add_subset_sensitivity(TargetT& sensitivity, const int subset_num) const override;
 
+  //! Adds the projection matrix parameters and \c use_tofsens to the description of the base class
+  void write_sensitivity_cache_description(std::ostream& s, const TargetT& target) override;
+
 #if STIR_VERSION < 060000
   //! Maximum ring difference to take into account
   /*! @deprecated */
@@ -151,44 +171,56 @@ protected:
   //! Scanner geometry, you can skip future checks.
   bool skip_balanced_subsets;
 
+  //! If \c true, the next batch is read in a separate thread while the current one is processed
+  bool pipelined_listmode_reading;
+
 private:
   //! Cache of the current "batch" in the listmode file
   /*! \todo Move this higher-up in the hierarchy as it doesn't depend on ProjMatrixByBin
    */
   mutable std::vector<BinAndCorr> record_cache;
-
-  //! This function loads the next "batch" of data from the listmode file.
-  /*!
-    This function will either use read_listmode_batch or load_listmode_cache_file.
-
-    \param[in] ibatch the batch number to be read.
-    \return \c true if there are no more events to read after this call, \c false otherwise
-    \todo Move this function higher-up in the hierarchy as it doesn't depend on ProjMatrixByBin
-   */
-  bool load_listmode_batch(unsigned int ibatch) const;
+  //! Cache for the next "batch", filled while the current one is processed (only used for pipelined reading)
+  mutable std::vector<BinAndCorr> next_record_cache;
 
   //! This function reads the next "batch" of data from the listmode file.
   /*!
     This function keeps on reading from the current position in the list-mode data and stores
-    prompts events and additive terms in \c record_cache. It also updates \c end_time_per_batch
+    prompts events and additive terms in \a records. It also updates \c end_time_per_batch
     such that we know when each batch starts/ends.
 
     \param[in] ibatch the batch number to be read.
+    \param[out] records the events (and additive terms) of the batch
     \return \c true if there are no more events to read after this call, \c false otherwise
     \todo Move this function higher-up in the hierarchy as it doesn't depend on ProjMatrixByBin
     \warning This function has to be called in sequence.
    */
-  bool read_listmode_batch(unsigned int ibatch) const;
+  bool read_listmode_batch(unsigned int ibatch, std::vector<BinAndCorr>& records) const;
+
+  //! Calls \a process_batch for every batch of the list mode data
+  /*!
+    \a process_batch is called as <tt>process_batch(records, ibatch, num_subsets)</tt>, in order of the batches.
+    \c records is either a <tt>std::vector<BinAndCorr></tt> or a ListModeCacheFile::Records (when using
+    cache files). In the latter case, it might only contain the events in subset \a subset_num, and \c num_subsets
+    is then 1. Otherwise, \c num_subsets is equal to the number of subsets of the objective function.
+
+    If \c pipelined_listmode_reading is \c true, the next batch is read in a separate thread (or the next cache
+    file is prefetched) while \a process_batch runs.
+  */
+  template <typename BatchFunctionT>
+  void for_each_listmode_batch(const int subset_num, BatchFunctionT&& process_batch) const;
+
   //! This function caches the list-mode batches to file. It is run during set_up()
   /*! \todo Move this function higher-up in the hierarchy as it doesn't depend on ProjMatrixByBin
    */
   Succeeded cache_listmode_file();
 
-  //! Reads the "batch" of data from the cache
-  bool load_listmode_cache_file(unsigned int file_id) const;
+  //! Writes the "batch" of data in \c record_cache to a cache file (see ListModeCacheFile)
   Succeeded write_listmode_cache_file(unsigned int file_id) const;
+  //! Memory-maps the cache files
+  Succeeded open_listmode_cache_files(const unsigned int num_cache_files);
 
-  unsigned int num_cache_files;
+  //! Cache files (memory-mapped), one per "batch"
+  std::vector<shared_ptr<ListModeCacheFile>> cache_files;
   mutable std::vector<double> end_time_per_batch;
 };
 
@@ -29,6 +29,7 @@
 #include "stir/RegisteredObject.h"
 #include "stir/ParsingObject.h"
 #include "stir/recon_buildblock/ProjMatrixElemsForOneBin.h"
+#include "stir/recon_buildblock/CompactProjMatrixElemsForOneBin.h"
 #include "stir/recon_buildblock/DataSymmetriesForBins.h"
 #include "stir/shared_ptr.h"
 #include "stir/VectorWithOffset.h"
@@ -38,6 +39,8 @@
 #include <cstdint>
 //#include <map>
 #include <unordered_map>
+#include <list>
+#include <vector>
 #ifdef STIR_OPENMP
 #  include <omp.h>
 #endif
@@ -70,15 +73,39 @@ class Bin;
   \verbatim
   disable caching := false
   store only basic bins in cache := true
+  maximum cache size in MB := 0
+  compact cache storage := none
+  persistent cache directory :=
   \endverbatim
   The 2nd option allows to cache the whole matrix. This results in the fastest
   behaviour IF your system does not start swapping. The default choice caches
   only the 'basic' bins, and computes symmetry related bins from the 'basic' ones.
+
+  The 3rd option limits the memory used by the cache (0 means no limit). When the
+  cache would grow larger, the least recently used elements are removed. The cache
+  consists of a separate part (with its own lock) for every view and segment.
+  Statistics on cache usage can be obtained via get_cache_statistics().
+
+  The 4th option allows storing the elements in the cache in a compact (but lossy) way, such
+  that more elements fit in the same amount of memory, see CompactProjMatrixElemsForOneBin.
+  Possible values are \c none (the default, storing elements exactly), \c float16 and \c fixed16.
+  Note that elements obtained from the cache are then only approximately equal to the computed
+  ones. The maximum relative error of the stored elements is reported in the cache statistics.
+
+  The 5th option enables a persistent (on-disk) cache. When set, set_up() computes a hash of the
+  projection data info, the image geometry and the (non-caching related) parameters of the matrix,
+  and looks in the directory for a file with this hash in its name. If present, the file is memory-mapped,
+  and elements that are not in the (in-memory) cache are read from it (without using extra memory, aside from
+  the file-system cache). If not present, the file can be created by calling precompute() for the whole matrix,
+  followed by write_persistent_cache(), such that later runs with the same geometry do not need to
+  recompute the matrix. Note that an existing file is never updated.
+  This is only used when the cache is enabled.
 */
 class ProjMatrixByBin : public RegisteredObject<ProjMatrixByBin>, public TimedObject
 {
 public:
-  ~ProjMatrixByBin() override {}
+  //! Destructor (writes cache statistics when the verbosity is at least 3)
+  ~ProjMatrixByBin() override;
 
   //! To be called before any calculation is performed
   /*! Note that get_proj_matrix_elems_for_one_bin() will expect objects of
@@ -125,7 +152,37 @@ public:
   const char * const file_name_without_extension);
   */
 
-  // void set_maximum_cache_size(const unsigned long size){;}
+  //! Set the maximum amount of memory (in MB) used by the cache
+  /*! When the cache would grow larger, the least recently used elements are removed.
+      A value of 0 means that there is no limit.
+  */
+  void set_maximum_cache_size_in_MB(const double size_in_MB);
+  double get_maximum_cache_size_in_MB() const;
+  //! Set how elements are stored in the cache ("none", "float16" or "fixed16")
+  /*! Calls error() for unknown values. Should be called before set_up() (or followed by clear_cache()). */
+  void set_compact_cache_storage(const std::string& storage);
+  std::string get_compact_cache_storage() const;
+  //! Set the directory used for the persistent cache (empty string disables it)
+  /*! Has to be called before set_up(). */
+  void set_persistent_cache_directory(const std::string& directory);
+  std::string get_persistent_cache_directory() const;
+  //! Get the name of the file used for the persistent cache
+  /*! This is empty if the persistent cache is not used, and only available after set_up(). */
+  std::string get_persistent_cache_filename() const;
+  //! Write the contents of the cache to the persistent cache file
+  /*! Nothing is written if the file exists already, no persistent cache directory was set, or
+      the cache does not contain the elements for all basic bins (as an existing file is never updated).
+      You therefore normally call precompute() (for the whole matrix) first. The file is first written to a
+      temporary file (with the process id in its name) and then renamed, such that other processes never
+      see an incomplete file.
+      \warning This should not be called while other threads are using this object.
+  */
+  Succeeded write_persistent_cache() const;
+  //! Get the parameters of the matrix, without those that only influence caching
+  /*! This is parameter_info() without the keywords for caching (including the persistent cache),
+      such that it can be used to check if matrix elements (or images computed with them) are still valid.
+  */
+  std::string get_parameter_info_affecting_elements();
   /* TODO
   void set_subset_usage(const SubsetInfo&, const int num_access_times);
   */
@@ -139,6 +196,41 @@ public:
   //! Remove all elements from the cache
   void clear_cache() const;
 
+  //! Compute the elements of all basic bins in a subset and store them in the cache
+  /*! Subsets are defined in terms of views, as for the projectors (see detail::find_basic_vs_nums_in_subset).
+      This is useful to avoid computing elements during the first iteration of a reconstruction,
+      and uses multiple threads when compiled with OpenMP. Progress is reported via info() at verbosity 2.
+
+      Does nothing (aside from a warning) when the cache is disabled. Elements will not all be stored if
+      the maximum cache size is too small.
+      Must be called after set_up().
+  */
+  void precompute(const int subset_num = 0, const int num_subsets = 1);
+
+  //! Statistics on the usage of the cache
+  struct CacheStatistics
+  {
+    //! number of times an element was found in the cache
+    std::uint64_t num_hits;
+    //! number of times an element was not found in the cache
+    std::uint64_t num_misses;
+    //! number of elements that were removed to stay within the maximum cache size
+    std::uint64_t num_evictions;
+    //! number of elements currently in the cache
+    std::uint64_t num_elements;
+    //! (estimated) memory currently used by the cache
+    std::uint64_t size_in_bytes;
+    //! number of elements that were not in the (in-memory) cache but found in the persistent cache
+    std::uint64_t num_persistent_cache_hits;
+    //! maximum error (relative to the maximum value of each bin) of elements stored in the cache
+    /*! This is always zero unless compact cache storage is used. It is reset by clear_cache(). */
+    float max_relative_error;
+  };
+  //! Get statistics on the usage of the cache (summed over all views and segments)
+  CacheStatistics get_cache_statistics() const;
+  //! Reset the hit, miss and eviction counters of the cache
+  void reset_cache_statistics() const;
+
 protected:
   shared_ptr<DataSymmetriesForBins> symmetries_sptr;
 
@@ -173,6 +265,12 @@ protected:
 
   bool cache_disabled;
   bool cache_stores_only_basic_bins;
+  //! maximum size of the cache (0 means no limit)
+  double max_cache_size_in_MB;
+  //! how elements are stored in the cache ("none", "float16" or "fixed16")
+  std::string compact_cache_storage;
+  //! directory for the persistent cache (empty means not used)
+  std::string persistent_cache_directory;
   //! If activated TOF reconstruction will be performed.
   bool tof_enabled;
 
@@ -203,16 +301,96 @@ private:
   const CacheKey axial_pos_bits = 28;
   const CacheKey timing_pos_bits = 20;
   //@}
+  //! An element in the cache, together with its position in the LRU list
+  /*! Depending on \c is_compact, either \c elems or \c compact_elems is used. */
+  struct CachedProjMatrixElemsForOneBin
+  {
+    bool is_compact;
+    ProjMatrixElemsForOneBin elems;
+    CompactProjMatrixElemsForOneBin compact_elems;
+    std::list<CacheKey>::iterator lru_position;
+    std::size_t size_in_bytes;
+  };
   //  typedef std::map<CacheKey, ProjMatrixElemsForOneBin>   MapProjMatrixElemsForOneBin;
-  typedef std::unordered_map<CacheKey, ProjMatrixElemsForOneBin> MapProjMatrixElemsForOneBin;
+  typedef std::unordered_map<CacheKey, CachedProjMatrixElemsForOneBin> MapProjMatrixElemsForOneBin;
   typedef MapProjMatrixElemsForOneBin::iterator MapProjMatrixElemsForOneBinIterator;
   typedef MapProjMatrixElemsForOneBin::const_iterator const_MapProjMatrixElemsForOneBinIterator;
 
-  //! collection of  ProjMatrixElemsForOneBin (internal cache )
-  mutable VectorWithOffset<VectorWithOffset<MapProjMatrixElemsForOneBin>> cache_collection;
+  //! One part ("shard") of the cache, keeping track of the least recently used elements
+  /*! There is one shard for every view/segment, each of which is protected by its own lock
+      when using OpenMP.
+  */
+  class CacheShard
+  {
+  public:
+    CacheShard();
+    //! copy constructor, needed as the LRU list is referred to by iterators
+    CacheShard(const CacheShard&);
+    CacheShard& operator=(const CacheShard&);
+
+    //! find an element, and make it the most recently used. Returns 0 if not found
+    const CachedProjMatrixElemsForOneBin* find(const CacheKey key);
+    //! insert an element as most recently used. Returns the (estimated) memory used by the new element
+    /*! If the key is already present, nothing is changed and 0 is returned. */
+    std::size_t insert(const CacheKey key, const CachedProjMatrixElemsForOneBin& cached_elems);
+    //! remove the least recently used element. Returns the memory that was freed
+    std::size_t evict_least_recently_used();
+    void clear();
+
+    bool empty() const { return map.empty(); }
+    std::size_t size() const { return map.size(); }
+    std::size_t size_in_bytes() const { return total_size_in_bytes; }
+    //! access to all elements (without changing the LRU order)
+    const MapProjMatrixElemsForOneBin& get_map() const { return map; }
+
+    std::uint64_t num_hits;
+    std::uint64_t num_misses;
+    std::uint64_t num_evictions;
+    float max_relative_error;
+
+    //! (estimated) memory used by an element in the cache
+    static std::size_t estimate_size_in_bytes(const CachedProjMatrixElemsForOneBin& cached_elems);
+
+  private:
+    MapProjMatrixElemsForOneBin map;
+    //! keys in order of usage, with the most recently used first
+    std::list<CacheKey> lru_list;
+    std::size_t total_size_in_bytes;
+  };
+
+  //! collection of shards of the internal cache, one for every view/segment
+  mutable VectorWithOffset<VectorWithOffset<CacheShard>> cache_collection;
 #ifdef STIR_OPENMP
   mutable VectorWithOffset<VectorWithOffset<omp_lock_t>> cache_locks;
 #endif
+  //! total (estimated) memory used by all elements in the cache
+  mutable std::size_t cache_size_in_bytes;
+  //! counter used to select the shard for the next eviction (round-robin)
+  mutable std::size_t eviction_counter;
+
+  //! memory-mapped file with the persistent cache (defined in ProjMatrixByBin.cxx)
+  class PersistentCache;
+  //! pointer to the persistent cache (null if no file was present at set_up())
+  shared_ptr<const PersistentCache> persistent_cache_sptr;
+  //! name of the file for the persistent cache (empty if not used)
+  std::string persistent_cache_filename;
+  //! hash of geometry and parameters, used for the name of the file
+  std::uint64_t persistent_cache_hash;
+  mutable std::uint64_t num_persistent_cache_hits;
+
+  //! find all basic bins in a subset (without duplicates), see precompute()
+  std::vector<Bin> find_basic_bins_in_subset(const int subset_num, const int num_subsets) const;
+
+  //! compute a hash of projection data info, image geometry and the parameters of the matrix (except for caching)
+  std::uint64_t compute_persistent_cache_hash();
+
+  //! remove elements from the cache such that an extra \a size_needed bytes fit
+  /*! The least recently used element of a shard is removed, cycling through the shards in a
+      round-robin fashion. Shards that are locked by another thread are skipped.
+      The lock for the shard for \a bin has to be set by the caller.
+      \return \c false if not enough elements could be removed.
+  */
+  bool make_space_in_cache(const Bin& bin, const std::size_t size_needed) const;
 
   //! create the key for caching
   // KT 15/05/2002 not static anymore as it uses cache_stores_only_basic_bins
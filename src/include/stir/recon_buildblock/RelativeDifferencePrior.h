@@ -70,6 +70,11 @@ START_NAMESPACE_STIR
   effectively the same as extending the volume by replicating the edges (which is different
   from zero boundary conditions).
 
+  The value, gradient and accumulate_Hessian_times_input() are computed with NeighbourhoodStencil,
+  i.e. multi-threaded (when OpenMP is enabled) and such that they can be vectorised by the compiler.
+  The gradient is computed in double precision, while the value and Hessian-times-input use
+  \c elemT for the computation of every term.
+
 \par Parsing
   These are the keywords that can be used in addition to the ones in GeneralPrior.
   \verbatim
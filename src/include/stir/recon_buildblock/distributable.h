@@ -186,17 +186,21 @@ void distributable_computation(const shared_ptr<ForwardProjectorByBin>& forward_
   \brief This function essentially implements a loop over a cached listmode file
   \ingroup distributable
 
+  \param record_cache the events, e.g. a <tt>std::vector<BinAndCorr></tt> or ListModeCacheFile::Records.
+     \c RecordsT needs to have a \c size() member and an \c operator[] that returns a BinAndCorr (or a reference to it).
+  \param subset_num only events in this subset are used (if \a num_subsets > 1)
+  \param num_subsets if \a record_cache only contains events in the subset, this can be set to 1
   \param has_add if \c true, the additive term in \c record_cache is taken into account
   \param accumulate if \c true, add to  \c output_image_ptr, otherwise fill it with zeroes before doing anything.
   \param double_out_ptr accumulated value (for every event) computed by the call-back, unless the pointer is zero
   \param call_back
 !*/
-template <typename CallBackT>
+template <typename RecordsT, typename CallBackT>
 void LM_distributable_computation(const shared_ptr<ProjMatrixByBin> PM_sptr,
                                   const shared_ptr<ProjDataInfo>& proj_data_info_sptr,
                                   DiscretisedDensity<3, float>* output_image_ptr,
                                   const DiscretisedDensity<3, float>* input_image_ptr,
-                                  const std::vector<BinAndCorr>& record_cache,
+                                  const RecordsT& record_cache,
                                   const int subset_num,
                                   const int num_subsets,
                                   const bool has_add,
@@ -34,13 +34,13 @@
 
 START_NAMESPACE_STIR
 
-template <typename CallBackT>
+template <typename RecordsT, typename CallBackT>
 void
 LM_distributable_computation(const shared_ptr<ProjMatrixByBin> PM_sptr,
                              const shared_ptr<ProjDataInfo>& proj_data_info_sptr,
                              DiscretisedDensity<3, float>* output_image_ptr,
                              const DiscretisedDensity<3, float>* input_image_ptr,
-                             const std::vector<BinAndCorr>& record_ptr,
+                             const RecordsT& record_ptr,
                              const int subset_num,
                              const int num_subsets,
                              const bool has_add,
@@ -54,8 +54,6 @@ LM_distributable_computation(const shared_ptr<ProjMatrixByBin> PM_sptr,
   HighResWallClockTimer wall_clock_timer;
   wall_clock_timer.start();
 
-  assert(!record_ptr.empty());
-
   if (output_image_ptr != NULL && !accumulate)
     output_image_ptr->fill(0.F);
 
@@ -100,7 +98,7 @@ LM_distributable_computation(const shared_ptr<ProjMatrixByBin> PM_sptr,
     // note: VC uses OpenMP 2.0, so need signed integer for loop
     for (long int ievent = 0; ievent < static_cast<long>(record_ptr.size()); ++ievent)
       {
-        auto& record = record_ptr.at(ievent);
+        const BinAndCorr& record = record_ptr[ievent];
         if (record.my_bin.get_bin_value() == 0.0f) // shouldn't happen really, but a check probably doesn't hurt
           continue;
 
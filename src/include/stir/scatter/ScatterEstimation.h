@@ -28,6 +28,7 @@
 #include "stir/ProjData.h"
 #include "stir/ParsingObject.h"
 #include "stir/numerics/BSplines.h"
+#include "stir/interpolate_projdata.h"
 #include "stir/CartesianCoordinate3D.h"
 #include "stir/recon_buildblock/Reconstruction.h"
 
@@ -106,6 +107,23 @@ public:
                                                 BSpline::BSplineType spline_type = BSpline::BSplineType::linear,
                                                 const bool remove_interleaving = true);
 
+  //! upsample coarse scatter estimate and fit it to tails of the emission data, reusing interpolation weights
+  /*! As above, but uses \a interpolator for step 1. It is only set-up if necessary (i.e. if it was set-up
+      for different projection data), such that repeated calls with data of the same size
+      do not need to recompute the interpolation weights.
+  */
+  static void upsample_and_fit_scatter_estimate(ProjData& scaled_scatter_proj_data,
+                                                const ProjData& emission_proj_data,
+                                                const ProjData& scatter_proj_data,
+                                                BinNormalisation& scatter_normalisation,
+                                                const ProjData& weights_proj_data,
+                                                const float min_scale_factor,
+                                                const float max_scale_factor,
+                                                const unsigned half_filter_width,
+                                                ProjDataInterpolator& interpolator,
+                                                BSpline::BSplineType spline_type = BSpline::BSplineType::linear,
+                                                const bool remove_interleaving = true);
+
   //! Default constructor (calls set_defaults())
   ScatterEstimation();
   //! Overloaded constructor with parameter file and initialisation
@@ -381,6 +399,8 @@ private:
   shared_ptr<ScatterSimulation> scatter_simulation_sptr;
   //! This path is used in the debug mode to store all the intermediate files, as they are many.
   FilePath extras_path;
+  //! Used for upsampling the scatter estimate, such that interpolation weights are reused over iterations
+  ProjDataInterpolator scatter_interpolator;
 
   //! Default value = 100
   float max_scale_value;
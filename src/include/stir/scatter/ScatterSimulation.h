@@ -160,6 +160,13 @@ public:
      simulation will give a slightly different result if this boolean is on.
   */
   void set_randomly_place_scatter_points(const bool);
+  //! Set the fraction of candidate scatter points that will be used (defaults to 1)
+  /*! If less than 1, scatter points are selected using importance sampling, see sample_scatter_points().
+      This reduces the number of scatter points (and therefore computation time) for a small loss
+      in accuracy. If scatter points were already sampled, they will be resampled.
+  */
+  void set_scatter_point_sampling_fraction(const float);
+  float get_scatter_point_sampling_fraction() const;
 
   void set_cache_enabled(const bool);
 
@@ -264,6 +271,11 @@ protected:
   {
     CartesianCoordinate3D<float> coord;
     float mu_value;
+    //! weight of the scatter point in the sum over all scatter points
+    /*! This is 1 if all voxels above the attenuation threshold are used as scatter points.
+        Otherwise, it is the inverse of the probability of selecting this voxel.
+    */
+    float weight;
   };
 
   std::vector<ScatterPoint> scatt_points_vector;
@@ -273,6 +285,20 @@ protected:
   //! find scatter points
   /*! This function sets scatt_points_vector and scatter_volume. It will also
       remove any cached integrals as they would be incorrect otherwise.
+
+      Candidate scatter points are all voxels in the attenuation image for scatter points
+      above the attenuation threshold. If the scatter point sampling fraction is less than 1,
+      only a subset of these is used. Voxels are selected with a probability proportional to
+      their importance (but at most 1), which is the sum of the attenuation coefficient and
+      the magnitude of its gradient (computed with central differences), such that regions with
+      high attenuation and edges are sampled more densely. Systematic sampling is used, i.e. a voxel
+      is selected whenever the cumulative sum of the probabilities crosses an integer.
+      Every scatter point gets a weight equal to the inverse of its probability, such that the
+      estimate of the integral over all scatter points remains unbiased.
+
+      As the scatter points only depend on the attenuation image, the integrals over the
+      attenuation image remain cached when changing the activity image (e.g. in the iterations of
+      ScatterEstimation).
   */
   void sample_scatter_points();
 
@@ -370,6 +396,8 @@ protected:
 
   //! boolean to see if we need to move the scatter point randomly within in its voxel
   bool randomly_place_scatter_points;
+  //! fraction of candidate scatter points that will be used, see sample_scatter_points()
+  float scatter_point_sampling_fraction;
   //! boolean to see if we need to cache the integrals
   /*! By default, we cache the integrals over the emission and attenuation image. If you run out
       of memory, you can switch this off, but performance will suffer dramatically.
@@ -49,6 +49,8 @@ protected:
   shared_ptr<AbsTimeInterval> _reference_abs_time_sptr;
 
   void start_new_time_frame(const unsigned int new_frame_num) override;
+  //! returns \c false, as get_bin_from_event() uses the motion at the current time
+  bool can_bin_events_in_parallel() const override;
 
   void set_defaults() override;
   void initialise_keymap() override;
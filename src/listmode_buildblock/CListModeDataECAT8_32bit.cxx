@@ -40,6 +40,8 @@ CListModeDataECAT8_32bit::CListModeDataECAT8_32bit(const std::string& listmode_f
     error(boost::format("Unknown value for originating_system keyword: '%s") % originating_system);
 
   this->set_proj_data_info_sptr(interfile_parser.data_info_ptr->create_shared_clone());
+  this->uncompressed_proj_data_info_sptr
+      = CListEventCylindricalScannerWithDiscreteDetectors::create_uncompressed_proj_data_info(*this->get_proj_data_info_sptr());
 
   if (this->open_lm_file() == Succeeded::no)
     error("CListModeDataECAT8_32bit: error opening the first listmode file for filename %s\n", listmode_filename.c_str());
@@ -54,7 +56,7 @@ CListModeDataECAT8_32bit::get_name() const
 shared_ptr<CListRecord>
 CListModeDataECAT8_32bit::get_empty_record_sptr() const
 {
-  shared_ptr<CListRecord> sptr(new CListRecordT(this->get_proj_data_info_sptr()));
+  shared_ptr<CListRecord> sptr(new CListRecordT(this->get_proj_data_info_sptr(), this->uncompressed_proj_data_info_sptr));
   return sptr;
 }
 
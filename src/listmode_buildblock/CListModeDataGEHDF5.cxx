@@ -61,7 +61,8 @@ CListModeDataGEHDF5::get_empty_record_sptr() const
   if (is_null_ptr(this->get_proj_data_info_sptr()))
     error("listmode file needs to be opened before calling get_empty_record_sptr()");
 
-  shared_ptr<CListRecord> sptr(new CListRecordT(this->get_proj_data_info_sptr(), this->first_time_stamp));
+  shared_ptr<CListRecord> sptr(
+      new CListRecordT(this->get_proj_data_info_sptr(), this->first_time_stamp, this->uncompressed_proj_data_info_sptr));
   return sptr;
 }
 
@@ -79,6 +80,8 @@ CListModeDataGEHDF5::open_lm_file()
 
   GEHDF5Wrapper inputFile(listmode_filename);
   this->set_proj_data_info_sptr(inputFile.get_proj_data_info_sptr()->create_shared_clone());
+  this->uncompressed_proj_data_info_sptr
+      = CListEventCylindricalScannerWithDiscreteDetectors::create_uncompressed_proj_data_info(*this->get_proj_data_info_sptr());
   this->set_exam_info(*inputFile.get_exam_info_sptr());
 
   this->first_time_stamp = inputFile.read_dataset_uint32("/HeaderData/ListHeader/firstTmAbsTimeStamp");
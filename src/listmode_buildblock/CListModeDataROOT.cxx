@@ -202,6 +202,8 @@ CListModeDataROOT::CListModeDataROOT(const std::string& hroot_filename)
                                              tof_mash_factor)
           ->create_shared_clone());
   // this->set_proj_data_info_sptr(tmp);
+  this->uncompressed_proj_data_info_sptr
+      = CListEventCylindricalScannerWithDiscreteDetectors::create_uncompressed_proj_data_info(*this->get_proj_data_info_sptr());
 
   if (this->open_lm_file() == Succeeded::no)
     error("CListModeDataROOT: error opening ROOT file for filename '%s'", hroot_filename.c_str());
@@ -216,7 +218,7 @@ CListModeDataROOT::get_name() const
 shared_ptr<CListRecord>
 CListModeDataROOT::get_empty_record_sptr() const
 {
-  shared_ptr<CListRecord> sptr(new CListRecordROOT(this->get_proj_data_info_sptr()));
+  shared_ptr<CListRecord> sptr(new CListRecordROOT(this->get_proj_data_info_sptr(), this->uncompressed_proj_data_info_sptr));
   return sptr;
 }
 
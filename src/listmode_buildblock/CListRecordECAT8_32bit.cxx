@@ -27,8 +27,10 @@ START_NAMESPACE_STIR
 namespace ecat
 {
 
-CListEventECAT8_32bit::CListEventECAT8_32bit(const shared_ptr<const ProjDataInfo>& proj_data_info_sptr)
-    : CListEventCylindricalScannerWithDiscreteDetectors(proj_data_info_sptr)
+CListEventECAT8_32bit::CListEventECAT8_32bit(
+    const shared_ptr<const ProjDataInfo>& proj_data_info_sptr,
+    const shared_ptr<const ProjDataInfoCylindricalNoArcCorr>& uncompressed_proj_data_info_sptr)
+    : CListEventCylindricalScannerWithDiscreteDetectors(proj_data_info_sptr, uncompressed_proj_data_info_sptr)
 {
   const ProjDataInfoCylindricalNoArcCorr* const proj_data_info_ptr
       = dynamic_cast<const ProjDataInfoCylindricalNoArcCorr* const>(proj_data_info_sptr.get());
@@ -76,8 +76,11 @@ typedef short elem_type;
 #include "stir/CPUTimer.h"
 #include "stir/recon_buildblock/TrivialBinNormalisation.h"
 #include "stir/is_null_ptr.h"
+#include "stir/num_threads.h"
+#include "stir/info.h"
 #include "stir/warning.h"
 #include "stir/error.h"
+#include <boost/format.hpp>
 
 #include <fstream>
 #include <iostream>
@@ -227,6 +230,18 @@ LmToProjData::get_num_segments_in_memory() const
   return num_segments_in_memory;
 }
 
+void
+LmToProjData::set_num_events_per_block(int v)
+{
+  this->num_events_per_block = v;
+}
+
+int
+LmToProjData::get_num_events_per_block() const
+{
+  return num_events_per_block;
+}
+
 void
 LmToProjData::set_num_events_to_store(long int v)
 {
@@ -263,6 +278,7 @@ LmToProjData::set_defaults()
   interactive = false;
   num_segments_in_memory = -1;
   num_timing_poss_in_memory = -1;
+  num_events_per_block = 10000;
   normalisation_ptr.reset(new TrivialBinNormalisation);
   post_normalisation_ptr.reset(new TrivialBinNormalisation);
   do_pre_normalisation = 0;
@@ -285,6 +301,7 @@ LmToProjData::initialise_keymap()
   parser.add_key("do pre normalisation ", &do_pre_normalisation);
   parser.add_key("num_TOF_bins_in_memory", &num_timing_poss_in_memory);
   parser.add_key("num_segments_in_memory", &num_segments_in_memory);
+  parser.add_key("num_events_per_block", &num_events_per_block);
 
   // if (lm_data_ptr->has_delayeds()) TODO we haven't read the ListModeData yet, so cannot access has_delayeds() yet
   //  one could add the next 2 keywords as part of a callback function for the 'input file' keyword.
@@ -591,6 +608,12 @@ void
 LmToProjData::start_new_time_frame(const unsigned int)
 {}
 
+bool
+LmToProjData::can_bin_events_in_parallel() const
+{
+  return true;
+}
+
 /**************************************************************
  Here follows the actual rebinning code (finally).
 
@@ -652,6 +675,23 @@ LmToProjData::process_data()
   if (!record.event().is_valid_template(*template_proj_data_info_ptr))
     error("The scanner template is not valid for LmToProjData. This might be because of unsupported arc correction.");
 
+  // set-up storage for processing blocks of events
+  set_num_threads();
+  const bool bin_in_parallel = !interactive && can_bin_events_in_parallel() && num_events_per_block > 1;
+  const std::size_t block_size = bin_in_parallel ? static_cast<std::size_t>(num_events_per_block) : 1U;
+  if (bin_in_parallel)
+    info(boost::format("LmToProjData: finding bins for blocks of %1% events with up to %2% threads") % block_size
+             % get_max_num_threads(),
+         2);
+  std::vector<shared_ptr<ListRecord>> record_block(block_size);
+  for (auto& block_record_sptr : record_block)
+    block_record_sptr = lm_data_ptr->get_empty_record_sptr();
+  std::vector<Bin> bins_in_block(block_size);
+  std::vector<double> event_times(block_size);
+  std::vector<int> event_increments(block_size);
+  // note: not using vector<bool> as it is not safe to write to different elements in parallel
+  std::vector<char> bins_in_range(block_size);
+
   /* Here starts the main loop which will store the listmode data. */
   for (current_frame_num = 1; current_frame_num <= frame_defs.get_num_frames(); ++current_frame_num)
     {
@@ -750,29 +790,66 @@ LmToProjData::process_data()
                   frame_start_positions[current_frame_num] = lm_data_ptr->save_get_position();
                 }
               {
+                // check if the bin is inside the range we want to store
+                auto is_bin_in_range = [this](const Bin& bin) {
+                  return bin.get_bin_value() > 0
+                         && bin.tangential_pos_num() >= output_proj_data_sptr->get_min_tangential_pos_num()
+                         && bin.tangential_pos_num() <= output_proj_data_sptr->get_max_tangential_pos_num()
+                         && bin.axial_pos_num() >= output_proj_data_sptr->get_min_axial_pos_num(bin.segment_num())
+                         && bin.axial_pos_num() <= output_proj_data_sptr->get_max_axial_pos_num(bin.segment_num())
+                         && bin.timing_pos_num() >= output_proj_data_sptr->get_min_tof_pos_num()
+                         && bin.timing_pos_num() <= output_proj_data_sptr->get_max_tof_pos_num();
+                };
+
                 // loop over all events in the listmode file
-                while (more_events)
+                // Events are read serially in blocks. Their bins are then found in parallel (if enabled),
+                // after which they are stored in the order in which they occur in the listmode file,
+                // such that the result is identical to the one obtained with a single thread.
+                bool end_of_events = false;
+                while (more_events && !end_of_events)
                   {
-                    if (lm_data_ptr->get_next_record(record) == Succeeded::no)
+                    // read a block of coincidence events
+                    std::size_t num_events_in_block = 0;
+                    while (num_events_in_block < record_block.size())
                       {
-                        // no more events in file for some reason
-                        break; // get out of while loop
-                      }
-                    if (record.is_time() && end_time > 0.01) // Direct comparison within doubles is unsafe.
-                      {
-                        current_time = record.time().get_time_in_secs();
-                        if (do_time_frame && current_time >= end_time)
-                          break; // get out of while loop
-                        assert(current_time >= start_time);
-                        process_new_time_event(record.time());
+                        ListRecord& block_record = *record_block[num_events_in_block];
+                        if (lm_data_ptr->get_next_record(block_record) == Succeeded::no)
+                          {
+                            // no more events in file for some reason
+                            end_of_events = true;
+                            break; // get out of while loop
+                          }
+                        if (block_record.is_time() && end_time > 0.01) // Direct comparison within doubles is unsafe.
+                          {
+                            current_time = block_record.time().get_time_in_secs();
+                            if (do_time_frame && current_time >= end_time)
+                              {
+                                end_of_events = true;
+                                break; // get out of while loop
+                              }
+                            assert(current_time >= start_time);
+                            process_new_time_event(block_record.time());
+                          }
+                        // note: could do "else if" here if we would be sure that
+                        // a record can never be both timing and coincidence event
+                        // and there might be a scanner around that has them both combined.
+                        if (block_record.is_event())
+                          {
+                            assert(start_time <= current_time);
+                            event_times[num_events_in_block] = current_time;
+                            ++num_events_in_block;
+                          }
                       }
-                    // note: could do "else if" here if we would be sure that
-                    // a record can never be both timing and coincidence event
-                    // and there might be a scanner around that has them both combined.
-                    if (record.is_event())
+
+                    // find the bins (and their normalisation) for all events in the block
+                    bool geometry_problem = false;
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(static) if (num_events_in_block > 1)
+#endif
+                    for (long event_num = 0; event_num < static_cast<long>(num_events_in_block); ++event_num)
                       {
-                        assert(start_time <= current_time);
-                        Bin bin;
+                        const ListEvent& event = record_block[event_num]->event();
+                        Bin& bin = bins_in_block[event_num];
                         // set value in case the event decoder doesn't touch it
                         // otherwise it would be 0 and all events will be ignored
                         bin.set_bin_value(1.f);
@@ -780,39 +857,61 @@ LmToProjData::process_data()
 
                         try
                           {
-                            get_bin_from_event(bin, record.event());
+                            get_bin_from_event(bin, event);
                           }
                         catch (...)
                           {
-                            for (int timing_pos_num = start_timing_pos_index; timing_pos_num <= end_timing_pos_index;
-                                 timing_pos_num++)
-                              for (int seg = start_segment_index; seg <= end_segment_index; seg++)
-                                delete segments[timing_pos_num][seg];
-                            error("Something wrong with geometry.");
+#ifdef STIR_OPENMP
+#  pragma omp critical(LMTOPROJDATA_GEOMETRY_PROBLEM)
+#endif
+                            geometry_problem = true;
+                            bin.set_bin_value(-1.f);
                           }
 
+                        bins_in_range[event_num] = is_bin_in_range(bin);
+                        event_increments[event_num] = event.is_prompt() ? (store_prompts ? 1 : 0) // it's a prompt
+                                                                        : delayed_increment; // it is a delayed-coincidence event
+                        // do the normalisation here (as opposed to when storing) such that it is done in parallel
+                        if (bins_in_range[event_num] && event_increments[event_num] != 0
+                            && bin.timing_pos_num() >= start_timing_pos_index && bin.timing_pos_num() <= end_timing_pos_index
+                            && bin.segment_num() >= start_segment_index && bin.segment_num() <= end_segment_index)
+                          do_post_normalisation(bin);
+                      }
+
+                    if (geometry_problem)
+                      {
+                        for (int timing_pos_num = start_timing_pos_index; timing_pos_num <= end_timing_pos_index;
+                             timing_pos_num++)
+                          for (int seg = start_segment_index; seg <= end_segment_index; seg++)
+                            delete segments[timing_pos_num][seg];
+                        error("Something wrong with geometry.");
+                      }
+
+                    // now store the events, in the order in which they occured
+                    for (std::size_t event_num = 0; more_events && event_num < num_events_in_block; ++event_num)
+                      {
+                        const Bin& bin = bins_in_block[event_num];
+                        const double event_time = event_times[event_num];
+
                         // check if it's inside the range we want to store
-                        if (bin.get_bin_value() > 0
-                            && bin.tangential_pos_num() >= output_proj_data_sptr->get_min_tangential_pos_num()
-                            && bin.tangential_pos_num() <= output_proj_data_sptr->get_max_tangential_pos_num()
-                            && bin.axial_pos_num() >= output_proj_data_sptr->get_min_axial_pos_num(bin.segment_num())
-                            && bin.axial_pos_num() <= output_proj_data_sptr->get_max_axial_pos_num(bin.segment_num())
-                            && bin.timing_pos_num() >= output_proj_data_sptr->get_min_tof_pos_num()
-                            && bin.timing_pos_num() <= output_proj_data_sptr->get_max_tof_pos_num())
+                        if (bins_in_range[event_num])
                           {
                             assert(bin.view_num() >= output_proj_data_sptr->get_min_view_num());
                             assert(bin.view_num() <= output_proj_data_sptr->get_max_view_num());
 
                             // see if we increment or decrement the value in the sinogram
-                            const int event_increment = record.event().is_prompt()
-                                                            ? (store_prompts ? 1 : 0) // it's a prompt
-                                                            : delayed_increment;      // it is a delayed-coincidence event
+                            const int event_increment = event_increments[event_num];
 
                             if (event_increment == 0)
                               continue;
 
                             if (!do_time_frame)
-                              more_events -= event_increment;
+                              {
+                                more_events -= event_increment;
+                                // we might have read beyond this event, so set the time to what it would have been
+                                if (!more_events)
+                                  current_time = event_time;
+                              }
 
                             // Check if the timing position of the bin is in the range
                             if (bin.timing_pos_num() >= start_timing_pos_index && bin.timing_pos_num() <= end_timing_pos_index)
@@ -820,10 +919,8 @@ LmToProjData::process_data()
                                 // now check if we have its segment in memory
                                 if (bin.segment_num() >= start_segment_index && bin.segment_num() <= end_segment_index)
                                   {
-                                    do_post_normalisation(bin);
-
                                     num_stored_events += event_increment;
-                                    if (record.event().is_prompt())
+                                    if (record_block[event_num]->event().is_prompt())
                                       ++num_prompts_in_frame;
                                     else
                                       ++num_delayeds_in_frame;
@@ -839,7 +936,7 @@ LmToProjData::process_data()
                                           bin.view_num(),
                                           bin.axial_pos_num(),
                                           bin.tangential_pos_num(),
-                                          current_time,
+                                          event_time,
                                           event_increment);
                                     else
                                       (*segments[bin.timing_pos_num()][bin.segment_num()])[bin.view_num()][bin.axial_pos_num()]
@@ -857,9 +954,9 @@ LmToProjData::process_data()
                                      bin.view_num(),
                                      bin.axial_pos_num(),
                                      bin.tangential_pos_num(),
-                                     current_time);
+                                     event_time);
                           }
-                      } // end of spatial event processing
+                      } // end of loop over events in block
                   }     // end of while loop over all events
 
                 time_of_last_stored_event = max(time_of_last_stored_event, current_time);
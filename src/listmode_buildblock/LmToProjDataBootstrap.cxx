@@ -234,6 +234,13 @@ LmToProjDataBootstrap<LmToProjDataT>::get_bin_from_event(Bin& bin, const ListEve
   ++num_times_to_replicate_iter;
 }
 
+template <typename LmToProjDataT>
+bool
+LmToProjDataBootstrap<LmToProjDataT>::can_bin_events_in_parallel() const
+{
+  return false;
+}
+
 // instantiation
 template class LmToProjDataBootstrap<LmToProjData>;
 
@@ -149,6 +149,13 @@ LmToProjDataWithRandomRejection<LmToProjDataT>::get_bin_from_event(Bin& bin, con
     bin.set_bin_value(-1);
 }
 
+template <typename LmToProjDataT>
+bool
+LmToProjDataWithRandomRejection<LmToProjDataT>::can_bin_events_in_parallel() const
+{
+  return false;
+}
+
 // instantiation
 template class LmToProjDataWithRandomRejection<LmToProjData>;
 
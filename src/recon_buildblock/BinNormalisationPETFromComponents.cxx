@@ -182,13 +182,9 @@ BinNormalisationPETFromComponents::create_proj_data()
   if (!_already_set_up)
     error("BinNormalisationPETFromComponents: internal error: create_proj_data called without set_up");
 
+  const ProjDataInfo& proj_data_info = *this->proj_data_info_sptr;
   FanProjData fan_data;
-
-  shared_ptr<ExamInfo> exam_info_sptr(new ExamInfo);
-  this->invnorm_proj_data_sptr
-      = std::make_shared<ProjDataInMemory>(exam_info_sptr, this->proj_data_info_sptr, /* do not initialise */ false);
-  this->invnorm_proj_data_sptr->fill(1.F);
-  make_fan_data_remove_gaps(fan_data, *this->invnorm_proj_data_sptr);
+  make_fan_data_remove_gaps(fan_data, proj_data_info, 1.F);
 
   // multiply fan data with resp factors
   if (this->has_block_factors())
@@ -198,26 +194,50 @@ BinNormalisationPETFromComponents::create_proj_data()
   if (this->has_geometric_factors())
     apply_geo_norm(fan_data, this->geo_data, true);
 
-  set_fan_data_add_gaps(*invnorm_proj_data_sptr, fan_data);
+  // store per viewgram, see get_invnorm_viewgram()
+  this->invnorm_viewgrams.clear();
+  this->invnorm_viewgrams.reserve(static_cast<std::size_t>(proj_data_info.get_num_segments()) * proj_data_info.get_num_tof_poss()
+                                  * proj_data_info.get_num_views());
+  for (int segment_num = proj_data_info.get_min_segment_num(); segment_num <= proj_data_info.get_max_segment_num(); ++segment_num)
+    for (int timing_pos_num = proj_data_info.get_min_tof_pos_num(); timing_pos_num <= proj_data_info.get_max_tof_pos_num();
+         ++timing_pos_num)
+      for (int view_num = proj_data_info.get_min_view_num(); view_num <= proj_data_info.get_max_view_num(); ++view_num)
+        {
+          Viewgram<float> viewgram = proj_data_info.get_empty_viewgram(view_num, segment_num, false, timing_pos_num);
+          set_fan_data_add_gaps(viewgram, fan_data);
+          this->invnorm_viewgrams.push_back(viewgram);
+        }
+}
+
+const Array<2, float>&
+BinNormalisationPETFromComponents::get_invnorm_viewgram(const int segment_num, const int view_num, const int timing_pos_num) const
+{
+  const ProjDataInfo& proj_data_info = *this->proj_data_info_sptr;
+  if (segment_num < proj_data_info.get_min_segment_num() || segment_num > proj_data_info.get_max_segment_num()
+      || view_num < proj_data_info.get_min_view_num() || view_num > proj_data_info.get_max_view_num()
+      || timing_pos_num < proj_data_info.get_min_tof_pos_num() || timing_pos_num > proj_data_info.get_max_tof_pos_num())
+    error(boost::format("BinNormalisationPETFromComponents: segment %1%, view %2%, TOF bin %3% out of range") % segment_num
+          % view_num % timing_pos_num);
+  const std::size_t index
+      = (static_cast<std::size_t>(segment_num - proj_data_info.get_min_segment_num()) * proj_data_info.get_num_tof_poss()
+         + (timing_pos_num - proj_data_info.get_min_tof_pos_num()))
+            * proj_data_info.get_num_views()
+        + (view_num - proj_data_info.get_min_view_num());
+  return this->invnorm_viewgrams[index];
 }
 
-// as in BinNormalisationFromProjData
+// as in BinNormalisationFromProjData, but without copying the efficiencies
 void
 BinNormalisationPETFromComponents::apply(RelatedViewgrams<float>& viewgrams) const
 {
   this->check(*viewgrams.get_proj_data_info_sptr());
-  const auto vs_num = viewgrams.get_basic_view_segment_num();
-  shared_ptr<DataSymmetriesForViewSegmentNumbers> symmetries_sptr(viewgrams.get_symmetries_ptr()->clone());
-
-  // divide, but need to handle 0/0
-  const auto invnorm_relv = invnorm_proj_data_sptr->get_related_viewgrams(vs_num, symmetries_sptr, false);
-  auto v_iter = viewgrams.begin();
-  auto invnorm_v_iter = invnorm_relv.begin();
-  while (v_iter != viewgrams.end())
+  for (auto v_iter = viewgrams.begin(); v_iter != viewgrams.end(); ++v_iter)
     {
-      divide(v_iter->begin_all(), v_iter->end_all(), invnorm_v_iter->begin_all(), 0.F);
-      ++v_iter;
-      ++invnorm_v_iter;
+      const Array<2, float>& invnorm
+          = this->get_invnorm_viewgram(v_iter->get_segment_num(), v_iter->get_view_num(), v_iter->get_timing_pos_num());
+      // divide, but need to handle 0/0
+      for (int axial_pos_num = v_iter->get_min_axial_pos_num(); axial_pos_num <= v_iter->get_max_axial_pos_num(); ++axial_pos_num)
+        divide((*v_iter)[axial_pos_num].begin(), (*v_iter)[axial_pos_num].end(), invnorm[axial_pos_num].begin(), 0.F);
     }
 }
 
@@ -225,17 +245,20 @@ void
 BinNormalisationPETFromComponents::undo(RelatedViewgrams<float>& viewgrams) const
 {
   this->check(*viewgrams.get_proj_data_info_sptr());
-  const auto vs_num = viewgrams.get_basic_view_segment_num();
-  shared_ptr<DataSymmetriesForViewSegmentNumbers> symmetries_sptr(viewgrams.get_symmetries_ptr()->clone());
-  viewgrams *= invnorm_proj_data_sptr->get_related_viewgrams(vs_num, symmetries_sptr, false);
+  for (auto v_iter = viewgrams.begin(); v_iter != viewgrams.end(); ++v_iter)
+    {
+      const Array<2, float>& invnorm
+          = this->get_invnorm_viewgram(v_iter->get_segment_num(), v_iter->get_view_num(), v_iter->get_timing_pos_num());
+      for (int axial_pos_num = v_iter->get_min_axial_pos_num(); axial_pos_num <= v_iter->get_max_axial_pos_num(); ++axial_pos_num)
+        (*v_iter)[axial_pos_num] *= invnorm[axial_pos_num];
+    }
 }
 
 float
 BinNormalisationPETFromComponents::get_bin_efficiency(const Bin& bin) const
 {
-  // need a copy at the moment
-  Bin copy(bin);
-  return this->invnorm_proj_data_sptr->get_bin_value(copy);
+  return this->get_invnorm_viewgram(
+      bin.segment_num(), bin.view_num(), bin.timing_pos_num())[bin.axial_pos_num()][bin.tangential_pos_num()];
 }
 
 #if 0
@@ -0,0 +1,267 @@
+//
+//
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+/*!
+
+  \file
+  \ingroup projection
+  \brief non-inline implementations for stir::CompactProjMatrixElemsForOneBin
+*/
+#include "stir/recon_buildblock/CompactProjMatrixElemsForOneBin.h"
+#include "stir/recon_buildblock/ProjMatrixElemsForOneBin.h"
+#include "stir/Coordinate3D.h"
+#include "stir/error.h"
+#include <algorithm>
+#include <cmath>
+#include <cstdlib>
+#include <cstring>
+#include <limits>
+
+START_NAMESPACE_STIR
+
+/////////////////// conversion functions for half-precision floats //////////////////
+
+//! convert a float to IEEE 754 half-precision (rounding to nearest even)
+static std::uint16_t
+float_to_half(const float f)
+{
+  std::uint32_t x;
+  std::memcpy(&x, &f, sizeof(x));
+  const std::uint32_t sign = (x >> 16) & 0x8000U;
+  const std::uint32_t float_exponent = (x >> 23) & 0xffU;
+  std::uint32_t mantissa = x & 0x7fffffU;
+
+  if (float_exponent == 0xffU) // infinity or NaN
+    return static_cast<std::uint16_t>(sign | 0x7c00U | (mantissa ? 0x200U : 0U));
+
+  const int exponent = static_cast<int>(float_exponent) - 127 + 15;
+  if (exponent >= 31) // overflow
+    return static_cast<std::uint16_t>(sign | 0x7c00U);
+  if (exponent <= 0)
+    {
+      // sub-normal half (or zero)
+      if (exponent < -10)
+        return static_cast<std::uint16_t>(sign);
+      mantissa |= 0x800000U; // add implicit leading 1
+      const int shift = 14 - exponent;
+      std::uint32_t half_mantissa = mantissa >> shift;
+      const std::uint32_t remainder = mantissa & ((1U << shift) - 1);
+      const std::uint32_t halfway = 1U << (shift - 1);
+      if (remainder > halfway || (remainder == halfway && (half_mantissa & 1U)))
+        ++half_mantissa;
+      return static_cast<std::uint16_t>(sign | half_mantissa);
+    }
+  std::uint32_t h = sign | (static_cast<std::uint32_t>(exponent) << 10) | (mantissa >> 13);
+  const std::uint32_t remainder = mantissa & 0x1fffU;
+  // note: rounding up might overflow into the exponent, which gives the correct result
+  if (remainder > 0x1000U || (remainder == 0x1000U && (h & 1U)))
+    ++h;
+  return static_cast<std::uint16_t>(h);
+}
+
+//! convert IEEE 754 half-precision to float
+static float
+half_to_float(const std::uint16_t h)
+{
+  const std::uint32_t sign = (static_cast<std::uint32_t>(h) & 0x8000U) << 16;
+  const std::uint32_t exponent = (h >> 10) & 0x1fU;
+  const std::uint32_t mantissa = h & 0x3ffU;
+  if (exponent == 0)
+    {
+      // zero or sub-normal
+      const float value = std::ldexp(static_cast<float>(mantissa), -24);
+      return sign ? -value : value;
+    }
+  std::uint32_t x;
+  if (exponent == 31)
+    x = sign | 0x7f800000U | (mantissa << 13);
+  else
+    x = sign | ((exponent - 15 + 127) << 23) | (mantissa << 13);
+  float f;
+  std::memcpy(&f, &x, sizeof(f));
+  return f;
+}
+
+//! lookup table for converting all half-precision values to float
+static const std::vector<float>&
+get_half_to_float_table()
+{
+  // initialisation of static local variables is thread-safe
+  static const std::vector<float> table = []() {
+    std::vector<float> t(65536);
+    for (std::uint32_t i = 0; i < 65536U; ++i)
+      t[i] = half_to_float(static_cast<std::uint16_t>(i));
+    return t;
+  }();
+  return table;
+}
+
+/////////////////// encoding of steps between neighbouring voxels //////////////////
+
+//! encode a step (with all differences between -1 and 1) as a number between 0 and 26
+static inline std::uint8_t
+encode_step(const int d1, const int d2, const int d3)
+{
+  return static_cast<std::uint8_t>((d1 + 1) * 9 + (d2 + 1) * 3 + (d3 + 1));
+}
+
+static inline bool
+is_unit_step(const int d1, const int d2, const int d3)
+{
+  return std::abs(d1) <= 1 && std::abs(d2) <= 1 && std::abs(d3) <= 1;
+}
+
+///////////////////////////////////////////////////////////////////////////////
+
+CompactProjMatrixElemsForOneBin::ValueType
+CompactProjMatrixElemsForOneBin::value_type_from_string(const std::string& str)
+{
+  if (str == "float16")
+    return float16;
+  if (str == "fixed16")
+    return fixed_point16;
+  error("CompactProjMatrixElemsForOneBin: unknown value type \"" + str + "\". Use float16 or fixed16");
+  return float16; // to avoid compiler warnings
+}
+
+std::string
+CompactProjMatrixElemsForOneBin::value_type_to_string(const ValueType value_type)
+{
+  return value_type == float16 ? "float16" : "fixed16";
+}
+
+CompactProjMatrixElemsForOneBin::CompactProjMatrixElemsForOneBin()
+    : num_elements(0),
+      value_type(float16),
+      scale(0.F)
+{}
+
+CompactProjMatrixElemsForOneBin::CompactProjMatrixElemsForOneBin(const ProjMatrixElemsForOneBin& elems,
+                                                                 const ValueType value_type)
+{
+  set(elems, value_type);
+}
+
+void
+CompactProjMatrixElemsForOneBin::set(const ProjMatrixElemsForOneBin& elems, const ValueType value_type_v)
+{
+  this->value_type = value_type_v;
+  this->num_elements = elems.size();
+  this->scale = 0.F;
+
+  // find runs
+  std::vector<Run> new_runs;
+  std::vector<std::uint8_t> new_steps;
+  new_steps.reserve(num_elements);
+  for (ProjMatrixElemsForOneBin::const_iterator element_ptr = elems.begin(); element_ptr != elems.end(); ++element_ptr)
+    {
+      if (!new_runs.empty())
+        {
+          Run& run = new_runs.back();
+          const ProjMatrixElemsForOneBin::const_iterator previous_element_ptr = element_ptr - 1;
+          const int d1 = element_ptr->coord1() - previous_element_ptr->coord1();
+          const int d2 = element_ptr->coord2() - previous_element_ptr->coord2();
+          const int d3 = element_ptr->coord3() - previous_element_ptr->coord3();
+          if (is_unit_step(d1, d2, d3) && run.length < std::numeric_limits<std::uint16_t>::max())
+            {
+              ++run.length;
+              new_steps.push_back(encode_step(d1, d2, d3));
+              continue;
+            }
+        }
+      Run run;
+      run.c1 = static_cast<std::int16_t>(element_ptr->coord1());
+      run.c2 = static_cast<std::int16_t>(element_ptr->coord2());
+      run.c3 = static_cast<std::int16_t>(element_ptr->coord3());
+      run.length = 1;
+      new_runs.push_back(run);
+    }
+  // copy such that we do not use more memory than necessary
+  this->runs = new_runs;
+  this->steps = new_steps;
+
+  // store values
+  std::vector<std::uint16_t> new_values;
+  new_values.reserve(num_elements);
+  if (value_type == float16)
+    {
+      for (ProjMatrixElemsForOneBin::const_iterator element_ptr = elems.begin(); element_ptr != elems.end(); ++element_ptr)
+        new_values.push_back(float_to_half(element_ptr->get_value()));
+    }
+  else
+    {
+      float max_abs_value = 0.F;
+      for (ProjMatrixElemsForOneBin::const_iterator element_ptr = elems.begin(); element_ptr != elems.end(); ++element_ptr)
+        max_abs_value = std::max(max_abs_value, std::fabs(element_ptr->get_value()));
+      this->scale = max_abs_value / std::numeric_limits<std::int16_t>::max();
+      for (ProjMatrixElemsForOneBin::const_iterator element_ptr = elems.begin(); element_ptr != elems.end(); ++element_ptr)
+        {
+          const std::int16_t v = scale == 0.F ? 0 : static_cast<std::int16_t>(std::lround(element_ptr->get_value() / scale));
+          new_values.push_back(static_cast<std::uint16_t>(v));
+        }
+    }
+  this->values.swap(new_values);
+}
+
+float
+CompactProjMatrixElemsForOneBin::decode_value(const std::uint16_t v) const
+{
+  if (value_type == float16)
+    return get_half_to_float_table()[v];
+  else
+    return static_cast<std::int16_t>(v) * scale;
+}
+
+void
+CompactProjMatrixElemsForOneBin::get(ProjMatrixElemsForOneBin& elems) const
+{
+  elems.erase();
+  elems.reserve(num_elements);
+  std::vector<std::uint16_t>::const_iterator value_iter = values.begin();
+  std::vector<std::uint8_t>::const_iterator step_iter = steps.begin();
+  for (std::vector<Run>::const_iterator run_iter = runs.begin(); run_iter != runs.end(); ++run_iter)
+    {
+      Coordinate3D<int> coords(run_iter->c1, run_iter->c2, run_iter->c3);
+      elems.push_back(ProjMatrixElemsForOneBin::value_type(coords, decode_value(*value_iter++)));
+      for (int i = 1; i < static_cast<int>(run_iter->length); ++i, ++step_iter)
+        {
+          const int code = *step_iter;
+          coords[1] += code / 9 - 1;
+          coords[2] += (code / 3) % 3 - 1;
+          coords[3] += code % 3 - 1;
+          elems.push_back(ProjMatrixElemsForOneBin::value_type(coords, decode_value(*value_iter++)));
+        }
+    }
+}
+
+std::size_t
+CompactProjMatrixElemsForOneBin::get_size_in_bytes() const
+{
+  return runs.capacity() * sizeof(Run) + steps.capacity() * sizeof(std::uint8_t) + values.capacity() * sizeof(std::uint16_t);
+}
+
+float
+CompactProjMatrixElemsForOneBin::get_max_relative_error(const ProjMatrixElemsForOneBin& elems) const
+{
+  if (elems.size() != num_elements)
+    error("CompactProjMatrixElemsForOneBin::get_max_relative_error called with different number of elements");
+  float max_abs_value = 0.F;
+  float max_error = 0.F;
+  std::vector<std::uint16_t>::const_iterator value_iter = values.begin();
+  for (ProjMatrixElemsForOneBin::const_iterator element_ptr = elems.begin(); element_ptr != elems.end();
+       ++element_ptr, ++value_iter)
+    {
+      max_abs_value = std::max(max_abs_value, std::fabs(element_ptr->get_value()));
+      max_error = std::max(max_error, std::fabs(element_ptr->get_value() - decode_value(*value_iter)));
+    }
+  return max_abs_value == 0.F ? 0.F : max_error / max_abs_value;
+}
+
+END_NAMESPACE_STIR
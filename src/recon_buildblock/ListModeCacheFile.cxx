@@ -0,0 +1,253 @@
+//
+//
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+/*!
+  \file
+  \ingroup listmode
+  \brief Implementation of class stir::ListModeCacheFile
+
+*/
+
+#include "stir/recon_buildblock/ListModeCacheFile.h"
+#include "stir/recon_buildblock/DataSymmetriesForBins.h"
+#include "stir/ProjDataInfo.h"
+#include "stir/fnv1a_hash.h"
+#include "stir/info.h"
+#include "stir/warning.h"
+#include "stir/error.h"
+#include <boost/format.hpp>
+#include <algorithm>
+#include <cstring>
+#include <fstream>
+#include <sstream>
+#include <typeinfo>
+
+START_NAMESPACE_STIR
+
+/* File format (native byte order, which is checked via the header)
+   - header (see ListModeCacheFileHeader)
+   - offsets of the first event of every subset (num_subsets+1 std::uint64_t)
+   - packed bin indices (num_records std::uint64_t)
+   - additive terms (num_records float), if present
+*/
+namespace detail
+{
+struct ListModeCacheFileHeader
+{
+  char magic[8];
+  std::uint32_t byte_order_check;
+  std::uint32_t version;
+  std::uint64_t proj_data_info_hash;
+  std::uint64_t num_records;
+  std::int32_t num_subsets;
+  std::int32_t has_additive_terms;
+  ListModeCacheFile::IndexPacking packing[5];
+};
+
+static const char list_mode_cache_magic[8] = { 'S', 'T', 'I', 'R', 'L', 'M', 'C', 'F' };
+static const std::uint32_t list_mode_cache_byte_order_check = 0x01020304U;
+
+//! number of bits needed to store all numbers between 0 and \a max_value
+static std::uint32_t
+get_num_bits(const std::uint32_t max_value)
+{
+  std::uint32_t num_bits = 0;
+  while (num_bits < 32 && (max_value >> num_bits) != 0)
+    ++num_bits;
+  return num_bits;
+}
+} // namespace detail
+
+std::uint64_t
+ListModeCacheFile::compute_hash(const ProjDataInfo& proj_data_info)
+{
+  std::ostringstream s;
+  s << typeid(proj_data_info).name() << '\n' << proj_data_info.parameter_info() << '\n';
+  return fnv1a_hash(s.str());
+}
+
+void
+ListModeCacheFile::find_packing(IndexPacking packing[num_indices], const ProjDataInfo& proj_data_info)
+{
+  int min_indices[num_indices];
+  int max_indices[num_indices];
+  min_indices[0] = proj_data_info.get_min_segment_num();
+  max_indices[0] = proj_data_info.get_max_segment_num();
+  min_indices[1] = proj_data_info.get_min_view_num();
+  max_indices[1] = proj_data_info.get_max_view_num();
+  min_indices[2] = proj_data_info.get_min_axial_pos_num(min_indices[0]);
+  max_indices[2] = proj_data_info.get_max_axial_pos_num(min_indices[0]);
+  for (int segment_num = min_indices[0] + 1; segment_num <= max_indices[0]; ++segment_num)
+    {
+      min_indices[2] = std::min(min_indices[2], proj_data_info.get_min_axial_pos_num(segment_num));
+      max_indices[2] = std::max(max_indices[2], proj_data_info.get_max_axial_pos_num(segment_num));
+    }
+  min_indices[3] = proj_data_info.get_min_tangential_pos_num();
+  max_indices[3] = proj_data_info.get_max_tangential_pos_num();
+  min_indices[4] = proj_data_info.get_min_tof_pos_num();
+  max_indices[4] = proj_data_info.get_max_tof_pos_num();
+
+  std::uint32_t total_num_bits = 0;
+  for (int d = 0; d < num_indices; ++d)
+    {
+      packing[d].min_index = min_indices[d];
+      packing[d].num_bits = detail::get_num_bits(static_cast<std::uint32_t>(max_indices[d] - min_indices[d]));
+      total_num_bits += packing[d].num_bits;
+    }
+  if (total_num_bits > 64)
+    error(boost::format("ListModeCacheFile: bin indices need %1% bits, but only 64 are available") % total_num_bits);
+}
+
+Succeeded
+ListModeCacheFile::write(const std::string& filename,
+                         const std::vector<BinAndCorr>& records,
+                         const ProjDataInfo& proj_data_info,
+                         const bool has_additive_terms,
+                         const DataSymmetriesForBins& symmetries,
+                         const int num_subsets)
+{
+  if (num_subsets < 1)
+    error("ListModeCacheFile::write: num_subsets has to be at least 1");
+
+  detail::ListModeCacheFileHeader header;
+  std::memset(&header, 0, sizeof(header));
+  std::memcpy(header.magic, detail::list_mode_cache_magic, sizeof(header.magic));
+  header.byte_order_check = detail::list_mode_cache_byte_order_check;
+  header.version = format_version;
+  header.proj_data_info_hash = compute_hash(proj_data_info);
+  header.num_records = records.size();
+  header.num_subsets = num_subsets;
+  header.has_additive_terms = has_additive_terms ? 1 : 0;
+  find_packing(header.packing, proj_data_info);
+
+  // find subset of every event (as in LM_distributable_computation)
+  std::vector<int> subset_nums(records.size());
+  std::vector<std::uint64_t> subset_offsets(num_subsets + 1, 0);
+  for (std::size_t i = 0; i < records.size(); ++i)
+    {
+      Bin basic_bin = records[i].my_bin;
+      if (!symmetries.is_basic(basic_bin))
+        symmetries.find_basic_bin(basic_bin);
+      subset_nums[i] = num_subsets > 1 ? basic_bin.view_num() % num_subsets : 0;
+      ++subset_offsets[subset_nums[i] + 1];
+    }
+  for (int subset_num = 0; subset_num < num_subsets; ++subset_num)
+    subset_offsets[subset_num + 1] += subset_offsets[subset_num];
+
+  // sort events on subset, keeping their order otherwise
+  std::vector<std::uint64_t> packed_bins(records.size());
+  std::vector<float> additive_terms(has_additive_terms ? records.size() : 0);
+  {
+    std::vector<std::uint64_t> next_index(subset_offsets.begin(), subset_offsets.end() - 1);
+    for (std::size_t i = 0; i < records.size(); ++i)
+      {
+        const Bin& bin = records[i].my_bin;
+        const int indices[num_indices]
+            = { bin.segment_num(), bin.view_num(), bin.axial_pos_num(), bin.tangential_pos_num(), bin.timing_pos_num() };
+        std::uint64_t packed_bin = 0;
+        std::uint32_t shift = 0;
+        for (int d = 0; d < num_indices; ++d)
+          {
+            const std::uint64_t index = static_cast<std::uint64_t>(indices[d] - header.packing[d].min_index);
+            if (indices[d] < header.packing[d].min_index || (index >> header.packing[d].num_bits) != 0)
+              error("ListModeCacheFile::write: bin indices out of range for the ProjDataInfo");
+            packed_bin |= index << shift;
+            shift += header.packing[d].num_bits;
+          }
+        const std::uint64_t new_i = next_index[subset_nums[i]]++;
+        packed_bins[new_i] = packed_bin;
+        if (has_additive_terms)
+          additive_terms[new_i] = records[i].my_corr;
+      }
+  }
+
+  std::ofstream fout(filename, std::ios::out | std::ios::binary | std::ios::trunc);
+  if (!fout)
+    {
+      warning("ListModeCacheFile: error opening \"" + filename + "\" for writing.");
+      return Succeeded::no;
+    }
+  fout.write(reinterpret_cast<const char*>(&header), sizeof(header));
+  fout.write(reinterpret_cast<const char*>(subset_offsets.data()), subset_offsets.size() * sizeof(std::uint64_t));
+  fout.write(reinterpret_cast<const char*>(packed_bins.data()), packed_bins.size() * sizeof(std::uint64_t));
+  fout.write(reinterpret_cast<const char*>(additive_terms.data()), additive_terms.size() * sizeof(float));
+  if (!fout)
+    {
+      warning("ListModeCacheFile: error writing to \"" + filename + "\".");
+      return Succeeded::no;
+    }
+  return Succeeded::yes;
+}
+
+ListModeCacheFile::ListModeCacheFile(const std::string& filename, const ProjDataInfo& proj_data_info)
+{
+  try
+    {
+      boost::interprocess::file_mapping new_file(filename.c_str(), boost::interprocess::read_only);
+      boost::interprocess::mapped_region new_region(new_file, boost::interprocess::read_only);
+      file.swap(new_file);
+      region.swap(new_region);
+    }
+  catch (std::exception& e)
+    {
+      error("ListModeCacheFile: cannot map \"" + filename + "\": " + e.what());
+    }
+  const char* const data = static_cast<const char*>(region.get_address());
+  const std::size_t size = region.get_size();
+  detail::ListModeCacheFileHeader header;
+  if (size < sizeof(header))
+    error("ListModeCacheFile: \"" + filename + "\" is too small to be a list mode cache file.");
+  std::memcpy(&header, data, sizeof(header));
+  if (std::memcmp(header.magic, detail::list_mode_cache_magic, sizeof(header.magic)) != 0)
+    error("ListModeCacheFile: \"" + filename
+          + "\" is not a list mode cache file (or it was written by an older version of STIR). Please recompute the cache.");
+  if (header.byte_order_check != detail::list_mode_cache_byte_order_check)
+    error("ListModeCacheFile: \"" + filename + "\" was written with a different byte order.");
+  if (header.version != format_version)
+    error(boost::format("ListModeCacheFile: \"%1%\" has format version %2%, but only version %3% is supported. "
+                        "Please recompute the cache.")
+          % filename % header.version % format_version);
+  if (header.proj_data_info_hash != compute_hash(proj_data_info))
+    error("ListModeCacheFile: \"" + filename + "\" was written for different projection data info. Please recompute the cache.");
+  IndexPacking expected_packing[num_indices];
+  find_packing(expected_packing, proj_data_info);
+  for (int d = 0; d < num_indices; ++d)
+    if (header.packing[d].min_index != expected_packing[d].min_index
+        || header.packing[d].num_bits != expected_packing[d].num_bits)
+      error("ListModeCacheFile: \"" + filename + "\" has inconsistent packing of bin indices.");
+  if (header.num_subsets < 1)
+    error("ListModeCacheFile: \"" + filename + "\" has invalid number of subsets.");
+
+  this->num_records = static_cast<std::size_t>(header.num_records);
+  this->num_subsets = header.num_subsets;
+  this->has_add = header.has_additive_terms != 0;
+  std::copy(header.packing, header.packing + num_indices, this->packing);
+  const std::size_t expected_size = sizeof(header) + (num_subsets + 1) * sizeof(std::uint64_t)
+                                    + num_records * (sizeof(std::uint64_t) + (has_add ? sizeof(float) : 0));
+  if (size != expected_size)
+    error(boost::format("ListModeCacheFile: \"%1%\" has size %2%, but expected %3%.") % filename % size % expected_size);
+
+  this->subset_offsets = reinterpret_cast<const std::uint64_t*>(data + sizeof(header));
+  this->packed_bins = this->subset_offsets + (num_subsets + 1);
+  this->additive_terms = has_add ? reinterpret_cast<const float*>(this->packed_bins + num_records) : nullptr;
+  if (subset_offsets[0] != 0 || subset_offsets[num_subsets] != num_records
+      || !std::is_sorted(subset_offsets, subset_offsets + num_subsets + 1))
+    error("ListModeCacheFile: \"" + filename + "\" has invalid subset offsets.");
+
+  info(boost::format("ListModeCacheFile: mapped %1% events from \"%2%\"") % num_records % filename, 2);
+}
+
+void
+ListModeCacheFile::prefetch() const
+{
+  region.advise(boost::interprocess::mapped_region::advice_willneed);
+}
+
+END_NAMESPACE_STIR
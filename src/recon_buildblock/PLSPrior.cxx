@@ -29,6 +29,8 @@
 #include "stir/info.h"
 #include "stir/error.h"
 #include <algorithm>
+#include <numeric>
+#include <vector>
 using std::min;
 using std::max;
 
@@ -317,6 +319,9 @@ PLSPrior<elemT>::compute_image_gradient_element(DiscretisedDensity<3, elemT>& im
   const int min_z = image.get_min_index();
   const int max_z = image.get_max_index();
 
+#ifdef STIR_OPENMP
+#  pragma omp parallel for
+#endif
   for (int z = min_z; z <= max_z; z++)
     {
 
@@ -367,6 +372,9 @@ PLSPrior<elemT>::compute_normalisation_anatomical_gradient(DiscretisedDensity<3,
   const int min_z = image_grad_x.get_min_index();
   const int max_z = image_grad_x.get_max_index();
 
+#ifdef STIR_OPENMP
+#  pragma omp parallel for
+#endif
   for (int z = min_z; z <= max_z; z++)
     {
 
@@ -411,9 +419,13 @@ PLSPrior<elemT>::compute_inner_product_and_penalty(DiscretisedDensity<3, elemT>&
   compute_image_gradient_element(pet_im_grad_y, 1, pet_image);
   compute_image_gradient_element(pet_im_grad_x, 2, pet_image);
 
+  const DiscretisedDensity<3, elemT>& norm = *this->get_norm_sptr();
   const int min_z = pet_image.get_min_index();
   const int max_z = pet_image.get_max_index();
 
+#ifdef STIR_OPENMP
+#  pragma omp parallel for
+#endif
   for (int z = min_z; z <= max_z; z++)
     {
 
@@ -430,9 +442,8 @@ PLSPrior<elemT>::compute_inner_product_and_penalty(DiscretisedDensity<3, elemT>&
             {
               if (only_2D)
                 {
-                  inner_product[z][y][x]
-                      = ((pet_im_grad_y[z][y][x] * (*anatomical_grad_y_sptr)[z][y][x] / (*get_norm_sptr())[z][y][x])
-                         + (pet_im_grad_x[z][y][x] * (*anatomical_grad_x_sptr)[z][y][x] / (*get_norm_sptr())[z][y][x]));
+                  inner_product[z][y][x] = ((pet_im_grad_y[z][y][x] * (*anatomical_grad_y_sptr)[z][y][x] / norm[z][y][x])
+                                            + (pet_im_grad_x[z][y][x] * (*anatomical_grad_x_sptr)[z][y][x] / norm[z][y][x]));
 
                   penalty[z][y][x] = sqrt(square(this->alpha) + square(pet_im_grad_y[z][y][x]) + square(pet_im_grad_x[z][y][x])
                                           - square(inner_product[z][y][x]));
@@ -442,7 +453,7 @@ PLSPrior<elemT>::compute_inner_product_and_penalty(DiscretisedDensity<3, elemT>&
                   inner_product[z][y][x] = (pet_im_grad_z[z][y][x] * (*anatomical_grad_z_sptr)[z][y][x]
                                             + pet_im_grad_y[z][y][x] * (*anatomical_grad_y_sptr)[z][y][x]
                                             + pet_im_grad_x[z][y][x] * (*anatomical_grad_x_sptr)[z][y][x])
-                                           / (*get_norm_sptr())[z][y][x];
+                                           / norm[z][y][x];
 
                   penalty[z][y][x] = sqrt(square(this->alpha) + square(pet_im_grad_z[z][y][x]) + square(pet_im_grad_y[z][y][x])
                                           + square(pet_im_grad_x[z][y][x]) - square(inner_product[z][y][x]));
@@ -478,11 +489,16 @@ PLSPrior<elemT>::compute_value(const DiscretisedDensity<3, elemT>& current_image
 
   const bool do_kappa = !is_null_ptr(kappa_ptr);
 
-  double result = 0.;
   const int min_z = current_image_estimate.get_min_index();
   const int max_z = current_image_estimate.get_max_index();
+  // sum per plane first, such that the result does not depend on the number of threads
+  std::vector<double> plane_sums(max_z - min_z + 1, 0.);
+#ifdef STIR_OPENMP
+#  pragma omp parallel for
+#endif
   for (int z = min_z; z <= max_z; z++)
     {
+      double& result = plane_sums[z - min_z];
 
       const int min_y = current_image_estimate[z].get_min_index();
       const int max_y = current_image_estimate[z].get_max_index();
@@ -511,6 +527,7 @@ PLSPrior<elemT>::compute_value(const DiscretisedDensity<3, elemT>& current_image
             }
         }
     }
+  const double result = std::accumulate(plane_sums.begin(), plane_sums.end(), 0.);
   return result * this->penalisation_factor;
 }
 
@@ -551,9 +568,13 @@ PLSPrior<elemT>::compute_gradient(DiscretisedDensity<3, elemT>& prior_gradient,
   const bool do_kappa = !is_null_ptr(kappa_ptr);
   shared_ptr<DiscretisedDensity<3, elemT>> gradient_sptr(this->anatomical_sptr->get_empty_copy());
 
+  const DiscretisedDensity<3, elemT>& norm = *this->get_norm_sptr();
   const int min_z = current_image_estimate.get_min_index();
   const int max_z = current_image_estimate.get_max_index();
 
+#ifdef STIR_OPENMP
+#  pragma omp parallel for
+#endif
   for (int z = min_z; z <= max_z; z++)
     {
 
@@ -582,20 +603,18 @@ PLSPrior<elemT>::compute_gradient(DiscretisedDensity<3, elemT>& prior_gradient,
                 {
                   (*gradientx_sptr)[z][y][x + 1]
                       = (((*pet_im_grad_x_sptr)[z][y][x + 1]
-                          - (*anatomical_grad_x_sptr)[z][y][x + 1] * (*inner_product_sptr)[z][y][x + 1]
-                                / (*get_norm_sptr())[z][y][x + 1])
+                          - (*anatomical_grad_x_sptr)[z][y][x + 1] * (*inner_product_sptr)[z][y][x + 1] / norm[z][y][x + 1])
                              / (*penalty_sptr)[z][y][x + 1]
                          - (((*pet_im_grad_x_sptr)[z][y][x]
-                             - (*anatomical_grad_x_sptr)[z][y][x] * (*inner_product_sptr)[z][y][x] / (*get_norm_sptr())[z][y][x])
+                             - (*anatomical_grad_x_sptr)[z][y][x] * (*inner_product_sptr)[z][y][x] / norm[z][y][x])
                             / (*penalty_sptr)[z][y][x]));
 
                   (*gradienty_sptr)[z][y + 1][x]
                       = (((*pet_im_grad_y_sptr)[z][y + 1][x]
-                          - (*anatomical_grad_y_sptr)[z][y + 1][x] * (*inner_product_sptr)[z][y + 1][x]
-                                / (*get_norm_sptr())[z][y + 1][x])
+                          - (*anatomical_grad_y_sptr)[z][y + 1][x] * (*inner_product_sptr)[z][y + 1][x] / norm[z][y + 1][x])
                              / (*penalty_sptr)[z][y + 1][x]
                          - (((*pet_im_grad_y_sptr)[z][y][x]
-                             - (*anatomical_grad_y_sptr)[z][y][x] * (*inner_product_sptr)[z][y][x] / (*get_norm_sptr())[z][y][x])
+                             - (*anatomical_grad_y_sptr)[z][y][x] * (*inner_product_sptr)[z][y][x] / norm[z][y][x])
                             / (*penalty_sptr)[z][y][x]));
                 }
               else
@@ -603,35 +622,35 @@ PLSPrior<elemT>::compute_gradient(DiscretisedDensity<3, elemT>& prior_gradient,
 
                   (*gradientx_sptr)[z][y][x + 1]
                       = (((*pet_im_grad_x_sptr)[z][y][x + 1]
-                          - (*anatomical_grad_x_sptr)[z][y][x + 1] * (*inner_product_sptr)[z][y][x + 1]
-                                / (*get_norm_sptr())[z][y][x + 1])
+                          - (*anatomical_grad_x_sptr)[z][y][x + 1] * (*inner_product_sptr)[z][y][x + 1] / norm[z][y][x + 1])
                              / (*penalty_sptr)[z][y][x + 1]
                          - ((*pet_im_grad_x_sptr)[z][y][x]
-                            - (*anatomical_grad_x_sptr)[z][y][x] * (*inner_product_sptr)[z][y][x] / (*get_norm_sptr())[z][y][x])
+                            - (*anatomical_grad_x_sptr)[z][y][x] * (*inner_product_sptr)[z][y][x] / norm[z][y][x])
                                / (*penalty_sptr)[z][y][x]);
 
                   (*gradienty_sptr)[z][y + 1][x]
                       = (((*pet_im_grad_y_sptr)[z][y + 1][x]
-                          - (*anatomical_grad_y_sptr)[z][y + 1][x] * (*inner_product_sptr)[z][y + 1][x]
-                                / (*get_norm_sptr())[z][y + 1][x])
+                          - (*anatomical_grad_y_sptr)[z][y + 1][x] * (*inner_product_sptr)[z][y + 1][x] / norm[z][y + 1][x])
                              / (*penalty_sptr)[z][y + 1][x]
                          - (((*pet_im_grad_y_sptr)[z][y][x]
-                             - (*anatomical_grad_y_sptr)[z][y][x] * (*inner_product_sptr)[z][y][x] / (*get_norm_sptr())[z][y][x])
+                             - (*anatomical_grad_y_sptr)[z][y][x] * (*inner_product_sptr)[z][y][x] / norm[z][y][x])
                             / (*penalty_sptr)[z][y][x]));
 
                   (*gradientz_sptr)[z + 1][y][x]
                       = (((*pet_im_grad_z_sptr)[z + 1][y][x]
-                          - (*anatomical_grad_z_sptr)[z + 1][y][x] * (*inner_product_sptr)[z + 1][y][x]
-                                / (*get_norm_sptr())[z + 1][y][x])
+                          - (*anatomical_grad_z_sptr)[z + 1][y][x] * (*inner_product_sptr)[z + 1][y][x] / norm[z + 1][y][x])
                              / (*penalty_sptr)[z + 1][y][x]
                          - (((*pet_im_grad_z_sptr)[z][y][x]
-                             - (*anatomical_grad_z_sptr)[z][y][x] * (*inner_product_sptr)[z][y][x] / (*get_norm_sptr())[z][y][x])
+                             - (*anatomical_grad_z_sptr)[z][y][x] * (*inner_product_sptr)[z][y][x] / norm[z][y][x])
                             / (*penalty_sptr)[z][y][x]));
                 }
             }
         }
     }
 
+#ifdef STIR_OPENMP
+#  pragma omp parallel for
+#endif
   for (int z = min_z; z <= max_z; z++)
     {
 
@@ -98,6 +98,8 @@ PoissonLogLikelihoodWithLinearModelForMean<TargetT>::set_subsensitivity_filename
 {
   this->already_set_up = false;
   this->subsensitivity_filenames = filenames;
+  if (filenames.empty())
+    return;
   try
     {
       const std::string test_sensitivity_filename = boost::str(boost::format(this->subsensitivity_filenames) % 0);
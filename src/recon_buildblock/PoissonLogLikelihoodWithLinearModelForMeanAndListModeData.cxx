@@ -28,8 +28,18 @@
 #include "stir/recon_buildblock/TrivialBinNormalisation.h"
 #include "stir/is_null_ptr.h"
 #include "stir/FilePath.h"
+#include "stir/DiscretisedDensityOnCartesianGrid.h"
+#include "stir/interfile_keyword_functions.h"
+#include "stir/stream.h"
+#include "stir/fnv1a_hash.h"
+#include "stir/info.h"
 #include "stir/warning.h"
 #include "stir/error.h"
+#include "boost/format.hpp"
+#include <fstream>
+#include <sstream>
+#include <vector>
+#include <typeinfo>
 
 using std::vector;
 using std::pair;
@@ -66,6 +76,8 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeData<TargetT>::set_defaults
   skip_lm_input_file = false;
   cache_path = "";
   cache_size = 0;
+  sensitivity_cache_directory = "";
+  sensitivity_cache_filename = "";
 }
 
 template <typename TargetT>
@@ -84,6 +96,7 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeData<TargetT>::initialise_k
   this->parser.add_key("cache path", &cache_path);
   this->parser.add_key("max cache size", &cache_size);
   this->parser.add_key("recompute cache", &recompute_cache);
+  this->parser.add_key("sensitivity cache directory", &sensitivity_cache_directory);
 }
 
 template <typename TargetT>
@@ -231,6 +244,192 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeData<TargetT>::get_cache_fi
   return icache.get_as_string();
 }
 
+template <typename TargetT>
+void
+PoissonLogLikelihoodWithLinearModelForMeanAndListModeData<TargetT>::set_sensitivity_cache_directory(const std::string& directory)
+{
+  this->already_set_up = this->already_set_up && (this->sensitivity_cache_directory == directory);
+  this->sensitivity_cache_directory = directory;
+}
+
+template <typename TargetT>
+std::string
+PoissonLogLikelihoodWithLinearModelForMeanAndListModeData<TargetT>::get_sensitivity_cache_directory() const
+{
+  return this->sensitivity_cache_directory;
+}
+
+template <typename TargetT>
+std::string
+PoissonLogLikelihoodWithLinearModelForMeanAndListModeData<TargetT>::get_sensitivity_cache_filename() const
+{
+  return this->sensitivity_cache_filename;
+}
+
+namespace detail
+{
+//! write size and hash of the contents of a file (and its data file if it is an Interfile header)
+static void
+write_file_contents_description(std::ostream& s, const std::string& filename)
+{
+  std::ifstream file(filename, std::ios::in | std::ios::binary);
+  if (!file)
+    return;
+  // hash in chunks, such that large files do not need to be in memory
+  std::vector<char> buffer(1024 * 1024);
+  std::uint64_t hash = fnv1a_hash(buffer.data(), 0);
+  std::uint64_t size = 0;
+  std::string first_line;
+  while (file)
+    {
+      file.read(buffer.data(), buffer.size());
+      const std::size_t num_read = static_cast<std::size_t>(file.gcount());
+      if (num_read == 0)
+        break;
+      if (size == 0)
+        {
+          const std::string chunk(buffer.data(), num_read);
+          first_line = chunk.substr(0, chunk.find_first_of("\r\n"));
+        }
+      hash = fnv1a_hash(buffer.data(), num_read, hash);
+      size += num_read;
+    }
+  s << "contents of " << filename << ": " << size << " bytes, hash " << hash << '\n';
+
+  if (standardise_interfile_keyword(first_line) != "interfile")
+    return;
+  file.clear();
+  file.seekg(0);
+  std::string line;
+  while (std::getline(file, line))
+    {
+      const std::string::size_type pos = line.find(":=");
+      if (pos == std::string::npos || standardise_interfile_keyword(line.substr(0, pos)) != "name of data file")
+        continue;
+      const std::string::size_type start = line.find_first_not_of(" \t", pos + 2);
+      const std::string::size_type end = line.find_last_not_of(" \t\r");
+      if (start == std::string::npos || end < start)
+        continue;
+      FilePath data_filename(line.substr(start, end - start + 1), false);
+      data_filename.prepend_directory_name(FilePath(filename, false).get_path_only());
+      write_file_contents_description(s, data_filename.get_as_string());
+    }
+}
+
+//! write the contents of all files that are used as value in \a parameters (as returned by parameter_info())
+static void
+write_referenced_files_description(std::ostream& s, const std::string& parameters)
+{
+  std::istringstream lines(parameters);
+  std::string line;
+  while (std::getline(lines, line))
+    {
+      const std::string::size_type pos = line.find(":=");
+      if (pos == std::string::npos)
+        continue;
+      const std::string::size_type start = line.find_first_not_of(" \t", pos + 2);
+      const std::string::size_type end = line.find_last_not_of(" \t\r");
+      if (start == std::string::npos || end < start)
+        continue;
+      const std::string value = line.substr(start, end - start + 1);
+      if (FilePath::exists(value) && FilePath(value, false).is_regular_file())
+        write_file_contents_description(s, value);
+    }
+}
+} // namespace detail
+
+template <typename TargetT>
+void
+PoissonLogLikelihoodWithLinearModelForMeanAndListModeData<TargetT>::write_sensitivity_cache_description(std::ostream& s,
+                                                                                                        const TargetT& target)
+{
+  s << "sensitivity cache version 1\n" << typeid(*this).name() << '\n';
+
+  const ProjDataInfo& proj_data_info = *this->list_mode_data_sptr->get_proj_data_info_sptr();
+  s << typeid(proj_data_info).name() << '\n' << proj_data_info.parameter_info() << '\n';
+  s << "maximum absolute segment number to process " << this->max_segment_num_to_process << '\n';
+
+  {
+    BasicCoordinate<3, int> min_indices, max_indices;
+    if (!target.get_regular_range(min_indices, max_indices))
+      error("The sensitivity cache can only be used for images with a regular range");
+    s << "image index range " << min_indices << ", " << max_indices << '\n';
+    s << "origin " << target.get_origin() << '\n';
+    if (auto cartesian_ptr = dynamic_cast<const DiscretisedDensityOnCartesianGrid<3, float>*>(&target))
+      s << "grid spacing " << cartesian_ptr->get_grid_spacing() << '\n';
+  }
+
+  s << "num subsets " << this->num_subsets << '\n';
+  s << "use subset sensitivities " << this->get_use_subset_sensitivities() << '\n';
+
+  {
+    const std::string normalisation_parameters = this->normalisation_sptr->parameter_info();
+    s << typeid(*this->normalisation_sptr).name() << '\n' << normalisation_parameters << '\n';
+    detail::write_referenced_files_description(s, normalisation_parameters);
+  }
+}
+
+template <typename TargetT>
+Succeeded
+PoissonLogLikelihoodWithLinearModelForMeanAndListModeData<TargetT>::set_up(shared_ptr<TargetT> const& target_sptr)
+{
+  this->sensitivity_cache_filename = "";
+  const bool use_subset_sensitivities = this->get_use_subset_sensitivities();
+  // only use the cache if the user did not ask to read/write the sensitivity from/to a specific file
+  if (this->sensitivity_cache_directory.empty() || is_null_ptr(this->list_mode_data_sptr) || is_null_ptr(this->normalisation_sptr)
+      || !(use_subset_sensitivities ? this->get_subsensitivity_filenames() : this->get_sensitivity_filename()).empty())
+    return base_type::set_up(target_sptr);
+
+  std::ostringstream description;
+  this->write_sensitivity_cache_description(description, *target_sptr);
+  FilePath filename_prefix((boost::format("sensitivity_%016x") % fnv1a_hash(description.str())).str(), false);
+  filename_prefix.prepend_directory_name(this->sensitivity_cache_directory);
+  const std::string prefix = filename_prefix.get_as_string();
+  // for subset sensitivities, the base class needs a boost::format pattern, so we have to escape any % in the directory
+  std::string escaped_prefix;
+  for (const char c : prefix)
+    escaped_prefix += (c == '%' ? std::string("%%") : std::string(1, c));
+  const std::string cache_filename = use_subset_sensitivities ? escaped_prefix + "_subset%d.hv" : prefix + ".hv";
+
+  const bool recompute_sensitivity = this->get_recompute_sensitivity();
+  bool cache_hit = !recompute_sensitivity;
+  if (use_subset_sensitivities)
+    {
+      for (int subset_num = 0; cache_hit && subset_num < this->num_subsets; ++subset_num)
+        cache_hit = FilePath::exists(prefix + "_subset" + std::to_string(subset_num) + ".hv");
+    }
+  else
+    cache_hit = cache_hit && FilePath::exists(cache_filename);
+  if (cache_hit)
+    info(boost::format("Sensitivity cache hit: reading sensitivities from '%1%'") % cache_filename);
+  else
+    info(boost::format("Sensitivity cache miss: sensitivities will be computed and written to '%1%'") % cache_filename);
+
+  // let the base class read or write the cache files, and restore the settings afterwards
+  auto set_sensitivity_settings = [this, use_subset_sensitivities](const std::string& filename, const bool recompute) {
+    if (use_subset_sensitivities)
+      this->set_subsensitivity_filenames(filename);
+    else
+      this->set_sensitivity_filename(filename);
+    this->set_recompute_sensitivity(recompute);
+  };
+  set_sensitivity_settings(cache_filename, !cache_hit);
+  Succeeded succeeded = Succeeded::no;
+  try
+    {
+      succeeded = base_type::set_up(target_sptr);
+    }
+  catch (...)
+    {
+      set_sensitivity_settings("", recompute_sensitivity);
+      throw;
+    }
+  set_sensitivity_settings("", recompute_sensitivity);
+  this->sensitivity_cache_filename = cache_filename;
+  this->already_set_up = succeeded == Succeeded::yes;
+  return succeeded;
+}
+
 template <typename TargetT>
 const ListModeData&
 PoissonLogLikelihoodWithLinearModelForMeanAndListModeData<TargetT>::get_input_data() const
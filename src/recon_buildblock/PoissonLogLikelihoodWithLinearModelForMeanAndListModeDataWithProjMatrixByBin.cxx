@@ -47,6 +47,8 @@
 #include <fstream>
 #include <cmath>
 #include <string>
+#include <future>
+#include <utility>
 
 #include "stir/recon_buildblock/ForwardProjectorByBinUsingProjMatrixByBin.h"
 #include "stir/recon_buildblock/BackProjectorByBinUsingProjMatrixByBin.h"
@@ -91,6 +93,7 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<Tar
 
   this->use_tofsens = false;
   skip_balanced_subsets = false;
+  this->pipelined_listmode_reading = false;
 }
 
 template <typename TargetT>
@@ -108,6 +111,7 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<Tar
 
   this->parser.add_key("num_events_to_use", &this->num_events_to_use);
   this->parser.add_key("skip checking balanced subsets", &skip_balanced_subsets);
+  this->parser.add_key("pipelined listmode reading", &this->pipelined_listmode_reading);
 }
 
 template <typename TargetT>
@@ -155,6 +159,21 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<Tar
   skip_balanced_subsets = arg;
 }
 
+template <typename TargetT>
+void
+PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<TargetT>::set_pipelined_listmode_reading(
+    const bool arg)
+{
+  this->pipelined_listmode_reading = arg;
+}
+
+template <typename TargetT>
+bool
+PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<TargetT>::get_pipelined_listmode_reading() const
+{
+  return this->pipelined_listmode_reading;
+}
+
 #if STIR_VERSION < 060000
 template <typename TargetT>
 void
@@ -360,95 +379,25 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<Tar
   return false;
 }
 
-template <typename TargetT>
-bool
-PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<TargetT>::load_listmode_cache_file(
-    unsigned int file_id) const
-{
-  FilePath icache(this->get_cache_filename(file_id), false);
-
-  record_cache.clear();
-
-  if (icache.is_regular_file())
-    {
-      info(boost::format("Loading Listmode cache from disk %1%") % icache.get_as_string());
-      std::ifstream fin(icache.get_as_string(), std::ios::in | std::ios::binary | std::ios::ate);
-
-      const std::size_t num_records = fin.tellg() / sizeof(Bin);
-      try
-        {
-          record_cache.reserve(num_records + 1); // add 1 to avoid reallocation when overruning (see below)
-        }
-      catch (...)
-        {
-          error("Listmode: cannot allocate cache for " + std::to_string(num_records + 1) + " records");
-        }
-      if (!fin)
-        error("Error opening cache file \"" + icache.get_as_string() + "\" for reading.");
-
-      fin.clear();
-      fin.seekg(0);
-
-      while (!fin.eof())
-        {
-          BinAndCorr tmp;
-          fin.read((char*)&tmp, sizeof(Bin));
-          if (this->has_add)
-            {
-              tmp.my_corr = tmp.my_bin.get_bin_value();
-              tmp.my_bin.set_bin_value(1);
-            }
-          record_cache.push_back(tmp);
-        }
-      // The while will push one junk record
-      record_cache.pop_back();
-      fin.close();
-    }
-  else
-    {
-      error("Cannot find Listmode cache on disk. Please recompute it or do not set the  max cache size. Abort.");
-      return true; // need to return something to avoid compiler warning
-    }
-
-  info(boost::format("Cached Events: %1% ") % record_cache.size(), 2);
-  return (file_id + 1) == this->num_cache_files;
-}
-
 template <typename TargetT>
 Succeeded
 PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<TargetT>::write_listmode_cache_file(
     unsigned int file_id) const
 {
   const auto cache_filename = this->get_cache_filename(file_id);
-  const bool with_add = !is_null_ptr(this->additive_proj_data_sptr);
-
-  {
-    info("Storing Listmode cache to file \"" + cache_filename + "\".");
-    // open the file, overwriting whatever was there before
-    std::ofstream fout(cache_filename, std::ios::out | std::ios::binary | std::ios::trunc);
-    if (!fout)
-      error("Error opening cache file \"" + cache_filename + "\" for writing.");
-
-    for (unsigned long int ie = 0; ie < record_cache.size(); ++ie)
-      {
-        Bin tmp = record_cache[ie].my_bin;
-        if (with_add)
-          tmp.set_bin_value(record_cache[ie].my_corr);
-        fout.write((char*)&tmp, sizeof(Bin));
-      }
-    if (!fout)
-      error("Error writing to cache file \"" + cache_filename + "\".");
-
-    fout.close();
-  }
-
-  return Succeeded::yes;
+  info("Storing Listmode cache to file \"" + cache_filename + "\".");
+  return ListModeCacheFile::write(cache_filename,
+                                  this->record_cache,
+                                  *this->proj_data_info_sptr,
+                                  this->has_add,
+                                  *this->PM_sptr->get_symmetries_ptr(),
+                                  this->num_subsets);
 }
 
 template <typename TargetT>
 bool
 PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<TargetT>::read_listmode_batch(
-    unsigned int ibatch) const
+    unsigned int ibatch, std::vector<BinAndCorr>& records) const
 {
   double current_time = 0.;
   if (ibatch == 0)
@@ -456,10 +405,10 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<Tar
   else
     current_time = this->end_time_per_batch[ibatch - 1];
 
-  record_cache.clear();
+  records.clear();
   try
     {
-      record_cache.reserve(this->cache_size);
+      records.reserve(this->cache_size);
     }
   catch (...)
     {
@@ -511,18 +460,17 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<Tar
             }
           try
             {
-              record_cache.push_back(tmp);
+              records.push_back(tmp);
               ++cached_events;
             }
           catch (...)
             {
               // should never get here due to `reserve` statement above, but best to check...
-              error("Listmode: running out of memory for cache. Current size: " + std::to_string(this->record_cache.size())
-                    + " records");
+              error("Listmode: running out of memory for cache. Current size: " + std::to_string(records.size()) + " records");
             }
 
-          if (record_cache.size() > 1 && record_cache.size() % 500000L == 0)
-            info(boost::format("Read Prompt Events (this batch): %1% ") % record_cache.size(), 3);
+          if (records.size() > 1 && records.size() % 500000L == 0)
+            info(boost::format("Read Prompt Events (this batch): %1% ") % records.size(), 3);
 
           if (this->num_events_to_use > 0)
             if (cached_events >= static_cast<std::size_t>(this->num_events_to_use))
@@ -531,7 +479,7 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<Tar
                 break;
               }
 
-          if (record_cache.size() == this->cache_size)
+          if (records.size() == this->cache_size)
             break; // cache is full.
         }
     }
@@ -551,7 +499,7 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<Tar
   // add additive term to current cache
   if (this->has_add)
     {
-      info(boost::format("Caching Additive corrections for : %1% events.") % record_cache.size(), 2);
+      info(boost::format("Caching Additive corrections for : %1% events.") % records.size(), 2);
 
 #ifdef STIR_OPENMP
 #  pragma omp parallel
@@ -579,7 +527,7 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<Tar
           {
             const auto segment(this->additive_proj_data_sptr->get_segment_by_view(seg, timing_pos_num));
 
-            for (BinAndCorr& cur_bin : record_cache)
+            for (BinAndCorr& cur_bin : records)
               {
                 if (cur_bin.my_bin.segment_num() == seg)
                   {
@@ -600,18 +548,62 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<Tar
 }
 
 template <typename TargetT>
-bool
-PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<TargetT>::load_listmode_batch(
-    unsigned int ibatch) const
+template <typename BatchFunctionT>
+void
+PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<TargetT>::for_each_listmode_batch(
+    const int subset_num, BatchFunctionT&& process_batch) const
 {
   if (this->cache_lm_file)
     {
-      return this->load_listmode_cache_file(ibatch);
+      // events are in memory-mapped files, so there is no need to read them
+      for (unsigned int icache = 0; icache < this->cache_files.size(); ++icache)
+        {
+          const ListModeCacheFile& cache_file = *this->cache_files[icache];
+          if (this->pipelined_listmode_reading && icache + 1 < this->cache_files.size())
+            this->cache_files[icache + 1]->prefetch();
+          if (cache_file.get_num_subsets() == this->num_subsets)
+            process_batch(cache_file.get_records_in_subset(subset_num), icache, /* num_subsets = */ 1);
+          else
+            process_batch(cache_file.get_all_records(), icache, this->num_subsets);
+        }
+      return;
     }
-  else
+
+  if (!this->pipelined_listmode_reading)
+    {
+      unsigned int icache = 0;
+      while (true)
+        {
+          const bool stop = this->read_listmode_batch(icache, this->record_cache);
+          process_batch(this->record_cache, icache, this->num_subsets);
+          ++icache;
+          if (stop)
+            break;
+        }
+      return;
+    }
+
+  // Pipelined version: read the next batch in a separate thread while the current one is processed.
+  // Note that reading is sequential, so only the reading thread accesses the list mode data.
+  unsigned int icache = 0;
+  bool stop = this->read_listmode_batch(icache, this->record_cache);
+  while (true)
     {
-      return this->read_listmode_batch(ibatch);
+      std::future<bool> next_stop;
+      if (!stop)
+        next_stop = std::async(std::launch::async,
+                               [this, icache]() { return this->read_listmode_batch(icache + 1, this->next_record_cache); });
+      // note: if process_batch throws, the destructor of next_stop waits for the reading thread
+      process_batch(this->record_cache, icache, this->num_subsets);
+      if (stop)
+        break;
+      // wait for reading to finish (rethrows any exception in the reading thread)
+      stop = next_stop.get();
+      std::swap(this->record_cache, this->next_record_cache);
+      ++icache;
     }
+  // free memory of the second buffer
+  std::vector<BinAndCorr>().swap(this->next_record_cache);
 }
 
 template <typename TargetT>
@@ -623,37 +615,58 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<Tar
       warning("Looking for existing cache files such as \"" + this->get_cache_filename(0) + "\".\n"
               + "We will be ignoring any time frame definitions as well as num_events_to_use!");
       // find how many cache files there are
-      this->num_cache_files = 0;
+      unsigned int num_cache_files = 0;
       while (true)
         {
-          if (!FilePath::exists(this->get_cache_filename(this->num_cache_files)))
+          if (!FilePath::exists(this->get_cache_filename(num_cache_files)))
             break;
-          ++this->num_cache_files;
+          ++num_cache_files;
         }
-      if (!this->num_cache_files)
+      if (!num_cache_files)
         error("No cache files found.");
-      return Succeeded::yes; // Stop here!!!
+      return this->open_listmode_cache_files(num_cache_files);
     }
 
   assert(this->cache_lm_file);
 
-  this->num_cache_files = 0;
+  // first close any existing files, as we might overwrite them
+  this->cache_files.clear();
+  unsigned int num_cache_files = 0;
 
   while (true)
     {
       info("Listmode reconstruction: Creating cache...", 2);
 
-      bool stop_caching = this->read_listmode_batch(this->num_cache_files);
+      bool stop_caching = this->read_listmode_batch(num_cache_files, this->record_cache);
 
-      if (write_listmode_cache_file(this->num_cache_files) == Succeeded::no)
+      if (write_listmode_cache_file(num_cache_files) == Succeeded::no)
         {
           error("Error writing cache file!");
         }
-      ++this->num_cache_files;
+      ++num_cache_files;
 
       if (stop_caching)
         break;
     }
+  // free memory, as we will use the files from now on
+  std::vector<BinAndCorr>().swap(this->record_cache);
+  return this->open_listmode_cache_files(num_cache_files);
+}
+
+template <typename TargetT>
+Succeeded
+PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<TargetT>::open_listmode_cache_files(
+    const unsigned int num_cache_files)
+{
+  this->cache_files.clear();
+  for (unsigned int file_id = 0; file_id < num_cache_files; ++file_id)
+    {
+      this->cache_files.push_back(
+          std::make_shared<ListModeCacheFile>(this->get_cache_filename(file_id), *this->proj_data_info_sptr));
+      if (this->has_add && !this->cache_files.back()->has_additive_terms())
+        error("Listmode cache file \"" + this->get_cache_filename(file_id)
+              + "\" does not contain additive terms. Please recompute the cache.");
+    }
   return Succeeded::yes;
 }
 
@@ -720,6 +733,17 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<Tar
   this->sens_backprojector_sptr->get_output(sensitivity);
 }
 
+template <typename TargetT>
+void
+PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<TargetT>::write_sensitivity_cache_description(
+    std::ostream& s, const TargetT& target)
+{
+  base_type::write_sensitivity_cache_description(s, target);
+  s << "use time-of-flight sensitivities " << this->use_tofsens << '\n';
+  if (!is_null_ptr(this->PM_sptr))
+    s << this->PM_sptr->get_registered_name() << '\n' << this->PM_sptr->get_parameter_info_affecting_elements();
+}
+
 template <typename TargetT>
 std::unique_ptr<ExamInfo>
 PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<TargetT>::get_exam_info_uptr_for_target() const
@@ -818,12 +842,13 @@ LM_Hessian(DiscretisedDensity<3, float>& output_image,
   row.back_project(output_image, fwd_bin);
 }
 
+template <typename RecordsT>
 void
 LM_gradient_distributable_computation(const shared_ptr<ProjMatrixByBin> PM_sptr,
                                       const shared_ptr<ProjDataInfo>& proj_data_info_sptr,
                                       DiscretisedDensity<3, float>* output_image_ptr,
                                       const DiscretisedDensity<3, float>* input_image_ptr,
-                                      const std::vector<BinAndCorr>& record_ptr,
+                                      const RecordsT& record_ptr,
                                       const int subset_num,
                                       const int num_subsets,
                                       const bool has_add,
@@ -843,13 +868,14 @@ LM_gradient_distributable_computation(const shared_ptr<ProjMatrixByBin> PM_sptr,
                                LM_gradient_and_value<true, false>);
 }
 
+template <typename RecordsT>
 void
 LM_Hessian_distributable_computation(const shared_ptr<ProjMatrixByBin> PM_sptr,
                                      const shared_ptr<ProjDataInfo>& proj_data_info_sptr,
                                      DiscretisedDensity<3, float>* output_image_ptr,
                                      const DiscretisedDensity<3, float>* input_image_ptr,
                                      const DiscretisedDensity<3, float>* rhs_ptr,
-                                     const std::vector<BinAndCorr>& record_ptr,
+                                     const RecordsT& record_ptr,
                                      const int subset_num,
                                      const int num_subsets,
                                      const bool has_add,
@@ -883,25 +909,19 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<
           "use_subset_sensitivities is false. This will result in an error in the gradient computation.");
 
   double accum = 0.;
-  unsigned int icache = 0;
-  while (true)
-    {
-      bool stop = this->load_listmode_batch(icache);
-      LM_distributable_computation(this->PM_sptr,
-                                   this->proj_data_info_sptr,
-                                   nullptr,
-                                   &current_estimate,
-                                   record_cache,
-                                   subset_num,
-                                   this->num_subsets,
-                                   this->has_add,
-                                   /* accumulate */ true,
-                                   &accum,
-                                   LM_gradient_and_value<false, true>);
-      ++icache;
-      if (stop)
-        break;
-    }
+  this->for_each_listmode_batch(subset_num, [&](const auto& records, unsigned int, const int num_subsets_in_records) {
+    LM_distributable_computation(this->PM_sptr,
+                                 this->proj_data_info_sptr,
+                                 nullptr,
+                                 &current_estimate,
+                                 records,
+                                 subset_num,
+                                 num_subsets_in_records,
+                                 this->has_add,
+                                 /* accumulate */ true,
+                                 &accum,
+                                 LM_gradient_and_value<false, true>);
+  });
   std::inner_product(current_estimate.begin_all_const(),
                      current_estimate.end_all_const(),
                      this->get_subset_sensitivity(subset_num).begin_all_const(),
@@ -924,24 +944,19 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<
           "actual_compute_subset_gradient_without_penalty(): cannot subtract subset sensitivity because "
           "use_subset_sensitivities is false. This will result in an error in the gradient computation.");
 
-  unsigned int icache = 0;
-  while (true)
-    {
-      bool stop = this->load_listmode_batch(icache);
-      LM_gradient_distributable_computation(this->PM_sptr,
-                                            this->proj_data_info_sptr,
-                                            &gradient,
-                                            &current_estimate,
-                                            record_cache,
-                                            subset_num,
-                                            this->num_subsets,
-                                            this->has_add,
-                                            /* accumulate = */ icache != 0,
-                                            nullptr);
-      ++icache;
-      if (stop)
-        break;
-    }
+  this->for_each_listmode_batch(subset_num,
+                                [&](const auto& records, const unsigned int icache, const int num_subsets_in_records) {
+                                  LM_gradient_distributable_computation(this->PM_sptr,
+                                                                        this->proj_data_info_sptr,
+                                                                        &gradient,
+                                                                        &current_estimate,
+                                                                        records,
+                                                                        subset_num,
+                                                                        num_subsets_in_records,
+                                                                        this->has_add,
+                                                                        /* accumulate = */ icache != 0,
+                                                                        nullptr);
+                                });
 
   if (!add_sensitivity)
     {
@@ -982,24 +997,19 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBin<
   assert(subset_num >= 0);
   assert(subset_num < this->num_subsets);
 
-  unsigned int icache = 0;
-  while (true)
-    {
-      bool stop = this->load_listmode_batch(icache);
-      LM_Hessian_distributable_computation(this->PM_sptr,
-                                           this->proj_data_info_sptr,
-                                           &output,
-                                           &current_estimate,
-                                           &rhs,
-                                           record_cache,
-                                           subset_num,
-                                           this->num_subsets,
-                                           this->has_add,
-                                           /* accumulate = */ icache != 0);
-      ++icache;
-      if (stop)
-        break;
-    }
+  this->for_each_listmode_batch(subset_num,
+                                [&](const auto& records, const unsigned int icache, const int num_subsets_in_records) {
+                                  LM_Hessian_distributable_computation(this->PM_sptr,
+                                                                       this->proj_data_info_sptr,
+                                                                       &output,
+                                                                       &current_estimate,
+                                                                       &rhs,
+                                                                       records,
+                                                                       subset_num,
+                                                                       num_subsets_in_records,
+                                                                       this->has_add,
+                                                                       /* accumulate = */ icache != 0);
+                                });
   return Succeeded::yes;
 }
 
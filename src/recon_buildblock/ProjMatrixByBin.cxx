@@ -27,6 +27,31 @@
 #include "stir/recon_buildblock/ProjMatrixByBin.h"
 #include "stir/recon_buildblock/ProjMatrixElemsForOneBin.h"
 #include "stir/TOF_conversions.h"
+#include "stir/info.h"
+#include "stir/Verbosity.h"
+#include "stir/warning.h"
+#include "stir/error.h"
+#include "stir/FilePath.h"
+#include "stir/Succeeded.h"
+#include "stir/stream.h"
+#include "stir/is_null_ptr.h"
+#include "stir/fnv1a_hash.h"
+#include "stir/recon_buildblock/find_basic_vs_nums_in_subsets.h"
+#include <boost/format.hpp>
+#include <boost/interprocess/file_mapping.hpp>
+#include <boost/interprocess/mapped_region.hpp>
+#if defined(__OS_WIN__)
+#  include <process.h>
+#else
+#  include <unistd.h>
+#endif
+#include <algorithm>
+#include <cstdio>
+#include <cstring>
+#include <fstream>
+#include <sstream>
+#include <tuple>
+#include <typeinfo>
 
 START_NAMESPACE_STIR
 
@@ -35,6 +60,9 @@ ProjMatrixByBin::set_defaults()
 {
   cache_disabled = false;
   cache_stores_only_basic_bins = true;
+  max_cache_size_in_MB = 0.;
+  compact_cache_storage = "none";
+  persistent_cache_directory = "";
   gauss_sigma_in_mm = 0.f;
   r_sqrt2_gauss_sigma = 0.f;
 }
@@ -44,19 +72,51 @@ ProjMatrixByBin::initialise_keymap()
 {
   parser.add_key("disable caching", &cache_disabled);
   parser.add_key("store_only_basic_bins_in_cache", &cache_stores_only_basic_bins);
+  parser.add_key("maximum cache size in MB", &max_cache_size_in_MB);
+  parser.add_key("compact cache storage", &compact_cache_storage);
+  parser.add_key("persistent cache directory", &persistent_cache_directory);
 }
 
 bool
 ProjMatrixByBin::post_processing()
 {
+  if (max_cache_size_in_MB < 0)
+    {
+      warning("ProjMatrixByBin: maximum cache size in MB should be non-negative");
+      return true;
+    }
+  if (compact_cache_storage != "none" && compact_cache_storage != "float16" && compact_cache_storage != "fixed16")
+    {
+      warning("ProjMatrixByBin: compact cache storage should be none, float16 or fixed16");
+      return true;
+    }
   return false;
 }
 
 ProjMatrixByBin::ProjMatrixByBin()
+    : cache_size_in_bytes(0),
+      eviction_counter(0),
+      persistent_cache_hash(0),
+      num_persistent_cache_hits(0)
 {
   set_defaults();
 }
 
+ProjMatrixByBin::~ProjMatrixByBin()
+{
+  if (cache_disabled)
+    return;
+  if (Verbosity::get() < 3)
+    return;
+  const CacheStatistics stats = get_cache_statistics();
+  if (stats.num_hits + stats.num_misses > 0)
+    info(boost::format("ProjMatrixByBin cache: %1% hits, %2% misses (of which %8% from persistent cache), %3% evictions, "
+                       "%4% elements using %5% MB (storage: %6%, max relative error %7%)")
+             % stats.num_hits % stats.num_misses % stats.num_evictions % stats.num_elements % (stats.size_in_bytes / 1048576.)
+             % compact_cache_storage % stats.max_relative_error % stats.num_persistent_cache_hits,
+         3);
+}
+
 void
 ProjMatrixByBin::enable_cache(const bool v)
 {
@@ -80,6 +140,52 @@ ProjMatrixByBin::store_only_basic_bins_in_cache(const bool v)
   cache_stores_only_basic_bins = v;
 }
 
+void
+ProjMatrixByBin::set_maximum_cache_size_in_MB(const double size_in_MB)
+{
+  if (size_in_MB < 0)
+    error("ProjMatrixByBin::set_maximum_cache_size_in_MB: size should be non-negative");
+  max_cache_size_in_MB = size_in_MB;
+}
+
+double
+ProjMatrixByBin::get_maximum_cache_size_in_MB() const
+{
+  return max_cache_size_in_MB;
+}
+
+void
+ProjMatrixByBin::set_compact_cache_storage(const std::string& storage)
+{
+  if (storage != "none")
+    CompactProjMatrixElemsForOneBin::value_type_from_string(storage); // calls error() if not valid
+  compact_cache_storage = storage;
+}
+
+std::string
+ProjMatrixByBin::get_compact_cache_storage() const
+{
+  return compact_cache_storage;
+}
+
+void
+ProjMatrixByBin::set_persistent_cache_directory(const std::string& directory)
+{
+  persistent_cache_directory = directory;
+}
+
+std::string
+ProjMatrixByBin::get_persistent_cache_directory() const
+{
+  return persistent_cache_directory;
+}
+
+std::string
+ProjMatrixByBin::get_persistent_cache_filename() const
+{
+  return persistent_cache_filename;
+}
+
 bool
 ProjMatrixByBin::is_cache_enabled() const
 {
@@ -105,8 +211,526 @@ ProjMatrixByBin::clear_cache() const
           this->cache_collection[i][j].clear();
         }
     }
+  this->cache_size_in_bytes = 0;
+}
+
+ProjMatrixByBin::CacheStatistics
+ProjMatrixByBin::get_cache_statistics() const
+{
+  CacheStatistics stats = { 0, 0, 0, 0, 0, 0, 0.F };
+  for (int i = this->cache_collection.get_min_index(); i <= this->cache_collection.get_max_index(); ++i)
+    {
+      for (int j = this->cache_collection[i].get_min_index(); j <= this->cache_collection[i].get_max_index(); ++j)
+        {
+#ifdef STIR_OPENMP
+          omp_set_lock(&this->cache_locks[i][j]);
+#endif
+          const CacheShard& shard = this->cache_collection[i][j];
+          stats.num_hits += shard.num_hits;
+          stats.num_misses += shard.num_misses;
+          stats.num_evictions += shard.num_evictions;
+          stats.num_elements += shard.size();
+          stats.size_in_bytes += shard.size_in_bytes();
+          stats.max_relative_error = std::max(stats.max_relative_error, shard.max_relative_error);
+#ifdef STIR_OPENMP
+          omp_unset_lock(&this->cache_locks[i][j]);
+#endif
+        }
+    }
+#ifdef STIR_OPENMP
+#  pragma omp atomic read
+#endif
+  stats.num_persistent_cache_hits = this->num_persistent_cache_hits;
+  return stats;
+}
+
+void
+ProjMatrixByBin::reset_cache_statistics() const
+{
+#ifdef STIR_OPENMP
+#  pragma omp atomic write
+#endif
+  this->num_persistent_cache_hits = 0;
+  for (int i = this->cache_collection.get_min_index(); i <= this->cache_collection.get_max_index(); ++i)
+    {
+      for (int j = this->cache_collection[i].get_min_index(); j <= this->cache_collection[i].get_max_index(); ++j)
+        {
+#ifdef STIR_OPENMP
+          omp_set_lock(&this->cache_locks[i][j]);
+#endif
+          CacheShard& shard = this->cache_collection[i][j];
+          shard.num_hits = 0;
+          shard.num_misses = 0;
+          shard.num_evictions = 0;
+#ifdef STIR_OPENMP
+          omp_unset_lock(&this->cache_locks[i][j]);
+#endif
+        }
+    }
+}
+
+std::vector<Bin>
+ProjMatrixByBin::find_basic_bins_in_subset(const int subset_num, const int num_subsets) const
+{
+  std::vector<ViewSegmentNumbers> vs_nums = detail::find_basic_vs_nums_in_subset(*proj_data_info_sptr,
+                                                                                 *symmetries_sptr,
+                                                                                 proj_data_info_sptr->get_min_segment_num(),
+                                                                                 proj_data_info_sptr->get_max_segment_num(),
+                                                                                 subset_num,
+                                                                                 num_subsets);
+  // remove duplicates (find_basic_vs_nums_in_subset can return them for TOF data)
+  std::sort(vs_nums.begin(), vs_nums.end());
+  vs_nums.erase(std::unique(vs_nums.begin(), vs_nums.end()), vs_nums.end());
+
+  // find all basic bins
+  // Note that basic bins can be outside the range of the projection data (e.g. for an even number of
+  // tangential positions), so we find the basic bin for every bin in the subset.
+  std::vector<Bin> bins;
+  for (const auto& basic_vs_num : vs_nums)
+    {
+      const std::size_t start_index_of_vs = bins.size();
+      std::vector<ViewSegmentNumbers> related_vs_nums;
+      symmetries_sptr->get_related_view_segment_numbers(related_vs_nums, basic_vs_num);
+      for (const auto& vs_num : related_vs_nums)
+        {
+          const int segment_num = vs_num.segment_num();
+          for (int axial_pos_num = proj_data_info_sptr->get_min_axial_pos_num(segment_num);
+               axial_pos_num <= proj_data_info_sptr->get_max_axial_pos_num(segment_num);
+               ++axial_pos_num)
+            for (int tangential_pos_num = proj_data_info_sptr->get_min_tangential_pos_num();
+                 tangential_pos_num <= proj_data_info_sptr->get_max_tangential_pos_num();
+                 ++tangential_pos_num)
+              for (int timing_pos_num = proj_data_info_sptr->get_min_tof_pos_num();
+                   timing_pos_num <= proj_data_info_sptr->get_max_tof_pos_num();
+                   ++timing_pos_num)
+                {
+                  Bin bin(segment_num, vs_num.view_num(), axial_pos_num, tangential_pos_num, timing_pos_num);
+                  symmetries_sptr->find_basic_bin(bin);
+                  bins.push_back(bin);
+                }
+        }
+      // remove duplicates (all bins found for this basic view/segment are in the same view/segment)
+      const auto less = [](const Bin& b1, const Bin& b2) {
+        return std::make_tuple(b1.segment_num(), b1.view_num(), b1.axial_pos_num(), b1.tangential_pos_num(), b1.timing_pos_num())
+               < std::make_tuple(
+                   b2.segment_num(), b2.view_num(), b2.axial_pos_num(), b2.tangential_pos_num(), b2.timing_pos_num());
+      };
+      const auto equal = [&less](const Bin& b1, const Bin& b2) { return !less(b1, b2) && !less(b2, b1); };
+      const auto start_of_vs = bins.begin() + start_index_of_vs;
+      std::sort(start_of_vs, bins.end(), less);
+      bins.erase(std::unique(start_of_vs, bins.end(), equal), bins.end());
+    }
+
+  return bins;
+}
+
+void
+ProjMatrixByBin::precompute(const int subset_num, const int num_subsets)
+{
+  if (cache_disabled)
+    {
+      warning("ProjMatrixByBin::precompute called while the cache is disabled. Nothing will be done");
+      return;
+    }
+  if (is_null_ptr(proj_data_info_sptr) || is_null_ptr(symmetries_sptr))
+    error("ProjMatrixByBin::precompute called before set_up");
+  if (num_subsets <= 0 || subset_num < 0 || subset_num >= num_subsets)
+    error(boost::format("ProjMatrixByBin::precompute: invalid subset %1% of %2%") % subset_num % num_subsets);
+
+  start_timers();
+  const std::vector<Bin> bins = find_basic_bins_in_subset(subset_num, num_subsets);
+
+  info(boost::format("ProjMatrixByBin: precomputing %1% basic bins for subset %2% of %3%") % bins.size() % subset_num
+           % num_subsets,
+       2);
+  const int num_bins = static_cast<int>(bins.size());
+  int num_bins_done = 0;
+#ifdef STIR_OPENMP
+#  pragma omp parallel for schedule(dynamic)
+#endif
+  for (int i = 0; i < num_bins; ++i)
+    {
+      ProjMatrixElemsForOneBin elems;
+      this->get_proj_matrix_elems_for_one_bin(elems, bins[i]);
+
+      int current_num_bins_done;
+#ifdef STIR_OPENMP
+#  pragma omp atomic capture
+#endif
+      current_num_bins_done = ++num_bins_done;
+      // report every 10% (only one thread will see every step)
+      const int percentage = static_cast<int>((100LL * current_num_bins_done) / num_bins);
+      const int previous_percentage = static_cast<int>((100LL * (current_num_bins_done - 1)) / num_bins);
+      if (percentage / 10 != previous_percentage / 10)
+        info(boost::format("ProjMatrixByBin: precomputed %1%%% of subset %2%") % percentage % subset_num, 2);
+    }
+  stop_timers();
+}
+
+/////////////////////// CacheShard ///////////////////////////////
+
+ProjMatrixByBin::CacheShard::CacheShard()
+    : num_hits(0),
+      num_misses(0),
+      num_evictions(0),
+      max_relative_error(0.F),
+      total_size_in_bytes(0)
+{}
+
+ProjMatrixByBin::CacheShard::CacheShard(const CacheShard& other)
+    : CacheShard()
+{
+  *this = other;
+}
+
+ProjMatrixByBin::CacheShard&
+ProjMatrixByBin::CacheShard::operator=(const CacheShard& other)
+{
+  if (this == &other)
+    return *this;
+  this->clear();
+  // insert elements from least to most recently used, such that the LRU order is preserved
+  for (auto key_iter = other.lru_list.rbegin(); key_iter != other.lru_list.rend(); ++key_iter)
+    this->insert(*key_iter, other.map.find(*key_iter)->second);
+  this->num_hits = other.num_hits;
+  this->num_misses = other.num_misses;
+  this->num_evictions = other.num_evictions;
+  this->max_relative_error = other.max_relative_error;
+  return *this;
+}
+
+std::size_t
+ProjMatrixByBin::CacheShard::estimate_size_in_bytes(const CachedProjMatrixElemsForOneBin& cached_elems)
+{
+  // element storage, plus the nodes in the map and LRU list (including some pointers)
+  const std::size_t elems_size_in_bytes = cached_elems.is_compact
+                                              ? cached_elems.compact_elems.get_size_in_bytes()
+                                              : cached_elems.elems.size() * sizeof(ProjMatrixElemsForOneBin::value_type);
+  return elems_size_in_bytes + sizeof(MapProjMatrixElemsForOneBin::value_type) + sizeof(CacheKey) + 4 * sizeof(void*);
+}
+
+const ProjMatrixByBin::CachedProjMatrixElemsForOneBin*
+ProjMatrixByBin::CacheShard::find(const CacheKey key)
+{
+  const MapProjMatrixElemsForOneBinIterator pos = map.find(key);
+  if (pos == map.end())
+    {
+      ++num_misses;
+      return 0;
+    }
+  ++num_hits;
+  // move to the front of the LRU list
+  lru_list.splice(lru_list.begin(), lru_list, pos->second.lru_position);
+  return &pos->second;
 }
 
+std::size_t
+ProjMatrixByBin::CacheShard::insert(const CacheKey key, const CachedProjMatrixElemsForOneBin& cached_elems)
+{
+  const std::pair<MapProjMatrixElemsForOneBinIterator, bool> result
+      = map.insert(MapProjMatrixElemsForOneBin::value_type(key, cached_elems));
+  if (!result.second)
+    return 0; // already present (another thread might have computed it as well)
+  lru_list.push_front(key);
+  CachedProjMatrixElemsForOneBin& new_cached_elems = result.first->second;
+  new_cached_elems.lru_position = lru_list.begin();
+  new_cached_elems.size_in_bytes = estimate_size_in_bytes(new_cached_elems);
+  total_size_in_bytes += new_cached_elems.size_in_bytes;
+  return new_cached_elems.size_in_bytes;
+}
+
+std::size_t
+ProjMatrixByBin::CacheShard::evict_least_recently_used()
+{
+  if (lru_list.empty())
+    return 0;
+  const MapProjMatrixElemsForOneBinIterator pos = map.find(lru_list.back());
+  const std::size_t freed = pos->second.size_in_bytes;
+  map.erase(pos);
+  lru_list.pop_back();
+  total_size_in_bytes -= freed;
+  ++num_evictions;
+  return freed;
+}
+
+void
+ProjMatrixByBin::CacheShard::clear()
+{
+  map.clear();
+  lru_list.clear();
+  total_size_in_bytes = 0;
+  max_relative_error = 0.F;
+}
+
+///////////////////// PersistentCache ///////////////////////////////
+
+/* File format of the persistent cache (native byte order, which is checked via the hash)
+   - header (see PersistentCacheHeader)
+   - elements of all bins (see PersistentCacheElement)
+   - index with one entry per bin (see PersistentCacheIndexEntry), sorted on segment, view and key
+*/
+namespace detail
+{
+struct PersistentCacheHeader
+{
+  char magic[8];
+  std::uint64_t hash;
+  std::uint64_t num_entries;
+  std::uint64_t index_offset;
+};
+
+struct PersistentCacheIndexEntry
+{
+  std::int32_t segment_num;
+  std::int32_t view_num;
+  std::uint64_t key;
+  std::uint64_t offset;
+  std::uint64_t num_elements;
+
+  bool operator<(const PersistentCacheIndexEntry& other) const
+  {
+    if (segment_num != other.segment_num)
+      return segment_num < other.segment_num;
+    if (view_num != other.view_num)
+      return view_num < other.view_num;
+    return key < other.key;
+  }
+};
+
+struct PersistentCacheElement
+{
+  std::int16_t c1, c2, c3, unused;
+  float value;
+};
+
+static const char persistent_cache_magic[8] = { 'S', 'T', 'I', 'R', 'P', 'M', 'C', '1' };
+} // namespace detail
+
+class ProjMatrixByBin::PersistentCache
+{
+public:
+  //! map the file. Throws std::runtime_error if something is wrong
+  PersistentCache(const std::string& filename, const std::uint64_t hash);
+  //! find the elements for a bin (in a thread-safe way). Returns false if not found
+  bool get(ProjMatrixElemsForOneBin& elems, const CacheKey key) const;
+
+private:
+  boost::interprocess::file_mapping file;
+  boost::interprocess::mapped_region region;
+  const detail::PersistentCacheIndexEntry* index_begin;
+  const detail::PersistentCacheIndexEntry* index_end;
+};
+
+ProjMatrixByBin::PersistentCache::PersistentCache(const std::string& filename, const std::uint64_t hash)
+    : file(filename.c_str(), boost::interprocess::read_only),
+      region(file, boost::interprocess::read_only)
+{
+  const char* const data = static_cast<const char*>(region.get_address());
+  const std::size_t size = region.get_size();
+  detail::PersistentCacheHeader header;
+  if (size < sizeof(header))
+    throw std::runtime_error("file too small");
+  std::memcpy(&header, data, sizeof(header));
+  if (std::memcmp(header.magic, detail::persistent_cache_magic, sizeof(header.magic)) != 0 || header.hash != hash)
+    throw std::runtime_error("invalid header");
+  if (header.index_offset > size || (size - header.index_offset) / sizeof(detail::PersistentCacheIndexEntry) < header.num_entries
+      || header.index_offset % alignof(detail::PersistentCacheIndexEntry) != 0)
+    throw std::runtime_error("invalid index");
+  index_begin = reinterpret_cast<const detail::PersistentCacheIndexEntry*>(data + header.index_offset);
+  index_end = index_begin + header.num_entries;
+  for (const detail::PersistentCacheIndexEntry* entry_ptr = index_begin; entry_ptr != index_end; ++entry_ptr)
+    if (entry_ptr->offset > header.index_offset
+        || (header.index_offset - entry_ptr->offset) / sizeof(detail::PersistentCacheElement) < entry_ptr->num_elements
+        || entry_ptr->offset % alignof(detail::PersistentCacheElement) != 0)
+      throw std::runtime_error("invalid index entry");
+}
+
+bool
+ProjMatrixByBin::PersistentCache::get(ProjMatrixElemsForOneBin& elems, const CacheKey key) const
+{
+  const Bin bin = elems.get_bin();
+  detail::PersistentCacheIndexEntry entry_to_find;
+  entry_to_find.segment_num = bin.segment_num();
+  entry_to_find.view_num = bin.view_num();
+  entry_to_find.key = key;
+  const detail::PersistentCacheIndexEntry* entry_ptr = std::lower_bound(index_begin, index_end, entry_to_find);
+  if (entry_ptr == index_end || entry_to_find < *entry_ptr)
+    return false;
+
+  const detail::PersistentCacheElement* element_ptr = reinterpret_cast<const detail::PersistentCacheElement*>(
+      static_cast<const char*>(region.get_address()) + entry_ptr->offset);
+  elems.erase();
+  elems.reserve(entry_ptr->num_elements);
+  for (std::uint64_t i = 0; i < entry_ptr->num_elements; ++i, ++element_ptr)
+    elems.push_back(ProjMatrixElemsForOneBin::value_type(Coordinate3D<int>(element_ptr->c1, element_ptr->c2, element_ptr->c3),
+                                                         element_ptr->value));
+  return true;
+}
+
+std::string
+ProjMatrixByBin::get_parameter_info_affecting_elements()
+{
+  std::ostringstream s;
+  // matrix parameters, but skip those that do not influence the elements
+  std::istringstream parameters(this->parameter_info());
+  const char* const keywords_to_skip[] = { "disable caching",
+                                           "store_only_basic_bins_in_cache",
+                                           "maximum cache size in mb",
+                                           "compact cache storage",
+                                           "persistent cache directory" };
+  std::string line;
+  while (std::getline(parameters, line))
+    {
+      const std::string::size_type start = line.find_first_not_of(" \t");
+      std::string lower_case_line = start == std::string::npos ? "" : line.substr(start);
+      std::transform(lower_case_line.begin(), lower_case_line.end(), lower_case_line.begin(), ::tolower);
+      bool skip = false;
+      for (const char* keyword : keywords_to_skip)
+        if (lower_case_line.compare(0, std::strlen(keyword), keyword) == 0)
+          skip = true;
+      if (!skip)
+        s << line << '\n';
+    }
+  return s.str();
+}
+
+std::uint64_t
+ProjMatrixByBin::compute_persistent_cache_hash()
+{
+  std::ostringstream s;
+  s << "persistent cache format version 1\n";
+  s << typeid(*this->proj_data_info_sptr).name() << '\n' << this->proj_data_info_sptr->parameter_info() << '\n';
+  {
+    BasicCoordinate<3, int> min_indices, max_indices;
+    if (!this->image_info_sptr->get_regular_range(min_indices, max_indices))
+      error("ProjMatrixByBin: persistent cache can only be used for images with a regular range");
+    s << "image index range " << min_indices << ", " << max_indices << '\n';
+  }
+  s << "voxel size " << this->image_info_sptr->get_voxel_size() << '\n';
+  s << "origin " << this->image_info_sptr->get_origin() << '\n';
+  s << this->get_registered_name() << '\n' << this->get_parameter_info_affecting_elements();
+  return fnv1a_hash(s.str());
+}
+
+Succeeded
+ProjMatrixByBin::write_persistent_cache() const
+{
+  if (persistent_cache_filename.empty() || cache_disabled || FilePath::exists(persistent_cache_filename))
+    return Succeeded::no;
+  if (get_cache_statistics().num_elements == 0)
+    return Succeeded::no;
+
+  // check that the cache contains the whole matrix, as a persistent cache is never updated
+  {
+    const std::vector<Bin> bins = find_basic_bins_in_subset(0, 1);
+    for (const auto& bin : bins)
+      {
+        const MapProjMatrixElemsForOneBin& map = this->cache_collection[bin.view_num()][bin.segment_num()].get_map();
+        if (map.find(cache_key(bin)) == map.end())
+          {
+            warning("ProjMatrixByBin: not writing the persistent cache as it does not contain all elements. "
+                    "Call precompute() first (with a large enough maximum cache size)");
+            return Succeeded::no;
+          }
+      }
+  }
+
+  // write to a temporary file first, such that other processes never see an incomplete file
+#if defined(__OS_WIN__)
+  const int pid = _getpid();
+#else
+  const int pid = static_cast<int>(getpid());
+#endif
+  const std::string tmp_filename = (boost::format("%1%.%2%.tmp") % persistent_cache_filename % pid).str();
+  {
+    std::ofstream file(tmp_filename.c_str(), std::ios::out | std::ios::binary);
+    if (!file)
+      {
+        warning("ProjMatrixByBin: cannot open " + tmp_filename + " for writing the persistent cache");
+        return Succeeded::no;
+      }
+    detail::PersistentCacheHeader header;
+    std::memcpy(header.magic, detail::persistent_cache_magic, sizeof(header.magic));
+    header.hash = 0;
+    header.num_entries = 0;
+    header.index_offset = 0;
+    // write header with dummy values (will be filled in at the end)
+    file.write(reinterpret_cast<const char*>(&header), sizeof(header));
+
+    std::vector<detail::PersistentCacheIndexEntry> index;
+    std::uint64_t offset = sizeof(header);
+    std::vector<detail::PersistentCacheElement> elements;
+    ProjMatrixElemsForOneBin elems;
+    for (int view_num = this->cache_collection.get_min_index(); view_num <= this->cache_collection.get_max_index(); ++view_num)
+      for (int segment_num = this->cache_collection[view_num].get_min_index();
+           segment_num <= this->cache_collection[view_num].get_max_index();
+           ++segment_num)
+        {
+          const MapProjMatrixElemsForOneBin& map = this->cache_collection[view_num][segment_num].get_map();
+          for (const_MapProjMatrixElemsForOneBinIterator iter = map.begin(); iter != map.end(); ++iter)
+            {
+              if (iter->second.is_compact)
+                iter->second.compact_elems.get(elems);
+              else
+                elems = iter->second.elems;
+              elements.resize(elems.size());
+              std::vector<detail::PersistentCacheElement>::iterator element_iter = elements.begin();
+              for (ProjMatrixElemsForOneBin::const_iterator elem_iter = elems.begin(); elem_iter != elems.end();
+                   ++elem_iter, ++element_iter)
+                {
+                  element_iter->c1 = static_cast<std::int16_t>(elem_iter->coord1());
+                  element_iter->c2 = static_cast<std::int16_t>(elem_iter->coord2());
+                  element_iter->c3 = static_cast<std::int16_t>(elem_iter->coord3());
+                  element_iter->unused = 0;
+                  element_iter->value = elem_iter->get_value();
+                }
+              file.write(reinterpret_cast<const char*>(elements.data()),
+                         elements.size() * sizeof(detail::PersistentCacheElement));
+
+              detail::PersistentCacheIndexEntry entry;
+              entry.segment_num = segment_num;
+              entry.view_num = view_num;
+              entry.key = iter->first;
+              entry.offset = offset;
+              entry.num_elements = elements.size();
+              index.push_back(entry);
+              offset += elements.size() * sizeof(detail::PersistentCacheElement);
+            }
+        }
+    // make sure that the index is aligned
+    while (offset % alignof(detail::PersistentCacheIndexEntry) != 0)
+      {
+        file.put(0);
+        ++offset;
+      }
+    std::sort(index.begin(), index.end());
+    file.write(reinterpret_cast<const char*>(index.data()), index.size() * sizeof(detail::PersistentCacheIndexEntry));
+
+    header.num_entries = index.size();
+    header.index_offset = offset;
+    header.hash = persistent_cache_hash;
+    file.seekp(0);
+    file.write(reinterpret_cast<const char*>(&header), sizeof(header));
+    if (!file)
+      {
+        warning("ProjMatrixByBin: error writing the persistent cache to " + tmp_filename);
+        file.close();
+        std::remove(tmp_filename.c_str());
+        return Succeeded::no;
+      }
+  }
+  if (std::rename(tmp_filename.c_str(), persistent_cache_filename.c_str()) != 0)
+    {
+      warning("ProjMatrixByBin: error renaming " + tmp_filename + " to " + persistent_cache_filename);
+      std::remove(tmp_filename.c_str());
+      return Succeeded::no;
+    }
+  info("ProjMatrixByBin: written persistent cache to " + persistent_cache_filename, 2);
+  return Succeeded::yes;
+}
+
+//////////////////////////////////////////////////////////////////
+
 /*
 void
 ProjMatrixByBin::
@@ -156,6 +780,7 @@ ProjMatrixByBin::set_up(const shared_ptr<const ProjDataInfo>& proj_data_info_spt
 
   this->cache_collection.recycle();
   this->cache_collection.resize(min_view_num, max_view_num);
+  this->cache_size_in_bytes = 0;
 #ifdef STIR_OPENMP
   this->cache_locks.recycle();
   this->cache_locks.resize(min_view_num, max_view_num);
@@ -171,6 +796,30 @@ ProjMatrixByBin::set_up(const shared_ptr<const ProjDataInfo>& proj_data_info_spt
 #endif
     }
 
+  this->persistent_cache_sptr.reset();
+  this->persistent_cache_filename = "";
+  this->num_persistent_cache_hits = 0;
+  if (is_cache_enabled() && !this->persistent_cache_directory.empty())
+    {
+      this->persistent_cache_hash = compute_persistent_cache_hash();
+      FilePath filename((boost::format("ProjMatrixByBin_%016x.pmcache") % this->persistent_cache_hash).str(), false);
+      filename.prepend_directory_name(this->persistent_cache_directory);
+      this->persistent_cache_filename = filename.get_as_string();
+      if (FilePath::exists(this->persistent_cache_filename))
+        {
+          try
+            {
+              this->persistent_cache_sptr.reset(
+                  new PersistentCache(this->persistent_cache_filename, this->persistent_cache_hash));
+              info("ProjMatrixByBin: using persistent cache " + this->persistent_cache_filename, 2);
+            }
+          catch (std::exception& e)
+            {
+              warning("ProjMatrixByBin: ignoring persistent cache " + this->persistent_cache_filename + " (" + e.what() + ")");
+            }
+        }
+    }
+
   // Setup the custom erf code
   erf_interpolation.set_num_samples(200000); // 200,000 =~12.8MB
   erf_interpolation.set_up();
@@ -207,16 +856,102 @@ ProjMatrixByBin::cache_proj_matrix_elems_for_one_bin(const ProjMatrixElemsForOne
   // std::cerr << "cached lor size " << probabilities.size() << " capacity " << probabilities.capacity() << std::endl;
   //  insert probabilities into the collection
   const Bin bin = probabilities.get_bin();
+  // construct the element outside of the lock, as compaction takes some time
+  CachedProjMatrixElemsForOneBin cached_elems;
+  cached_elems.is_compact = compact_cache_storage != "none";
+  float max_relative_error = 0.F;
+  if (cached_elems.is_compact)
+    {
+      cached_elems.compact_elems.set(probabilities,
+                                     CompactProjMatrixElemsForOneBin::value_type_from_string(compact_cache_storage));
+      max_relative_error = cached_elems.compact_elems.get_max_relative_error(probabilities);
+    }
+  else
+    cached_elems.elems = probabilities;
+
 #ifdef STIR_OPENMP
   omp_set_lock(&this->cache_locks[bin.view_num()][bin.segment_num()]);
 #endif
-  cache_collection[bin.view_num()][bin.segment_num()].insert(
-      MapProjMatrixElemsForOneBin::value_type(cache_key(bin), probabilities));
+  if (make_space_in_cache(bin, CacheShard::estimate_size_in_bytes(cached_elems)))
+    {
+      CacheShard& shard = cache_collection[bin.view_num()][bin.segment_num()];
+      const std::size_t size_in_bytes = shard.insert(cache_key(bin), cached_elems);
+      if (size_in_bytes > 0)
+        shard.max_relative_error = std::max(shard.max_relative_error, max_relative_error);
+#ifdef STIR_OPENMP
+#  pragma omp atomic
+#endif
+      cache_size_in_bytes += size_in_bytes;
+    }
 #ifdef STIR_OPENMP
   omp_unset_lock(&this->cache_locks[bin.view_num()][bin.segment_num()]);
 #endif
 }
 
+bool
+ProjMatrixByBin::make_space_in_cache(const Bin& bin, const std::size_t size_needed) const
+{
+  if (max_cache_size_in_MB <= 0)
+    return true;
+  const std::size_t max_size_in_bytes = static_cast<std::size_t>(max_cache_size_in_MB * 1048576);
+  if (size_needed > max_size_in_bytes)
+    return false;
+
+  const int min_view_num = cache_collection.get_min_index();
+  const int min_segment_num = cache_collection[min_view_num].get_min_index();
+  const std::size_t num_segments = static_cast<std::size_t>(cache_collection[min_view_num].size());
+  const std::size_t num_shards = static_cast<std::size_t>(cache_collection.size()) * num_segments;
+
+  // we give up when we didn't manage to remove anything after trying all shards twice
+  std::size_t num_unsuccessful_tries = 0;
+  while (true)
+    {
+      std::size_t current_size_in_bytes;
+#ifdef STIR_OPENMP
+#  pragma omp atomic read
+#endif
+      current_size_in_bytes = cache_size_in_bytes;
+      if (current_size_in_bytes + size_needed <= max_size_in_bytes)
+        return true;
+      if (num_unsuccessful_tries >= 2 * num_shards)
+        return false;
+
+      std::size_t shard_num;
+#ifdef STIR_OPENMP
+#  pragma omp atomic capture
+#endif
+      shard_num = eviction_counter++;
+      shard_num %= num_shards;
+      const int view_num = min_view_num + static_cast<int>(shard_num / num_segments);
+      const int segment_num = min_segment_num + static_cast<int>(shard_num % num_segments);
+      // the lock for the shard of the current bin is already set by the caller
+      const bool is_current_shard = view_num == bin.view_num() && segment_num == bin.segment_num();
+#ifdef STIR_OPENMP
+      // don't wait for other threads (avoiding dead-lock)
+      if (!is_current_shard && !omp_test_lock(&this->cache_locks[view_num][segment_num]))
+        {
+          ++num_unsuccessful_tries;
+          continue;
+        }
+#endif
+      const std::size_t freed_size_in_bytes = cache_collection[view_num][segment_num].evict_least_recently_used();
+#ifdef STIR_OPENMP
+      if (!is_current_shard)
+        omp_unset_lock(&this->cache_locks[view_num][segment_num]);
+#endif
+      if (freed_size_in_bytes == 0)
+        {
+          ++num_unsuccessful_tries;
+          continue;
+        }
+      num_unsuccessful_tries = 0;
+#ifdef STIR_OPENMP
+#  pragma omp atomic
+#endif
+      cache_size_in_bytes -= freed_size_in_bytes;
+    }
+}
+
 Succeeded
 ProjMatrixByBin::get_cached_proj_matrix_elems_for_one_bin(ProjMatrixElemsForOneBin& probabilities) const
 {
@@ -240,12 +975,16 @@ ProjMatrixByBin::get_cached_proj_matrix_elems_for_one_bin(ProjMatrixElemsForOneB
 #endif
 
   {
-    const_MapProjMatrixElemsForOneBinIterator pos = cache_collection[bin.view_num()][bin.segment_num()].find(cache_key(bin));
+    const CachedProjMatrixElemsForOneBin* cached_elems_ptr
+        = cache_collection[bin.view_num()][bin.segment_num()].find(cache_key(bin));
 
-    if (pos != cache_collection[bin.view_num()][bin.segment_num()].end())
+    if (cached_elems_ptr != 0)
       {
         // cout << Key << " =========>> entry found in cache " <<  endl;
-        probabilities = pos->second;
+        if (cached_elems_ptr->is_compact)
+          cached_elems_ptr->compact_elems.get(probabilities);
+        else
+          probabilities = cached_elems_ptr->elems;
         // note: cannot return from inside an OPENMP critical section
         // return Succeeded::yes;
         found = true;
@@ -254,6 +993,18 @@ ProjMatrixByBin::get_cached_proj_matrix_elems_for_one_bin(ProjMatrixElemsForOneB
 #ifdef STIR_OPENMP
   omp_unset_lock(&this->cache_locks[bin.view_num()][bin.segment_num()]);
 #endif
+  if (!found && this->persistent_cache_sptr)
+    {
+      // the persistent cache is read-only, so we do not need a lock
+      found = this->persistent_cache_sptr->get(probabilities, cache_key(bin));
+      if (found)
+        {
+#ifdef STIR_OPENMP
+#  pragma omp atomic
+#endif
+          ++this->num_persistent_cache_hits;
+        }
+    }
   if (found)
     return Succeeded::yes;
   else
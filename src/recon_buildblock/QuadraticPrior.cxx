@@ -19,6 +19,7 @@
 */
 
 #include "stir/recon_buildblock/QuadraticPrior.h"
+#include "stir/recon_buildblock/NeighbourhoodStencil.h"
 #include "stir/Succeeded.h"
 #include "stir/DiscretisedDensityOnCartesianGrid.h"
 #include "stir/IndexRange3D.h"
@@ -246,54 +247,18 @@ QuadraticPrior<elemT>::compute_value(const DiscretisedDensity<3, elemT>& current
       compute_weights(this->weights, current_image_cast.get_grid_spacing(), this->only_2D);
     }
 
-  const bool do_kappa = !is_null_ptr(kappa_ptr);
-
-  double result = 0.;
-  const int min_z = current_image_estimate.get_min_index();
-  const int max_z = current_image_estimate.get_max_index();
-  for (int z = min_z; z <= max_z; z++)
-    {
-      const int min_dz = max(weights.get_min_index(), min_z - z);
-      const int max_dz = min(weights.get_max_index(), max_z - z);
-
-      const int min_y = current_image_estimate[z].get_min_index();
-      const int max_y = current_image_estimate[z].get_max_index();
-
-      for (int y = min_y; y <= max_y; y++)
-        {
-          const int min_dy = max(weights[0].get_min_index(), min_y - y);
-          const int max_dy = min(weights[0].get_max_index(), max_y - y);
-
-          const int min_x = current_image_estimate[z][y].get_min_index();
-          const int max_x = current_image_estimate[z][y].get_max_index();
-
-          for (int x = min_x; x <= max_x; x++)
-            {
-              const int min_dx = max(weights[0][0].get_min_index(), min_x - x);
-              const int max_dx = min(weights[0][0].get_max_index(), max_x - x);
-
-              /* formula:
-                sum_dx,dy,dz
-                 1/4 weights[dz][dy][dx] *
-                 (current_image_estimate[z][y][x] - current_image_estimate[z+dz][y+dy][x+dx])^2 *
-                 (*kappa_ptr)[z][y][x] * (*kappa_ptr)[z+dz][y+dy][x+dx];
-              */
-              for (int dz = min_dz; dz <= max_dz; ++dz)
-                for (int dy = min_dy; dy <= max_dy; ++dy)
-                  for (int dx = min_dx; dx <= max_dx; ++dx)
-                    {
-                      double current = weights[dz][dy][dx]
-                                       * square(current_image_estimate[z][y][x] - current_image_estimate[z + dz][y + dy][x + dx])
-                                       / 4;
-
-                      if (do_kappa)
-                        current *= (*kappa_ptr)[z][y][x] * (*kappa_ptr)[z + dz][y + dy][x + dx];
-
-                      result += current;
-                    }
-            }
-        }
-    }
+  /* formula:
+    sum_dx,dy,dz
+     1/4 weights[dz][dy][dx] *
+     (current_image_estimate[z][y][x] - current_image_estimate[z+dz][y+dy][x+dx])^2 *
+     (*kappa_ptr)[z][y][x] * (*kappa_ptr)[z+dz][y+dy][x+dx];
+  */
+  const NeighbourhoodStencil stencil(this->weights);
+  const double result = stencil.sum_over_image(
+      current_image_estimate,
+      current_image_estimate,
+      this->kappa_ptr.get(),
+      [](const double x_j, const double x_k, const double, const double, const bool) { return square(x_j - x_k) / 4; });
   return result * this->penalisation_factor;
 }
 
@@ -319,54 +284,20 @@ QuadraticPrior<elemT>::compute_gradient(DiscretisedDensity<3, elemT>& prior_grad
       compute_weights(this->weights, current_image_cast.get_grid_spacing(), this->only_2D);
     }
 
-  const bool do_kappa = !is_null_ptr(kappa_ptr);
-
-  const int min_z = current_image_estimate.get_min_index();
-  const int max_z = current_image_estimate.get_max_index();
-  for (int z = min_z; z <= max_z; z++)
-    {
-      const int min_dz = max(weights.get_min_index(), min_z - z);
-      const int max_dz = min(weights.get_max_index(), max_z - z);
-
-      const int min_y = current_image_estimate[z].get_min_index();
-      const int max_y = current_image_estimate[z].get_max_index();
-
-      for (int y = min_y; y <= max_y; y++)
-        {
-          const int min_dy = max(weights[0].get_min_index(), min_y - y);
-          const int max_dy = min(weights[0].get_max_index(), max_y - y);
-
-          const int min_x = current_image_estimate[z][y].get_min_index();
-          const int max_x = current_image_estimate[z][y].get_max_index();
-
-          for (int x = min_x; x <= max_x; x++)
-            {
-              const int min_dx = max(weights[0][0].get_min_index(), min_x - x);
-              const int max_dx = min(weights[0][0].get_max_index(), max_x - x);
-
-              /* formula:
-                sum_dx,dy,dz
-                 weights[dz][dy][dx] *
-                 (current_image_estimate[z][y][x] - current_image_estimate[z+dz][y+dy][x+dx]) *
-                 (*kappa_ptr)[z][y][x] * (*kappa_ptr)[z+dz][y+dy][x+dx];
-              */
-              double gradient = 0.;
-              for (int dz = min_dz; dz <= max_dz; ++dz)
-                for (int dy = min_dy; dy <= max_dy; ++dy)
-                  for (int dx = min_dx; dx <= max_dx; ++dx)
-                    {
-                      double current = weights[dz][dy][dx]
-                                       * (current_image_estimate[z][y][x] - current_image_estimate[z + dz][y + dy][x + dx]);
-
-                      if (do_kappa)
-                        current *= (*kappa_ptr)[z][y][x] * (*kappa_ptr)[z + dz][y + dy][x + dx];
-
-                      gradient += current;
-                    }
-              prior_gradient[z][y][x] = static_cast<elemT>(gradient * this->penalisation_factor);
-            }
-        }
-    }
+  /* formula:
+    sum_dx,dy,dz
+     weights[dz][dy][dx] *
+     (current_image_estimate[z][y][x] - current_image_estimate[z+dz][y+dy][x+dx]) *
+     (*kappa_ptr)[z][y][x] * (*kappa_ptr)[z+dz][y+dy][x+dx];
+  */
+  const NeighbourhoodStencil stencil(this->weights);
+  stencil.compute_sums(
+      prior_gradient,
+      current_image_estimate,
+      current_image_estimate,
+      this->kappa_ptr.get(),
+      [](const double x_j, const double x_k, const double, const double, const bool) { return x_j - x_k; },
+      this->penalisation_factor);
 
   info(boost::format("Prior gradient max %1%, min %2%\n") % prior_gradient.find_max() % prior_gradient.find_min());
 
@@ -476,48 +407,15 @@ QuadraticPrior<elemT>::parabolic_surrogate_curvature(DiscretisedDensity<3, elemT
       compute_weights(weights, current_image_cast.get_grid_spacing(), this->only_2D);
     }
 
-  const bool do_kappa = !is_null_ptr(kappa_ptr);
-
-  const int min_z = current_image_estimate.get_min_index();
-  const int max_z = current_image_estimate.get_max_index();
-  for (int z = min_z; z <= max_z; z++)
-    {
-      const int min_dz = max(weights.get_min_index(), min_z - z);
-      const int max_dz = min(weights.get_max_index(), max_z - z);
-
-      const int min_y = current_image_estimate[z].get_min_index();
-      const int max_y = current_image_estimate[z].get_max_index();
-
-      for (int y = min_y; y <= max_y; y++)
-        {
-          const int min_dy = max(weights[0].get_min_index(), min_y - y);
-          const int max_dy = min(weights[0].get_max_index(), max_y - y);
-
-          const int min_x = current_image_estimate[z][y].get_min_index();
-          const int max_x = current_image_estimate[z][y].get_max_index();
-          for (int x = min_x; x <= max_x; x++)
-            {
-              const int min_dx = max(weights[0][0].get_min_index(), min_x - x);
-              const int max_dx = min(weights[0][0].get_max_index(), max_x - x);
-
-              elemT gradient = 0;
-              for (int dz = min_dz; dz <= max_dz; ++dz)
-                for (int dy = min_dy; dy <= max_dy; ++dy)
-                  for (int dx = min_dx; dx <= max_dx; ++dx)
-                    {
-                      // 1 comes from omega = psi'(t)/t = 2*t/2t =1
-                      elemT current = weights[dz][dy][dx] * 1;
-
-                      if (do_kappa)
-                        current *= (*kappa_ptr)[z][y][x] * (*kappa_ptr)[z + dz][y + dy][x + dx];
-
-                      gradient += current;
-                    }
-
-              parabolic_surrogate_curvature[z][y][x] = gradient * this->penalisation_factor;
-            }
-        }
-    }
+  const NeighbourhoodStencil stencil(this->weights);
+  stencil.compute_sums(
+      parabolic_surrogate_curvature,
+      current_image_estimate,
+      current_image_estimate,
+      this->kappa_ptr.get(),
+      // 1 comes from omega = psi'(t)/t = 2*t/2t =1
+      [](const elemT, const elemT, const elemT, const elemT, const bool) { return elemT(1); },
+      this->penalisation_factor);
 
   info(boost::format("parabolic_surrogate_curvature max %1%, min %2%\n") % parabolic_surrogate_curvature.find_max()
        % parabolic_surrogate_curvature.find_min());
@@ -553,47 +451,14 @@ QuadraticPrior<elemT>::add_multiplication_with_approximate_Hessian(DiscretisedDe
       compute_weights(weights, output_cast.get_grid_spacing(), this->only_2D);
     }
 
-  const bool do_kappa = !is_null_ptr(kappa_ptr);
-
-  const int min_z = output.get_min_index();
-  const int max_z = output.get_max_index();
-  for (int z = min_z; z <= max_z; z++)
-    {
-      const int min_dz = max(weights.get_min_index(), min_z - z);
-      const int max_dz = min(weights.get_max_index(), max_z - z);
-
-      const int min_y = output[z].get_min_index();
-      const int max_y = output[z].get_max_index();
-
-      for (int y = min_y; y <= max_y; y++)
-        {
-          const int min_dy = max(weights[0].get_min_index(), min_y - y);
-          const int max_dy = min(weights[0].get_max_index(), max_y - y);
-
-          const int min_x = output[z][y].get_min_index();
-          const int max_x = output[z][y].get_max_index();
-
-          for (int x = min_x; x <= max_x; x++)
-            {
-              const int min_dx = max(weights[0][0].get_min_index(), min_x - x);
-              const int max_dx = min(weights[0][0].get_max_index(), max_x - x);
-
-              elemT result = 0;
-              for (int dz = min_dz; dz <= max_dz; ++dz)
-                for (int dy = min_dy; dy <= max_dy; ++dy)
-                  for (int dx = min_dx; dx <= max_dx; ++dx)
-                    {
-                      elemT current = weights[dz][dy][dx] * input[z + dz][y + dy][x + dx];
-
-                      if (do_kappa)
-                        current *= (*kappa_ptr)[z][y][x] * (*kappa_ptr)[z + dz][y + dy][x + dx];
-                      result += current;
-                    }
-
-              output[z][y][x] += result * this->penalisation_factor;
-            }
-        }
-    }
+  const NeighbourhoodStencil stencil(this->weights);
+  stencil.accumulate_sums(
+      output,
+      input,
+      input,
+      this->kappa_ptr.get(),
+      [](const elemT, const elemT input_k, const elemT, const elemT, const bool) { return input_k; },
+      this->penalisation_factor);
 }
 
 template <typename elemT>
@@ -620,70 +485,23 @@ QuadraticPrior<elemT>::accumulate_Hessian_times_input(DiscretisedDensity<3, elem
       compute_weights(weights, output_cast.get_grid_spacing(), this->only_2D);
     }
 
-  const bool do_kappa = !is_null_ptr(kappa_ptr);
-
-  const int min_z = output.get_min_index();
-  const int max_z = output.get_max_index();
-  for (int z = min_z; z <= max_z; z++)
-    {
-      const int min_dz = max(weights.get_min_index(), min_z - z);
-      const int max_dz = min(weights.get_max_index(), max_z - z);
-
-      const int min_y = output[z].get_min_index();
-      const int max_y = output[z].get_max_index();
-
-      for (int y = min_y; y <= max_y; y++)
-        {
-          const int min_dy = max(weights[0].get_min_index(), min_y - y);
-          const int max_dy = min(weights[0].get_max_index(), max_y - y);
-
-          const int min_x = output[z][y].get_min_index();
-          const int max_x = output[z][y].get_max_index();
-
-          for (int x = min_x; x <= max_x; x++)
-            {
-              const int min_dx = max(weights[0][0].get_min_index(), min_x - x);
-              const int max_dx = min(weights[0][0].get_max_index(), max_x - x);
-
-              // At this point, we have j = [z][y][x]
-              // The next for loops will have k = [z+dz][y+dy][x+dx]
-              // The following computes
-              //(H_{wf} y)_j =
-              //      \sum_{k\in N_j} w_{(j,k)} f''_{d}(x_j,x_k) y_j +
-              //      \sum_{(i \in N_j) \ne j} w_{(j,i)} f''_{od}(x_j, x_i) y_i
-              // Note the condition in the second sum that i is not equal to j
-
-              elemT result = 0;
-              for (int dz = min_dz; dz <= max_dz; ++dz)
-                for (int dy = min_dy; dy <= max_dy; ++dy)
-                  for (int dx = min_dx; dx <= max_dx; ++dx)
-                    {
-                      elemT current = weights[dz][dy][dx];
-                      if (current == elemT(0))
-                        continue;
-                      if (dz == 0 && dy == 0 && dx == 0)
-                        {
-                          // The j == k case
-                          current *= derivative_20(current_estimate[z][y][x], current_estimate[z + dz][y + dy][x + dx])
-                                     * input[z][y][x];
-                        }
-                      else
-                        {
-                          current *= (derivative_20(current_estimate[z][y][x], current_estimate[z + dz][y + dy][x + dx])
-                                          * input[z][y][x]
-                                      + derivative_11(current_estimate[z][y][x], current_estimate[z + dz][y + dy][x + dx])
-                                            * input[z + dz][y + dy][x + dx]);
-                        }
-
-                      if (do_kappa)
-                        current *= (*kappa_ptr)[z][y][x] * (*kappa_ptr)[z + dz][y + dy][x + dx];
-                      result += current;
-                    }
-
-              output[z][y][x] += result * this->penalisation_factor;
-            }
-        }
-    }
+  // At this point, we have j = [z][y][x], and the sum is over k = [z+dz][y+dy][x+dx].
+  // This computes
+  //(H_{wf} y)_j =
+  //      \sum_{k\in N_j} w_{(j,k)} f''_{d}(x_j,x_k) y_j +
+  //      \sum_{(i \in N_j) \ne j} w_{(j,i)} f''_{od}(x_j, x_i) y_i
+  // Note the condition in the second sum that i is not equal to j
+  const NeighbourhoodStencil stencil(this->weights);
+  stencil.accumulate_sums(
+      output,
+      current_estimate,
+      input,
+      this->kappa_ptr.get(),
+      [this](const elemT x_j, const elemT x_k, const elemT input_j, const elemT input_k, const bool is_centre) {
+        const elemT diagonal_term = this->derivative_20(x_j, x_k) * input_j;
+        return is_centre ? diagonal_term : diagonal_term + this->derivative_11(x_j, x_k) * input_k;
+      },
+      this->penalisation_factor);
 }
 
 template <typename elemT>
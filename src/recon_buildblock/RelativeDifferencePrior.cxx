@@ -21,6 +21,7 @@
 */
 
 #include "stir/recon_buildblock/RelativeDifferencePrior.h"
+#include "stir/recon_buildblock/NeighbourhoodStencil.h"
 #include "stir/Succeeded.h"
 #include "stir/DiscretisedDensityOnCartesianGrid.h"
 #include "stir/IndexRange3D.h"
@@ -275,27 +276,106 @@ compute_weights(Array<3, float>& weights, const CartesianCoordinate3D<float>& gr
         }
 }
 
+/* Functions computing the RDP and its derivatives.
+   These are written without branches (ternary operators only) such that they can be used in vectorised loops.
+*/
+template <typename T>
+static inline T
+RDP_value(const T x_j, const T x_k, const T gamma, const T epsilon)
+{
+  const T diff = x_j - x_k;
+  const T denom = x_j + x_k + gamma * std::fabs(diff) + epsilon;
+  // handle the undefined nature of the function at 0/0
+  return (epsilon == 0 && x_j == 0 && x_k == 0) ? T(0) : T(0.5) * diff * diff / denom;
+}
+
+template <typename T>
+static inline T
+RDP_derivative_10(const T x_j, const T x_k, const T gamma, const T epsilon)
+{
+  const T diff = x_j - x_k;
+  const T denom = x_j + x_k + gamma * std::fabs(diff) + epsilon;
+  // handle 0/0 by taking the limit with x=y->0
+  // note that the limit y=0,x->0 is 1/(1+gamma)
+  return (epsilon == 0 && x_j == 0 && x_k == 0)
+             ? T(0)
+             : diff * (gamma * std::fabs(diff) + x_j + 3 * x_k + 2 * epsilon) / (denom * denom);
+}
+
+template <typename T>
+static inline T
+RDP_derivative_20(const T x_j, const T x_k, const T gamma, const T epsilon)
+{
+  const T denom = x_j + x_k + gamma * std::fabs(x_j - x_k) + epsilon;
+  const T num = 2 * x_k + epsilon;
+  return (x_j > 0 || x_k > 0 || epsilon > 0) ? 2 * num * num / (denom * denom * denom) : T(INFINITY);
+}
+
+template <typename T>
+static inline T
+RDP_derivative_11(const T x_j, const T x_k, const T gamma, const T epsilon)
+{
+  const T denom = x_j + x_k + gamma * std::fabs(x_j - x_k) + epsilon;
+  return (x_j > 0 || x_k > 0 || epsilon > 0) ? -2 * (2 * x_j + epsilon) * (2 * x_k + epsilon) / (denom * denom * denom)
+                                             : T(INFINITY);
+}
+
+/* Terms in the neighbourhood sum (see NeighbourhoodStencil).
+   \c T is the type used for the computation and for the sums. We use \c double for the gradient
+   as it needs to be accurate, but the lower precision is fine for the value and Hessian, and \c float
+   computations are faster (in particular when vectorised).
+*/
+
+//! term in the neighbourhood sum for the value
+template <typename T>
+struct RDPValueTerm
+{
+  T gamma, epsilon;
+  inline T operator()(const T x_j, const T x_k, const T, const T, const bool) const
+  {
+    return RDP_value(x_j, x_k, gamma, epsilon);
+  }
+};
+
+//! term in the neighbourhood sum for the gradient
+template <typename T>
+struct RDPGradientTerm
+{
+  T gamma, epsilon;
+  inline T operator()(const T x_j, const T x_k, const T, const T, const bool) const
+  {
+    return RDP_derivative_10(x_j, x_k, gamma, epsilon);
+  }
+};
+
+//! term in the neighbourhood sum for the Hessian times input
+/*! This computes
+   \f[ f''_{d}(x_j,x_k) y_j + f''_{od}(x_j, x_k) y_k \f]
+   where the second term is only used if \f$ k \ne j \f$.
+*/
+template <typename T>
+struct RDPHessianTimesInputTerm
+{
+  T gamma, epsilon;
+  inline T operator()(const T x_j, const T x_k, const T input_j, const T input_k, const bool is_centre) const
+  {
+    const T diagonal_term = RDP_derivative_20(x_j, x_k, gamma, epsilon) * input_j;
+    return is_centre ? diagonal_term : diagonal_term + RDP_derivative_11(x_j, x_k, gamma, epsilon) * input_k;
+  }
+};
+
 template <typename elemT>
 double
 RelativeDifferencePrior<elemT>::value(const elemT x, const elemT y) const
 {
-  return 0.5 * (square(static_cast<double>(x - y)) / (x + y + this->gamma * std::abs(x - y) + this->epsilon));
+  return RDP_value<double>(x, y, this->gamma, this->epsilon);
 }
 
 template <typename elemT>
 elemT
 RelativeDifferencePrior<elemT>::derivative_10(const elemT x, const elemT y) const
 {
-  if (this->epsilon == 0.0 && x == 0 && y == 0)
-    {
-      // handle 0/0 by taking the limit with x=y->0
-      // note that the limit y=0,x->0 is 1/(1+gamma)
-      return elemT(0);
-    }
-
-  const double num = (static_cast<double>(x - y) * (this->gamma * std::abs(x - y) + x + 3 * y + 2 * this->epsilon));
-  const double denom_sqrt = static_cast<double>(x + y) + this->gamma * std::abs(x - y) + this->epsilon;
-  return static_cast<elemT>(num / (denom_sqrt * denom_sqrt));
+  return static_cast<elemT>(RDP_derivative_10<double>(x, y, this->gamma, this->epsilon));
 }
 
 template <typename elemT>
@@ -317,56 +397,9 @@ RelativeDifferencePrior<elemT>::compute_value(const DiscretisedDensity<3, elemT>
       compute_weights(this->weights, current_image_cast.get_grid_spacing(), this->only_2D);
     }
 
-  const bool do_kappa = !is_null_ptr(kappa_ptr);
-
-  double result = 0.;
-  const int min_z = current_image_estimate.get_min_index();
-  const int max_z = current_image_estimate.get_max_index();
-  for (int z = min_z; z <= max_z; z++)
-    {
-      const int min_dz = max(weights.get_min_index(), min_z - z);
-      const int max_dz = min(weights.get_max_index(), max_z - z);
-
-      const int min_y = current_image_estimate[z].get_min_index();
-      const int max_y = current_image_estimate[z].get_max_index();
-
-      for (int y = min_y; y <= max_y; y++)
-        {
-          const int min_dy = max(weights[0].get_min_index(), min_y - y);
-          const int max_dy = min(weights[0].get_max_index(), max_y - y);
-
-          const int min_x = current_image_estimate[z][y].get_min_index();
-          const int max_x = current_image_estimate[z][y].get_max_index();
-
-          for (int x = min_x; x <= max_x; x++)
-            {
-              const int min_dx = max(weights[0][0].get_min_index(), min_x - x);
-              const int max_dx = min(weights[0][0].get_max_index(), max_x - x);
-
-              for (int dz = min_dz; dz <= max_dz; ++dz)
-                for (int dy = min_dy; dy <= max_dy; ++dy)
-                  for (int dx = min_dx; dx <= max_dx; ++dx)
-                    {
-                      double current;
-                      if (this->epsilon == 0.0 && current_image_estimate[z][y][x] == 0.0
-                          && current_image_estimate[z + dz][y + dy][x + dx] == 0.0)
-                        {
-                          // handle the undefined nature of the function
-                          current = 0.0;
-                        }
-                      else
-                        {
-                          current = weights[dz][dy][dx]
-                                    * value(current_image_estimate[z][y][x], current_image_estimate[z + dz][y + dy][x + dx]);
-                        }
-                      if (do_kappa)
-                        current *= (*kappa_ptr)[z][y][x] * (*kappa_ptr)[z + dz][y + dy][x + dx];
-
-                      result += current;
-                    }
-            }
-        }
-    }
+  const NeighbourhoodStencil stencil(this->weights);
+  const double result = stencil.sum_over_image(
+      current_image_estimate, current_image_estimate, this->kappa_ptr.get(), RDPValueTerm<elemT>{ this->gamma, this->epsilon });
   return result * this->penalisation_factor;
 }
 
@@ -392,49 +425,13 @@ RelativeDifferencePrior<elemT>::compute_gradient(DiscretisedDensity<3, elemT>& p
       compute_weights(this->weights, current_image_cast.get_grid_spacing(), this->only_2D);
     }
 
-  const bool do_kappa = !is_null_ptr(kappa_ptr);
-
-  const int min_z = current_image_estimate.get_min_index();
-  const int max_z = current_image_estimate.get_max_index();
-  for (int z = min_z; z <= max_z; z++)
-    {
-      const int min_dz = max(weights.get_min_index(), min_z - z);
-      const int max_dz = min(weights.get_max_index(), max_z - z);
-
-      const int min_y = current_image_estimate[z].get_min_index();
-      const int max_y = current_image_estimate[z].get_max_index();
-
-      for (int y = min_y; y <= max_y; y++)
-        {
-          const int min_dy = max(weights[0].get_min_index(), min_y - y);
-          const int max_dy = min(weights[0].get_max_index(), max_y - y);
-
-          const int min_x = current_image_estimate[z][y].get_min_index();
-          const int max_x = current_image_estimate[z][y].get_max_index();
-
-          for (int x = min_x; x <= max_x; x++)
-            {
-              const int min_dx = max(weights[0][0].get_min_index(), min_x - x);
-              const int max_dx = min(weights[0][0].get_max_index(), max_x - x);
-
-              double gradient = 0;
-              for (int dz = min_dz; dz <= max_dz; ++dz)
-                for (int dy = min_dy; dy <= max_dy; ++dy)
-                  for (int dx = min_dx; dx <= max_dx; ++dx)
-                    {
-                      double current
-                          = weights[dz][dy][dx]
-                            * derivative_10(current_image_estimate[z][y][x], current_image_estimate[z + dz][y + dy][x + dx]);
-                      if (do_kappa)
-                        current *= (*kappa_ptr)[z][y][x] * (*kappa_ptr)[z + dz][y + dy][x + dx];
-
-                      gradient += current;
-                    }
-
-              prior_gradient[z][y][x] = static_cast<elemT>(gradient * this->penalisation_factor);
-            }
-        }
-    }
+  const NeighbourhoodStencil stencil(this->weights);
+  stencil.compute_sums(prior_gradient,
+                       current_image_estimate,
+                       current_image_estimate,
+                       this->kappa_ptr.get(),
+                       RDPGradientTerm<double>{ this->gamma, this->epsilon },
+                       this->penalisation_factor);
 
   info(boost::format("Prior gradient max %1%, min %2%\n") % prior_gradient.find_max() % prior_gradient.find_min(), 3);
 
@@ -551,92 +548,33 @@ RelativeDifferencePrior<elemT>::accumulate_Hessian_times_input(DiscretisedDensit
       compute_weights(weights, output_cast.get_grid_spacing(), this->only_2D);
     }
 
-  const bool do_kappa = !is_null_ptr(kappa_ptr);
-
-  const int min_z = output.get_min_index();
-  const int max_z = output.get_max_index();
-  for (int z = min_z; z <= max_z; z++)
-    {
-      const int min_dz = max(weights.get_min_index(), min_z - z);
-      const int max_dz = min(weights.get_max_index(), max_z - z);
-
-      const int min_y = output[z].get_min_index();
-      const int max_y = output[z].get_max_index();
-
-      for (int y = min_y; y <= max_y; y++)
-        {
-          const int min_dy = max(weights[0].get_min_index(), min_y - y);
-          const int max_dy = min(weights[0].get_max_index(), max_y - y);
-
-          const int min_x = output[z][y].get_min_index();
-          const int max_x = output[z][y].get_max_index();
-
-          for (int x = min_x; x <= max_x; x++)
-            {
-              const int min_dx = max(weights[0][0].get_min_index(), min_x - x);
-              const int max_dx = min(weights[0][0].get_max_index(), max_x - x);
-
-              // At this point, we have j = [z][y][x]
-              // The next for loops will have k = [z+dz][y+dy][x+dx]
-              // The following computes
-              //(H_{wf} y)_j =
-              //      \sum_{k\in N_j} w_{(j,k)} f''_{d}(x_j,x_k) y_j +
-              //      \sum_{(i \in N_j) \ne j} w_{(j,i)} f''_{od}(x_j, x_i) y_i
-              // Note the condition in the second sum that i is not equal to j
-
-              elemT result = 0;
-              for (int dz = min_dz; dz <= max_dz; ++dz)
-                for (int dy = min_dy; dy <= max_dy; ++dy)
-                  for (int dx = min_dx; dx <= max_dx; ++dx)
-                    {
-                      elemT current = weights[dz][dy][dx];
-                      if (current == elemT(0))
-                        continue;
-                      if ((dz == 0) && (dy == 0) && (dx == 0))
-                        {
-                          // The j == k case
-                          current *= derivative_20(current_estimate[z][y][x], current_estimate[z + dz][y + dy][x + dx])
-                                     * input[z][y][x];
-                        }
-                      else
-                        {
-                          current *= (derivative_20(current_estimate[z][y][x], current_estimate[z + dz][y + dy][x + dx])
-                                          * input[z][y][x]
-                                      + derivative_11(current_estimate[z][y][x], current_estimate[z + dz][y + dy][x + dx])
-                                            * input[z + dz][y + dy][x + dx]);
-                        }
-
-                      if (do_kappa)
-                        current *= (*kappa_ptr)[z][y][x] * (*kappa_ptr)[z + dz][y + dy][x + dx];
-
-                      result += current;
-                    }
-
-              output[z][y][x] += result * this->penalisation_factor;
-            }
-        }
-    }
+  // At this point, we have j = [z][y][x], and the sum is over k = [z+dz][y+dy][x+dx].
+  // This computes
+  //(H_{wf} y)_j =
+  //      \sum_{k\in N_j} w_{(j,k)} f''_{d}(x_j,x_k) y_j +
+  //      \sum_{(i \in N_j) \ne j} w_{(j,i)} f''_{od}(x_j, x_i) y_i
+  // Note the condition in the second sum that i is not equal to j
+  const NeighbourhoodStencil stencil(this->weights);
+  stencil.accumulate_sums(output,
+                          current_estimate,
+                          input,
+                          this->kappa_ptr.get(),
+                          RDPHessianTimesInputTerm<elemT>{ this->gamma, this->epsilon },
+                          this->penalisation_factor);
 }
 
 template <typename elemT>
 elemT
 RelativeDifferencePrior<elemT>::derivative_20(const elemT x_j, const elemT x_k) const
 {
-  if (x_j > 0.0 || x_k > 0.0 || this->epsilon > 0.0)
-    return 2 * pow(2 * x_k + this->epsilon, 2) / pow(x_j + x_k + this->gamma * std::abs(x_j - x_k) + this->epsilon, 3);
-  else
-    return INFINITY;
+  return static_cast<elemT>(RDP_derivative_20<double>(x_j, x_k, this->gamma, this->epsilon));
 }
 
 template <typename elemT>
 elemT
 RelativeDifferencePrior<elemT>::derivative_11(const elemT x_j, const elemT x_k) const
 {
-  if (x_j > 0.0 || x_k > 0.0 || this->epsilon > 0.0)
-    return -2 * (2 * x_j + this->epsilon) * (2 * x_k + this->epsilon)
-           / pow(x_j + x_k + this->gamma * std::abs(x_j - x_k) + this->epsilon, 3);
-  else
-    return INFINITY;
+  return static_cast<elemT>(RDP_derivative_11<double>(x_j, x_k, this->gamma, this->epsilon));
 }
 
 #ifdef _MSC_VER
@@ -0,0 +1,203 @@
+//
+//
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+/*!
+
+  \file
+  \ingroup test
+  \ingroup listmode
+
+  \brief Test program for stir::ListModeCacheFile
+
+  Writes random events to a file, reads them back and checks that they are the same and
+  that events are sorted on subset.
+*/
+
+#include "stir/recon_buildblock/ListModeCacheFile.h"
+#include "stir/recon_buildblock/ProjMatrixByBinUsingRayTracing.h"
+#include "stir/recon_buildblock/DataSymmetriesForBins.h"
+#include "stir/ProjDataInfo.h"
+#include "stir/VoxelsOnCartesianGrid.h"
+#include "stir/Scanner.h"
+#include "stir/RunTests.h"
+#include <algorithm>
+#include <cstdio>
+#include <iostream>
+#include <random>
+#include <tuple>
+
+START_NAMESPACE_STIR
+
+/*!
+  \ingroup test
+  \brief Test class for ListModeCacheFile
+*/
+class ListModeCacheFileTests : public RunTests
+{
+public:
+  void run_tests() override;
+
+private:
+  void run_tests_for_proj_data_info(const shared_ptr<const ProjDataInfo>& proj_data_info_sptr);
+};
+
+static std::tuple<int, int, int, int, int, float>
+as_tuple(const BinAndCorr& record)
+{
+  const Bin& bin = record.my_bin;
+  return std::make_tuple(
+      bin.segment_num(), bin.view_num(), bin.axial_pos_num(), bin.tangential_pos_num(), bin.timing_pos_num(), record.my_corr);
+}
+
+void
+ListModeCacheFileTests::run_tests_for_proj_data_info(const shared_ptr<const ProjDataInfo>& proj_data_info_sptr)
+{
+  const ProjDataInfo& proj_data_info = *proj_data_info_sptr;
+  shared_ptr<DiscretisedDensity<3, float>> density_sptr(
+      new VoxelsOnCartesianGrid<float>(proj_data_info, 1.F, CartesianCoordinate3D<float>(0, 0, 0)));
+  ProjMatrixByBinUsingRayTracing proj_matrix;
+  proj_matrix.set_up(proj_data_info_sptr, density_sptr);
+  const DataSymmetriesForBins& symmetries = *proj_matrix.get_symmetries_ptr();
+
+  // construct random events (including the extremes of the index ranges)
+  std::mt19937 generator(42);
+  std::vector<BinAndCorr> records;
+  for (int i = 0; i < 2000; ++i)
+    {
+      const bool use_min = i == 0;
+      const bool use_max = i == 1;
+      auto random_int = [&](const int min_value, const int max_value) {
+        if (use_min)
+          return min_value;
+        if (use_max)
+          return max_value;
+        return std::uniform_int_distribution<int>(min_value, max_value)(generator);
+      };
+      const int segment_num = random_int(proj_data_info.get_min_segment_num(), proj_data_info.get_max_segment_num());
+      BinAndCorr record;
+      record.my_bin
+          = Bin(segment_num,
+                random_int(proj_data_info.get_min_view_num(), proj_data_info.get_max_view_num()),
+                random_int(proj_data_info.get_min_axial_pos_num(segment_num), proj_data_info.get_max_axial_pos_num(segment_num)),
+                random_int(proj_data_info.get_min_tangential_pos_num(), proj_data_info.get_max_tangential_pos_num()),
+                random_int(proj_data_info.get_min_tof_pos_num(), proj_data_info.get_max_tof_pos_num()),
+                1.F);
+      record.my_corr = std::uniform_real_distribution<float>(0.F, 3.F)(generator);
+      records.push_back(record);
+    }
+
+  const std::string filename = "test_ListModeCacheFile.bin";
+  for (int has_add = 0; has_add <= 1; ++has_add)
+    {
+      const int num_subsets = 3;
+      const std::string suffix = has_add ? " (with additive terms)" : " (without additive terms)";
+      check(ListModeCacheFile::write(filename, records, proj_data_info, has_add != 0, symmetries, num_subsets) == Succeeded::yes,
+            "write" + suffix);
+      {
+        const ListModeCacheFile cache_file(filename, proj_data_info);
+        check_if_equal(cache_file.get_num_records(), records.size(), "number of records" + suffix);
+        check_if_equal(cache_file.get_num_subsets(), num_subsets, "number of subsets" + suffix);
+        check_if_equal(cache_file.has_additive_terms(), has_add != 0, "has_additive_terms" + suffix);
+
+        // check that subsets are correct and contiguous
+        std::vector<std::tuple<int, int, int, int, int, float>> read_records;
+        for (int subset_num = 0; subset_num < num_subsets; ++subset_num)
+          {
+            const ListModeCacheFile::Records subset_records = cache_file.get_records_in_subset(subset_num);
+            for (std::size_t i = 0; i < subset_records.size(); ++i)
+              {
+                const BinAndCorr record = subset_records[i];
+                Bin basic_bin = record.my_bin;
+                if (!symmetries.is_basic(basic_bin))
+                  symmetries.find_basic_bin(basic_bin);
+                if (!check_if_equal(basic_bin.view_num() % num_subsets, subset_num, "subset of event" + suffix))
+                  break;
+                check_if_equal(record.my_bin.get_bin_value(), 1.F, "bin value" + suffix);
+                read_records.push_back(as_tuple(record));
+              }
+          }
+        check_if_equal(read_records.size(), records.size(), "total number of records in subsets" + suffix);
+        check_if_equal(cache_file.get_all_records().size(), records.size(), "size of get_all_records" + suffix);
+
+        // check that the events are the same (up to order)
+        std::vector<std::tuple<int, int, int, int, int, float>> original_records;
+        for (BinAndCorr record : records)
+          {
+            if (!has_add)
+              record.my_corr = 0.F;
+            original_records.push_back(as_tuple(record));
+          }
+        std::sort(original_records.begin(), original_records.end());
+        std::sort(read_records.begin(), read_records.end());
+        check(original_records == read_records, "events read back should be the same" + suffix);
+      }
+    }
+
+  // reading with a different proj_data_info should fail
+  {
+    shared_ptr<ProjDataInfo> other_proj_data_info_sptr(proj_data_info.clone());
+    other_proj_data_info_sptr->set_num_views(proj_data_info.get_num_views() / 2);
+    bool failed = false;
+    try
+      {
+        std::cerr << "\nThe next test should result in an error message\n";
+        const ListModeCacheFile cache_file(filename, *other_proj_data_info_sptr);
+      }
+    catch (...)
+      {
+        failed = true;
+      }
+    check(failed, "reading with different proj_data_info should fail");
+  }
+  std::remove(filename.c_str());
+}
+
+void
+ListModeCacheFileTests::run_tests()
+{
+  std::cerr << "Tests for ListModeCacheFile\n";
+  {
+    std::cerr << "Non-TOF scanner\n";
+    shared_ptr<Scanner> scanner_sptr(new Scanner(Scanner::Siemens_mMR));
+    shared_ptr<const ProjDataInfo> proj_data_info_sptr(
+        ProjDataInfo::construct_proj_data_info(scanner_sptr,
+                                               /*span*/ 11,
+                                               scanner_sptr->get_num_rings() - 1,
+                                               /*views*/ scanner_sptr->get_num_detectors_per_ring() / 2,
+                                               /*tang_pos*/ scanner_sptr->get_default_num_arccorrected_bins(),
+                                               /*arc_corrected*/ false));
+    run_tests_for_proj_data_info(proj_data_info_sptr);
+  }
+  {
+    std::cerr << "TOF scanner\n";
+    shared_ptr<Scanner> scanner_sptr(new Scanner(Scanner::Discovery690));
+    shared_ptr<const ProjDataInfo> proj_data_info_sptr(
+        ProjDataInfo::construct_proj_data_info(scanner_sptr,
+                                               /*span*/ 11,
+                                               scanner_sptr->get_num_rings() - 1,
+                                               /*views*/ scanner_sptr->get_num_detectors_per_ring() / 2,
+                                               /*tang_pos*/ 64,
+                                               /*arc_corrected*/ false,
+                                               /*tof_mashing*/ 5));
+    run_tests_for_proj_data_info(proj_data_info_sptr);
+  }
+}
+
+END_NAMESPACE_STIR
+
+USING_NAMESPACE_STIR
+
+int
+main()
+{
+  ListModeCacheFileTests tests;
+  tests.run_tests();
+  return tests.main_return_value();
+}
@@ -0,0 +1,164 @@
+//
+//
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+/*!
+
+  \file
+  \ingroup test
+  \ingroup priors
+
+  \brief Test program for stir::NeighbourhoodStencil
+
+  Compares the results with a straightforward implementation, for images that are larger
+  and smaller than the neighbourhood.
+*/
+
+#include "stir/recon_buildblock/NeighbourhoodStencil.h"
+#include "stir/Array.h"
+#include "stir/IndexRange3D.h"
+#include "stir/RunTests.h"
+#include <iostream>
+#include <random>
+
+START_NAMESPACE_STIR
+
+/*!
+  \ingroup test
+  \brief Test class for NeighbourhoodStencil
+*/
+class NeighbourhoodStencilTests : public RunTests
+{
+public:
+  void run_tests() override;
+
+private:
+  //! a term that depends on all of its arguments
+  struct TestTerm
+  {
+    double operator()(const double x_j, const double x_k, const double y_j, const double y_k, const bool is_centre) const
+    {
+      return (x_j - 2 * x_k) * y_k + (is_centre ? y_j : 0.);
+    }
+  };
+
+  //! straightforward implementation of the sums
+  static Array<3, double> compute_sums_directly(const Array<3, float>& weights,
+                                                const Array<3, float>& image,
+                                                const Array<3, float>& input,
+                                                const Array<3, float>* kappa_ptr);
+
+  void run_tests_for_image(const std::string& name, const Array<3, float>& weights, const IndexRange<3>& range);
+};
+
+Array<3, double>
+NeighbourhoodStencilTests::compute_sums_directly(const Array<3, float>& weights,
+                                                 const Array<3, float>& image,
+                                                 const Array<3, float>& input,
+                                                 const Array<3, float>* kappa_ptr)
+{
+  const TestTerm term;
+  Array<3, double> sums(image.get_index_range());
+  for (int z = image.get_min_index(); z <= image.get_max_index(); ++z)
+    for (int y = image[z].get_min_index(); y <= image[z].get_max_index(); ++y)
+      for (int x = image[z][y].get_min_index(); x <= image[z][y].get_max_index(); ++x)
+        for (int dz = weights.get_min_index(); dz <= weights.get_max_index(); ++dz)
+          for (int dy = weights[dz].get_min_index(); dy <= weights[dz].get_max_index(); ++dy)
+            for (int dx = weights[dz][dy].get_min_index(); dx <= weights[dz][dy].get_max_index(); ++dx)
+              {
+                const int zk = z + dz;
+                const int yk = y + dy;
+                const int xk = x + dx;
+                if (zk < image.get_min_index() || zk > image.get_max_index() || yk < image[z].get_min_index()
+                    || yk > image[z].get_max_index() || xk < image[z][y].get_min_index() || xk > image[z][y].get_max_index())
+                  continue;
+                double current
+                    = weights[dz][dy][dx]
+                      * term(image[z][y][x], image[zk][yk][xk], input[z][y][x], input[zk][yk][xk], dz == 0 && dy == 0 && dx == 0);
+                if (kappa_ptr)
+                  current *= (*kappa_ptr)[z][y][x] * (*kappa_ptr)[zk][yk][xk];
+                sums[z][y][x] += current;
+              }
+  return sums;
+}
+
+void
+NeighbourhoodStencilTests::run_tests_for_image(const std::string& name,
+                                               const Array<3, float>& weights,
+                                               const IndexRange<3>& range)
+{
+  std::cerr << "Tests with " << name << '\n';
+  std::mt19937 generator(42);
+  std::uniform_real_distribution<float> distribution(0.5F, 2.F);
+  Array<3, float> image(range), input(range), kappa(range);
+  for (auto iter = image.begin_all(); iter != image.end_all(); ++iter)
+    *iter = distribution(generator);
+  for (auto iter = input.begin_all(); iter != input.end_all(); ++iter)
+    *iter = distribution(generator);
+  for (auto iter = kappa.begin_all(); iter != kappa.end_all(); ++iter)
+    *iter = distribution(generator);
+
+  const NeighbourhoodStencil stencil(weights);
+  const TestTerm term;
+  for (int do_kappa = 0; do_kappa <= 1; ++do_kappa)
+    {
+      const Array<3, float>* kappa_ptr = do_kappa ? &kappa : nullptr;
+      const std::string kappa_string = do_kappa ? " with kappa" : " without kappa";
+      const Array<3, double> expected_sums = compute_sums_directly(weights, image, input, kappa_ptr);
+
+      Array<3, float> output(range);
+      stencil.compute_sums(output, image, input, kappa_ptr, term, 2.);
+      bool all_equal = true;
+      for (int z = range.get_min_index(); all_equal && z <= range.get_max_index(); ++z)
+        for (int y = range[z].get_min_index(); all_equal && y <= range[z].get_max_index(); ++y)
+          for (int x = range[z][y].get_min_index(); all_equal && x <= range[z][y].get_max_index(); ++x)
+            all_equal = check_if_equal(double(output[z][y][x]), 2 * expected_sums[z][y][x], "compute_sums" + kappa_string);
+
+      stencil.accumulate_sums(output, image, input, kappa_ptr, term, -1.);
+      for (int z = range.get_min_index(); all_equal && z <= range.get_max_index(); ++z)
+        for (int y = range[z].get_min_index(); all_equal && y <= range[z].get_max_index(); ++y)
+          for (int x = range[z][y].get_min_index(); all_equal && x <= range[z][y].get_max_index(); ++x)
+            all_equal = check_if_equal(double(output[z][y][x]), expected_sums[z][y][x], "accumulate_sums" + kappa_string);
+
+      check_if_equal(stencil.sum_over_image(image, input, kappa_ptr, term), expected_sums.sum(), "sum_over_image" + kappa_string);
+    }
+}
+
+void
+NeighbourhoodStencilTests::run_tests()
+{
+  // asymmetric weights with non-zero weight for the centre and a zero weight
+  Array<3, float> weights(IndexRange3D(-1, 1, -1, 2, -2, 1));
+  int count = 0;
+  for (auto iter = weights.begin_all(); iter != weights.end_all(); ++iter)
+    *iter = static_cast<float>(++count % 7) / 3;
+  weights[0][0][0] = 1.5F;
+  weights[1][-1][1] = 0.F;
+
+  run_tests_for_image("large image", weights, IndexRange3D(-2, 5, 0, 20, -11, 12));
+  run_tests_for_image("small image", weights, IndexRange3D(0, 1, 0, 1, 0, 2));
+  {
+    // 2D weights
+    Array<3, float> weights_2D(IndexRange3D(0, 0, -1, 1, -1, 1));
+    weights_2D.fill(1.F);
+    run_tests_for_image("2D weights", weights_2D, IndexRange3D(0, 2, -5, 5, -6, 6));
+  }
+}
+
+END_NAMESPACE_STIR
+
+USING_NAMESPACE_STIR
+
+int
+main()
+{
+  NeighbourhoodStencilTests tests;
+  tests.run_tests();
+  return tests.main_return_value();
+}
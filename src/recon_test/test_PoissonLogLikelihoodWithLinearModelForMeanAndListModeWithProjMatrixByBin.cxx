@@ -45,12 +45,16 @@
 #include "stir/info.h"
 #include "stir/Succeeded.h"
 #include "stir/num_threads.h"
+#include "stir/FilePath.h"
+#include <boost/format.hpp>
 #include <boost/random/uniform_01.hpp>
 #include <boost/random/normal_distribution.hpp>
 #include <boost/random/mersenne_twister.hpp>
 #include <boost/random/variate_generator.hpp>
+#include <cstdio>
 #include <iostream>
 #include <memory>
+#include <vector>
 
 START_NAMESPACE_STIR
 
@@ -106,6 +110,14 @@ protected:
 
   //! run the test
   void run_tests_for_objective_function(objective_function_type& objective_function, target_type& target);
+
+  //! check that the gradient is the same with and without pipelined reading, and when using several batches
+  /*! This will modify the cache size of \c objective_function_sptr and write cache files in the current directory. */
+  void test_pipelined_listmode_reading(const target_type& target);
+
+  //! check that sensitivities are written to and read from the sensitivity cache
+  /*! This will write (and remove) images in the current directory. */
+  void test_sensitivity_cache(const target_type& target);
 };
 
 PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBinTests::
@@ -129,6 +141,120 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBinTest
   test_Hessian("PoissonLLListModeData", objective_function, target, 0.5F);
 }
 
+void
+PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBinTests::test_pipelined_listmode_reading(
+    const target_type& target)
+{
+  auto& objective_function = *this->objective_function_sptr;
+  const int subset_num = 1;
+  shared_ptr<target_type> ref_gradient_sptr(target.get_empty_copy());
+  shared_ptr<target_type> gradient_sptr(target.get_empty_copy());
+
+  // reference: a single batch without pipelining
+  objective_function.set_pipelined_listmode_reading(false);
+  objective_function.compute_sub_gradient_without_penalty(*ref_gradient_sptr, target, subset_num);
+  const double ref_value = objective_function.compute_objective_function_without_penalty(target, subset_num);
+
+  objective_function.set_pipelined_listmode_reading(true);
+  objective_function.compute_sub_gradient_without_penalty(*gradient_sptr, target, subset_num);
+  check_if_equal(*ref_gradient_sptr, *gradient_sptr, "gradient with pipelined reading (1 batch)");
+
+  // use several batches (stored in cache files)
+  objective_function.set_cache_max_size(3000);
+  objective_function.set_recompute_cache(true);
+  if (!check(objective_function.set_up(shared_ptr<target_type>(target.clone())) == Succeeded::yes,
+             "set-up of objective function with small cache"))
+    return;
+  for (int pipelined = 0; pipelined <= 1; ++pipelined)
+    {
+      const std::string suffix = pipelined ? " with pipelined reading" : " without pipelined reading";
+      objective_function.set_pipelined_listmode_reading(pipelined != 0);
+      objective_function.compute_sub_gradient_without_penalty(*gradient_sptr, target, subset_num);
+      check_if_equal(*ref_gradient_sptr, *gradient_sptr, "gradient with several batches" + suffix);
+      check_if_equal(ref_value,
+                     objective_function.compute_objective_function_without_penalty(target, subset_num),
+                     "value with several batches" + suffix);
+    }
+  for (unsigned int icache = 0; FilePath::exists(objective_function.get_cache_filename(icache)); ++icache)
+    std::remove(objective_function.get_cache_filename(icache).c_str());
+}
+
+void
+PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBinTests::test_sensitivity_cache(
+    const target_type& target)
+{
+  auto& objective_function = *this->objective_function_sptr;
+  const int num_subsets = objective_function.get_num_subsets();
+  std::vector<shared_ptr<target_type>> ref_sensitivities;
+  for (int subset_num = 0; subset_num < num_subsets; ++subset_num)
+    ref_sensitivities.emplace_back(objective_function.get_subset_sensitivity(subset_num).clone());
+
+  auto remove_cache_files = [&](const std::string& filename_pattern) {
+    for (int subset_num = 0; subset_num < num_subsets; ++subset_num)
+      {
+        FilePath filename(boost::str(boost::format(filename_pattern) % subset_num), false);
+        std::remove(filename.get_as_string().c_str());
+        filename.replace_extension(".ahv");
+        std::remove(filename.get_as_string().c_str());
+        filename.replace_extension(".v");
+        std::remove(filename.get_as_string().c_str());
+      }
+  };
+
+  // use a directory with a % in its name, as the filename is used as a boost::format pattern for subset sensitivities
+  const std::string cache_directory
+      = FilePath(FilePath::get_current_working_directory()).append("sensitivity%cache").get_as_string();
+  objective_function.set_sensitivity_cache_directory(cache_directory);
+  // the first set_up() will have set this to true, as no sensitivity filenames were set
+  objective_function.set_recompute_sensitivity(false);
+  // first set_up should compute and write the sensitivities
+  if (!check(objective_function.set_up(shared_ptr<target_type>(target.clone())) == Succeeded::yes,
+             "set-up of objective function with sensitivity cache (miss)"))
+    return;
+  const std::string cache_filename = objective_function.get_sensitivity_cache_filename();
+  check(!cache_filename.empty(), "sensitivity cache filename should be set");
+  check_if_equal(
+      objective_function.get_subsensitivity_filenames(), std::string(), "subset sensitivity filenames should be restored");
+  for (int subset_num = 0; subset_num < num_subsets; ++subset_num)
+    {
+      check(FilePath::exists(boost::str(boost::format(cache_filename) % subset_num)), "sensitivity cache file should exist");
+      check_if_equal(*ref_sensitivities[subset_num],
+                     objective_function.get_subset_sensitivity(subset_num),
+                     "subset sensitivity after cache miss");
+    }
+
+  // overwrite the cache with different images to check that they are read by the next set_up
+  for (int subset_num = 0; subset_num < num_subsets; ++subset_num)
+    {
+      *ref_sensitivities[subset_num] *= 2;
+      write_to_file(boost::str(boost::format(cache_filename) % subset_num), *ref_sensitivities[subset_num]);
+    }
+  if (!check(objective_function.set_up(shared_ptr<target_type>(target.clone())) == Succeeded::yes,
+             "set-up of objective function with sensitivity cache (hit)"))
+    return;
+  check_if_equal(objective_function.get_sensitivity_cache_filename(), cache_filename, "sensitivity cache filename for hit");
+  for (int subset_num = 0; subset_num < num_subsets; ++subset_num)
+    check_if_equal(*ref_sensitivities[subset_num],
+                   objective_function.get_subset_sensitivity(subset_num),
+                   "subset sensitivity after cache hit");
+
+  // changing the geometry should use a different file
+  objective_function.set_max_segment_num_to_process(0);
+  if (check(objective_function.set_up(shared_ptr<target_type>(target.clone())) == Succeeded::yes,
+            "set-up of objective function with sensitivity cache and different geometry"))
+    {
+      check(objective_function.get_sensitivity_cache_filename() != cache_filename,
+            "sensitivity cache filename should change with the geometry");
+      remove_cache_files(objective_function.get_sensitivity_cache_filename());
+    }
+  remove_cache_files(cache_filename);
+  for (unsigned int icache = 0; FilePath::exists(objective_function.get_cache_filename(icache)); ++icache)
+    std::remove(objective_function.get_cache_filename(icache).c_str());
+  objective_function.set_max_segment_num_to_process(1);
+  objective_function.set_sensitivity_cache_directory("");
+  std::remove(cache_directory.c_str());
+}
+
 void
 PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBinTests::construct_input_data(
     shared_ptr<target_type>& density_sptr)
@@ -252,6 +378,10 @@ PoissonLogLikelihoodWithLinearModelForMeanAndListModeDataWithProjMatrixByBinTest
   shared_ptr<target_type> density_sptr;
   construct_input_data(density_sptr);
   this->run_tests_for_objective_function(*this->objective_function_sptr, *density_sptr);
+  std::cerr << "----- testing pipelined reading of list mode data\n";
+  this->test_pipelined_listmode_reading(*density_sptr);
+  std::cerr << "----- testing sensitivity cache\n";
+  this->test_sensitivity_cache(*density_sptr);
 #else
   // alternative that gets the objective function from an OSMAPOSL .par file
   // currently disabled
@@ -0,0 +1,363 @@
+//
+//
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+/*!
+
+  \file
+  \ingroup test
+
+  \brief Test program for the caching mechanism of stir::ProjMatrixByBin
+
+  Uses stir::ProjMatrixByBinUsingRayTracing.
+
+*/
+
+#include "stir/VoxelsOnCartesianGrid.h"
+#include "stir/ProjDataInfo.h"
+#include "stir/Scanner.h"
+#include "stir/Bin.h"
+#include "stir/recon_buildblock/ProjMatrixByBinUsingRayTracing.h"
+#include "stir/recon_buildblock/ProjMatrixElemsForOneBin.h"
+#include "stir/RunTests.h"
+#include "stir/Succeeded.h"
+#include "stir/FilePath.h"
+#include <cstdio>
+#include <iostream>
+#include <sstream>
+#include <vector>
+
+using std::cerr;
+using std::stringstream;
+
+START_NAMESPACE_STIR
+
+/*!
+  \ingroup test
+  \brief Test class for the cache of ProjMatrixByBin
+
+  Checks that elements obtained via the cache are identical to those computed without the
+  cache, and that the cache respects its maximum size and keeps statistics.
+  Also checks compact (lossy) storage in the cache, which is compared with a tolerance
+  (see ProjMatrixElemsForOneBin::operator==), and the persistent cache (which writes a file
+  in the current directory).
+*/
+class ProjMatrixByBinTests : public RunTests
+{
+public:
+  void run_tests() override;
+
+private:
+  shared_ptr<ProjDataInfo> proj_data_info_sptr;
+  shared_ptr<DiscretisedDensity<3, float>> density_sptr;
+  std::vector<Bin> bins;
+
+  //! set up a matrix, using \a cache_parameters in the parameter file
+  bool set_up_proj_matrix(ProjMatrixByBinUsingRayTracing& proj_matrix, const std::string& cache_parameters);
+  //! compare all bins with the uncached matrix
+  void compare_with_uncached(const ProjMatrixByBin& proj_matrix, const ProjMatrixByBin& proj_matrix_no_cache, const char* str);
+
+  void run_tests_unlimited_cache(const ProjMatrixByBin& proj_matrix_no_cache);
+  void run_tests_limited_cache(const ProjMatrixByBin& proj_matrix_no_cache);
+  void run_tests_compact_cache(const ProjMatrixByBin& proj_matrix_no_cache);
+  void run_tests_persistent_cache(const ProjMatrixByBin& proj_matrix_no_cache);
+  void run_tests_precompute(const ProjMatrixByBin& proj_matrix_no_cache);
+};
+
+bool
+ProjMatrixByBinTests::set_up_proj_matrix(ProjMatrixByBinUsingRayTracing& proj_matrix, const std::string& cache_parameters)
+{
+  stringstream str;
+  str << "Ray Tracing Matrix Parameters :=\n"
+         "restrict to cylindrical FOV := 1\n"
+         "number of rays in tangential direction to trace for each bin := 1\n"
+      << cache_parameters << "End Ray Tracing Matrix Parameters :=\n";
+  if (!check(proj_matrix.parse(str), "parsing projection matrix parameters"))
+    return false;
+  proj_matrix.set_up(proj_data_info_sptr, density_sptr);
+  return true;
+}
+
+void
+ProjMatrixByBinTests::compare_with_uncached(const ProjMatrixByBin& proj_matrix,
+                                            const ProjMatrixByBin& proj_matrix_no_cache,
+                                            const char* str)
+{
+  ProjMatrixElemsForOneBin elems;
+  ProjMatrixElemsForOneBin elems_no_cache;
+  for (const auto& bin : bins)
+    {
+      proj_matrix.get_proj_matrix_elems_for_one_bin(elems, bin);
+      proj_matrix_no_cache.get_proj_matrix_elems_for_one_bin(elems_no_cache, bin);
+      elems.sort();
+      elems_no_cache.sort();
+      if (!check(elems == elems_no_cache, str))
+        {
+          cerr << "Current bin: segment = " << bin.segment_num() << ", axial pos " << bin.axial_pos_num()
+               << ", view = " << bin.view_num() << ", tangential_pos_num = " << bin.tangential_pos_num() << "\n";
+          return;
+        }
+    }
+}
+
+void
+ProjMatrixByBinTests::run_tests_unlimited_cache(const ProjMatrixByBin& proj_matrix_no_cache)
+{
+  cerr << "\tTests with cache without size limit\n";
+  ProjMatrixByBinUsingRayTracing proj_matrix;
+  if (!set_up_proj_matrix(proj_matrix, "store_only_basic_bins_in_cache := 0\n"))
+    return;
+  check_if_equal(proj_matrix.get_maximum_cache_size_in_MB(), 0., "default maximum cache size");
+
+  compare_with_uncached(proj_matrix, proj_matrix_no_cache, "comparing with uncached matrix (1st pass)");
+  {
+    const ProjMatrixByBin::CacheStatistics stats = proj_matrix.get_cache_statistics();
+    check_if_equal(stats.num_elements, static_cast<std::uint64_t>(bins.size()), "number of elements in cache");
+    check_if_equal(stats.num_evictions, static_cast<std::uint64_t>(0), "number of evictions without size limit");
+    check(stats.size_in_bytes > 0, "size of cache should be positive");
+  }
+  proj_matrix.reset_cache_statistics();
+  compare_with_uncached(proj_matrix, proj_matrix_no_cache, "comparing with uncached matrix (2nd pass)");
+  {
+    const ProjMatrixByBin::CacheStatistics stats = proj_matrix.get_cache_statistics();
+    check_if_equal(stats.num_hits, static_cast<std::uint64_t>(bins.size()), "number of hits in 2nd pass");
+    check_if_equal(stats.num_misses, static_cast<std::uint64_t>(0), "number of misses in 2nd pass");
+  }
+
+  cerr << "\tTests copying a matrix with a filled cache\n";
+  {
+    ProjMatrixByBinUsingRayTracing proj_matrix_copy(proj_matrix);
+    proj_matrix_copy.reset_cache_statistics();
+    compare_with_uncached(proj_matrix_copy, proj_matrix_no_cache, "comparing copy with uncached matrix");
+    const ProjMatrixByBin::CacheStatistics stats = proj_matrix_copy.get_cache_statistics();
+    check_if_equal(stats.num_hits, static_cast<std::uint64_t>(bins.size()), "number of hits for copied matrix");
+  }
+
+  proj_matrix.clear_cache();
+  {
+    const ProjMatrixByBin::CacheStatistics stats = proj_matrix.get_cache_statistics();
+    check_if_equal(stats.num_elements, static_cast<std::uint64_t>(0), "number of elements after clear_cache");
+    check_if_equal(stats.size_in_bytes, static_cast<std::uint64_t>(0), "size of cache after clear_cache");
+  }
+}
+
+void
+ProjMatrixByBinTests::run_tests_limited_cache(const ProjMatrixByBin& proj_matrix_no_cache)
+{
+  cerr << "\tTests with cache with size limit\n";
+  // first find out how much memory we need for the full cache
+  std::uint64_t full_size_in_bytes;
+  {
+    ProjMatrixByBinUsingRayTracing proj_matrix;
+    if (!set_up_proj_matrix(proj_matrix, "store_only_basic_bins_in_cache := 0\n"))
+      return;
+    compare_with_uncached(proj_matrix, proj_matrix_no_cache, "comparing with uncached matrix");
+    full_size_in_bytes = proj_matrix.get_cache_statistics().size_in_bytes;
+  }
+  const double max_size_in_MB = full_size_in_bytes / 3. / 1048576;
+
+  ProjMatrixByBinUsingRayTracing proj_matrix;
+  {
+    stringstream str;
+    str << "store_only_basic_bins_in_cache := 0\n"
+        << "maximum cache size in MB := " << max_size_in_MB << "\n";
+    if (!set_up_proj_matrix(proj_matrix, str.str()))
+      return;
+  }
+  check_if_equal(proj_matrix.get_maximum_cache_size_in_MB(), max_size_in_MB, "parsing maximum cache size");
+
+  for (int pass = 1; pass <= 2; ++pass)
+    {
+      compare_with_uncached(proj_matrix, proj_matrix_no_cache, "comparing limited cache with uncached matrix");
+      const ProjMatrixByBin::CacheStatistics stats = proj_matrix.get_cache_statistics();
+      check(stats.size_in_bytes <= static_cast<std::uint64_t>(max_size_in_MB * 1048576), "cache should respect its maximum size");
+      check(stats.num_elements < bins.size(), "not all elements should fit in the cache");
+      check(stats.num_evictions > 0, "elements should have been evicted");
+    }
+
+  cerr << "\tTests least recently used eviction\n";
+  {
+    proj_matrix.clear_cache();
+    // fill the cache with a few bins, access the first one again, then add many other bins
+    ProjMatrixElemsForOneBin elems;
+    const Bin& first_bin = bins[0];
+    proj_matrix.get_proj_matrix_elems_for_one_bin(elems, first_bin);
+    for (std::size_t i = 1; i < bins.size(); ++i)
+      {
+        // keep accessing the first bin such that it is the most recently used element of its view/segment
+        proj_matrix.get_proj_matrix_elems_for_one_bin(elems, first_bin);
+        proj_matrix.get_proj_matrix_elems_for_one_bin(elems, bins[i]);
+      }
+    proj_matrix.reset_cache_statistics();
+    proj_matrix.get_proj_matrix_elems_for_one_bin(elems, first_bin);
+    check_if_equal(proj_matrix.get_cache_statistics().num_hits,
+                   static_cast<std::uint64_t>(1),
+                   "recently used element should still be in the cache");
+  }
+}
+
+void
+ProjMatrixByBinTests::run_tests_compact_cache(const ProjMatrixByBin& proj_matrix_no_cache)
+{
+  std::uint64_t full_size_in_bytes;
+  {
+    ProjMatrixByBinUsingRayTracing proj_matrix;
+    if (!set_up_proj_matrix(proj_matrix, "store_only_basic_bins_in_cache := 0\n"))
+      return;
+    check_if_equal(proj_matrix.get_compact_cache_storage(), std::string("none"), "default compact cache storage");
+    compare_with_uncached(proj_matrix, proj_matrix_no_cache, "comparing with uncached matrix");
+    full_size_in_bytes = proj_matrix.get_cache_statistics().size_in_bytes;
+    check_if_equal(proj_matrix.get_cache_statistics().max_relative_error, 0.F, "max relative error without compact storage");
+  }
+
+  const char* storage_types[] = { "float16", "fixed16" };
+  for (const char* storage : storage_types)
+    {
+      cerr << "\tTests with compact cache storage " << storage << "\n";
+      ProjMatrixByBinUsingRayTracing proj_matrix;
+      if (!set_up_proj_matrix(proj_matrix,
+                              std::string("store_only_basic_bins_in_cache := 0\ncompact cache storage := ") + storage + "\n"))
+        return;
+      check_if_equal(proj_matrix.get_compact_cache_storage(), std::string(storage), "parsing compact cache storage");
+      compare_with_uncached(proj_matrix, proj_matrix_no_cache, "comparing with uncached matrix (1st pass)");
+      proj_matrix.reset_cache_statistics();
+      // 2nd pass gets (approximate) elements from the cache
+      compare_with_uncached(proj_matrix, proj_matrix_no_cache, "comparing compact cache with uncached matrix");
+      const ProjMatrixByBin::CacheStatistics stats = proj_matrix.get_cache_statistics();
+      check_if_equal(stats.num_hits, static_cast<std::uint64_t>(bins.size()), "number of hits with compact storage");
+      // note: for this small image, the overhead per cached bin is still substantial
+      check(stats.size_in_bytes < full_size_in_bytes * 2 / 3, "compact storage should use less memory");
+      check(stats.max_relative_error > 0.F, "max relative error should be positive with compact storage");
+      check(stats.max_relative_error < .001F, "max relative error should be small");
+      cerr << "\t\tcache size " << stats.size_in_bytes << " bytes (vs " << full_size_in_bytes << " bytes), max relative error "
+           << stats.max_relative_error << "\n";
+    }
+}
+
+void
+ProjMatrixByBinTests::run_tests_persistent_cache(const ProjMatrixByBin& proj_matrix_no_cache)
+{
+  cerr << "\tTests with persistent cache\n";
+  const std::string parameters = "persistent cache directory := .\n";
+  std::string filename;
+  {
+    ProjMatrixByBinUsingRayTracing proj_matrix;
+    if (!set_up_proj_matrix(proj_matrix, parameters))
+      return;
+    filename = proj_matrix.get_persistent_cache_filename();
+    if (!check(!filename.empty(), "persistent cache filename should be set"))
+      return;
+    // remove any left-over file from a previous run
+    std::remove(filename.c_str());
+    // set-up again, now that the file does not exist
+    proj_matrix.set_up(proj_data_info_sptr, density_sptr);
+    compare_with_uncached(proj_matrix, proj_matrix_no_cache, "comparing with uncached matrix (writing persistent cache)");
+    check(proj_matrix.write_persistent_cache() == Succeeded::no, "incomplete persistent cache should not be written");
+    check(!FilePath::exists(filename), "incomplete persistent cache should not be written");
+    proj_matrix.precompute();
+    check(proj_matrix.write_persistent_cache() == Succeeded::yes, "writing persistent cache");
+    check(proj_matrix.write_persistent_cache() == Succeeded::no, "persistent cache should not be overwritten");
+  }
+  {
+    ProjMatrixByBinUsingRayTracing proj_matrix;
+    if (!set_up_proj_matrix(proj_matrix, parameters))
+      return;
+    check_if_equal(proj_matrix.get_persistent_cache_filename(), filename, "persistent cache filename for same geometry");
+    compare_with_uncached(proj_matrix, proj_matrix_no_cache, "comparing persistent cache with uncached matrix");
+    const ProjMatrixByBin::CacheStatistics stats = proj_matrix.get_cache_statistics();
+    check_if_equal(stats.num_persistent_cache_hits, static_cast<std::uint64_t>(bins.size()), "number of persistent cache hits");
+    check_if_equal(stats.num_elements, static_cast<std::uint64_t>(0), "elements from persistent cache are not stored in memory");
+  }
+  std::string other_filename;
+  {
+    ProjMatrixByBinUsingRayTracing proj_matrix;
+    if (!set_up_proj_matrix(proj_matrix, parameters + "restrict to cylindrical FOV := 0\n"))
+      return;
+    other_filename = proj_matrix.get_persistent_cache_filename();
+    check(other_filename != filename, "persistent cache filename should depend on parameters");
+    std::remove(other_filename.c_str());
+    proj_matrix.set_up(proj_data_info_sptr, density_sptr);
+    ProjMatrixElemsForOneBin elems;
+    for (const auto& bin : bins)
+      proj_matrix.get_proj_matrix_elems_for_one_bin(elems, bin);
+  }
+  check(!FilePath::exists(other_filename), "persistent cache should not be written by destructor");
+  std::remove(other_filename.c_str());
+  std::remove(filename.c_str());
+}
+
+void
+ProjMatrixByBinTests::run_tests_precompute(const ProjMatrixByBin& proj_matrix_no_cache)
+{
+  cerr << "\tTests precompute\n";
+  ProjMatrixByBinUsingRayTracing proj_matrix;
+  if (!set_up_proj_matrix(proj_matrix, ""))
+    return;
+  proj_matrix.precompute(0, 2);
+  const std::uint64_t num_elements_in_subset = proj_matrix.get_cache_statistics().num_elements;
+  check(num_elements_in_subset > 0, "precompute should fill the cache");
+  proj_matrix.precompute(1, 2);
+  const std::uint64_t num_elements_all = proj_matrix.get_cache_statistics().num_elements;
+  check(num_elements_in_subset < num_elements_all, "precompute of a subset should only compute part of the matrix");
+
+  proj_matrix.reset_cache_statistics();
+  compare_with_uncached(proj_matrix, proj_matrix_no_cache, "comparing precomputed matrix with uncached matrix");
+  const ProjMatrixByBin::CacheStatistics stats = proj_matrix.get_cache_statistics();
+  check_if_equal(stats.num_misses, static_cast<std::uint64_t>(0), "number of misses after precompute");
+  check_if_equal(stats.num_elements, num_elements_all, "number of elements should not change after precompute");
+}
+
+void
+ProjMatrixByBinTests::run_tests()
+{
+  cerr << "Tests for ProjMatrixByBin caching\n";
+
+  shared_ptr<Scanner> scanner_sptr(new Scanner(Scanner::E953));
+  proj_data_info_sptr.reset(ProjDataInfo::ProjDataInfoCTI(scanner_sptr,
+                                                          /*span=*/1,
+                                                          /*max_delta=*/3,
+                                                          /*num_views=*/8,
+                                                          /*num_tang_poss=*/16));
+  density_sptr.reset(new VoxelsOnCartesianGrid<float>(*proj_data_info_sptr, 1.F, CartesianCoordinate3D<float>(0, 0, 0)));
+
+  bins.clear();
+  for (int segment_num = proj_data_info_sptr->get_min_segment_num(); segment_num <= proj_data_info_sptr->get_max_segment_num();
+       ++segment_num)
+    for (int view_num = proj_data_info_sptr->get_min_view_num(); view_num <= proj_data_info_sptr->get_max_view_num();
+         view_num += 3)
+      for (int axial_pos_num = proj_data_info_sptr->get_min_axial_pos_num(segment_num);
+           axial_pos_num <= proj_data_info_sptr->get_max_axial_pos_num(segment_num);
+           axial_pos_num += 4)
+        for (int tangential_pos_num = proj_data_info_sptr->get_min_tangential_pos_num();
+             tangential_pos_num <= proj_data_info_sptr->get_max_tangential_pos_num();
+             tangential_pos_num += 2)
+          bins.push_back(Bin(segment_num, view_num, axial_pos_num, tangential_pos_num));
+
+  ProjMatrixByBinUsingRayTracing proj_matrix_no_cache;
+  if (!set_up_proj_matrix(proj_matrix_no_cache, "disable caching := 1\n"))
+    return;
+
+  run_tests_unlimited_cache(proj_matrix_no_cache);
+  run_tests_limited_cache(proj_matrix_no_cache);
+  run_tests_compact_cache(proj_matrix_no_cache);
+  run_tests_persistent_cache(proj_matrix_no_cache);
+  run_tests_precompute(proj_matrix_no_cache);
+}
+
+END_NAMESPACE_STIR
+
+USING_NAMESPACE_STIR
+
+int
+main()
+{
+  ProjMatrixByBinTests tests;
+  tests.run_tests();
+  return tests.main_return_value();
+}
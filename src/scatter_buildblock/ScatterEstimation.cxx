@@ -959,6 +959,7 @@ ScatterEstimation::process_data()
                                         local_min_scale_value,
                                         local_max_scale_value,
                                         this->half_filter_width,
+                                        this->scatter_interpolator,
                                         spline_type,
                                         true);
 
@@ -219,6 +219,7 @@ ScatterSimulation::set_defaults()
 {
   this->attenuation_threshold = 0.01f;
   this->randomly_place_scatter_points = true;
+  this->scatter_point_sampling_fraction = 1.F;
   this->use_cache = true;
   this->zoom_xy = -1.f;
   this->zoom_z = -1.f;
@@ -271,12 +272,18 @@ ScatterSimulation::initialise_keymap()
   this->parser.add_key("output filename prefix", &this->output_proj_data_filename);
   this->parser.add_key("downsample scanner", &this->downsample_scanner_bool);
   this->parser.add_key("randomly place scatter points", &this->randomly_place_scatter_points);
+  this->parser.add_key("scatter point sampling fraction", &this->scatter_point_sampling_fraction);
   this->parser.add_key("use cache", &this->use_cache);
 }
 
 bool
 ScatterSimulation::post_processing()
 {
+  if (this->scatter_point_sampling_fraction <= 0.F || this->scatter_point_sampling_fraction > 1.F)
+    {
+      warning("ScatterSimulation: scatter point sampling fraction has to be larger than 0 and at most 1");
+      return true;
+    }
 
   if (this->template_proj_data_filename.size() > 0)
     this->set_template_proj_data_info(this->template_proj_data_filename);
@@ -986,6 +993,23 @@ ScatterSimulation::set_randomly_place_scatter_points(const bool arg)
   this->_already_set_up = false;
 }
 
+void
+ScatterSimulation::set_scatter_point_sampling_fraction(const float arg)
+{
+  if (arg <= 0.F || arg > 1.F)
+    error("ScatterSimulation: scatter point sampling fraction has to be larger than 0 and at most 1");
+  scatter_point_sampling_fraction = arg;
+  if (!is_null_ptr(this->density_image_for_scatter_points_sptr))
+    this->sample_scatter_points();
+  this->_already_set_up = false;
+}
+
+float
+ScatterSimulation::get_scatter_point_sampling_fraction() const
+{
+  return scatter_point_sampling_fraction;
+}
+
 void
 ScatterSimulation::set_cache_enabled(const bool arg)
 {
@@ -21,6 +21,7 @@
 #include "stir/scatter/ScatterSimulation.h"
 #include "stir/IndexRange.h"
 #include "stir/Coordinate2D.h"
+#include "stir/info.h"
 
 START_NAMESPACE_STIR
 
@@ -47,7 +48,11 @@ ScatterSimulation::initialise_cache_for_scattpoint_det_integrals_over_attenuatio
   const IndexRange<2> range(Coordinate2D<int>(0, 0),
                             Coordinate2D<int>(static_cast<int>(this->scatt_points_vector.size() - 1), this->total_detectors - 1));
   if (this->cached_attenuation_integral_scattpoint_det.get_index_range() == range)
-    return; // keep cache if correct size
+    {
+      // keep cache if correct size, e.g. when only the activity image changed
+      info("ScatterSimulation: reusing cached integrals over the attenuation image", 3);
+      return;
+    }
 
   this->cached_attenuation_integral_scattpoint_det.resize(range);
   this->cached_attenuation_integral_scattpoint_det.fill(cache_init_value);
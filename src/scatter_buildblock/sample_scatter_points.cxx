@@ -22,6 +22,10 @@
 #include "stir/VoxelsOnCartesianGrid.h"
 #include "stir/info.h"
 #include "stir/error.h"
+#include <algorithm>
+#include <cmath>
+#include <numeric>
+#include <vector>
 #include <time.h>
 #include <boost/format.hpp>
 using namespace std;
@@ -66,23 +70,82 @@ ScatterSimulation::sample_scatter_points()
   this->scatt_points_vector.resize(0); // make sure we don't keep scatter points from a previous run
   this->scatt_points_vector.reserve(1000);
 
-  // coord[] is in voxels units
+  // find candidate scatter points (coord[] is in voxels units)
+  std::vector<CartesianCoordinate3D<int>> candidates;
   for (coord[1] = min_index[1]; coord[1] <= max_index[1]; ++coord[1])
     for (coord[2] = min_index[2]; coord[2] <= max_index[2]; ++coord[2])
       for (coord[3] = min_index[3]; coord[3] <= max_index[3]; ++coord[3])
         if (attenuation_map[coord] >= this->attenuation_threshold)
-          {
-            ScatterPoint scatter_point;
-            scatter_point.coord = convert_int_to_float(coord);
-            if (randomly_place_scatter_points)
-              scatter_point.coord
-                  += CartesianCoordinate3D<float>(random_point(-.5, .5), random_point(-.5, .5), random_point(-.5, .5));
-            scatter_point.coord = voxel_size * scatter_point.coord + origin;
-            scatter_point.mu_value = attenuation_map[coord];
-            this->scatt_points_vector.push_back(scatter_point);
-          }
+          candidates.push_back(coord);
+
+  // find probabilities for selecting every candidate
+  std::vector<float> probabilities(candidates.size(), 1.F);
+  if (this->scatter_point_sampling_fraction < 1.F && !candidates.empty())
+    {
+      std::vector<float> importance(candidates.size());
+      for (std::size_t i = 0; i < candidates.size(); ++i)
+        {
+          // magnitude of the gradient using central differences (in index units)
+          float gradient_norm_squared = 0.F;
+          for (int d = 1; d <= 3; ++d)
+            {
+              CartesianCoordinate3D<int> previous = candidates[i];
+              CartesianCoordinate3D<int> next = candidates[i];
+              previous[d] = std::max(previous[d] - 1, min_index[d]);
+              next[d] = std::min(next[d] + 1, max_index[d]);
+              if (next[d] > previous[d])
+                gradient_norm_squared += square((attenuation_map[next] - attenuation_map[previous]) / (next[d] - previous[d]));
+            }
+          importance[i] = attenuation_map[candidates[i]] + std::sqrt(gradient_norm_squared);
+        }
+
+      // probabilities are proportional to the importance, but at most 1.
+      // Find the proportionality constant such that the expected number of points is as requested.
+      const double num_points = this->scatter_point_sampling_fraction * candidates.size();
+      auto expected_num_points = [&](const double factor) {
+        double sum = 0.;
+        for (const float value : importance)
+          sum += std::min(1., factor * value);
+        return sum;
+      };
+      double low = 0.;
+      double high = num_points / std::accumulate(importance.begin(), importance.end(), 0.);
+      while (expected_num_points(high) < num_points)
+        high *= 2;
+      for (int iter = 0; iter < 50; ++iter)
+        {
+          const double factor = (low + high) / 2;
+          if (expected_num_points(factor) < num_points)
+            low = factor;
+          else
+            high = factor;
+        }
+      for (std::size_t i = 0; i < candidates.size(); ++i)
+        probabilities[i] = static_cast<float>(std::min(1., high * importance[i]));
+    }
+
+  // systematic sampling: select a candidate whenever the cumulative probability crosses an integer
+  double cumulative_probability = .5;
+  for (std::size_t i = 0; i < candidates.size(); ++i)
+    {
+      cumulative_probability += probabilities[i];
+      if (cumulative_probability < 1.)
+        continue;
+      cumulative_probability -= 1.;
+
+      ScatterPoint scatter_point;
+      scatter_point.coord = convert_int_to_float(candidates[i]);
+      if (randomly_place_scatter_points)
+        scatter_point.coord += CartesianCoordinate3D<float>(random_point(-.5, .5), random_point(-.5, .5), random_point(-.5, .5));
+      scatter_point.coord = voxel_size * scatter_point.coord + origin;
+      scatter_point.mu_value = attenuation_map[candidates[i]];
+      scatter_point.weight = 1.F / probabilities[i];
+      this->scatt_points_vector.push_back(scatter_point);
+    }
   this->remove_cache_for_integrals_over_activity();
   this->remove_cache_for_integrals_over_attenuation();
-  info(boost::format("ScatterSimulation: using %1% scatter points") % this->scatt_points_vector.size(), 2);
+  info(boost::format("ScatterSimulation: using %1% scatter points (out of %2% candidates)") % this->scatt_points_vector.size()
+           % candidates.size(),
+       2);
 }
 END_NAMESPACE_STIR
@@ -107,7 +107,8 @@ SingleScatterSimulation::simulate_for_one_scatter_point(const std::size_t scatte
   const float cos_incident_angle_AS = static_cast<float>(cos_angle(scatter_point - detector_coord_A, detA_to_ring_center));
   const float cos_incident_angle_BS = static_cast<float>(cos_angle(scatter_point - detector_coord_B, detB_to_ring_center));
 
-  return scatter_ratio * cos_incident_angle_AS * cos_incident_angle_BS * dif_Compton_cross_section_value;
+  return scatter_ratio * cos_incident_angle_AS * cos_incident_angle_BS * dif_Compton_cross_section_value
+         * scatt_points_vector[scatter_point_num].weight;
 }
 
 END_NAMESPACE_STIR
@@ -52,6 +52,33 @@ ScatterEstimation::upsample_and_fit_scatter_estimate(ProjData& scaled_scatter_pr
                                                      const unsigned half_filter_width,
                                                      BSpline::BSplineType spline_type,
                                                      const bool remove_interleaving)
+{
+  ProjDataInterpolator interpolator;
+  upsample_and_fit_scatter_estimate(scaled_scatter_proj_data,
+                                    emission_proj_data,
+                                    scatter_proj_data,
+                                    scatter_normalisation,
+                                    weights_proj_data,
+                                    min_scale_factor,
+                                    max_scale_factor,
+                                    half_filter_width,
+                                    interpolator,
+                                    spline_type,
+                                    remove_interleaving);
+}
+
+void
+ScatterEstimation::upsample_and_fit_scatter_estimate(ProjData& scaled_scatter_proj_data,
+                                                     const ProjData& emission_proj_data,
+                                                     const ProjData& scatter_proj_data,
+                                                     BinNormalisation& scatter_normalisation,
+                                                     const ProjData& weights_proj_data,
+                                                     const float min_scale_factor,
+                                                     const float max_scale_factor,
+                                                     const unsigned half_filter_width,
+                                                     ProjDataInterpolator& interpolator,
+                                                     BSpline::BSplineType spline_type,
+                                                     const bool remove_interleaving)
 {
   info("upsample_and_fit_scatter_estimate: Interpolating scatter estimate to size of emission data");
 
@@ -70,7 +97,21 @@ ScatterEstimation::upsample_and_fit_scatter_estimate(ProjData& scaled_scatter_pr
         actual_remove_interleaving = false;
       }
 
-    interpolate_projdata(interpolated_direct_scatter, scatter_proj_data, spline_type, actual_remove_interleaving);
+    BasicCoordinate<3, BSpline::BSplineType> spline_types;
+    spline_types.fill(spline_type);
+    if (!interpolator.is_set_up_for(*interpolated_direct_scatter_proj_data_info_sptr,
+                                    *scatter_proj_data.get_proj_data_info_sptr(),
+                                    spline_types,
+                                    actual_remove_interleaving))
+      {
+        info("upsample_and_fit_scatter_estimate: computing interpolation weights", 3);
+        interpolator.set_up(interpolated_direct_scatter_proj_data_info_sptr,
+                            scatter_proj_data.get_proj_data_info_sptr(),
+                            spline_types,
+                            actual_remove_interleaving);
+      }
+    if (interpolator.interpolate(interpolated_direct_scatter, scatter_proj_data) != Succeeded::yes)
+      error("upsample_and_fit_scatter_estimate: interpolation of scatter estimate failed");
   }
 
   // now call inverse_SSRB, and normalise/scale if we need to
@@ -42,6 +42,7 @@
 
  #include "stir/find_STIR_config.h"
  #include "stir/Succeeded.h"
+ #include "stir/ByteOrder.h"
  #include "stir/DetectionPosition.h"
  #include "stir/Scanner.h"
  #include "stir/Bin.h"
@@ -233,6 +234,210 @@
 	return p;
       }
 
+    // numpy "typestr" for the element types that we wrap (used for __array_interface__)
+    template <typename elemT> struct numpy_typestr;
+    template <> struct numpy_typestr<float>
+    {
+      static const char* get()
+      { return stir::ByteOrder::get_native_order() == stir::ByteOrder::little_endian ? "<f4" : ">f4"; }
+    };
+    template <> struct numpy_typestr<double>
+    {
+      static const char* get()
+      { return stir::ByteOrder::get_native_order() == stir::ByteOrder::little_endian ? "<f8" : ">f8"; }
+    };
+
+    // construct a dictionary following the numpy __array_interface__ protocol (version 3).
+    // For a contiguous Array, it points to the data of the Array (i.e. no copy is made).
+    // The caller needs to keep the Array alive (and not resize it) while the data is in use.
+    // Otherwise, the data is copied into a (contiguous) bytearray, which is then kept alive by numpy.
+    // Arrays with an irregular range cannot be represented, so we raise an AttributeError,
+    // such that numpy handles the object as if it does not support the protocol.
+    template <int num_dimensions, typename elemT>
+      PyObject* array_interface_from_Array(stir::Array<num_dimensions, elemT>& array)
+    {
+      stir::BasicCoordinate<num_dimensions,int> sizes;
+      if (array.size_all() == 0)
+	sizes.fill(0);
+      else
+	{
+	  stir::BasicCoordinate<num_dimensions,int> minind,maxind;
+	  if (!array.get_regular_range(minind, maxind))
+	    {
+	      PyErr_SetString(PyExc_AttributeError, "__array_interface__ is not available for arrays with an irregular range");
+	      return NULL;
+	    }
+	  sizes = maxind-minind+1;
+	}
+      PyObject* data;
+      if (array.size_all() > 0 && array.is_contiguous())
+	{
+	  elemT* data_ptr = array.get_full_data_ptr();
+	  array.release_full_data_ptr();
+	  data = Py_BuildValue("(NO)", PyLong_FromVoidPtr(data_ptr), Py_False);
+	}
+      else
+	{
+	  data = PyByteArray_FromStringAndSize(NULL, static_cast<Py_ssize_t>(array.size_all() * sizeof(elemT)));
+	  if (data == NULL)
+	    return NULL;
+	  std::copy(array.begin_all_const(), array.end_all_const(), reinterpret_cast<elemT*>(PyByteArray_AS_STRING(data)));
+	}
+      // note: "N" steals the reference, so no need to DECREF
+      return Py_BuildValue("{s:N,s:s,s:N,s:i}",
+			   "shape", tuple_from_coord(sizes),
+			   "typestr", numpy_typestr<elemT>::get(),
+			   "data", data,
+			   "version", 3);
+    }
+
+    // helper class to make sure that a Py_buffer is released, even when throwing
+    class PyBufferReleaser
+    {
+    public:
+      explicit PyBufferReleaser(Py_buffer& view) : view(view) {}
+      ~PyBufferReleaser() { PyBuffer_Release(&view); }
+    private:
+      Py_buffer& view;
+    };
+
+    // check if a buffer-protocol format string corresponds to the given type in native byte order
+    // (format strings can start with a byte-order character, see the Python struct module)
+    inline bool buffer_format_is(const char* format, const char type_char)
+    {
+      if (format == NULL)
+	return type_char == 'B'; // NULL means unsigned bytes
+      const bool native_is_little = stir::ByteOrder::get_native_order() == stir::ByteOrder::little_endian;
+      switch (format[0])
+	{
+	case '@': case '=':
+	  ++format; break;
+	case '<':
+	  if (!native_is_little) return false;
+	  ++format; break;
+	case '>': case '!':
+	  if (native_is_little) return false;
+	  ++format; break;
+	default:
+	  break;
+	}
+      return format[0] == type_char && format[1] == '\0';
+    }
+
+    // helper class to make sure that a Python object is DECREF-ed, even when throwing
+    class PyObjectReleaser
+    {
+    public:
+      explicit PyObjectReleaser(PyObject* const obj) : obj(obj) {}
+      ~PyObjectReleaser() { Py_XDECREF(obj); }
+    private:
+      PyObject* const obj;
+    };
+
+    // fill a STIR object from a Python object that supports the buffer protocol (e.g. a numpy array)
+    // using a single copy (i.e. without calling into Python for every element).
+    // Only C-contiguous float32/float64 buffers in native byte-order are handled.
+    // If \a check_shape is true, the shape of the buffer has to be identical to \a sizes (otherwise we throw),
+    // otherwise only the total number of elements is checked.
+    // Returns false if the buffer cannot be handled, such that the caller can fall back to the (slower)
+    // element-by-element copy.
+    template <int num_dimensions, typename STIRObjectT>
+      bool fill_from_Python_buffer_help(STIRObjectT& stir_object,
+					const stir::BasicCoordinate<num_dimensions,int>& sizes,
+					PyObject* const arg,
+					const bool check_shape)
+    {
+      if (!PyObject_CheckBuffer(arg))
+	return false;
+      Py_buffer view;
+      if (PyObject_GetBuffer(arg, &view, PyBUF_RECORDS_RO) != 0)
+	{
+	  PyErr_Clear();
+	  return false;
+	}
+      PyBufferReleaser releaser(view);
+
+      const std::size_t num_elements = static_cast<std::size_t>(view.len / view.itemsize);
+      if (check_shape)
+	{
+	  if (view.ndim != num_dimensions)
+	    {
+	      char str[1000];
+	      snprintf(str, 1000, "fill() called with an array with %d dimensions, but %d are needed",
+		       view.ndim, num_dimensions);
+	      throw std::invalid_argument(str);
+	    }
+	  for (int d=1; d<=num_dimensions; ++d)
+	    if (view.shape[d-1] != static_cast<Py_ssize_t>(sizes[d]))
+	      throw std::invalid_argument("fill() called with an array of incorrect shape. Check shape() of the STIR object.");
+	}
+      else
+	{
+	  std::size_t num_elements_needed = 1;
+	  for (int d=1; d<=num_dimensions; ++d)
+	    num_elements_needed *= static_cast<std::size_t>(sizes[d]);
+	  if (num_elements != num_elements_needed)
+	    return false;
+	}
+
+      if (!PyBuffer_IsContiguous(&view, 'C'))
+	return false;
+      if (buffer_format_is(view.format, 'f') && view.itemsize == sizeof(float))
+	{
+	  const float* data_ptr = static_cast<const float*>(view.buf);
+	  stir::fill_from(stir_object, data_ptr, data_ptr + num_elements);
+	}
+      else if (buffer_format_is(view.format, 'd') && view.itemsize == sizeof(double))
+	{
+	  const double* data_ptr = static_cast<const double*>(view.buf);
+	  stir::fill_from(stir_object, data_ptr, data_ptr + num_elements);
+	}
+      else
+	return false;
+      return true;
+    }
+
+    // if \a arg is a numpy.flatiter (e.g. numpyarray.flat) that has not been advanced yet,
+    // return a new reference to the array it iterates over, otherwise return NULL
+    inline PyObject* get_base_of_numpy_flatiter(PyObject* const arg)
+    {
+      if (strcmp(Py_TYPE(arg)->tp_name, "numpy.flatiter") != 0)
+	return NULL;
+      PyObject* const index = PyObject_GetAttrString(arg, "index");
+      if (index == NULL)
+	{
+	  PyErr_Clear();
+	  return NULL;
+	}
+      const bool at_start = PyLong_Check(index) && PyLong_AsLong(index) == 0;
+      Py_DECREF(index);
+      if (!at_start)
+	return NULL;
+      PyObject* const base = PyObject_GetAttrString(arg, "base");
+      if (base == NULL)
+	PyErr_Clear();
+      return base;
+    }
+
+    // fill a STIR object from a numpy array (or other object supporting the buffer protocol) of
+    // the same shape, or from a numpy.flatiter over such an array, using a single copy.
+    // Returns false if this is not possible (e.g. non-contiguous arrays, or other element types),
+    // such that the caller can fall back to fill_Array_from_Python_object().
+    // Throws if \a arg is an array of the wrong shape.
+    template <int num_dimensions, typename STIRObjectT>
+      bool fill_from_Python_buffer(STIRObjectT& stir_object,
+				   const stir::BasicCoordinate<num_dimensions,int>& sizes,
+				   PyObject* const arg)
+    {
+      PyObject* const base = get_base_of_numpy_flatiter(arg);
+      if (base != NULL)
+	{
+	  PyObjectReleaser base_releaser(base);
+	  return fill_from_Python_buffer_help(stir_object, sizes, base, /* check_shape = */ false);
+	}
+      return fill_from_Python_buffer_help(stir_object, sizes, arg, /* check_shape = */ true);
+    }
+
     // fill an array from a Python sequence
     // (could be trivially modified to just write to a C++ iterator)
     template <int num_dimensions, typename elemT>
@@ -251,6 +456,15 @@
 	  double val;
 	  // TODO currently hard-wired as double which might imply extra conversions
 	  int ecode = SWIG_AsVal_double(item, &val);
+	  if (!SWIG_IsOK(ecode))
+	    {
+	      // use Python's conversion (e.g. for numpy integer scalars)
+	      val = PyFloat_AsDouble(item);
+	      if (val != -1. || !PyErr_Occurred())
+		ecode = SWIG_OK;
+	      else
+		PyErr_Clear();
+	    }
 	  if (SWIG_IsOK(ecode)) 
 	  {
 	    *array_iter++ = static_cast<elemT>(val);
@@ -281,6 +495,39 @@
 
     }
 
+    // fill an array from a Python iterator, or from any object that we can iterate over.
+    // For numpy arrays, we iterate over all elements (i.e. use numpyarray.flat).
+    template <int num_dimensions, typename elemT>
+      void fill_Array_from_Python_object(stir::Array<num_dimensions, elemT> * array_ptr, PyObject* const arg)
+    {
+      if (PyIter_Check(arg))
+	{
+	  fill_Array_from_Python_iterator(array_ptr, arg);
+	  return;
+	}
+      PyObject* iterator = NULL;
+      if (PyObject_CheckBuffer(arg) && PyObject_HasAttrString(arg, "flat"))
+	{
+	  PyObject* const flat = PyObject_GetAttrString(arg, "flat");
+	  if (flat != NULL && PyIter_Check(flat))
+	    iterator = flat;
+	  else
+	    Py_XDECREF(flat);
+	}
+      if (iterator == NULL)
+	iterator = PyObject_GetIter(arg);
+      if (iterator == NULL)
+	{
+	  PyErr_Clear();
+	  char str[1000];
+	  snprintf(str, 1000, "Wrong argument-type used for fill(): should be a scalar or an iterator or so, but is of type %s",
+		   arg->ob_type->tp_name);
+	  throw std::invalid_argument(str);
+	}
+      PyObjectReleaser iterator_releaser(iterator);
+      fill_Array_from_Python_iterator(array_ptr, iterator);
+    }
+
 #if 0
     
     // TODO  does not work yet.
@@ -715,6 +962,13 @@ namespace std {
 
 
 #endif
+  // sizes of the 4D array corresponding to the projection data (see create_array_for_proj_data)
+  static BasicCoordinate<4,int> get_shape_for_proj_data(const ProjData& proj_data)
+  {
+    return make_coordinate(proj_data.get_num_tof_poss(), proj_data.get_num_non_tof_sinograms(),
+                           proj_data.get_num_views(), proj_data.get_num_tangential_poss());
+  }
+
   static Array<4,float> create_array_for_proj_data(const ProjData& proj_data)
   {
     const int num_non_tof_sinos = proj_data.get_num_non_tof_sinograms();
@@ -82,6 +82,16 @@
 #ifdef SWIGPYTHON
 // ignore as we will add a version that returns a tuple instead
 %ignore stir::Array::shape() const;
+
+// allows numpy.asarray(array) to return a (writable) view without copying (or a copy for non-contiguous arrays).
+// This uses an attribute (as opposed to a Python property) such that it works for builtin types as well.
+%define %ADD_array_interface(TYPE...)
+%attribute_readonly(%arg(TYPE), PyObject*, __array_interface__, __array_interface__, swigstir::array_interface_from_Array(*self_));
+%enddef
+%ADD_array_interface(stir::Array<1,float>)
+%ADD_array_interface(stir::Array<2,float>)
+%ADD_array_interface(stir::Array<3,float>)
+%ADD_array_interface(stir::Array<4,float>)
 #endif
 
 %include "stir/Array.h"
@@ -143,20 +153,20 @@ namespace stir
       return swigstir::tuple_from_coord(sizes);
     }
 
-    %feature("autodoc", "fill from a Python iterator, e.g. array.fill(numpyarray.flat)") fill;
+    %feature("autodoc", "return a dictionary following the numpy __array_interface__ protocol, pointing to the STIR data if it is contiguous (internal, use numpy.asarray() or stirextra.as_numpy())") _array_interface;
+    PyObject* _array_interface()
+    {
+      return swigstir::array_interface_from_Array(*$self);
+    }
+
+    %feature("autodoc", "fill from a numpy array of the same shape, e.g. array.fill(numpyarray), or from a Python iterator, e.g. array.fill(numpyarray.flat). This is fastest for C-contiguous float32 or float64 numpy arrays (or their flat iterator)") fill;
     void fill(PyObject* const arg)
     {
-      if (PyIter_Check(arg))
-      {
-	swigstir::fill_Array_from_Python_iterator($self, arg);
-      }
-      else
-      {
-	char str[1000];
-	snprintf(str, 1000, "Wrong argument-type used for fill(): should be a scalar or an iterator or so, but is of type %s",
-		arg->ob_type->tp_name);
-	throw std::invalid_argument(str);
-      } 
+      stir::BasicCoordinate<num_dimensions,int> minind,maxind;
+      if ($self->get_regular_range(minind, maxind)
+	  && swigstir::fill_from_Python_buffer(*$self, maxind-minind+1, arg))
+	return;
+      swigstir::fill_Array_from_Python_object($self, arg);
     }
   }
 #endif
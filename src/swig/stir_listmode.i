@@ -33,6 +33,27 @@
 %include "stir/listmode/LmToProjData.h"
 ADD_REPR_PARAMETER_INFO(stir::LmToProjData);
 
+#ifdef SWIGPYTHON
+// needs to be defined before ListModeData is wrapped, as it is used in read_events_batch below
+%{
+#include "stir/listmode/CListEventCylindricalScannerWithDiscreteDetectors.h"
+#include "stir/DetectionPositionPair.h"
+
+  namespace swigstir {
+    // layout of one element of the numpy structured array returned by ListModeData.read_events_batch
+    // Note: this has to be consistent with the dtype constructed there (using "aligned" fields).
+    struct ListModeEventForPython
+    {
+      double time_in_secs;
+      int det1, ring1, det2, ring2;
+      int segment_num, axial_pos_num, view_num, tangential_pos_num, timing_pos_num;
+      float bin_value;
+      unsigned char is_prompt;
+    };
+  }
+%}
+#endif
+
 %shared_ptr(stir::ListModeData);
 %include "stir/listmode/ListModeData.h"
 %shared_ptr(stir::CListModeData);
@@ -47,6 +68,109 @@ ADD_REPR_PARAMETER_INFO(stir::LmToProjData);
     }
 }
 
+#ifdef SWIGPYTHON
+%extend stir::ListModeData {
+  // Read (at most) max_num_events events from the current position in the list mode data
+  // and return them as a numpy structured array (see ListModeEventForPython for the fields).
+  // The time of an event is the one of the last time record, or start_time_in_secs if there was none yet
+  // (pass the last time of the previous batch to continue).
+  // Detector/ring numbers are set to -1 if the events do not have discrete detectors.
+  // If proj_data_info is given, bin coordinates are computed using get_bin() (bin_value <= 0 means
+  // that the event is not in the projection data), otherwise they are set to 0.
+  // An array with less than max_num_events elements means that the end of the data was reached.
+  %feature("autodoc", "read events in a numpy structured array, e.g. events=lm.read_events_batch(100000, proj_data_info); events['view_num']") read_events_batch;
+  PyObject* read_events_batch(const int max_num_events,
+                              const shared_ptr<const ProjDataInfo> proj_data_info_sptr = shared_ptr<const ProjDataInfo>(),
+                              const double start_time_in_secs = 0.)
+  {
+    using swigstir::ListModeEventForPython;
+    if (max_num_events < 0)
+      throw std::invalid_argument("read_events_batch: max_num_events has to be non-negative");
+
+    std::vector<ListModeEventForPython> events;
+    events.reserve(max_num_events);
+    {
+      shared_ptr<ListRecord> record_sptr = $self->get_empty_record_sptr();
+      ListRecord& record = *record_sptr;
+      const ProjDataInfo* const proj_data_info_ptr = proj_data_info_sptr.get();
+      double current_time = start_time_in_secs;
+      Bin bin;
+      DetectionPositionPair<> det_pos_pair;
+      while (events.size() < static_cast<std::size_t>(max_num_events))
+        {
+          if ($self->get_next_record(record) == Succeeded::no)
+            break;
+          if (record.is_time())
+            current_time = record.time().get_time_in_secs();
+          if (!record.is_event())
+            continue;
+
+          const ListEvent& event = record.event();
+          ListModeEventForPython e;
+          e.time_in_secs = current_time;
+          e.is_prompt = event.is_prompt() ? 1 : 0;
+          if (auto det_event_ptr = dynamic_cast<const CListEventCylindricalScannerWithDiscreteDetectors*>(&event))
+            {
+              det_event_ptr->get_detection_position(det_pos_pair);
+              e.det1 = det_pos_pair.pos1().tangential_coord();
+              e.ring1 = det_pos_pair.pos1().axial_coord();
+              e.det2 = det_pos_pair.pos2().tangential_coord();
+              e.ring2 = det_pos_pair.pos2().axial_coord();
+            }
+          else
+            {
+              e.det1 = e.ring1 = e.det2 = e.ring2 = -1;
+            }
+          if (proj_data_info_ptr)
+            {
+              event.get_bin(bin, *proj_data_info_ptr);
+              e.segment_num = bin.segment_num();
+              e.axial_pos_num = bin.axial_pos_num();
+              e.view_num = bin.view_num();
+              e.tangential_pos_num = bin.tangential_pos_num();
+              e.timing_pos_num = bin.timing_pos_num();
+              e.bin_value = bin.get_bin_value();
+            }
+          else
+            {
+              e.segment_num = e.axial_pos_num = e.view_num = e.tangential_pos_num = e.timing_pos_num = 0;
+              e.bin_value = 0.F;
+            }
+          events.push_back(e);
+        }
+    }
+
+    // now construct the numpy array
+    PyObject* dtype_spec = Py_BuildValue("[(ss)(ss)(ss)(ss)(ss)(ss)(ss)(ss)(ss)(ss)(ss)(ss)]",
+                                         "time_in_secs", "f8",
+                                         "det1", "i4", "ring1", "i4", "det2", "i4", "ring2", "i4",
+                                         "segment_num", "i4", "axial_pos_num", "i4", "view_num", "i4",
+                                         "tangential_pos_num", "i4", "timing_pos_num", "i4",
+                                         "bin_value", "f4",
+                                         "is_prompt", "u1");
+    PyArray_Descr* descr = NULL;
+    const int ok = PyArray_DescrAlignConverter(dtype_spec, &descr);
+    Py_DECREF(dtype_spec);
+    if (!ok)
+      throw std::runtime_error("read_events_batch: internal error constructing numpy dtype");
+    npy_intp dims[1] = { static_cast<npy_intp>(events.size()) };
+    // note: PyArray_NewFromDescr steals the reference to descr
+    PyObject* array = PyArray_NewFromDescr(&PyArray_Type, descr, 1, dims, NULL, NULL, 0, NULL);
+    if (array == NULL)
+      throw std::runtime_error("read_events_batch: failed allocating numpy array");
+    if (static_cast<std::size_t>(PyArray_ITEMSIZE(reinterpret_cast<PyArrayObject*>(array))) != sizeof(ListModeEventForPython))
+      {
+        Py_DECREF(array);
+        throw std::runtime_error("read_events_batch: internal error: size of numpy dtype differs from C++ struct");
+      }
+    if (!events.empty())
+      std::memcpy(PyArray_DATA(reinterpret_cast<PyArrayObject*>(array)), events.data(),
+                  events.size() * sizeof(ListModeEventForPython));
+    return array;
+  }
+}
+#endif
+
 %extend stir::CListModeData {
   static shared_ptr<stir::CListModeData> read_from_file(const std::string& filename)
     {
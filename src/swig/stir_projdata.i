@@ -57,6 +57,219 @@
                 stir::ProjDataInfoBlocksOnCylindricalNoArcCorr,
                 stir::ProjDataInfoGenericNoArcCorr);
 
+// the versions for many bins are replaced by versions using numpy arrays below
+%ignore stir::ProjDataInfo::get_s_for_bins(std::vector<float>&, const std::vector<stir::Bin>&) const;
+%ignore stir::ProjDataInfo::get_phi_for_bins(std::vector<float>&, const std::vector<stir::Bin>&) const;
+%ignore stir::ProjDataInfo::get_m_for_bins(std::vector<float>&, const std::vector<stir::Bin>&) const;
+%ignore stir::ProjDataInfo::get_t_for_bins(std::vector<float>&, const std::vector<stir::Bin>&) const;
+%ignore stir::ProjDataInfo::get_LOR_end_points_for_bins(std::vector<stir::LORAs2Points<float> >&, const std::vector<stir::Bin>&) const;
+%ignore *::get_det_pos_pairs_for_bins(std::vector<stir::DetectionPositionPair<unsigned int> >&, const std::vector<stir::Bin>&) const;
+%ignore *::get_bins_for_det_pos_pairs(std::vector<stir::Bin>&, const std::vector<stir::DetectionPositionPair<unsigned int> >&) const;
+
+#ifdef SWIGPYTHON
+// helper functions for the numpy versions of the functions for many bins (see below).
+// These need to be defined before ProjDataInfo is wrapped.
+%{
+  namespace swigstir {
+    // convert a Python object (e.g. a 1D numpy array, list or scalar) to a vector of ints
+    // (None is converted to 0)
+    static std::vector<int> int_vector_from_Python_object(PyObject* const obj, const char* const name)
+    {
+      if (obj == Py_None)
+        return std::vector<int>(1, 0);
+      // check the type first, as we do not want to silently truncate floats
+      PyObject* const input_array = PyArray_FROM_OF(obj, 0);
+      if (input_array == NULL)
+        throw std::invalid_argument(std::string(name) + " has to be a 1D array of integers (or a scalar)");
+      if (!PyArray_ISINTEGER(reinterpret_cast<PyArrayObject*>(input_array))
+          || PyArray_NDIM(reinterpret_cast<PyArrayObject*>(input_array)) > 1)
+        {
+          Py_DECREF(input_array);
+          throw std::invalid_argument(std::string(name) + " has to be a 1D array of integers (or a scalar)");
+        }
+      // now convert to int (e.g. from int64)
+      PyObject* array = PyArray_FROMANY(input_array, NPY_INT, 0, 1, NPY_ARRAY_IN_ARRAY | NPY_ARRAY_FORCECAST);
+      Py_DECREF(input_array);
+      if (array == NULL)
+        throw std::invalid_argument(std::string(name) + " has to be a 1D array of integers (or a scalar)");
+      const int* const data = static_cast<const int*>(PyArray_DATA(reinterpret_cast<PyArrayObject*>(array)));
+      std::vector<int> result(data, data + PyArray_SIZE(reinterpret_cast<PyArrayObject*>(array)));
+      Py_DECREF(array);
+      return result;
+    }
+
+    // find the size of the output for index vectors, where vectors of size 1 are broadcast
+    static std::size_t get_broadcast_size(const std::vector<const std::vector<int>*>& indices)
+    {
+      std::size_t size = 1;
+      for (auto v : indices)
+        if (v->size() != 1)
+          {
+            if (size != 1 && v->size() != size)
+              throw std::invalid_argument("index arrays have to have the same size (or size 1)");
+            size = v->size();
+          }
+      return size;
+    }
+
+    static int get_broadcast_element(const std::vector<int>& v, const std::size_t i)
+    {
+      return v.size() == 1 ? v[0] : v[i];
+    }
+
+    static void check_in_range(const int value, const int min_value, const int max_value, const char* const name)
+    {
+      if (value < min_value || value > max_value)
+        throw std::out_of_range(std::string(name) + " out of range");
+    }
+
+    // construct bins from index arrays, checking that they are in range
+    static std::vector<stir::Bin>
+      bins_from_Python_objects(const stir::ProjDataInfo& proj_data_info,
+                               PyObject* const segment_nums, PyObject* const view_nums,
+                               PyObject* const axial_pos_nums, PyObject* const tangential_pos_nums,
+                               PyObject* const timing_pos_nums)
+    {
+      const std::vector<int> segments = int_vector_from_Python_object(segment_nums, "segment_nums");
+      const std::vector<int> views = int_vector_from_Python_object(view_nums, "view_nums");
+      const std::vector<int> axial_poss = int_vector_from_Python_object(axial_pos_nums, "axial_pos_nums");
+      const std::vector<int> tangential_poss = int_vector_from_Python_object(tangential_pos_nums, "tangential_pos_nums");
+      const std::vector<int> timing_poss = int_vector_from_Python_object(timing_pos_nums, "timing_pos_nums");
+      const std::size_t num_bins = get_broadcast_size({ &segments, &views, &axial_poss, &tangential_poss, &timing_poss });
+
+      std::vector<stir::Bin> bins(num_bins);
+      for (std::size_t i = 0; i < num_bins; ++i)
+        {
+          const int segment_num = get_broadcast_element(segments, i);
+          check_in_range(segment_num, proj_data_info.get_min_segment_num(), proj_data_info.get_max_segment_num(), "segment_num");
+          const int view_num = get_broadcast_element(views, i);
+          check_in_range(view_num, proj_data_info.get_min_view_num(), proj_data_info.get_max_view_num(), "view_num");
+          const int axial_pos_num = get_broadcast_element(axial_poss, i);
+          check_in_range(axial_pos_num, proj_data_info.get_min_axial_pos_num(segment_num),
+                         proj_data_info.get_max_axial_pos_num(segment_num), "axial_pos_num");
+          const int tangential_pos_num = get_broadcast_element(tangential_poss, i);
+          check_in_range(tangential_pos_num, proj_data_info.get_min_tangential_pos_num(),
+                         proj_data_info.get_max_tangential_pos_num(), "tangential_pos_num");
+          const int timing_pos_num = get_broadcast_element(timing_poss, i);
+          check_in_range(timing_pos_num, proj_data_info.get_min_tof_pos_num(), proj_data_info.get_max_tof_pos_num(),
+                         "timing_pos_num");
+          bins[i] = stir::Bin(segment_num, view_num, axial_pos_num, tangential_pos_num, timing_pos_num, 1.F);
+        }
+      return bins;
+    }
+
+    // construct a numpy array of the given shape, filled with a copy of the data
+    template <typename elemT>
+      static PyObject* numpy_array_from_data(const elemT* const data, const int num_dimensions, npy_intp* const dims, const int type_num)
+    {
+      PyObject* array = PyArray_SimpleNew(num_dimensions, dims, type_num);
+      if (array == NULL)
+        throw std::runtime_error("failed allocating numpy array");
+      const npy_intp size = PyArray_SIZE(reinterpret_cast<PyArrayObject*>(array));
+      if (size > 0)
+        std::memcpy(PyArray_DATA(reinterpret_cast<PyArrayObject*>(array)), data, size * sizeof(elemT));
+      return array;
+    }
+
+    static PyObject* numpy_array_from_vector(const std::vector<float>& v)
+    {
+      npy_intp dims[1] = { static_cast<npy_intp>(v.size()) };
+      return numpy_array_from_data(v.data(), 1, dims, NPY_FLOAT);
+    }
+
+    static PyObject* numpy_array_from_vector(const std::vector<int>& v)
+    {
+      npy_intp dims[1] = { static_cast<npy_intp>(v.size()) };
+      return numpy_array_from_data(v.data(), 1, dims, NPY_INT);
+    }
+
+    template <class ProjDataInfoT>
+      static PyObject* get_det_pos_pairs_for_bins(const ProjDataInfoT& proj_data_info,
+                                                  PyObject* const segment_nums, PyObject* const view_nums,
+                                                  PyObject* const axial_pos_nums, PyObject* const tangential_pos_nums,
+                                                  PyObject* const timing_pos_nums)
+    {
+      std::vector<stir::DetectionPositionPair<>> det_pos_pairs;
+      proj_data_info.get_det_pos_pairs_for_bins(det_pos_pairs,
+                                                bins_from_Python_objects(proj_data_info, segment_nums, view_nums,
+                                                                         axial_pos_nums, tangential_pos_nums,
+                                                                         timing_pos_nums));
+      const std::size_t num = det_pos_pairs.size();
+      std::vector<int> det1(num), ring1(num), det2(num), ring2(num), timing_pos(num);
+      for (std::size_t i = 0; i < num; ++i)
+        {
+          det1[i] = det_pos_pairs[i].pos1().tangential_coord();
+          ring1[i] = det_pos_pairs[i].pos1().axial_coord();
+          det2[i] = det_pos_pairs[i].pos2().tangential_coord();
+          ring2[i] = det_pos_pairs[i].pos2().axial_coord();
+          timing_pos[i] = det_pos_pairs[i].timing_pos();
+        }
+      // note: "N" steals the reference, so no need to DECREF
+      return Py_BuildValue("{s:N,s:N,s:N,s:N,s:N}",
+                           "det1", numpy_array_from_vector(det1),
+                           "ring1", numpy_array_from_vector(ring1),
+                           "det2", numpy_array_from_vector(det2),
+                           "ring2", numpy_array_from_vector(ring2),
+                           "timing_pos", numpy_array_from_vector(timing_pos));
+    }
+
+    template <class ProjDataInfoT>
+      static PyObject* get_bins_for_det_pos_pairs(const ProjDataInfoT& proj_data_info,
+                                                  PyObject* const det1_obj, PyObject* const ring1_obj,
+                                                  PyObject* const det2_obj, PyObject* const ring2_obj,
+                                                  PyObject* const timing_pos_obj)
+    {
+      const std::vector<int> det1 = int_vector_from_Python_object(det1_obj, "det1");
+      const std::vector<int> ring1 = int_vector_from_Python_object(ring1_obj, "ring1");
+      const std::vector<int> det2 = int_vector_from_Python_object(det2_obj, "det2");
+      const std::vector<int> ring2 = int_vector_from_Python_object(ring2_obj, "ring2");
+      const std::vector<int> timing_pos = int_vector_from_Python_object(timing_pos_obj, "timing_pos");
+      const std::size_t num = get_broadcast_size({ &det1, &ring1, &det2, &ring2, &timing_pos });
+      const int num_detectors_per_ring = proj_data_info.get_scanner_ptr()->get_num_detectors_per_ring();
+      const int num_rings = proj_data_info.get_scanner_ptr()->get_num_rings();
+
+      std::vector<stir::DetectionPositionPair<>> det_pos_pairs(num);
+      for (std::size_t i = 0; i < num; ++i)
+        {
+          stir::DetectionPositionPair<>& dp = det_pos_pairs[i];
+          dp.pos1().tangential_coord() = get_broadcast_element(det1, i);
+          dp.pos1().axial_coord() = get_broadcast_element(ring1, i);
+          dp.pos2().tangential_coord() = get_broadcast_element(det2, i);
+          dp.pos2().axial_coord() = get_broadcast_element(ring2, i);
+          dp.timing_pos() = get_broadcast_element(timing_pos, i);
+          check_in_range(dp.pos1().tangential_coord(), 0, num_detectors_per_ring - 1, "det1");
+          check_in_range(dp.pos2().tangential_coord(), 0, num_detectors_per_ring - 1, "det2");
+          check_in_range(dp.pos1().axial_coord(), 0, num_rings - 1, "ring1");
+          check_in_range(dp.pos2().axial_coord(), 0, num_rings - 1, "ring2");
+          if (dp.pos1().tangential_coord() == dp.pos2().tangential_coord())
+            throw std::invalid_argument("det1 and det2 have to be different");
+        }
+
+      std::vector<stir::Bin> bins;
+      proj_data_info.get_bins_for_det_pos_pairs(bins, det_pos_pairs);
+      std::vector<int> segment_nums(num), view_nums(num), axial_pos_nums(num), tangential_pos_nums(num), timing_pos_nums(num);
+      std::vector<float> bin_values(num);
+      for (std::size_t i = 0; i < num; ++i)
+        {
+          segment_nums[i] = bins[i].segment_num();
+          view_nums[i] = bins[i].view_num();
+          axial_pos_nums[i] = bins[i].axial_pos_num();
+          tangential_pos_nums[i] = bins[i].tangential_pos_num();
+          timing_pos_nums[i] = bins[i].timing_pos_num();
+          bin_values[i] = bins[i].get_bin_value();
+        }
+      return Py_BuildValue("{s:N,s:N,s:N,s:N,s:N,s:N}",
+                           "segment_num", numpy_array_from_vector(segment_nums),
+                           "view_num", numpy_array_from_vector(view_nums),
+                           "axial_pos_num", numpy_array_from_vector(axial_pos_nums),
+                           "tangential_pos_num", numpy_array_from_vector(tangential_pos_nums),
+                           "timing_pos_num", numpy_array_from_vector(timing_pos_nums),
+                           "bin_value", numpy_array_from_vector(bin_values));
+    }
+  } // end namespace swigstir
+%}
+#endif
+
 %include "stir/ProjDataInfo.h"
 
 %include "stir/ProjDataInfoCylindrical.h"
@@ -99,6 +312,88 @@ stir::CartesianCoordinate3D<float>
 }
 }
 
+#ifdef SWIGPYTHON
+
+// Functions returning geometrical info for many bins at once.
+// Bins are specified via (1D) arrays of their indices, where arrays of size 1 (or scalars) are broadcast.
+// timing_pos_nums defaults to 0.
+%extend stir::ProjDataInfo {
+  %feature("autodoc", "get_s() for many bins, e.g. s=pdi.get_s_for_bins(segment_nums, view_nums, axial_pos_nums, tangential_pos_nums), returns a numpy array") get_s_for_bins;
+  PyObject* get_s_for_bins(PyObject* segment_nums, PyObject* view_nums, PyObject* axial_pos_nums,
+                           PyObject* tangential_pos_nums, PyObject* timing_pos_nums = Py_None) const
+  {
+    std::vector<float> values;
+    $self->get_s_for_bins(values, swigstir::bins_from_Python_objects(*$self, segment_nums, view_nums, axial_pos_nums,
+                                                                   tangential_pos_nums, timing_pos_nums));
+    return swigstir::numpy_array_from_vector(values);
+  }
+  %feature("autodoc", "get_phi() for many bins, see get_s_for_bins") get_phi_for_bins;
+  PyObject* get_phi_for_bins(PyObject* segment_nums, PyObject* view_nums, PyObject* axial_pos_nums,
+                           PyObject* tangential_pos_nums, PyObject* timing_pos_nums = Py_None) const
+  {
+    std::vector<float> values;
+    $self->get_phi_for_bins(values, swigstir::bins_from_Python_objects(*$self, segment_nums, view_nums, axial_pos_nums,
+                                                                     tangential_pos_nums, timing_pos_nums));
+    return swigstir::numpy_array_from_vector(values);
+  }
+  %feature("autodoc", "get_m() for many bins, see get_s_for_bins") get_m_for_bins;
+  PyObject* get_m_for_bins(PyObject* segment_nums, PyObject* view_nums, PyObject* axial_pos_nums,
+                           PyObject* tangential_pos_nums, PyObject* timing_pos_nums = Py_None) const
+  {
+    std::vector<float> values;
+    $self->get_m_for_bins(values, swigstir::bins_from_Python_objects(*$self, segment_nums, view_nums, axial_pos_nums,
+                                                                   tangential_pos_nums, timing_pos_nums));
+    return swigstir::numpy_array_from_vector(values);
+  }
+  %feature("autodoc", "get_t() for many bins, see get_s_for_bins") get_t_for_bins;
+  PyObject* get_t_for_bins(PyObject* segment_nums, PyObject* view_nums, PyObject* axial_pos_nums,
+                           PyObject* tangential_pos_nums, PyObject* timing_pos_nums = Py_None) const
+  {
+    std::vector<float> values;
+    $self->get_t_for_bins(values, swigstir::bins_from_Python_objects(*$self, segment_nums, view_nums, axial_pos_nums,
+                                                                   tangential_pos_nums, timing_pos_nums));
+    return swigstir::numpy_array_from_vector(values);
+  }
+  %feature("autodoc", "end-points of the LORs for many bins (see get_s_for_bins), returns a numpy array of shape (num_bins, 2, 3) with coordinates in the order (z,y,x)") get_LOR_end_points_for_bins;
+  PyObject* get_LOR_end_points_for_bins(PyObject* segment_nums, PyObject* view_nums, PyObject* axial_pos_nums,
+                           PyObject* tangential_pos_nums, PyObject* timing_pos_nums = Py_None) const
+  {
+    std::vector<stir::LORAs2Points<float>> lors;
+    $self->get_LOR_end_points_for_bins(lors, swigstir::bins_from_Python_objects(*$self, segment_nums, view_nums, axial_pos_nums,
+                                                                              tangential_pos_nums, timing_pos_nums));
+    std::vector<float> coords(lors.size() * 6);
+    for (std::size_t i = 0; i < lors.size(); ++i)
+      for (int d = 1; d <= 3; ++d)
+        {
+          coords[6 * i + d - 1] = lors[i].p1()[d];
+          coords[6 * i + 3 + d - 1] = lors[i].p2()[d];
+        }
+    npy_intp dims[3] = { static_cast<npy_intp>(lors.size()), 2, 3 };
+    return swigstir::numpy_array_from_data(coords.data(), 3, dims, NPY_FLOAT);
+  }
+}
+
+%define ADD_DET_POS_PAIRS_FOR_MANY_BINS(PROJDATAINFO)
+%extend PROJDATAINFO {
+  %feature("autodoc", "detector pairs for many bins (see get_s_for_bins), returns a dictionary of numpy arrays with keys det1, ring1, det2, ring2 and timing_pos") get_det_pos_pairs_for_bins;
+  PyObject* get_det_pos_pairs_for_bins(PyObject* segment_nums, PyObject* view_nums, PyObject* axial_pos_nums,
+                           PyObject* tangential_pos_nums, PyObject* timing_pos_nums = Py_None) const
+  {
+    return swigstir::get_det_pos_pairs_for_bins(*$self, segment_nums, view_nums, axial_pos_nums, tangential_pos_nums, timing_pos_nums);
+  }
+  %feature("autodoc", "bins for many detector pairs, e.g. bins=pdi.get_bins_for_det_pos_pairs(det1, ring1, det2, ring2), returns a dictionary of numpy arrays with keys segment_num, view_num, axial_pos_num, tangential_pos_num, timing_pos_num and bin_value (which is negative if there is no corresponding bin)") get_bins_for_det_pos_pairs;
+  PyObject* get_bins_for_det_pos_pairs(PyObject* det1, PyObject* ring1, PyObject* det2, PyObject* ring2,
+                                       PyObject* timing_pos = Py_None) const
+  {
+    return swigstir::get_bins_for_det_pos_pairs(*$self, det1, ring1, det2, ring2, timing_pos);
+  }
+}
+%enddef
+
+ADD_DET_POS_PAIRS_FOR_MANY_BINS(stir::ProjDataInfoCylindricalNoArcCorr)
+ADD_DET_POS_PAIRS_FOR_MANY_BINS(stir::ProjDataInfoGenericNoArcCorr)
+#endif
+
 %include "stir/Viewgram.h"
 %include "stir/RelatedViewgrams.h"
 %include "stir/Sinogram.h"
@@ -154,23 +449,15 @@ namespace stir {
       return array;
     }
 
-    %feature("autodoc", "fill from a Python iterator, e.g. proj_data.fill(numpyarray.flat)") fill;
+    %feature("autodoc", "fill from a numpy array of the same shape as to_array(), e.g. proj_data.fill(numpyarray), or from a Python iterator, e.g. proj_data.fill(numpyarray.flat). This is fastest for C-contiguous float32 or float64 numpy arrays (or their flat iterator)") fill;
     void fill(PyObject* const arg)
     {
-      if (PyIter_Check(arg))
-      {
-        // TODO avoid need for copy to Array
-        Array<4,float> array = swigstir::create_array_for_proj_data(*$self);
-	swigstir::fill_Array_from_Python_iterator(&array, arg);
-        fill_from(*$self, array.begin_all(), array.end_all());
-      }
-      else
-      {
-	char str[1000];
-	snprintf(str, 1000, "Wrong argument-type used for fill(): should be a scalar or an iterator or so, but is of type %s",
-		arg->ob_type->tp_name);
-	throw std::invalid_argument(str);
-      } 
+      if (swigstir::fill_from_Python_buffer(*$self, swigstir::get_shape_for_proj_data(*$self), arg))
+	return;
+      // TODO avoid need for copy to Array
+      Array<4,float> array = swigstir::create_array_for_proj_data(*$self);
+      swigstir::fill_Array_from_Python_object(&array, arg);
+      fill_from(*$self, array.begin_all(), array.end_all());
     }
 
 #elif defined(SWIGMATLAB)
@@ -195,22 +482,14 @@ namespace stir {
 %extend ProjDataInMemory
   {
 #ifdef SWIGPYTHON
-    %feature("autodoc", "fill from a Python iterator, e.g. proj_data.fill(numpyarray.flat)") fill;
+    %feature("autodoc", "fill from a numpy array of the same shape as to_array(), e.g. proj_data.fill(numpyarray), or from a Python iterator, e.g. proj_data.fill(numpyarray.flat). This is fastest for C-contiguous float32 or float64 numpy arrays (or their flat iterator)") fill;
     void fill(PyObject* const arg)
     {
-      if (PyIter_Check(arg))
-      {
-        Array<4,float> array = swigstir::create_array_for_proj_data(*$self);
-	swigstir::fill_Array_from_Python_iterator(&array, arg);
-        fill_from(*$self, array.begin_all(), array.end_all());
-      }
-      else
-      {
-	char str[1000];
-	snprintf(str, 1000, "Wrong argument-type used for fill(): should be a scalar or an iterator or so, but is of type %s",
-		arg->ob_type->tp_name);
-	throw std::invalid_argument(str);
-      } 
+      if (swigstir::fill_from_Python_buffer(*$self, swigstir::get_shape_for_proj_data(*$self), arg))
+	return;
+      Array<4,float> array = swigstir::create_array_for_proj_data(*$self);
+      swigstir::fill_Array_from_Python_object(&array, arg);
+      fill_from(*$self, array.begin_all(), array.end_all());
     }
 
 #elif defined(SWIGMATLAB)
@@ -229,6 +508,124 @@ namespace stir {
 %include "stir/ProjDataInterfile.h"
 %include "stir/ProjDataInMemory.h"
 
+#ifdef SWIGPYTHON
+%{
+#include "stir/IO/interfile.h"
+#include "stir/IO/InterfileHeader.h"
+#include "stir/IO/InterfileHeaderSiemens.h"
+#include "stir/IO/InterfilePDFSHeaderSPECT.h"
+#include "stir/utilities.h"
+
+  namespace swigstir {
+    // parse an Interfile projection data header and return the name of the binary file
+    // (with the directory of the header prepended as in read_interfile_PDFS)
+    template <class HeaderT>
+      std::string get_interfile_data_file_name(const std::string& filename)
+    {
+      HeaderT hdr;
+      if (!hdr.parse(filename.c_str(), false))
+        throw std::runtime_error("Interfile parsing of " + filename + " failed");
+      char full_data_file_name[max_filename_length];
+      strcpy(full_data_file_name, hdr.data_file_name.c_str());
+      prepend_directory_name(full_data_file_name, get_directory_name(filename).c_str());
+      return full_data_file_name;
+    }
+
+    // numpy "typestr" for data stored with the given type and byte order
+    inline std::string numpy_typestr_for_stream(const NumericType type, const ByteOrder byte_order)
+    {
+      char str[4];
+      if (type.size_in_bytes() == 1)
+        str[0] = '|';
+      else
+        str[0] = (byte_order == ByteOrder::little_endian ||
+                  (byte_order == ByteOrder::native && ByteOrder::get_native_order() == ByteOrder::little_endian))
+          ? '<' : '>';
+      str[1] = !type.integer_type() ? 'f' : (type.signed_type() ? 'i' : 'u');
+      str[2] = static_cast<char>('0' + type.size_in_bytes());
+      str[3] = '\0';
+      return std::string(str);
+    }
+  }
+%}
+
+%feature("autodoc", "return a dictionary describing the layout of the binary file of Interfile projection data (see stirextra.projdata_as_memmap)") get_interfile_proj_data_layout;
+%inline %{
+  PyObject* get_interfile_proj_data_layout(const std::string& filename)
+  {
+    std::string data_file_name;
+    {
+      MinimalInterfileHeader hdr;
+      if (!hdr.parse(filename.c_str(), false))
+        throw std::runtime_error("Interfile parsing of " + filename + " failed");
+      if (hdr.get_exam_info().imaging_modality.get_modality() == ImagingModality::NM)
+        data_file_name = swigstir::get_interfile_data_file_name<InterfilePDFSHeaderSPECT>(filename);
+      else if (!hdr.siemens_mi_version.empty())
+        {
+          InterfilePDFSHeaderSiemens siemens_hdr;
+          if (siemens_hdr.parse(filename.c_str(), false) && siemens_hdr.compression)
+            throw std::runtime_error("Siemens projection data is compressed and cannot be memory-mapped");
+          data_file_name = swigstir::get_interfile_data_file_name<InterfilePDFSHeaderSiemens>(filename);
+        }
+      else
+        data_file_name = swigstir::get_interfile_data_file_name<InterfilePDFSHeader>(filename);
+    }
+
+    unique_ptr<ProjDataFromStream> pdfs_ptr(read_interfile_PDFS(filename, std::ios::in));
+    if (!pdfs_ptr)
+      throw std::runtime_error("Reading Interfile projection data " + filename + " failed");
+    const ProjDataFromStream& pdfs = *pdfs_ptr;
+
+    std::string storage_order;
+    switch (pdfs.get_storage_order())
+      {
+      case ProjDataFromStream::Segment_AxialPos_View_TangPos:
+      case ProjDataFromStream::Timing_Segment_AxialPos_View_TangPos:
+        storage_order = "Segment_AxialPos_View_TangPos"; break;
+      case ProjDataFromStream::Segment_View_AxialPos_TangPos:
+      case ProjDataFromStream::Timing_Segment_View_AxialPos_TangPos:
+        storage_order = "Segment_View_AxialPos_TangPos"; break;
+      default:
+        throw std::runtime_error("Unsupported storage order in " + filename);
+      }
+
+    const std::vector<int> segment_sequence = pdfs.get_segment_sequence_in_stream();
+    std::vector<int> timing_poss_sequence = pdfs.get_timing_poss_sequence_in_stream();
+    if (timing_poss_sequence.empty())
+      timing_poss_sequence.push_back(pdfs.get_min_tof_pos_num());
+
+    PyObject* segments = PyList_New(segment_sequence.size());
+    for (std::size_t i=0; i<segment_sequence.size(); ++i)
+      {
+        const int segment_num = segment_sequence[i];
+        PyList_SET_ITEM(segments, i,
+                        Py_BuildValue("(iii)", segment_num,
+                                      pdfs.get_min_axial_pos_num(segment_num),
+                                      pdfs.get_num_axial_poss(segment_num)));
+      }
+    PyObject* timing_poss = PyList_New(timing_poss_sequence.size());
+    for (std::size_t i=0; i<timing_poss_sequence.size(); ++i)
+      PyList_SET_ITEM(timing_poss, i, PyLong_FromLong(timing_poss_sequence[i]));
+
+    // note: "N" steals the reference, so no need to DECREF
+    const std::string typestr
+      = swigstir::numpy_typestr_for_stream(pdfs.get_data_type_in_stream(), pdfs.get_byte_order_in_stream());
+    return Py_BuildValue("{s:s,s:L,s:s,s:f,s:s,s:N,s:N,s:i,s:i,s:i,s:i}",
+                         "data_file_name", data_file_name.c_str(),
+                         "offset", static_cast<long long>(pdfs.get_offset_in_stream()),
+                         "typestr", typestr.c_str(),
+                         "scale_factor", pdfs.get_scale_factor(),
+                         "storage_order", storage_order.c_str(),
+                         "segments", segments,
+                         "timing_poss_sequence", timing_poss,
+                         "num_views", pdfs.get_num_views(),
+                         "min_view_num", pdfs.get_min_view_num(),
+                         "num_tangential_poss", pdfs.get_num_tangential_poss(),
+                         "min_tangential_pos_num", pdfs.get_min_tangential_pos_num());
+  }
+%}
+#endif
+
 namespace stir { 
   %template(FloatViewgram) Viewgram<float>;
   %template(FloatRelatedViewgrams) RelatedViewgrams<float>;
@@ -54,6 +54,10 @@
 
 %include "stir/recon_buildblock/ForwardProjectorByBin.h"
 %include "stir/recon_buildblock/BackProjectorByBin.h"
+// SWIG can only wrap the nested CacheStatistics struct as a top-level class
+%feature("flatnested") stir::ProjMatrixByBin::CacheStatistics;
+// convert the std::uint64_t members of CacheStatistics to Python ints
+%apply unsigned long long { std::uint64_t };
 %include "stir/recon_buildblock/ProjMatrixByBin.h"
 
 %template (internalRPProjMatrixByBinUsingRayTracing) stir::RegisteredParsingObject<
@@ -58,10 +58,100 @@ def get_physical_coordinates_for_grid(image):
     else:
         raise exceptions.NotImplementedError('need to handle dimensions different from 2 and 3')
 
-def to_numpy(stirdata):
+def _is_contiguous_array(stirdata):
+    try:
+        return stirdata.size_all() > 0 and stirdata.is_contiguous()
+    except AttributeError:
+        return False
+
+def as_numpy(stirdata):
+    """
+    return a numpy array sharing memory with a STIR image or other Array (no copy)
+
+    Modifying the returned numpy array modifies the STIR data (and vice versa). The STIR object
+    is kept alive as long as the numpy array exists, but it should not be resized.
+    If the STIR data is not contiguous in memory (or is projection data), a copy is returned
+    instead, see to_numpy().
+    """
+    if _is_contiguous_array(stirdata):
+        return numpy.asarray(stirdata)
+    return to_numpy(stirdata)
+
+def iterate_proj_data_segments(projdata):
     """
-    return the data in a STIR image or other Array as a numpy array
+    generator that yields the data in a STIR ProjData object segment-by-segment
+
+    For every TOF bin and segment (in the order used by ProjData.to_array(), i.e.
+    STIR's "standard segment sequence"), yields a tuple (info, nparray) where nparray is
+    a 3D numpy array with the segment by sinogram (i.e. axial_pos, view, tangential_pos).
+    info is a dictionary with the segment_num, timing_pos_num, the index ranges of the
+    axial positions, views and tangential positions, and
+    tof_index and sinogram_offset, which give the location of the segment in
+    the 4D array returned by to_numpy(projdata), i.e.
+        full[info['tof_index'], info['sinogram_offset']:info['sinogram_offset']+nparray.shape[0], :, :] == nparray
+    This avoids creating the full 4D array, and therefore reduces memory usage for large data.
     """
+    proj_data_info = projdata.get_proj_data_info()
+    segment_sequence = stir.ProjData.standard_segment_sequence(proj_data_info)
+    for tof_index, timing_pos_num in enumerate(range(projdata.get_min_tof_pos_num(),
+                                                     projdata.get_max_tof_pos_num() + 1)):
+        sinogram_offset = 0
+        for segment_num in segment_sequence:
+            segment = projdata.get_segment_by_sinogram(segment_num, timing_pos_num)
+            info = {
+                'segment_num': segment_num,
+                'timing_pos_num': timing_pos_num,
+                'min_axial_pos_num': segment.get_min_axial_pos_num(),
+                'max_axial_pos_num': segment.get_max_axial_pos_num(),
+                'min_view_num': segment.get_min_view_num(),
+                'max_view_num': segment.get_max_view_num(),
+                'min_tangential_pos_num': segment.get_min_tangential_pos_num(),
+                'max_tangential_pos_num': segment.get_max_tangential_pos_num(),
+                'tof_index': tof_index,
+                'sinogram_offset': sinogram_offset
+            }
+            # no copy needed as the segment is not used anywhere else
+            npsegment = as_numpy(segment)
+            sinogram_offset += npsegment.shape[0]
+            yield info, npsegment
+
+def to_numpy(stirdata, out=None):
+    """
+    return the data in a STIR image or other Array (or ProjData) as a numpy array
+
+    The returned array is a copy, i.e. it does not share memory with the STIR object.
+    See also as_numpy().
+
+    If out is specified, it has to be a numpy array of the correct shape (e.g. a numpy.memmap),
+    and the data will be written into it (and out is returned). For ProjData, this is done
+    segment-by-segment such that no temporary copy of all data is made.
+    """
+    if isinstance(stirdata, stir.ProjData):
+        if out is None:
+            # just use the 4D array. This uses less memory than the loop below
+            # (as we do not need both the numpy and the STIR data for all segments)
+            return as_numpy(stirdata.to_array())
+        shape = (stirdata.get_num_tof_poss(), stirdata.get_num_non_tof_sinograms(),
+                 stirdata.get_num_views(), stirdata.get_num_tangential_poss())
+        if tuple(out.shape) != shape:
+            raise ValueError('out argument has shape {} but needs to be {}'.format(out.shape, shape))
+        for info, npsegment in iterate_proj_data_segments(stirdata):
+            offset = info['sinogram_offset']
+            out[info['tof_index'], offset:offset + npsegment.shape[0], :, :] = npsegment
+        return out
+
+    if out is not None:
+        if tuple(out.shape) != tuple(stirdata.shape()):
+            raise ValueError('out argument has shape {} but needs to be {}'.format(out.shape, stirdata.shape()))
+        if _is_contiguous_array(stirdata):
+            out[...] = as_numpy(stirdata)
+        else:
+            out[...] = to_numpy(stirdata)
+        return out
+
+    if _is_contiguous_array(stirdata):
+        # single copy of the contiguous data
+        return numpy.array(stirdata, copy=True)
     # construct a numpy array using the "flat" STIR iterator
     try:
         npstirdata=numpy.fromiter(stirdata.flat(), dtype=numpy.float32);
@@ -72,3 +162,40 @@ def to_numpy(stirdata):
         # hopefully it's projection data
         stirarray=stirdata.to_array();
         return to_numpy(stirarray);
+
+def projdata_as_memmap(filename, mode='r'):
+    """
+    return memory-mapped numpy arrays for Interfile projection data (no data is read)
+
+    filename is the name of the Interfile header (e.g. .hs). The header is parsed by STIR, see
+    stir.get_interfile_proj_data_layout().
+    mode can be 'r' (read-only) or 'c' (copy-on-write, i.e. modifications are not written to file).
+
+    Returns a dictionary with keys (segment_num, timing_pos_num) and numpy.memmap values.
+    The memmap arrays are laid out as in the file, i.e. their dimensions are
+    (axial_pos, view, tangential_pos) for storage order Segment_AxialPos_View_TangPos, and
+    (view, axial_pos, tangential_pos) for Segment_View_AxialPos_TangPos (the STIR default).
+    Use layout=stir.get_interfile_proj_data_layout(filename) to find the storage order and
+    index ranges. Note that the values in the arrays are the raw values in the file, i.e. they
+    still need to be multiplied with layout['scale_factor'].
+    """
+    if mode not in ('r', 'c'):
+        raise ValueError("mode has to be 'r' or 'c'")
+    layout = stir.get_interfile_proj_data_layout(filename)
+    dtype = numpy.dtype(layout['typestr'])
+    num_views = layout['num_views']
+    num_tangential_poss = layout['num_tangential_poss']
+    view_first = layout['storage_order'] == 'Segment_View_AxialPos_TangPos'
+    memmaps = {}
+    offset = layout['offset']
+    # the file contains all segments (in segment_sequence order) for one TOF bin, then the next TOF bin etc
+    for timing_pos_num in layout['timing_poss_sequence']:
+        for (segment_num, min_axial_pos_num, num_axial_poss) in layout['segments']:
+            if view_first:
+                shape = (num_views, num_axial_poss, num_tangential_poss)
+            else:
+                shape = (num_axial_poss, num_views, num_tangential_poss)
+            memmaps[(segment_num, timing_pos_num)] = numpy.memmap(layout['data_file_name'], dtype=dtype, mode=mode,
+                                                                  offset=offset, shape=shape)
+            offset += num_axial_poss * num_views * num_tangential_poss * dtype.itemsize
+    return memmaps
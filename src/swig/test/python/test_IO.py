@@ -75,3 +75,26 @@ def test_ProjDataInfo(tmpdir):
         for i1,i2 in zip(segment.flat(), segment2.flat()):
             assert abs(i1-i2)<.01
     
+
+def test_projdata_as_memmap(tmpdir):
+    tmpdir.chdir()
+    s=Scanner.get_scanner_from_name("ECAT 962")
+    examinfo=ExamInfo();
+    projdatainfo=ProjDataInfo.construct_proj_data_info(s,3,6,8,6)
+    projdata=ProjDataInterfile(examinfo, projdatainfo, "stir_python_test_memmap.hs")
+    for seg in range(projdata.get_min_segment_num(), projdata.get_max_segment_num()+1):
+        segment=projdatainfo.get_empty_segment_by_view(seg)
+        segment.fill(seg+100)
+        assert projdata.set_segment(segment)==Succeeded(Succeeded.yes)
+    del projdata
+
+    layout=get_interfile_proj_data_layout('stir_python_test_memmap.hs')
+    assert layout['storage_order']=='Segment_View_AxialPos_TangPos'
+    memmaps=projdata_as_memmap('stir_python_test_memmap.hs')
+    projdata2=ProjData.read_from_file('stir_python_test_memmap.hs');
+    assert len(memmaps)==projdata2.get_num_segments()
+    for seg in range(projdata2.get_min_segment_num(), projdata2.get_max_segment_num()+1):
+        segment=memmaps[(seg,0)]
+        assert segment.shape==(projdata2.get_num_views(), projdata2.get_num_axial_poss(seg), projdata2.get_num_tangential_poss())
+        assert abs(segment.min()-(seg+100))<.01
+        assert abs(segment.max()-(seg+100))<.01
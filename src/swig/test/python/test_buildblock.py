@@ -269,6 +269,40 @@ def test_ProjDataInfo():
     #assert sinogram.get_proj_data_info() == projdatainfo
     assert sinogram.get_proj_data_info().parameter_info() == projdatainfo.parameter_info()
 
+def test_ProjDataInfo_geometry_for_many_bins():
+    import numpy
+    s=Scanner.get_scanner_from_name("ECAT 962")
+    projdatainfo=ProjDataInfo.construct_proj_data_info(s,1,9,s.get_num_detectors_per_ring()//2,6,False)
+    segment_num=3
+    view_nums=numpy.arange(projdatainfo.get_num_views())
+    tangential_pos_nums=view_nums % 6 - 3
+    # scalars are broadcast
+    s_values=projdatainfo.get_s_for_bins(segment_num, view_nums, 0, tangential_pos_nums)
+    phi_values=projdatainfo.get_phi_for_bins(segment_num, view_nums, 0, tangential_pos_nums)
+    end_points=projdatainfo.get_LOR_end_points_for_bins(segment_num, view_nums, 0, tangential_pos_nums)
+    assert s_values.shape == view_nums.shape
+    assert end_points.shape == (view_nums.size, 2, 3)
+    for i in (0, 10, view_nums.size - 1):
+        b=Bin(segment_num, int(view_nums[i]), 0, int(tangential_pos_nums[i]))
+        assert s_values[i] == pytest.approx(projdatainfo.get_s(b))
+        assert phi_values[i] == pytest.approx(projdatainfo.get_phi(b))
+    # detection positions should round-trip
+    dets=projdatainfo.get_det_pos_pairs_for_bins(segment_num, view_nums, 0, tangential_pos_nums)
+    bins=projdatainfo.get_bins_for_det_pos_pairs(dets['det1'], dets['ring1'], dets['det2'], dets['ring2'])
+    assert numpy.all(bins['bin_value'] > 0)
+    assert numpy.all(bins['segment_num'] == segment_num)
+    assert numpy.all(bins['view_num'] == view_nums)
+    assert numpy.all(bins['tangential_pos_num'] == tangential_pos_nums)
+    with pytest.raises(Exception):
+        projdatainfo.get_s_for_bins(segment_num, view_nums, 0, tangential_pos_nums[:2])
+    # lists and other integer types are fine, but floats are not silently truncated
+    assert numpy.array_equal(projdatainfo.get_s_for_bins(segment_num, list(view_nums), 0, tangential_pos_nums.astype(numpy.int16)),
+                             s_values)
+    with pytest.raises(Exception):
+        projdatainfo.get_s_for_bins(segment_num, view_nums + 0.5, 0, tangential_pos_nums)
+    with pytest.raises(Exception):
+        projdatainfo.get_s_for_bins(segment_num, view_nums, 0.0, tangential_pos_nums)
+
 
 def test_ProjData_from_to_Array3D():
     # define a projection with some dummy data (filled with segment no.)
@@ -292,6 +326,18 @@ def test_ProjData_from_to_Array3D():
     # assert every data point is equal
     assert all(a==b for a, b in zip(projdata.to_array().flat(),new_projdata.to_array().flat()))
 
+def test_ProjMatrixByBin_precompute():
+    s=Scanner.get_scanner_from_name("ECAT 962")
+    projdatainfo=ProjDataInfo.construct_proj_data_info(s,3,9,8,6)
+    image=FloatVoxelsOnCartesianGrid(ExamInfo(), projdatainfo, 1.)
+    projmatrix=ProjMatrixByBinUsingRayTracing()
+    projmatrix.set_up(projdatainfo, image)
+    projmatrix.precompute(0, 2)
+    num_elements_in_subset=projmatrix.get_cache_statistics().num_elements
+    assert num_elements_in_subset > 0
+    projmatrix.precompute(1, 2)
+    assert projmatrix.get_cache_statistics().num_elements > num_elements_in_subset
+
 def test_xapyb_and_sapyb():
     """
     Test the xapyb and sapyb methods for FloatVoxelsOnCartesianGrid and ProjDataInMemory
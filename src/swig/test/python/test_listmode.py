@@ -61,3 +61,28 @@ def test_get_record():
     assert abs(diff.x()) < .1 and abs(diff.y()) < .1 and abs(diff.z()) < .1
     assert b.segment_num == -1 and b.axial_pos_num == 1 and b.view_num == 12 and b.tangential_pos_num == -14
 
+
+def test_read_events_batch():
+    try:
+        lm=stir.ListModeData.read_from_file(os.path.join(loc, filename))
+        proj_data_info = lm.get_proj_data_info()
+    except RuntimeError:
+        print(f"Could not open {filename}")
+        print("ROOT support not enabled?")
+        return
+
+    events = lm.read_events_batch(2, proj_data_info)
+    assert events.shape == (2,)
+    # compare with test_get_record above
+    assert events['time_in_secs'][0] == .002
+    assert events['segment_num'][0] == 1 and events['axial_pos_num'][0] == 1 and events['view_num'][0] == 112 and events['tangential_pos_num'][0] == -102
+    assert events['segment_num'][1] == -1 and events['axial_pos_num'][1] == 1 and events['view_num'][1] == 12 and events['tangential_pos_num'][1] == -14
+    # check next batch is consistent with the single event reading
+    events = lm.read_events_batch(1, proj_data_info, events['time_in_secs'][-1])
+    lm.reset()
+    record = lm.get_empty_record()
+    b = stir.Bin()
+    for i in range(3):
+        lm.get_next_record(record)
+    record.event().get_bin(b, proj_data_info)
+    assert b.segment_num == events['segment_num'][0] and b.view_num == events['view_num'][0]
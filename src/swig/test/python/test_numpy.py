@@ -11,6 +11,16 @@
 #
 #    See STIR/LICENSE.txt for details
 
+try:
+    import pytest
+except ImportError:
+    # No pytest, try older py.test
+    try:
+        import py.test as pytest
+    except ImportError:
+        raise ImportError('Tests require pytest or py<1.4')
+
+import numpy
 from stir import *
 import stirextra
 # for Python2 and itertools.zip->zip (as in Python 3) 
@@ -79,3 +89,136 @@ def test_ProjData():
     seg0=stirextra.to_numpy(projdata.get_segment_by_sinogram(0))
     assert(seg0.max() == 2)
 
+
+def test_Array3D_as_numpy():
+    minind=Int3BasicCoordinate((3,3,5));
+    a=FloatArray3D(IndexRange3D(minind, Int3BasicCoordinate((9,8,7))))
+    a.fill(2);
+    np=stirextra.as_numpy(a);
+    assert np.shape==a.shape()
+    # check that the numpy array is a view on the STIR data
+    np[(0,0,1)]=5
+    ind=Int3BasicCoordinate((3,3,6));
+    assert a[ind]==5
+    a[ind]=6
+    assert np[(0,0,1)]==6
+    # to_numpy should make a copy
+    npcopy=stirextra.to_numpy(a);
+    npcopy+=1
+    assert a[ind]==6
+    assert npcopy[(0,0,1)]==7
+
+def test_VoxelsOnCartesianGrid_as_numpy():
+    origin=FloatCartesianCoordinate3D(0,1,6)
+    gridspacing=FloatCartesianCoordinate3D(1,1,2)
+    indrange=IndexRange3D(Int3BasicCoordinate((0,-4,-5)), Int3BasicCoordinate((3,4,5)))
+    image=FloatVoxelsOnCartesianGrid(indrange, origin,gridspacing)
+    image.fill(1)
+    np=stirextra.as_numpy(image)
+    np*=3
+    assert image.find_max()==3
+
+def test_Array3D_numpy_asarray():
+    a=FloatArray3D(IndexRange3D(Int3BasicCoordinate((3,3,5)), Int3BasicCoordinate((9,8,7))))
+    a.fill(2)
+    np=numpy.asarray(a)
+    assert np.dtype==numpy.float32
+    assert np.shape==a.shape()
+    # check that the numpy array is a view on the STIR data
+    np[(0,0,1)]=5
+    ind=Int3BasicCoordinate((3,3,6))
+    assert a[ind]==5
+    # numpy keeps the STIR object alive
+    del a
+    assert np[(0,0,1)]==5
+    assert numpy.asarray(FloatArray3D()).shape==(0,0,0)
+
+def test_VoxelsOnCartesianGrid_numpy_asarray():
+    origin=FloatCartesianCoordinate3D(0,1,6)
+    gridspacing=FloatCartesianCoordinate3D(1,1,2)
+    indrange=IndexRange3D(Int3BasicCoordinate((0,-4,-5)), Int3BasicCoordinate((3,4,5)))
+    image=FloatVoxelsOnCartesianGrid(indrange, origin,gridspacing)
+    image.fill(1)
+    np=numpy.asarray(image)
+    assert np.shape==image.shape()
+    np*=3
+    assert image.find_max()==3
+
+def test_Array2D_numpy_asarray_noncontiguous():
+    a=FloatArray2D(IndexRange2D(Int2BasicCoordinate((0,0)), Int2BasicCoordinate((1,2))))
+    a.fill(2)
+    # resizing makes the data non-contiguous
+    a.resize(IndexRange2D(Int2BasicCoordinate((0,0)), Int2BasicCoordinate((2,2))))
+    assert not a.is_contiguous()
+    a[Int2BasicCoordinate((2,1))]=4
+    np=numpy.asarray(a)
+    assert np.shape==(3,3)
+    assert np[2,1]==4
+    assert numpy.all(np[0:2,:]==2)
+    # this is a copy
+    np[0,0]=5
+    assert a[Int2BasicCoordinate((0,0))]==2
+
+def test_Array3D_fill_from_numpy():
+    a=FloatArray3D(IndexRange3D(Int3BasicCoordinate((3,3,5)), Int3BasicCoordinate((9,8,7))))
+    np=stirextra.to_numpy(a)
+    np[...]=numpy.arange(np.size).reshape(np.shape)
+    a.fill(np)
+    assert numpy.array_equal(stirextra.to_numpy(a), np)
+    # float64 gets converted
+    a.fill(np.astype(numpy.float64)*2)
+    assert numpy.array_equal(stirextra.to_numpy(a), np*2)
+    # wrong shape
+    with pytest.raises(Exception):
+        a.fill(np[1:,:,:])
+    with pytest.raises(Exception):
+        a.fill(np[1:,:,:].flat)
+    # non-contiguous arrays and other element types fall back to element-by-element copying
+    a.fill(np[:,:,::-1])
+    assert numpy.array_equal(stirextra.to_numpy(a), np[:,:,::-1])
+    a.fill(np.astype(numpy.int32)+1)
+    assert numpy.array_equal(stirextra.to_numpy(a), np+1)
+    a.fill(np[:,:,::-1].flat)
+    assert numpy.array_equal(stirextra.to_numpy(a), np[:,:,::-1])
+    # flat iterators over contiguous arrays use their base array
+    a.fill((np*3).flat)
+    assert numpy.array_equal(stirextra.to_numpy(a), np*3)
+    # but not if the iterator has been advanced already
+    it=(np*4).flat
+    next(it)
+    with pytest.raises(Exception):
+        a.fill(it)
+
+def test_ProjData_fill_from_numpy():
+    s=Scanner.get_scanner_from_name("ECAT 962")
+    projdatainfo=ProjDataInfo.construct_proj_data_info(s,3,9,8,6)
+    projdata=ProjDataInMemory(ExamInfo(), projdatainfo)
+    np=stirextra.to_numpy(projdata)
+    np[...]=numpy.arange(np.size).reshape(np.shape)
+    projdata.fill(np)
+    assert numpy.array_equal(stirextra.to_numpy(projdata), np)
+    projdata.fill(np.flat)
+    assert numpy.array_equal(stirextra.to_numpy(projdata), np)
+    projdata.fill(numpy.flip(np,axis=3))
+    assert numpy.array_equal(stirextra.to_numpy(projdata), numpy.flip(np,axis=3))
+    with pytest.raises(Exception):
+        projdata.fill(np[:,:,:,1:])
+
+def test_ProjData_segments():
+    s=Scanner.get_scanner_from_name("ECAT 962")
+    projdatainfo=ProjDataInfo.construct_proj_data_info(s,3,9,8,6)
+    projdata=ProjDataInMemory(ExamInfo(), projdatainfo)
+    np=stirextra.to_numpy(projdata)
+    np[...]=numpy.arange(np.size).reshape(np.shape)
+    projdata.fill(np)
+    num_segments=0
+    for info, npsegment in stirextra.iterate_proj_data_segments(projdata):
+        num_segments+=1
+        offset=info['sinogram_offset']
+        assert npsegment.shape[0]==info['max_axial_pos_num']-info['min_axial_pos_num']+1
+        assert numpy.array_equal(npsegment, np[info['tof_index'], offset:offset+npsegment.shape[0], :, :])
+    assert num_segments==projdata.get_num_segments()*projdata.get_num_tof_poss()
+    # write into a preallocated array
+    out=numpy.zeros(np.shape, dtype=numpy.float32)
+    stirextra.to_numpy(projdata, out=out)
+    assert numpy.array_equal(out, np)
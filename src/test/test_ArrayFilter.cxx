@@ -26,6 +26,10 @@
 #include "stir/IndexRange2D.h"
 #include "stir/ArrayFilter3DUsingConvolution.h"
 #include "stir/IndexRange3D.h"
+#include "stir/MedianArrayFilter3D.h"
+#include "stir/MinimalArrayFilter3D.h"
+#include "stir/MaximalArrayFilter3D.h"
+#include "stir/Coordinate3D.h"
 #include "stir/Succeeded.h"
 #include "stir/modulo.h"
 #include "stir/RunTests.h"
@@ -33,6 +37,8 @@
 #include "stir/stream.h" //XXX
 #include <iostream>
 #include <algorithm>
+#include <random>
+#include <vector>
 #include <boost/static_assert.hpp>
 
 #ifdef DO_TIMINGS
@@ -52,6 +58,9 @@ public:
   void run_tests() override;
 
 private:
+  //! compare median, minimal and maximal filters with a straightforward implementation
+  void test_rank_filters(const Array<3, float>& test, const Coordinate3D<int>& mask_radius);
+
   template <int num_dimensions>
   void compare_results_1arg(const ArrayFunctionObject<num_dimensions, float>& filter1,
                             const ArrayFunctionObject<num_dimensions, float>& filter2,
@@ -155,6 +164,55 @@ private:
       }
   }
 };
+void
+ArrayFilterTests::test_rank_filters(const Array<3, float>& test, const Coordinate3D<int>& mask_radius)
+{
+  Array<3, float> median(test.get_index_range());
+  Array<3, float> minimum(test.get_index_range());
+  Array<3, float> maximum(test.get_index_range());
+  std::vector<float> neighbours;
+  for (int z = test.get_min_index(); z <= test.get_max_index(); ++z)
+    for (int y = test[z].get_min_index(); y <= test[z].get_max_index(); ++y)
+      for (int x = test[z][y].get_min_index(); x <= test[z][y].get_max_index(); ++x)
+        {
+          neighbours.clear();
+          for (int mask_z = std::max(z - mask_radius[1], test.get_min_index());
+               mask_z <= std::min(z + mask_radius[1], test.get_max_index());
+               ++mask_z)
+            for (int mask_y = std::max(y - mask_radius[2], test[z].get_min_index());
+                 mask_y <= std::min(y + mask_radius[2], test[z].get_max_index());
+                 ++mask_y)
+              for (int mask_x = std::max(x - mask_radius[3], test[z][y].get_min_index());
+                   mask_x <= std::min(x + mask_radius[3], test[z][y].get_max_index());
+                   ++mask_x)
+                neighbours.push_back(test[mask_z][mask_y][mask_x]);
+          std::sort(neighbours.begin(), neighbours.end());
+          const std::size_t n = neighbours.size();
+          median[z][y][x] = n % 2 == 1 ? neighbours[n / 2] : (neighbours[n / 2 - 1] + neighbours[n / 2]) / 2;
+          minimum[z][y][x] = neighbours.front();
+          maximum[z][y][x] = neighbours.back();
+        }
+
+  {
+    Array<3, float> out(test.get_index_range());
+    const MedianArrayFilter3D<float> median_filter(mask_radius);
+    median_filter(out, test);
+    check_if_equal(out, median, "test MedianArrayFilter3D");
+  }
+  {
+    Array<3, float> out(test);
+    const MinimalArrayFilter3D<float> minimal_filter(mask_radius);
+    minimal_filter(out);
+    check_if_equal(out, minimum, "test MinimalArrayFilter3D");
+  }
+  {
+    Array<3, float> out(test.get_index_range());
+    const MaximalArrayFilter3D<float> maximal_filter(mask_radius);
+    maximal_filter(out, test);
+    check_if_equal(out, maximum, "test MaximalArrayFilter3D");
+  }
+}
+
 void
 ArrayFilterTests::run_tests()
 {
@@ -423,6 +481,24 @@ ArrayFilterTests::run_tests()
       compare_results_1arg(DFT_filter, conv_filter, test_pos_offset);
     }
   }
+  std::cerr << "\nTesting median, minimal and maximal filters\n";
+  {
+    Array<3, float> test(IndexRange3D(-2, 6, 3, 13, -4, 12));
+    // use a small number of different values to test handling of duplicates
+    std::mt19937 generator(42);
+    std::uniform_int_distribution<int> distribution(0, 9);
+    for (auto iter = test.begin_all(); iter != test.end_all(); ++iter)
+      *iter = static_cast<float>(distribution(generator));
+    for (const Coordinate3D<int>& mask_radius : { Coordinate3D<int>(1, 1, 1),
+                                                  Coordinate3D<int>(0, 2, 1),
+                                                  Coordinate3D<int>(2, 0, 3),
+                                                  Coordinate3D<int>(1, 2, 0),
+                                                  Coordinate3D<int>(5, 6, 20) })
+      {
+        std::cerr << "mask radius " << mask_radius << '\n';
+        test_rank_filters(test, mask_radius);
+      }
+  }
 }
 
 END_NAMESPACE_STIR
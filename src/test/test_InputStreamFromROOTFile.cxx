@@ -0,0 +1,290 @@
+/*!
+
+  \file
+  \ingroup test
+
+  \brief Test program for stir::InputStreamFromROOTFile (via stir::CListModeDataROOT)
+
+  \author Kris Thielemans
+*/
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+
+#include "stir/listmode/CListModeDataROOT.h"
+#include "stir/listmode/CListRecordROOT.h"
+#include "stir/DetectionPositionPair.h"
+#include "stir/RunTests.h"
+#include "stir/Succeeded.h"
+#include "stir/error.h"
+#include <TFile.h>
+#include <TTree.h>
+#include <fstream>
+#include <iostream>
+#include <random>
+#include <limits>
+#include <cstdio>
+#include <string>
+#include <vector>
+
+START_NAMESPACE_STIR
+
+/*!
+  \ingroup test
+  \brief Test class for reading GATE ROOT files in chunks, with and without prefetching in the background
+
+  A small ROOT file is written first, with random coincidences for a small cylindrical scanner.
+  The events returned by CListModeDataROOT for different settings of the
+  <tt>number of entries per read chunk</tt> and <tt>prefetch in background</tt> keywords are
+  then compared with those when reading everything in a single chunk, also after reset() and
+  set_get_position().
+*/
+class InputStreamFromROOTFileTests : public RunTests
+{
+public:
+  void run_tests() override;
+
+private:
+  //! information on an event that we compare
+  struct EventInfo
+  {
+    DetectionPositionPair<> det_pos_pair;
+    double delta_time;
+    unsigned long time_in_millisecs;
+
+    bool operator==(const EventInfo& other) const
+    {
+      return det_pos_pair == other.det_pos_pair && delta_time == other.delta_time && time_in_millisecs == other.time_in_millisecs;
+    }
+  };
+
+  void write_ROOT_file(const std::string& filename, const int num_entries) const;
+  void write_header(const std::string& header_filename,
+                    const std::string& root_filename,
+                    const int num_entries_per_chunk,
+                    const bool prefetch_in_background) const;
+  //! read at most \a max_num_events from the current position
+  std::vector<EventInfo> read_events(CListModeData& lm_data,
+                                     const std::size_t max_num_events = std::numeric_limits<std::size_t>::max()) const;
+  void check_same_events(const std::vector<EventInfo>& ref, const std::vector<EventInfo>& events, const std::string& str);
+  //! compare events for the given settings with \a ref_events
+  void test_events(const std::string& header_filename, const std::vector<EventInfo>& ref_events, const std::string& str);
+};
+
+void
+InputStreamFromROOTFileTests::write_ROOT_file(const std::string& filename, const int num_entries) const
+{
+  TFile file(filename.c_str(), "RECREATE");
+  if (file.IsZombie())
+    error("Cannot create ROOT file " + filename);
+  TTree tree("Coincidences", "Coincidences");
+  Double_t time1, time2;
+  Int_t eventID1, eventID2, comptonPhantom1, comptonPhantom2;
+  Float_t energy1, energy2;
+  Int_t crystalID1, crystalID2, submoduleID1, submoduleID2, moduleID1, moduleID2, rsectorID1, rsectorID2;
+  tree.Branch("time1", &time1, "time1/D");
+  tree.Branch("time2", &time2, "time2/D");
+  tree.Branch("eventID1", &eventID1, "eventID1/I");
+  tree.Branch("eventID2", &eventID2, "eventID2/I");
+  tree.Branch("comptonPhantom1", &comptonPhantom1, "comptonPhantom1/I");
+  tree.Branch("comptonPhantom2", &comptonPhantom2, "comptonPhantom2/I");
+  tree.Branch("energy1", &energy1, "energy1/F");
+  tree.Branch("energy2", &energy2, "energy2/F");
+  tree.Branch("crystalID1", &crystalID1, "crystalID1/I");
+  tree.Branch("crystalID2", &crystalID2, "crystalID2/I");
+  tree.Branch("submoduleID1", &submoduleID1, "submoduleID1/I");
+  tree.Branch("submoduleID2", &submoduleID2, "submoduleID2/I");
+  tree.Branch("moduleID1", &moduleID1, "moduleID1/I");
+  tree.Branch("moduleID2", &moduleID2, "moduleID2/I");
+  tree.Branch("rsectorID1", &rsectorID1, "rsectorID1/I");
+  tree.Branch("rsectorID2", &rsectorID2, "rsectorID2/I");
+
+  std::mt19937 generator(42);
+  std::uniform_int_distribution<int> rsector_distribution(0, 31);
+  std::uniform_int_distribution<int> crystal_distribution(0, 3);
+  std::uniform_int_distribution<int> compton_distribution(0, 4);
+  std::uniform_real_distribution<float> energy_distribution(.3F, .7F);
+  std::uniform_real_distribution<double> time_distribution(0., 1.E-3);
+  submoduleID1 = submoduleID2 = moduleID1 = moduleID2 = 0;
+  time1 = 0.;
+  for (int i = 0; i < num_entries; ++i)
+    {
+      time1 += time_distribution(generator);
+      time2 = time1 + time_distribution(generator) * 1.E-6;
+      eventID1 = i;
+      eventID2 = i + (i % 11 == 0 ? 1 : 0);
+      comptonPhantom1 = compton_distribution(generator) == 0 ? 1 : 0;
+      comptonPhantom2 = 0;
+      energy1 = energy_distribution(generator);
+      energy2 = energy_distribution(generator);
+      rsectorID1 = rsector_distribution(generator);
+      rsectorID2 = (rsectorID1 + 16) % 32;
+      crystalID1 = crystal_distribution(generator);
+      crystalID2 = crystal_distribution(generator);
+      tree.Fill();
+    }
+  tree.Write();
+  file.Close();
+}
+
+void
+InputStreamFromROOTFileTests::write_header(const std::string& header_filename,
+                                           const std::string& root_filename,
+                                           const int num_entries_per_chunk,
+                                           const bool prefetch_in_background) const
+{
+  std::ofstream header(header_filename.c_str());
+  if (!header)
+    error("Cannot write header " + header_filename);
+  header << "ROOT header :=\n"
+         << "originating system := User_defined_scanner\n"
+         << "Number of rings := 4\n"
+         << "Number of detectors per ring := 32\n"
+         << "Inner ring diameter (cm) := 20\n"
+         << "Average depth of interaction (cm) := 0.7\n"
+         << "Distance between rings (cm) := 0.4\n"
+         << "Default bin size (cm) := 0.2\n"
+         << "Maximum number of non-arc-corrected bins := 15\n"
+         << "Default number of arc-corrected bins := 15\n"
+         << "View offset (degrees) := 0\n"
+         << "Number of virtual axial crystals per block := 0\n"
+         << "Number of virtual transaxial crystals per block := 0\n"
+         << "GATE scanner type := GATE_Cylindrical_PET\n"
+         << "GATE_Cylindrical_PET Parameters :=\n"
+         << "name of data file := " << root_filename << "\n"
+         << "name of input TChain := Coincidences\n"
+         << "number of Rsectors := 32\n"
+         << "number of modules_X := 1\n"
+         << "number of modules_Y := 1\n"
+         << "number of modules_Z := 1\n"
+         << "number of submodules_X := 1\n"
+         << "number of submodules_Y := 1\n"
+         << "number of submodules_Z := 1\n"
+         << "number of crystals_X := 1\n"
+         << "number of crystals_Y := 1\n"
+         << "number of crystals_Z := 4\n"
+         << "Singles readout depth := 1\n"
+         << "exclude scattered events := 1\n"
+         << "exclude random events := 1\n"
+         << "check energy window information := 1\n"
+         << "low energy window (keV) := 350\n"
+         << "upper energy window (keV) := 650\n"
+         << "number of entries per read chunk := " << num_entries_per_chunk << "\n"
+         << "prefetch in background := " << (prefetch_in_background ? 1 : 0) << "\n"
+         << "End GATE_Cylindrical_PET Parameters :=\n"
+         << "end ROOT header :=\n";
+}
+
+std::vector<InputStreamFromROOTFileTests::EventInfo>
+InputStreamFromROOTFileTests::read_events(CListModeData& lm_data, const std::size_t max_num_events) const
+{
+  std::vector<EventInfo> events;
+  auto record_sptr = lm_data.get_empty_record_sptr();
+  auto& record = dynamic_cast<CListRecordROOT&>(*record_sptr);
+  while (events.size() < max_num_events && lm_data.get_next_record(record) == Succeeded::yes)
+    {
+      EventInfo event;
+      record.event().get_detection_position(event.det_pos_pair);
+      event.delta_time = record.event().get_delta_time();
+      event.time_in_millisecs = record.time().get_time_in_millisecs();
+      events.push_back(event);
+    }
+  return events;
+}
+
+void
+InputStreamFromROOTFileTests::check_same_events(const std::vector<EventInfo>& ref,
+                                                const std::vector<EventInfo>& events,
+                                                const std::string& str)
+{
+  if (!check_if_equal(ref.size(), events.size(), str + ": number of events"))
+    return;
+  for (std::size_t i = 0; i < ref.size(); ++i)
+    if (!check(ref[i] == events[i], str + ": event " + std::to_string(i)))
+      return;
+}
+
+void
+InputStreamFromROOTFileTests::test_events(const std::string& header_filename,
+                                          const std::vector<EventInfo>& ref_events,
+                                          const std::string& str)
+{
+  std::cerr << "Testing " << str << '\n';
+  CListModeDataROOT lm_data(header_filename);
+  check_same_events(ref_events, read_events(lm_data), str + ", all events");
+  check(read_events(lm_data).empty(), str + ", no events after end of file");
+
+  // reading from a saved position in the middle (not at the start of a chunk)
+  lm_data.reset();
+  const std::size_t num_first_events = ref_events.size() / 3;
+  check_same_events(std::vector<EventInfo>(ref_events.begin(), ref_events.begin() + num_first_events),
+                    read_events(lm_data, num_first_events),
+                    str + ", first events after reset");
+  const auto saved_position = lm_data.save_get_position();
+  const std::vector<EventInfo> remaining_ref_events(ref_events.begin() + num_first_events, ref_events.end());
+  // read a few only, such that there is a background thread busy (if prefetching)
+  check_same_events(std::vector<EventInfo>(remaining_ref_events.begin(), remaining_ref_events.begin() + 5),
+                    read_events(lm_data, 5),
+                    str + ", events after save_get_position");
+  lm_data.set_get_position(saved_position);
+  check_same_events(remaining_ref_events, read_events(lm_data), str + ", events after set_get_position");
+  lm_data.reset();
+  check_same_events(ref_events, read_events(lm_data), str + ", all events after reset");
+}
+
+void
+InputStreamFromROOTFileTests::run_tests()
+{
+  const int num_entries = 2000;
+  const std::string root_filename = "test_InputStreamFromROOTFile.root";
+  const std::string header_filename = "test_InputStreamFromROOTFile.hroot";
+  write_ROOT_file(root_filename, num_entries);
+
+  // reference: all entries in a single chunk
+  write_header(header_filename, root_filename, num_entries + 1, false);
+  std::vector<EventInfo> ref_events;
+  {
+    CListModeDataROOT lm_data(header_filename);
+    check_if_equal(lm_data.get_total_number_of_events(), static_cast<unsigned long>(num_entries), "total number of events");
+    ref_events = read_events(lm_data);
+  }
+  // check that we actually rejected some events
+  check(!ref_events.empty() && ref_events.size() < static_cast<std::size_t>(num_entries), "some events should be rejected");
+
+  const struct
+  {
+    int num_entries_per_chunk;
+    bool prefetch_in_background;
+  } settings[] = { { 7, false }, { 7, true }, { 1, true }, { 300, true }, { num_entries + 1, true } };
+  for (const auto& setting : settings)
+    {
+      write_header(header_filename, root_filename, setting.num_entries_per_chunk, setting.prefetch_in_background);
+      test_events(header_filename,
+                  ref_events,
+                  "chunk size " + std::to_string(setting.num_entries_per_chunk) + ", prefetch "
+                      + std::to_string(setting.prefetch_in_background));
+    }
+
+  if (is_everything_ok())
+    {
+      std::remove(header_filename.c_str());
+      std::remove(root_filename.c_str());
+    }
+}
+
+END_NAMESPACE_STIR
+
+USING_NAMESPACE_STIR
+
+int
+main()
+{
+  InputStreamFromROOTFileTests tests;
+  tests.run_tests();
+  return tests.main_return_value();
+}
@@ -5,7 +5,7 @@
   \file
   \ingroup test
 
-  \brief Test program for ML_norm.h functionality
+  \brief Test program for ML_norm.h functionality (and stir::BinNormalisationPETFromComponents)
 
   \author Kris Thielemans
   \author daniel deidda
@@ -26,6 +26,9 @@
 #include "stir/Scanner.h"
 #include "stir/Bin.h"
 #include "stir/ML_norm.h"
+#include "stir/recon_buildblock/BinNormalisationPETFromComponents.h"
+#include "stir/DetectionPositionPair.h"
+#include "stir/ExamInfo.h"
 #include "stir/IndexRange2D.h"
 #include "stir/numerics/norm.h"
 #include "stir/num_threads.h"
@@ -48,6 +51,8 @@ public:
 protected:
   template <class TProjDataInfo>
   void test_proj_data_info(shared_ptr<TProjDataInfo> proj_data_info_sptr);
+  //! tests for BinNormalisationPETFromComponents (only for scanners without gaps)
+  void test_BinNormalisationPETFromComponents(shared_ptr<const ProjDataInfoCylindricalNoArcCorr> proj_data_info_sptr);
 };
 
 void
@@ -64,6 +69,7 @@ ML_normTests::run_tests()
                                                /*tang_pos*/ 64,
                                                /*arc_corrected*/ false));
     test_proj_data_info(dynamic_pointer_cast<ProjDataInfoCylindricalNoArcCorr>(proj_data_info_sptr));
+    test_BinNormalisationPETFromComponents(dynamic_pointer_cast<ProjDataInfoCylindricalNoArcCorr>(proj_data_info_sptr));
   }
   {
     std::cerr << "\n-------- Testing ECAT E1080 (with gaps) --------\n";
@@ -183,6 +189,74 @@ ML_normTests::test_proj_data_info(shared_ptr<TProjDataInfo> proj_data_info_sptr)
   }
 }
 
+void
+ML_normTests::test_BinNormalisationPETFromComponents(shared_ptr<const ProjDataInfoCylindricalNoArcCorr> proj_data_info_sptr)
+{
+  if (!check(proj_data_info_sptr != nullptr, "check type of proj_data_info"))
+    return;
+  std::cerr << "\tTesting BinNormalisationPETFromComponents\n";
+  auto exam_info_sptr = std::make_shared<ExamInfo>();
+
+  BinNormalisationPETFromComponents norm;
+  norm.allocate(proj_data_info_sptr, /* do_eff */ true, /* do_geo */ false);
+  DetectorEfficiencies& efficiencies = norm.crystal_efficiencies();
+  for (int ring = efficiencies.get_min_index(); ring <= efficiencies.get_max_index(); ++ring)
+    for (int det = efficiencies[ring].get_min_index(); det <= efficiencies[ring].get_max_index(); ++det)
+      efficiencies[ring][det] = 0.5F + ((7 * ring + 13 * det) % 10) / 10.F;
+  check(norm.set_up(exam_info_sptr, proj_data_info_sptr) == Succeeded::yes, "set_up");
+
+  // check get_bin_efficiency against the crystal efficiencies
+  {
+    DetectionPositionPair<> det_pos_pair;
+    for (int segment_num = proj_data_info_sptr->get_min_segment_num(); segment_num <= proj_data_info_sptr->get_max_segment_num();
+         segment_num += 5)
+      for (int view_num = proj_data_info_sptr->get_min_view_num(); view_num <= proj_data_info_sptr->get_max_view_num();
+           view_num += 7)
+        for (int axial_pos_num = proj_data_info_sptr->get_min_axial_pos_num(segment_num);
+             axial_pos_num <= proj_data_info_sptr->get_max_axial_pos_num(segment_num);
+             axial_pos_num += 3)
+          // skip the first tangential position, as it is outside the fan
+          for (int tangential_pos_num = proj_data_info_sptr->get_min_tangential_pos_num() + 1;
+               tangential_pos_num <= proj_data_info_sptr->get_max_tangential_pos_num();
+               tangential_pos_num += 5)
+            {
+              const Bin bin(segment_num, view_num, axial_pos_num, tangential_pos_num);
+              proj_data_info_sptr->get_det_pos_pair_for_bin(det_pos_pair, bin);
+              const float expected = efficiencies[det_pos_pair.pos1().axial_coord()][det_pos_pair.pos1().tangential_coord()]
+                                     * efficiencies[det_pos_pair.pos2().axial_coord()][det_pos_pair.pos2().tangential_coord()];
+              if (!check_if_equal(norm.get_bin_efficiency(bin), expected, "get_bin_efficiency"))
+                return;
+            }
+  }
+
+  // check consistency between undo, apply and get_bin_efficiency
+  {
+    ProjDataInMemory proj_data(exam_info_sptr, proj_data_info_sptr);
+    proj_data.fill(2.F);
+    norm.undo(proj_data);
+    for (int segment_num = proj_data_info_sptr->get_min_segment_num(); segment_num <= proj_data_info_sptr->get_max_segment_num();
+         segment_num += 3)
+      {
+        const int view_num = (segment_num + 100) % proj_data_info_sptr->get_num_views();
+        const int axial_pos_num = proj_data_info_sptr->get_max_axial_pos_num(segment_num);
+        for (int tangential_pos_num = proj_data_info_sptr->get_min_tangential_pos_num();
+             tangential_pos_num <= proj_data_info_sptr->get_max_tangential_pos_num();
+             ++tangential_pos_num)
+          {
+            Bin bin(segment_num, view_num, axial_pos_num, tangential_pos_num);
+            const float value = proj_data.get_bin_value(bin);
+            check_if_equal(value, 2 * norm.get_bin_efficiency(bin), "undo should multiply with get_bin_efficiency");
+          }
+      }
+    norm.apply(proj_data);
+    // apply sets bins with zero efficiency to zero, so data should now be 2 or 0
+    check_if_equal(proj_data.find_max(), 2.F, "apply after undo should give the original data (max)");
+    const auto num_non_zeroes
+        = std::distance(proj_data.begin_all(), proj_data.end_all()) - std::count(proj_data.begin_all(), proj_data.end_all(), 0.F);
+    check_if_equal(proj_data.sum(), 2.F * num_non_zeroes, "apply after undo should give the original data (sum)");
+  }
+}
+
 END_NAMESPACE_STIR
 
 USING_NAMESPACE_STIR
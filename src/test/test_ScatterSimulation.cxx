@@ -467,6 +467,38 @@ ScatterSimulationTests::test_scatter_simulation()
     sss->downsample_density_image_for_scatter_points(.2F, .3F, -1, -1);
     test_symmetric(*sss, "halfrings_zoomz.3");
   }
+
+  // importance sampling of scatter points and reuse of cached attenuation integrals
+  {
+    auto simulate = [&](const std::string& name) {
+      shared_ptr<ProjDataInMemory> sss_output(
+          new ProjDataInMemory(sss->get_exam_info_sptr(), sss->get_template_proj_data_info_sptr()));
+      sss->set_output_proj_data_sptr(sss_output);
+      check(sss->set_up() == Succeeded::yes, "Check Scatter Simulation set_up. test " + name);
+      check(sss->process_data() == Succeeded::yes, "Check Scatter Simulation process. test " + name);
+      return sss_output->get_segment_by_sinogram(0).sum();
+    };
+    const double full_sum = simulate("full_sampling");
+    const int full_num_scatter_points = sss->get_num_scatter_points();
+
+    sss->set_scatter_point_sampling_fraction(.3F);
+    check_if_equal(sss->get_scatter_point_sampling_fraction(), .3F, "get_scatter_point_sampling_fraction");
+    const double sampled_sum = simulate("importance_sampling");
+    check_if_less(std::abs(sss->get_num_scatter_points() - .3 * full_num_scatter_points),
+                  2.,
+                  "number of scatter points with importance sampling");
+    set_tolerance(.05);
+    check_if_equal(sampled_sum, full_sum, "total scatter with importance sampling should be close to full sampling");
+
+    // changing the activity should only recompute the integrals over the activity image
+    shared_ptr<VoxelsOnCartesianGrid<float>> double_act_density(act_density->clone());
+    *double_act_density *= 2.F;
+    sss->set_activity_image_sptr(double_act_density);
+    set_tolerance(.001);
+    check_if_equal(simulate("double_activity"), 2 * sampled_sum, "scatter should be linear in the activity");
+    sss->set_activity_image_sptr(act_density);
+    sss->set_scatter_point_sampling_fraction(1.F);
+  }
 #endif
 
   //    shared_ptr<ProjDataInMemory> atten_sino(new ProjDataInMemory(exam, output_projdata_info));
@@ -34,6 +34,9 @@
 #include "stir/IO/read_data.h"
 #include "stir/IO/write_to_file.h"
 #include "stir/numerics/BSplines.h"
+#include "stir/numerics/BSplinesRegularGrid.h"
+#include "stir/extend_projdata.h"
+#include "stir/ProjDataInfoCylindricalArcCorr.h"
 #include "stir/interpolate_projdata.h"
 #include "stir/inverse_SSRB.h"
 #include "stir/VoxelsOnCartesianGrid.h"
@@ -59,6 +62,8 @@ private:
   void scatter_interpolation_test_cyl_asymmetric();
   void scatter_interpolation_test_blocks_downsampled();
   void transaxial_upsampling_interpolation_test_blocks();
+  void projdata_interpolator_test();
+  void projdata_interpolator_BSplines_test();
 
   void check_symmetry(const SegmentBySinogram<float>& segment);
   void compare_segment(const SegmentBySinogram<float>& segment1, const SegmentBySinogram<float>& segment2, float maxDiff);
@@ -952,6 +957,164 @@ InterpolationTests::transaxial_upsampling_interpolation_test_blocks()
   info(boost::format("A total of %1% LORs were compared between the downsampled and the interpolated sinogram.") % tested_LORs);
 }
 
+void
+InterpolationTests::projdata_interpolator_test()
+{
+  info("Performing tests of ProjDataInterpolator");
+
+  auto exam_info_sptr = std::make_shared<ExamInfo>(ImagingModality::PT);
+  auto scanner_sptr = std::make_shared<Scanner>(Scanner::Siemens_mMR);
+  auto downsampled_scanner_sptr = std::make_shared<Scanner>(*scanner_sptr);
+  downsampled_scanner_sptr->set_num_rings(8);
+  downsampled_scanner_sptr->set_ring_spacing(scanner_sptr->get_ring_spacing() * (scanner_sptr->get_num_rings() - 1) / 7);
+  downsampled_scanner_sptr->set_num_detectors_per_ring(scanner_sptr->get_num_detectors_per_ring() / 4);
+
+  shared_ptr<ProjDataInfo> proj_data_info_sptr(
+      ProjDataInfo::construct_proj_data_info(scanner_sptr,
+                                             1,
+                                             0,
+                                             scanner_sptr->get_num_detectors_per_ring() / 2,
+                                             scanner_sptr->get_max_num_non_arccorrected_bins(),
+                                             false));
+  shared_ptr<ProjDataInfo> downsampled_proj_data_info_sptr(
+      ProjDataInfo::construct_proj_data_info(downsampled_scanner_sptr,
+                                             1,
+                                             0,
+                                             downsampled_scanner_sptr->get_num_detectors_per_ring() / 2,
+                                             downsampled_scanner_sptr->get_max_num_non_arccorrected_bins() / 4,
+                                             false));
+
+  ProjDataInMemory downsampled_proj_data(exam_info_sptr, downsampled_proj_data_info_sptr);
+  ProjDataInMemory interpolated_proj_data(exam_info_sptr, proj_data_info_sptr);
+  ProjDataInMemory interpolated_proj_data_by_interpolator(exam_info_sptr, proj_data_info_sptr);
+
+  for (int remove_interleaving = 0; remove_interleaving <= 1; ++remove_interleaving)
+    {
+      BasicCoordinate<3, BSpline::BSplineType> spline_types;
+      spline_types.fill(BSpline::cubic);
+      ProjDataInterpolator interpolator(proj_data_info_sptr, downsampled_proj_data_info_sptr, spline_types, remove_interleaving);
+      check(interpolator.is_set_up_for(*proj_data_info_sptr, *downsampled_proj_data_info_sptr, spline_types, remove_interleaving),
+            "ProjDataInterpolator::is_set_up_for with the same arguments");
+      check(
+          !interpolator.is_set_up_for(*proj_data_info_sptr, *downsampled_proj_data_info_sptr, spline_types, !remove_interleaving),
+          "ProjDataInterpolator::is_set_up_for with different remove_interleaving");
+      check(
+          !interpolator.is_set_up_for(*downsampled_proj_data_info_sptr, *proj_data_info_sptr, spline_types, remove_interleaving),
+          "ProjDataInterpolator::is_set_up_for with different projection data");
+
+      // reuse the interpolator for different data, and compare with interpolate_projdata
+      for (int data_num = 1; data_num <= 2; ++data_num)
+        {
+          SegmentBySinogram<float> segment = downsampled_proj_data.get_empty_segment_by_sinogram(0);
+          for (int axial_pos_num = segment.get_min_axial_pos_num(); axial_pos_num <= segment.get_max_axial_pos_num();
+               ++axial_pos_num)
+            for (int view_num = segment.get_min_view_num(); view_num <= segment.get_max_view_num(); ++view_num)
+              for (int tang_pos_num = segment.get_min_tangential_pos_num(); tang_pos_num <= segment.get_max_tangential_pos_num();
+                   ++tang_pos_num)
+                segment[axial_pos_num][view_num][tang_pos_num]
+                    = data_num * 10.F + std::cos(view_num * 0.3F + data_num) * axial_pos_num + tang_pos_num * 0.1F;
+          downsampled_proj_data.set_segment(segment);
+
+          interpolate_projdata(interpolated_proj_data, downsampled_proj_data, spline_types, remove_interleaving);
+          interpolator.interpolate(interpolated_proj_data_by_interpolator, downsampled_proj_data);
+          check_if_equal(interpolated_proj_data.get_segment_by_sinogram(0),
+                         interpolated_proj_data_by_interpolator.get_segment_by_sinogram(0),
+                         "ProjDataInterpolator should give the same result as interpolate_projdata");
+        }
+    }
+
+  // linear interpolation to the same geometry should not change the data
+  {
+    BasicCoordinate<3, BSpline::BSplineType> spline_types;
+    spline_types.fill(BSpline::linear);
+    const ProjDataInterpolator interpolator(
+        downsampled_proj_data_info_sptr, downsampled_proj_data_info_sptr, spline_types, /* remove_interleaving */ false);
+    ProjDataInMemory out_proj_data(exam_info_sptr, downsampled_proj_data_info_sptr);
+    interpolator.interpolate(out_proj_data, downsampled_proj_data);
+    check_if_equal(downsampled_proj_data.get_segment_by_sinogram(0),
+                   out_proj_data.get_segment_by_sinogram(0),
+                   "ProjDataInterpolator with linear interpolation to the same geometry");
+  }
+}
+
+void
+InterpolationTests::projdata_interpolator_BSplines_test()
+{
+  info("Comparing ProjDataInterpolator with direct evaluation of BSplinesRegularGrid");
+
+  // use small arc-corrected data, such that the sampling is regular in every direction
+  auto exam_info_sptr = std::make_shared<ExamInfo>(ImagingModality::PT);
+  auto scanner_sptr = std::make_shared<Scanner>(Scanner::Siemens_mMR);
+  const float axial_length = scanner_sptr->get_ring_spacing() * (scanner_sptr->get_num_rings() - 1);
+  auto in_scanner_sptr = std::make_shared<Scanner>(*scanner_sptr);
+  in_scanner_sptr->set_num_rings(8);
+  in_scanner_sptr->set_ring_spacing(axial_length / 7);
+  in_scanner_sptr->set_num_detectors_per_ring(scanner_sptr->get_num_detectors_per_ring() / 4);
+  auto out_scanner_sptr = std::make_shared<Scanner>(*scanner_sptr);
+  out_scanner_sptr->set_num_rings(15);
+  out_scanner_sptr->set_ring_spacing(axial_length / 14);
+  out_scanner_sptr->set_num_detectors_per_ring(scanner_sptr->get_num_detectors_per_ring() / 2);
+
+  const float bin_size = scanner_sptr->get_default_bin_size();
+  shared_ptr<ProjDataInfo> in_proj_data_info_sptr(ProjDataInfo::construct_proj_data_info(
+      in_scanner_sptr, 1, 0, in_scanner_sptr->get_num_detectors_per_ring() / 2, 43, /* arc_corrected */ true));
+  dynamic_cast<ProjDataInfoCylindricalArcCorr&>(*in_proj_data_info_sptr).set_tangential_sampling(2 * bin_size);
+  shared_ptr<ProjDataInfo> out_proj_data_info_sptr(ProjDataInfo::construct_proj_data_info(
+      out_scanner_sptr, 1, 0, out_scanner_sptr->get_num_detectors_per_ring() / 2, 80, /* arc_corrected */ true));
+  dynamic_cast<ProjDataInfoCylindricalArcCorr&>(*out_proj_data_info_sptr).set_tangential_sampling(bin_size);
+
+  ProjDataInMemory in_proj_data(exam_info_sptr, in_proj_data_info_sptr);
+  SegmentBySinogram<float> segment = in_proj_data.get_empty_segment_by_sinogram(0);
+  for (int axial_pos_num = segment.get_min_axial_pos_num(); axial_pos_num <= segment.get_max_axial_pos_num(); ++axial_pos_num)
+    for (int view_num = segment.get_min_view_num(); view_num <= segment.get_max_view_num(); ++view_num)
+      for (int tang_pos_num = segment.get_min_tangential_pos_num(); tang_pos_num <= segment.get_max_tangential_pos_num();
+           ++tang_pos_num)
+        segment[axial_pos_num][view_num][tang_pos_num]
+            = 10.F + std::cos(2 * in_proj_data_info_sptr->get_phi(Bin(0, view_num, axial_pos_num, tang_pos_num))) * axial_pos_num
+              + std::exp(-square(tang_pos_num / 10.F));
+  in_proj_data.set_segment(segment);
+
+  for (int spline = 0; spline <= 1; ++spline)
+    {
+      BasicCoordinate<3, BSpline::BSplineType> spline_types;
+      spline_types.fill(spline == 0 ? BSpline::linear : BSpline::cubic);
+      const ProjDataInterpolator interpolator(
+          out_proj_data_info_sptr, in_proj_data_info_sptr, spline_types, /* remove_interleaving */ false);
+      ProjDataInMemory out_proj_data(exam_info_sptr, out_proj_data_info_sptr);
+      interpolator.interpolate(out_proj_data, in_proj_data);
+      const SegmentBySinogram<float> out_segment = out_proj_data.get_segment_by_sinogram(0);
+
+      // reference: B-splines on the (extended) input segment, evaluated at the position of every output bin
+      const BSpline::BSplinesRegularGrid<3, float, float> bsplines(extend_segment(segment, 5, 5, 5), spline_types);
+      const Bin in_origin(0, 0, 0, 0);
+      const float in_m0 = in_proj_data_info_sptr->get_m(in_origin);
+      const float in_phi0 = in_proj_data_info_sptr->get_phi(in_origin);
+      const float in_s0 = in_proj_data_info_sptr->get_s(in_origin);
+      const float in_sampling_m = in_proj_data_info_sptr->get_sampling_in_m(in_origin);
+      const float in_sampling_phi = in_proj_data_info_sptr->get_phi(Bin(0, 1, 0, 0)) - in_phi0;
+      const float in_sampling_s = in_proj_data_info_sptr->get_sampling_in_s(in_origin);
+      float max_diff = 0.F;
+      for (int axial_pos_num = out_segment.get_min_axial_pos_num(); axial_pos_num <= out_segment.get_max_axial_pos_num();
+           ++axial_pos_num)
+        for (int view_num = out_segment.get_min_view_num(); view_num <= out_segment.get_max_view_num(); ++view_num)
+          for (int tang_pos_num = out_segment.get_min_tangential_pos_num();
+               tang_pos_num <= out_segment.get_max_tangential_pos_num();
+               ++tang_pos_num)
+            {
+              const Bin bin(0, view_num, axial_pos_num, tang_pos_num);
+              BasicCoordinate<3, BSpline::pos_type> position;
+              position[1] = (out_proj_data_info_sptr->get_m(bin) - in_m0) / in_sampling_m;
+              position[2] = (out_proj_data_info_sptr->get_phi(bin) - in_phi0) / in_sampling_phi;
+              position[3] = (out_proj_data_info_sptr->get_s(bin) - in_s0) / in_sampling_s;
+              max_diff = std::max(max_diff, std::abs(out_segment[axial_pos_num][view_num][tang_pos_num] - bsplines(position)));
+            }
+      check_if_less(max_diff,
+                    1e-4F * out_segment.find_max(),
+                    std::string("ProjDataInterpolator versus BSplinesRegularGrid with ") + (spline == 0 ? "linear" : "cubic")
+                        + " B-splines");
+    }
+}
+
 void
 InterpolationTests::run_tests()
 {
@@ -961,6 +1124,8 @@ InterpolationTests::run_tests()
   scatter_interpolation_test_cyl_asymmetric();
   scatter_interpolation_test_blocks_downsampled();
   transaxial_upsampling_interpolation_test_blocks();
+  projdata_interpolator_test();
+  projdata_interpolator_BSplines_test();
 }
 
 END_NAMESPACE_STIR
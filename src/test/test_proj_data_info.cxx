@@ -107,6 +107,9 @@ protected:
   void run_coordinate_test_for_realistic_scanner();
   void run_Blocks_DOI_test();
   void run_lor_get_s_test();
+  void run_bulk_geometry_test();
+  template <class TProjDataInfo>
+  void test_bulk_geometry(const TProjDataInfo& proj_data_info);
 };
 
 /*! The following is a function to allow a projdata_info blocksONCylindrical to be created from the scanner.
@@ -509,6 +512,38 @@ ProjDataInfoCylindricalTests::test_cylindrical_proj_data_info(ProjDataInfoCylind
         }
   }
 
+  cerr << "\tTest ring pair to segment,ax_pos for all ring pairs\n";
+  {
+    const int num_rings = proj_data_info.get_scanner_ptr()->get_num_rings();
+    for (int ring1 = 0; ring1 < num_rings; ++ring1)
+      for (int ring2 = 0; ring2 < num_rings; ++ring2)
+        {
+          int segment_num = 0, axial_pos_num = 0;
+          int expected_segment_num = 0;
+          const bool expected_found
+              = proj_data_info.get_segment_num_for_ring_difference(expected_segment_num, ring2 - ring1) == Succeeded::yes;
+          const bool found = proj_data_info.get_segment_axial_pos_num_for_ring_pair(segment_num, axial_pos_num, ring1, ring2)
+                             == Succeeded::yes;
+          if (!check_if_equal(found, expected_found, "test if ring pair is found when ring difference is in range"))
+            continue;
+          if (!found)
+            continue;
+          check_if_equal(segment_num, expected_segment_num, "test if segment_num is consistent with ring difference");
+          if (axial_pos_num < proj_data_info.get_min_axial_pos_num(segment_num)
+              || axial_pos_num > proj_data_info.get_max_axial_pos_num(segment_num))
+            continue;
+          const ProjDataInfoCylindrical::RingNumPairs& ring_pairs
+              = proj_data_info.get_all_ring_pairs_for_segment_axial_pos_num(segment_num, axial_pos_num);
+          check(std::find(ring_pairs.begin(), ring_pairs.end(), std::make_pair(ring1, ring2)) != ring_pairs.end(),
+                "test if ring pair is in the list of ring pairs for its segment,ax_pos");
+        }
+    int segment_num = 0, axial_pos_num = 0;
+    check(proj_data_info.get_segment_axial_pos_num_for_ring_pair(segment_num, axial_pos_num, -1, 0) == Succeeded::no,
+          "test if ring pair with negative ring is rejected");
+    check(proj_data_info.get_segment_axial_pos_num_for_ring_pair(segment_num, axial_pos_num, 0, num_rings) == Succeeded::no,
+          "test if ring pair with too large ring is rejected");
+  }
+
   test_generic_proj_data_info(proj_data_info);
 }
 
@@ -1005,6 +1040,98 @@ ProjDataInfoTests::run_lor_get_s_test()
     }
 }
 
+/*! Checks that the functions returning geometrical info for many bins give the same results as
+  the functions for a single bin, and that detection positions round-trip to the same bins.
+*/
+template <class TProjDataInfo>
+void
+ProjDataInfoTests::test_bulk_geometry(const TProjDataInfo& proj_data_info)
+{
+  std::vector<Bin> bins;
+  for (int segment_num = proj_data_info.get_min_segment_num(); segment_num <= proj_data_info.get_max_segment_num(); ++segment_num)
+    for (int view_num = proj_data_info.get_min_view_num(); view_num <= proj_data_info.get_max_view_num(); ++view_num)
+      for (int axial_pos_num = proj_data_info.get_min_axial_pos_num(segment_num);
+           axial_pos_num <= proj_data_info.get_max_axial_pos_num(segment_num);
+           ++axial_pos_num)
+        for (int tangential_pos_num = proj_data_info.get_min_tangential_pos_num();
+             tangential_pos_num <= proj_data_info.get_max_tangential_pos_num();
+             ++tangential_pos_num)
+          bins.push_back(Bin(segment_num, view_num, axial_pos_num, tangential_pos_num, /*bin_value*/ 1.F));
+
+  std::vector<float> s, phi, m, t;
+  std::vector<LORAs2Points<float>> lors;
+  proj_data_info.get_s_for_bins(s, bins);
+  proj_data_info.get_phi_for_bins(phi, bins);
+  proj_data_info.get_m_for_bins(m, bins);
+  proj_data_info.get_t_for_bins(t, bins);
+  proj_data_info.get_LOR_end_points_for_bins(lors, bins);
+  check_if_equal(s.size(), bins.size(), "size of get_s_for_bins");
+  check_if_equal(lors.size(), bins.size(), "size of get_LOR_end_points_for_bins");
+  for (std::size_t i = 0; i < bins.size(); ++i)
+    {
+      const Bin& bin = bins[i];
+      LORInAxialAndNoArcCorrSinogramCoordinates<float> lor;
+      proj_data_info.get_LOR(lor, bin);
+      LORAs2Points<float> lor_as_2_points;
+      lor.get_intersections_with_cylinder(lor_as_2_points, lor.radius());
+      if (!check_if_equal(s[i], proj_data_info.get_s(bin), "get_s_for_bins")
+          || !check_if_equal(phi[i], proj_data_info.get_phi(bin), "get_phi_for_bins")
+          || !check_if_equal(m[i], proj_data_info.get_m(bin), "get_m_for_bins")
+          || !check_if_equal(t[i], proj_data_info.get_t(bin), "get_t_for_bins")
+          || !check_if_equal(lors[i].p1(), lor_as_2_points.p1(), "get_LOR_end_points_for_bins p1")
+          || !check_if_equal(lors[i].p2(), lor_as_2_points.p2(), "get_LOR_end_points_for_bins p2"))
+        {
+          cerr << "Problem at segment = " << bin.segment_num() << ", axial pos " << bin.axial_pos_num()
+               << ", view = " << bin.view_num() << ", tangential_pos_num = " << bin.tangential_pos_num() << "\n";
+          break;
+        }
+    }
+
+  std::vector<DetectionPositionPair<>> det_pos_pairs;
+  std::vector<Bin> new_bins;
+  proj_data_info.get_det_pos_pairs_for_bins(det_pos_pairs, bins);
+  proj_data_info.get_bins_for_det_pos_pairs(new_bins, det_pos_pairs);
+  check_if_equal(new_bins.size(), bins.size(), "size of get_bins_for_det_pos_pairs");
+  for (std::size_t i = 0; i < bins.size(); ++i)
+    {
+      DetectionPositionPair<> det_pos_pair;
+      proj_data_info.get_det_pos_pair_for_bin(det_pos_pair, bins[i]);
+      if (!check(det_pos_pairs[i] == det_pos_pair, "get_det_pos_pairs_for_bins")
+          || !check_if_equal(new_bins[i].get_bin_value(), 1.F, "get_bins_for_det_pos_pairs should find a bin")
+          || !check(new_bins[i] == bins[i],
+                    "get_bins_for_det_pos_pairs should round-trip to the same bin (and set bin value to 1)"))
+        {
+          cerr << "Problem at segment = " << bins[i].segment_num() << ", axial pos " << bins[i].axial_pos_num()
+               << ", view = " << bins[i].view_num() << ", tangential_pos_num = " << bins[i].tangential_pos_num() << "\n";
+          break;
+        }
+    }
+}
+
+void
+ProjDataInfoTests::run_bulk_geometry_test()
+{
+  cerr << "\tTesting geometrical info for many bins at once for ProjDataInfoCylindricalNoArcCorr\n";
+  {
+    shared_ptr<Scanner> scanner_sptr(new Scanner(Scanner::E953));
+    auto proj_data_info_sptr = ProjDataInfo::construct_proj_data_info(scanner_sptr,
+                                                                      /*span*/ 1,
+                                                                      scanner_sptr->get_num_rings() - 1,
+                                                                      /*views*/ scanner_sptr->get_num_detectors_per_ring() / 2,
+                                                                      /*tang_pos*/ 64,
+                                                                      /*arc_corrected*/ false);
+    test_bulk_geometry(dynamic_cast<const ProjDataInfoCylindricalNoArcCorr&>(*proj_data_info_sptr));
+  }
+  cerr << "\tTesting geometrical info for many bins at once for ProjDataInfoBlocksOnCylindricalNoArcCorr\n";
+  {
+    auto scanner_sptr = std::make_shared<Scanner>(Scanner::SAFIRDualRingPrototype);
+    scanner_sptr->set_scanner_geometry("BlocksOnCylindrical");
+    scanner_sptr->set_up();
+    auto proj_data_info_sptr = set_blocks_projdata_info<ProjDataInfoBlocksOnCylindricalNoArcCorr>(scanner_sptr);
+    test_bulk_geometry(*proj_data_info_sptr);
+  }
+}
+
 /*!
   \ingroup test
   \brief Test class for ProjDataInfoCylindricalArcCorr
@@ -1029,6 +1156,7 @@ ProjDataInfoCylindricalArcCorrTests::run_tests()
   run_lor_get_s_test();
   run_coordinate_test();
   run_coordinate_test_for_realistic_scanner();
+  run_bulk_geometry_test();
 
   cerr << "-------- Testing ProjDataInfoCylindricalArcCorr --------\n";
   {
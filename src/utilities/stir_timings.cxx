@@ -35,6 +35,8 @@
 #include "stir/recon_buildblock/ProjMatrixByBinUsingRayTracing.h"
 #include "stir/recon_buildblock/PoissonLogLikelihoodWithLinearModelForMeanAndProjData.h"
 #include "stir/recon_buildblock/RelativeDifferencePrior.h"
+#include "stir/analytic/FBP2D/FBP2DReconstruction.h"
+#include "stir/analytic/FBP3DRP/FBP3DRPReconstruction.h"
 #ifdef STIR_WITH_CUDA
 #  include "stir/recon_buildblock/CUDA/CudaRelativeDifferencePrior.h"
 #endif
@@ -46,6 +48,7 @@
 #include "stir/Verbosity.h"
 #include <iostream>
 #include <cstdlib>
+#include <cstdio>
 #include <iomanip>
 #include <chrono>
 #include <thread>
@@ -54,10 +57,12 @@ static void
 print_usage_and_exit()
 {
   std::cerr << "\nUsage:\nstir_timings [--name some_string] [--threads num_threads] [--runs num_runs]\\\n"
-            << "\t[--skip-BB 1] [--skip-PP 1] [--skip-PMRT 1] [--skip-priors 1]\\\n"
+            << "\t[--skip-BB 1] [--skip-PP 1] [--skip-PMRT 1] [--skip-priors 1] [--skip-FBP 1]\\\n"
             << "\t[--image image_filename]\\\n"
             << "\t--template-projdata template_proj_data_filename\n\n"
-            << "skip BB: basic building blocks; PP: Parallelproj; PMRT: ray-tracing matrix; priors: prior timing\n\n"
+            << "skip BB: basic building blocks; PP: Parallelproj; PMRT: ray-tracing matrix; priors: prior timing;\n"
+            << "FBP: analytic reconstructions (FBP3DRP needs cylindrical projection data)\n\n"
+            << "To check scaling with the number of threads, run multiple times with different --threads.\n\n"
             << "Timings are reported to stdout as:\n"
             << "name\ttiming_name\tCPU_time_in_ms\twall-clock_time_in_ms\n";
   std::exit(EXIT_FAILURE);
@@ -77,6 +82,7 @@ public:
   bool skip_PMRT;   //! skip ProjMatrixByBinUsingRayTracing
   bool skip_PP;     //! skip Parallelproj
   bool skip_priors; //! skip GeneralisedPrior
+  bool skip_FBP;    //! skip FBP2D and FBP3DRP
   // variables used for running timings
   shared_ptr<VoxelsOnCartesianGrid<float>> image_sptr;
   shared_ptr<ProjData> output_proj_data_sptr;
@@ -94,6 +100,8 @@ public:
   shared_ptr<PoissonLogLikelihoodWithLinearModelForMeanAndProjData<DiscretisedDensity<3, float>>> objective_function_sptr;
 
   shared_ptr<GeneralisedPrior<DiscretisedDensity<3, float>>> prior_sptr;
+  shared_ptr<Reconstruction<DiscretisedDensity<3, float>>> analytic_recon_sptr;
+  shared_ptr<DiscretisedDensity<3, float>> analytic_target_sptr;
   // basic methods
   Timings(const std::string& image_filename, const std::string& template_proj_data_filename)
   {
@@ -262,6 +270,19 @@ public:
     delete im;
   }
 
+  void prior_Hessian_times_input()
+  {
+    auto im = this->image_sptr->get_empty_copy();
+    this->prior_sptr->accumulate_Hessian_times_input(*im, *this->image_sptr, *this->image_sptr);
+    delete im;
+  }
+
+  void analytic_reconstruct()
+  {
+    if (this->analytic_recon_sptr->reconstruct(this->analytic_target_sptr) != Succeeded::yes)
+      error("stir_timings: reconstruction failed");
+  }
+
   void prior_value()
   {
     auto im = this->image_sptr->clone();
@@ -356,6 +377,7 @@ Timings::run_all(const unsigned runs)
         this->prior_sptr->set_up(this->image_sptr);
         this->run_it(&Timings::prior_value, "RDP_value", runs * 10);
         this->run_it(&Timings::prior_grad, "RDP_grad", runs * 10);
+        this->run_it(&Timings::prior_Hessian_times_input, "RDP_Hessian_times_input", runs * 10);
         this->prior_sptr = nullptr;
       }
 #ifdef STIR_WITH_CUDA
@@ -368,6 +390,35 @@ Timings::run_all(const unsigned runs)
       }
 #endif
     }
+
+  if (!skip_FBP)
+    {
+      this->mem_proj_data_sptr->fill(1.F);
+      this->analytic_target_sptr.reset(this->image_sptr->get_empty_copy());
+      {
+        auto recon_sptr = std::make_shared<FBP2DReconstruction>(this->mem_proj_data_sptr);
+        recon_sptr->set_disable_output(true);
+        recon_sptr->set_up(this->analytic_target_sptr);
+        this->analytic_recon_sptr = recon_sptr;
+        this->run_it(&Timings::analytic_reconstruct, "FBP2D_reconstruct", runs);
+      }
+      if (dynamic_cast<const ProjDataInfoCylindrical*>(this->mem_proj_data_sptr->get_proj_data_info_sptr().get()))
+        {
+          // note: FBP3DRP writes log files, even when output is disabled, so we remove them afterwards
+          const std::string prefix = "my_timings_FBP3DRP";
+          auto recon_sptr = std::make_shared<FBP3DRPReconstruction>();
+          recon_sptr->set_input_data(this->mem_proj_data_sptr);
+          recon_sptr->set_output_filename_prefix(prefix);
+          recon_sptr->set_disable_output(true);
+          recon_sptr->set_up(this->analytic_target_sptr);
+          this->analytic_recon_sptr = recon_sptr;
+          this->run_it(&Timings::analytic_reconstruct, "FBP3DRP_reconstruct", runs);
+          std::remove((prefix + ".full_log").c_str());
+          std::remove((prefix + ".log").c_str());
+        }
+      this->analytic_recon_sptr = nullptr;
+      this->analytic_target_sptr = nullptr;
+    }
 }
 
 void
@@ -452,6 +503,7 @@ main(int argc, char** argv)
   bool skip_PMRT = false;
   bool skip_PP = false;
   bool skip_priors = false;
+  bool skip_FBP = false;
   // prefix output with this string
   std::string name;
 
@@ -477,6 +529,8 @@ main(int argc, char** argv)
         skip_PP = std::atoi(argv[1]) != 0;
       else if (!strcmp(argv[0], "--skip-priors"))
         skip_priors = std::atoi(argv[1]) != 0;
+      else if (!strcmp(argv[0], "--skip-FBP"))
+        skip_FBP = std::atoi(argv[1]) != 0;
       else
         print_usage_and_exit();
       argv += 2;
@@ -495,6 +549,7 @@ main(int argc, char** argv)
   timings.skip_PMRT = skip_PMRT;
   timings.skip_PP = skip_PP;
   timings.skip_priors = skip_priors;
+  timings.skip_FBP = skip_FBP;
 
   timings.run_all(num_runs);
   return EXIT_SUCCESS;
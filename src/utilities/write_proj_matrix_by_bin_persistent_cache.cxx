@@ -0,0 +1,98 @@
+//
+//
+
+/*!
+  \file
+  \ingroup utilities
+
+  \brief Program that computes a projection matrix by bin and writes its persistent cache
+
+  \par Usage
+  \verbatim
+  write_proj_matrix_by_bin_persistent_cache proj_data_file projmatrixbybin-parfile template-image
+  \endverbatim
+  The parameter file has to set the <tt>persistent cache directory</tt> keyword, e.g.
+  \verbatim
+  ProjMatrixByBin parameters :=
+    type := Ray Tracing
+    Ray tracing matrix parameters :=
+      persistent cache directory := /path/to/cache
+    End Ray tracing matrix parameters :=
+  END :=
+  \endverbatim
+  The whole matrix is computed (using multiple threads if STIR was compiled with OpenMP),
+  and written to the persistent cache directory, see stir::ProjMatrixByBin. Later set-ups of the
+  same matrix with the same projection data and image geometry will then use this file.
+
+  \author Kris Thielemans
+
+*/
+/*
+    Copyright (C) 2026, University College London
+    This file is part of STIR.
+
+    SPDX-License-Identifier: Apache-2.0
+
+    See STIR/LICENSE.txt for details
+*/
+
+#include "stir/recon_buildblock/ProjMatrixByBin.h"
+#include "stir/KeyParser.h"
+#include "stir/ProjDataInfo.h"
+#include "stir/ProjData.h"
+#include "stir/DiscretisedDensity.h"
+#include "stir/Succeeded.h"
+#include "stir/is_null_ptr.h"
+#include "stir/IO/read_from_file.h"
+#include "stir/FilePath.h"
+#include "stir/info.h"
+#include "stir/warning.h"
+#include <iostream>
+
+using std::cerr;
+
+int
+main(int argc, char** argv)
+{
+  USING_NAMESPACE_STIR
+  if (argc != 4)
+    {
+      cerr << "Usage: " << argv[0] << " \\\n"
+           << "\tproj_data_file projmatrixbybin-parfile template-image\n";
+      exit(EXIT_FAILURE);
+    }
+
+  shared_ptr<ProjData> proj_data_sptr = ProjData::read_from_file(argv[1]);
+  shared_ptr<ProjDataInfo> proj_data_info_sptr = proj_data_sptr->get_proj_data_info_sptr()->create_shared_clone();
+
+  shared_ptr<ProjMatrixByBin> proj_matrix_sptr;
+  {
+    KeyParser parser;
+    parser.add_start_key("ProjMatrixByBin parameters");
+    parser.add_parsing_key("type", &proj_matrix_sptr);
+    parser.add_stop_key("END");
+    if (!parser.parse(argv[2]) || is_null_ptr(proj_matrix_sptr))
+      {
+        warning("Error parsing the ProjMatrixByBin parameters in " + std::string(argv[2]));
+        exit(EXIT_FAILURE);
+      }
+  }
+  if (proj_matrix_sptr->get_persistent_cache_directory().empty())
+    {
+      warning("The ProjMatrixByBin parameters need to set the \"persistent cache directory\"");
+      exit(EXIT_FAILURE);
+    }
+
+  shared_ptr<DiscretisedDensity<3, float>> image_sptr(read_from_file<DiscretisedDensity<3, float>>(argv[3]));
+
+  proj_matrix_sptr->set_up(proj_data_info_sptr, image_sptr);
+  const std::string filename = proj_matrix_sptr->get_persistent_cache_filename();
+  if (FilePath::exists(filename))
+    {
+      info("Persistent cache " + filename + " exists already. Nothing to do.");
+      return EXIT_SUCCESS;
+    }
+  proj_matrix_sptr->precompute();
+
+  return proj_matrix_sptr->write_persistent_cache() == Succeeded::yes ? EXIT_SUCCESS : EXIT_FAILURE;
+}